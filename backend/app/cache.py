@@ -4,10 +4,15 @@
 """
 
 import asyncio
+import fnmatch
+import heapq
 import json
 import pickle
 import hashlib
-from typing import Any, Optional, Dict, List, Union, Callable
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Dict, List, Tuple, Union, Callable
 from datetime import datetime, timedelta
 from functools import wraps
 import logging
@@ -40,135 +45,204 @@ class CacheSerializer:
             raise
 
 
+class _MemoryEntry:
+    """Запись in-memory кэша"""
+
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
 class MemoryCache:
-    """In-memory кэш с TTL"""
-    
-    def __init__(self, max_size: int = 1000):
+    """In-memory кэш с TTL
+
+    LRU-порядок хранится в OrderedDict (O(1) на попадание, вставку и вытеснение),
+    а истечение срока отслеживается min-heap по времени истечения: истекшие
+    записи снимаются с вершины кучи амортизированно, без полного обхода кэша.
+    Помимо числа записей кэш может ограничиваться суммарным размером в байтах.
+    """
+
+    def __init__(self, max_size: int = 1000, max_bytes: Optional[int] = None):
         self.max_size = max_size
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._access_order: List[str] = []
-    
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._current_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
     def _get_cache_key(self, key: str) -> str:
         """Генерация ключа кэша"""
         return f"memory:{key}"
-    
-    def _is_expired(self, item: Dict[str, Any]) -> bool:
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """Оценка размера значения в байтах"""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return len(value)
+        if hasattr(value, "nbytes"):
+            # numpy массивы (например, эмбеддинги float32)
+            return int(value.nbytes)
+        if isinstance(value, str):
+            return len(value.encode("utf-8"))
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return sys.getsizeof(value)
+
+    def _is_expired(self, entry: _MemoryEntry, now: Optional[float] = None) -> bool:
         """Проверка истечения срока действия"""
-        if 'expires_at' not in item:
-            return False
-        return datetime.utcnow() > item['expires_at']
-    
+        if now is None:
+            now = time.monotonic()
+        return now >= entry.expires_at
+
+    def _remove_item(self, key: str) -> Optional[_MemoryEntry]:
+        """Удаление элемента из кэша
+
+        Запись в куче истечения не трогаем: она станет «устаревшей»
+        и будет отброшена при следующем проходе _cleanup_expired.
+        """
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._current_bytes -= entry.size
+        return entry
+
     def _cleanup_expired(self):
-        """Очистка истекших элементов"""
-        expired_keys = [
-            key for key, item in self._cache.items()
-            if self._is_expired(item)
-        ]
-        for key in expired_keys:
-            self._remove_item(key)
-    
-    def _remove_item(self, key: str):
-        """Удаление элемента из кэша"""
-        if key in self._cache:
-            del self._cache[key]
-        if key in self._access_order:
-            self._access_order.remove(key)
-    
-    def _update_access_order(self, key: str):
-        """Обновление порядка доступа (LRU)"""
-        if key in self._access_order:
-            self._access_order.remove(key)
-        self._access_order.append(key)
-    
-    def _evict_if_needed(self):
+        """Очистка истекших элементов (амортизированно по куче истечения)"""
+        heap = self._expiry_heap
+        now = time.monotonic()
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._cache.get(key)
+            # Пропускаем устаревшие записи кучи (ключ перезаписан или удален)
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove_item(key)
+                self._stats["expirations"] += 1
+        self._compact_heap()
+
+    def _compact_heap(self):
+        """Перестроение кучи, если в ней накопилось много устаревших записей"""
+        if len(self._expiry_heap) > 2 * len(self._cache) + 64:
+            self._expiry_heap = [
+                (entry.expires_at, key) for key, entry in self._cache.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+
+    def _evict_if_needed(self, incoming_size: int = 0):
         """Вытеснение элементов при превышении размера"""
-        while len(self._cache) >= self.max_size and self._access_order:
-            oldest_key = self._access_order.pop(0)
-            if oldest_key in self._cache:
-                del self._cache[oldest_key]
-    
+        while self._cache and (
+            len(self._cache) >= self.max_size
+            or (
+                self.max_bytes is not None
+                and self._current_bytes + incoming_size > self.max_bytes
+            )
+        ):
+            _, entry = self._cache.popitem(last=False)
+            self._current_bytes -= entry.size
+            self._stats["evictions"] += 1
+
     async def get(self, key: str) -> Optional[Any]:
         """Получение значения из кэша"""
         cache_key = self._get_cache_key(key)
-        
-        # Очистка истекших элементов
-        self._cleanup_expired()
-        
-        if cache_key in self._cache:
-            item = self._cache[cache_key]
-            if not self._is_expired(item):
-                self._update_access_order(cache_key)
-                return item['value']
-            else:
-                self._remove_item(cache_key)
-        
+
+        entry = self._cache.get(cache_key)
+        if entry is not None:
+            if not self._is_expired(entry):
+                self._cache.move_to_end(cache_key)
+                self._stats["hits"] += 1
+                return entry.value
+            self._remove_item(cache_key)
+            self._stats["expirations"] += 1
+
+        self._stats["misses"] += 1
         return None
-    
+
     async def set(self, key: str, value: Any, ttl: int = 3600) -> bool:
         """Установка значения в кэш"""
         cache_key = self._get_cache_key(key)
-        
+
         # Очистка истекших элементов
         self._cleanup_expired()
-        
+
+        size = self._estimate_size(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            logger.warning(f"Value for key {key} exceeds memory cache byte limit")
+            self._remove_item(cache_key)
+            return False
+
+        # Перезапись существующего ключа не должна вытеснять соседей
+        self._remove_item(cache_key)
+
         # Вытеснение при необходимости
-        self._evict_if_needed()
-        
+        self._evict_if_needed(size)
+
         # Установка значения
-        expires_at = datetime.utcnow() + timedelta(seconds=ttl)
-        self._cache[cache_key] = {
-            'value': value,
-            'expires_at': expires_at,
-            'created_at': datetime.utcnow()
-        }
-        self._update_access_order(cache_key)
-        
+        expires_at = time.monotonic() + ttl
+        self._cache[cache_key] = _MemoryEntry(value, expires_at, size)
+        self._current_bytes += size
+        heapq.heappush(self._expiry_heap, (expires_at, cache_key))
+
         return True
-    
+
     async def delete(self, key: str) -> bool:
         """Удаление значения из кэша"""
         cache_key = self._get_cache_key(key)
-        if cache_key in self._cache:
-            self._remove_item(cache_key)
-            return True
-        return False
-    
+        return self._remove_item(cache_key) is not None
+
     async def clear(self) -> bool:
         """Очистка всего кэша"""
         self._cache.clear()
-        self._access_order.clear()
+        self._expiry_heap.clear()
+        self._current_bytes = 0
         return True
-    
+
     async def exists(self, key: str) -> bool:
         """Проверка существования ключа"""
         cache_key = self._get_cache_key(key)
-        self._cleanup_expired()
-        return cache_key in self._cache and not self._is_expired(self._cache[cache_key])
-    
+        entry = self._cache.get(cache_key)
+        return entry is not None and not self._is_expired(entry)
+
     async def ttl(self, key: str) -> int:
         """Получение оставшегося времени жизни"""
         cache_key = self._get_cache_key(key)
-        if cache_key in self._cache:
-            item = self._cache[cache_key]
-            if not self._is_expired(item):
-                remaining = (item['expires_at'] - datetime.utcnow()).total_seconds()
-                return max(0, int(remaining))
+        entry = self._cache.get(cache_key)
+        if entry is not None and not self._is_expired(entry):
+            remaining = entry.expires_at - time.monotonic()
+            return max(0, int(remaining))
         return -1
-    
+
     async def keys(self, pattern: str = "*") -> List[str]:
-        """Получение ключей по паттерну"""
+        """Получение ключей по паттерну (glob, как в Redis KEYS)"""
         self._cleanup_expired()
-        # Простая реализация паттерна
+        keys = [key[len("memory:"):] for key in self._cache.keys()]
         if pattern == "*":
-            return [key.replace("memory:", "") for key in self._cache.keys()]
-        return [key.replace("memory:", "") for key in self._cache.keys() if pattern in key]
+            return keys
+        return [key for key in keys if fnmatch.fnmatchcase(key, pattern)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика in-memory кэша"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "size": len(self._cache),
+            "max_size": self.max_size,
+            "bytes": self._current_bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+        }
 
 
 class RedisCache:
     """Redis кэш"""
     
-    def __init__(self, redis_url: str = "redis://redis:6379"):
+    def __init__(self, redis_url: str = "redis://redis:6379", scan_count: int = 1000):
         self.redis_url = redis_url
+        self.scan_count = scan_count
         self._client: Optional[redis.Redis] = None
     
     async def _get_client(self) -> redis.Redis:
@@ -223,11 +297,16 @@ class RedisCache:
         """Очистка всего кэша"""
         try:
             client = await self._get_client()
-            # Удаляем только ключи нашего приложения
+            # Удаляем только ключи нашего приложения: SCAN курсором и пакетный UNLINK
             pattern = self._get_cache_key("*")
-            keys = await client.keys(pattern)
-            if keys:
-                await client.delete(*keys)
+            batch: List[bytes] = []
+            async for key in client.scan_iter(match=pattern, count=self.scan_count):
+                batch.append(key)
+                if len(batch) >= self.scan_count:
+                    await client.unlink(*batch)
+                    batch = []
+            if batch:
+                await client.unlink(*batch)
             return True
         except Exception as e:
             logger.error(f"Redis clear error: {e}")
@@ -258,12 +337,56 @@ class RedisCache:
         try:
             client = await self._get_client()
             cache_pattern = self._get_cache_key(pattern)
-            keys = await client.keys(cache_pattern)
-            return [key.decode().replace("redis:", "") for key in keys]
+            return [
+                key.decode().replace("redis:", "", 1)
+                async for key in client.scan_iter(match=cache_pattern, count=self.scan_count)
+            ]
         except Exception as e:
             logger.error(f"Redis keys error: {e}")
             return []
     
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Получение нескольких значений одним MGET"""
+        if not keys:
+            return {}
+        try:
+            client = await self._get_client()
+            values = await client.mget([self._get_cache_key(key) for key in keys])
+            return {
+                key: CacheSerializer.deserialize(data)
+                for key, data in zip(keys, values)
+                if data is not None
+            }
+        except Exception as e:
+            logger.error(f"Redis mget error: {e}")
+            return {}
+    
+    async def set_many(self, items: Dict[str, Any], ttl: int = 3600) -> bool:
+        """Установка нескольких значений одним pipeline (SET EX на каждый ключ)"""
+        if not items:
+            return True
+        try:
+            client = await self._get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(self._get_cache_key(key), CacheSerializer.serialize(value), ex=ttl)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis pipeline set error: {e}")
+            return False
+    
+    async def delete_many(self, keys: List[str]) -> int:
+        """Удаление нескольких ключей одним UNLINK"""
+        if not keys:
+            return 0
+        try:
+            client = await self._get_client()
+            return await client.unlink(*[self._get_cache_key(key) for key in keys])
+        except Exception as e:
+            logger.error(f"Redis unlink error: {e}")
+            return 0
+    
     async def close(self):
         """Закрытие соединения с Redis"""
         if self._client:
@@ -415,7 +538,10 @@ class CacheManager:
     """Универсальный менеджер кэша с поддержкой RAG"""
     
     def __init__(self):
-        self.memory_cache = MemoryCache()
+        self.memory_cache = MemoryCache(
+            max_size=settings.cache.max_size,
+            max_bytes=settings.cache.max_memory_bytes,
+        )
         self.redis_cache = RedisCache()
         self.rag_cache = RAGCache()  # Новый RAG-специфичный кэш
         
@@ -454,6 +580,42 @@ class CacheManager:
         
         return success
     
+    async def get_many(self, keys: List[str], use_redis: bool = True) -> Dict[str, Any]:
+        """Получение нескольких значений: memory cache, затем один MGET в Redis"""
+        result: Dict[str, Any] = {}
+        
+        if settings.cache.enable_memory:
+            for key in keys:
+                value = await self.memory_cache.get(key)
+                if value is not None:
+                    result[key] = value
+        
+        missing = [key for key in keys if key not in result]
+        if missing and use_redis and self.redis_cache and settings.cache.enable_redis:
+            redis_values = await self.redis_cache.get_many(missing)
+            if settings.cache.enable_memory:
+                for key, value in redis_values.items():
+                    await self.memory_cache.set(key, value, settings.cache.default_ttl)
+            result.update(redis_values)
+        
+        return result
+    
+    async def set_many(self, items: Dict[str, Any], ttl: int = None, use_redis: bool = True) -> bool:
+        """Установка нескольких значений: memory cache и один pipeline в Redis"""
+        if ttl is None:
+            ttl = settings.cache.default_ttl
+        
+        success = True
+        
+        if settings.cache.enable_memory:
+            for key, value in items.items():
+                success &= await self.memory_cache.set(key, value, ttl)
+        
+        if use_redis and self.redis_cache and settings.cache.enable_redis:
+            success &= await self.redis_cache.set_many(items, ttl)
+        
+        return success
+    
     async def delete(self, key: str, use_redis: bool = True) -> bool:
         """Удаление значения из кэша"""
         success = True
@@ -468,6 +630,17 @@ class CacheManager:
         
         return success
     
+    async def delete_many(self, keys: List[str], use_redis: bool = True) -> bool:
+        """Удаление нескольких ключей: memory cache и один UNLINK в Redis"""
+        if settings.cache.enable_memory:
+            for key in keys:
+                await self.memory_cache.delete(key)
+        
+        if keys and use_redis and self.redis_cache and settings.cache.enable_redis:
+            await self.redis_cache.delete_many(keys)
+        
+        return True
+    
     async def clear(self, use_redis: bool = True) -> bool:
         """Очистка всего кэша"""
         success = True
@@ -598,8 +771,7 @@ def invalidate_cache(pattern: str = "*", use_redis: bool = True):
             
             # Инвалидация кэша
             keys = await cache_manager.keys(pattern, use_redis)
-            for key in keys:
-                await cache_manager.delete(key, use_redis)
+            await cache_manager.delete_many(keys, use_redis)
             
             return result
         return wrapper
@@ -638,10 +810,7 @@ class SEOCache:
         """Инвалидация всех данных домена"""
         pattern = f"{self.prefix}:*:{domain}"
         keys = await cache_manager.keys(pattern)
-        success = True
-        for key in keys:
-            success &= await cache_manager.delete(key)
-        return success
+        return await cache_manager.delete_many(keys)
 
 
 class UserCache:
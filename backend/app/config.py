@@ -139,6 +139,7 @@ class CacheSettings(BaseSettings):
     """Настройки кэширования"""
     default_ttl: int = Field(default=3600, env="CACHE_DEFAULT_TTL")
     max_size: int = Field(default=1000, env="CACHE_MAX_SIZE")
+    max_memory_bytes: Optional[int] = Field(default=64 * 1024 * 1024, env="CACHE_MAX_MEMORY_BYTES")
     enable_redis: bool = Field(default=True, env="CACHE_ENABLE_REDIS")
     enable_memory: bool = Field(default=True, env="CACHE_ENABLE_MEMORY")
 
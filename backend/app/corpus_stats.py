@@ -0,0 +1,275 @@
+"""
+Инкрементальная статистика терминов по статьям и доменам
+"""
+
+import asyncio
+import heapq
+import logging
+import re
+from collections import Counter
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Domain, DomainTermStats, PostTermStats, WordPressPost, utc_now
+
+logger = logging.getLogger(__name__)
+
+# Только буквенные токены (аналог word.isalpha() после word_tokenize)
+TERM_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+BACKFILL_BATCH_SIZE = 500
+
+_stop_words: Optional[frozenset] = None
+
+
+def get_stop_words() -> frozenset:
+    """Русские стоп-слова NLTK (пустое множество, если данные недоступны)"""
+    global _stop_words
+    if _stop_words is None:
+        try:
+            from nltk.corpus import stopwords
+            _stop_words = frozenset(stopwords.words('russian'))
+        except (ImportError, LookupError) as e:
+            logger.warning(f"Стоп-слова NLTK недоступны: {e}")
+            _stop_words = frozenset()
+    return _stop_words
+
+
+def compute_post_stats(content: str) -> Dict[str, Any]:
+    """Частоты терминов и размеры текста статьи"""
+    content = content or ''
+    stop_words = get_stop_words()
+    terms = Counter(
+        term for term in TERM_RE.findall(content.lower())
+        if term not in stop_words
+    )
+    return {
+        'term_counts': dict(terms),
+        'total_terms': sum(terms.values()),
+        'word_count': len(content.split()),
+        'content_length': len(content),
+    }
+
+
+def top_terms(term_counts: Mapping[str, int], k: int) -> List[Tuple[str, int]]:
+    """Top-k терминов по частоте (heap, без полной сортировки)"""
+    return heapq.nlargest(k, term_counts.items(), key=lambda item: item[1])
+
+
+class TermAggregate:
+    """Сумма частот терминов с поддержкой вычитания"""
+
+    def __init__(self, term_counts: Optional[Mapping[str, int]] = None, total_terms: int = 0, posts_count: int = 0):
+        self.counts: Counter = Counter(term_counts or {})
+        self.total_terms = total_terms
+        self.posts_count = posts_count
+
+    def add(self, stats: Mapping[str, Any]):
+        self.counts.update(stats['term_counts'])
+        self.total_terms += stats['total_terms']
+        self.posts_count += 1
+
+    def subtract(self, stats: Mapping[str, Any]):
+        counts = self.counts
+        for term, count in stats['term_counts'].items():
+            remaining = counts.get(term, 0) - count
+            if remaining > 0:
+                counts[term] = remaining
+            else:
+                counts.pop(term, None)
+        self.total_terms -= stats['total_terms']
+        self.posts_count -= 1
+
+    @property
+    def unique_terms(self) -> int:
+        return len(self.counts)
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return top_terms(self.counts, k)
+
+
+def _stats_dict(row: PostTermStats) -> Dict[str, Any]:
+    return {'term_counts': row.term_counts or {}, 'total_terms': row.total_terms or 0}
+
+
+class DomainTermStatsUpdater:
+    """Инкрементальное обновление PostTermStats и DomainTermStats при синхронизации статей
+
+    PostTermStats пишутся вместе со статьями, а изменения агрегата домена
+    копятся в памяти как разность и применяются один раз в save() под
+    блокировкой строки (SELECT ... FOR UPDATE): JSON агрегата
+    перезаписывается один раз за синхронизацию, и параллельные
+    синхронизации домена не затирают изменения друг друга.
+
+    Если агрегат домена еще не построен (статьи проиндексированы до
+    появления статистики), он строится лениво в ensure_domain_term_stats.
+    """
+
+    def __init__(self, db: AsyncSession, domain_id: int):
+        self.db = db
+        self.domain_id = domain_id
+        self.tracking = False
+        self.aggregate_exists = False
+        self._reset_delta()
+
+    def _reset_delta(self):
+        self.delta_counts: Counter = Counter()
+        self.delta_total_terms = 0
+        self.delta_posts = 0
+
+    def _add(self, stats: Mapping[str, Any], sign: int = 1):
+        for term, count in stats['term_counts'].items():
+            self.delta_counts[term] += sign * count
+        self.delta_total_terms += sign * stats['total_terms']
+        self.delta_posts += sign
+
+    @property
+    def has_changes(self) -> bool:
+        return self.delta_posts != 0 or self.delta_total_terms != 0 or any(self.delta_counts.values())
+
+    async def load(self, has_posts: bool):
+        exists = await self.db.scalar(
+            select(DomainTermStats.domain_id).where(DomainTermStats.domain_id == self.domain_id)
+        )
+        self.aggregate_exists = exists is not None
+        self.tracking = self.aggregate_exists or not has_posts
+
+    def add_new(self, post: WordPressPost, stats: Dict[str, Any]):
+        """Статистика новой статьи (строка создается вместе со статьей)"""
+        self.db.add(PostTermStats(post=post, domain_id=self.domain_id, **stats))
+        if self.tracking:
+            self._add(stats)
+
+    async def replace(self, post_id: int, stats: Dict[str, Any]):
+        """Статистика измененной статьи"""
+        row = await self.db.get(PostTermStats, post_id)
+        if row is None:
+            row = PostTermStats(post_id=post_id, domain_id=self.domain_id)
+            self.db.add(row)
+        elif self.tracking:
+            self._add(_stats_dict(row), -1)
+        for key, value in stats.items():
+            setattr(row, key, value)
+        if self.tracking:
+            self._add(stats)
+
+    async def remove(self, post_ids: List[int]):
+        """Удаление статистики удаленных статей"""
+        if self.tracking:
+            rows = await self.db.execute(
+                select(PostTermStats.term_counts, PostTermStats.total_terms)
+                .where(PostTermStats.post_id.in_(post_ids))
+            )
+            for term_counts, total_terms in rows:
+                self._add({'term_counts': term_counts or {}, 'total_terms': total_terms or 0}, -1)
+        await self.db.execute(delete(PostTermStats).where(PostTermStats.post_id.in_(post_ids)))
+
+    async def save(self):
+        """Применение накопленной разности к агрегату домена (один раз за синхронизацию)"""
+        if not self.tracking or not self.has_changes:
+            return
+        row = await self.db.scalar(
+            select(DomainTermStats)
+            .where(DomainTermStats.domain_id == self.domain_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        if row is None and not self.aggregate_exists:
+            # Первая синхронизация домена без статей создает агрегат
+            row = DomainTermStats(domain_id=self.domain_id, term_counts={}, total_terms=0, posts_count=0)
+            self.db.add(row)
+        elif row is None:
+            # Агрегат удален во время синхронизации (invalidate другой
+            # синхронизации): разность без базы дала бы неверный агрегат,
+            # он будет пересчитан в ensure_domain_term_stats
+            logger.info(f"Агрегат терминов домена {self.domain_id} удален, разность синхронизации не применяется")
+            self._reset_delta()
+            self.tracking = False
+            return
+        counts = Counter(row.term_counts or {})
+        for term, count in self.delta_counts.items():
+            remaining = counts.get(term, 0) + count
+            if remaining > 0:
+                counts[term] = remaining
+            else:
+                counts.pop(term, None)
+        row.term_counts = dict(counts)
+        row.total_terms = (row.total_terms or 0) + self.delta_total_terms
+        row.posts_count = (row.posts_count or 0) + self.delta_posts
+        row.updated_at = utc_now()
+        self._reset_delta()
+
+    async def invalidate(self):
+        """Сброс агрегата после прерванной синхронизации
+
+        Статьи прошедших пакетов уже зафиксированы, а разность агрегата
+        потеряна; без строки агрегат будет пересчитан по PostTermStats
+        в ensure_domain_term_stats.
+        """
+        self._reset_delta()
+        self.tracking = False
+        await self.db.rollback()
+        await self.db.execute(delete(DomainTermStats).where(DomainTermStats.domain_id == self.domain_id))
+        await self.db.commit()
+
+
+async def ensure_domain_term_stats(db: AsyncSession, domain_id: int) -> DomainTermStats:
+    """Агрегат терминов домена; при отсутствии строится по статьям пачками
+
+    Для статей без PostTermStats статистика считается вне event loop и
+    сохраняется, поэтому полный проход по контенту выполняется один раз.
+    Параллельные построения одного домена выполняются по очереди под
+    блокировкой строки домена: следующий запрос получает готовый агрегат.
+    """
+    row = await db.get(DomainTermStats, domain_id)
+    if row is not None:
+        return row
+
+    await db.execute(select(Domain.id).where(Domain.id == domain_id).with_for_update())
+    row = await db.scalar(
+        select(DomainTermStats)
+        .where(DomainTermStats.domain_id == domain_id)
+        .execution_options(populate_existing=True)
+    )
+    if row is not None:
+        await db.commit()
+        return row
+
+    missing = await db.execute(
+        select(WordPressPost.id)
+        .outerjoin(PostTermStats, PostTermStats.post_id == WordPressPost.id)
+        .where(WordPressPost.domain_id == domain_id, PostTermStats.post_id.is_(None))
+    )
+    missing_ids = missing.scalars().all()
+    for start in range(0, len(missing_ids), BACKFILL_BATCH_SIZE):
+        batch_ids = missing_ids[start:start + BACKFILL_BATCH_SIZE]
+        contents = await db.execute(
+            select(WordPressPost.id, WordPressPost.content).where(WordPressPost.id.in_(batch_ids))
+        )
+        batch = contents.all()
+        stats_list = await asyncio.to_thread(lambda: [compute_post_stats(content) for _, content in batch])
+        for (post_id, _), stats in zip(batch, stats_list):
+            db.add(PostTermStats(post_id=post_id, domain_id=domain_id, **stats))
+        await db.flush()
+
+    aggregate = TermAggregate()
+    rows = await db.execute(
+        select(PostTermStats.term_counts, PostTermStats.total_terms)
+        .where(PostTermStats.domain_id == domain_id)
+    )
+    for term_counts, total_terms in rows:
+        aggregate.add({'term_counts': term_counts or {}, 'total_terms': total_terms or 0})
+
+    row = DomainTermStats(
+        domain_id=domain_id,
+        term_counts=dict(aggregate.counts),
+        total_terms=aggregate.total_terms,
+        posts_count=aggregate.posts_count,
+        updated_at=utc_now()
+    )
+    db.add(row)
+    await db.commit()
+    logger.info(f"Построена статистика терминов домена {domain_id}: {aggregate.posts_count} статей, {aggregate.unique_terms} терминов")
+    return row
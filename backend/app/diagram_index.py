@@ -0,0 +1,176 @@
+"""
+In-memory индекс эмбеддингов диаграмм для поиска по сходству
+"""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .vector_storage import load_diagram_vectors
+
+logger = logging.getLogger(__name__)
+
+SEARCH_EMBEDDING_TYPES = ("title", "description", "components")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class DiagramVectorIndex:
+    """Индекс L2-нормализованных эмбеддингов диаграмм (один на процесс)
+
+    Векторы хранятся в одной float32 матрице с запасом емкости, поэтому
+    косинусное сходство запроса со всеми эмбеддингами считается одним
+    матрично-векторным произведением, а top-k выбирается argpartition.
+    Индекс загружается из базы при первом поиске, пополняется при
+    создании эмбеддингов и очищается от удаленных диаграмм.
+    """
+
+    def __init__(self, embedding_types: Sequence[str] = SEARCH_EMBEDDING_TYPES, initial_capacity: int = 1024):
+        self.embedding_types = tuple(embedding_types)
+        self.initial_capacity = initial_capacity
+        self._lock = asyncio.Lock()
+        self.invalidate()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def invalidate(self):
+        """Сброс индекса; он будет заново загружен из базы при следующем поиске"""
+        self._matrix: Optional[np.ndarray] = None
+        self._diagram_ids = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._rows_per_diagram: Dict[int, int] = {}
+        self._max_rows = 1
+        self._loaded = False
+        self._loading = False
+        self._pending: List[Tuple[int, List[np.ndarray]]] = []
+
+    async def ensure_loaded(self, db: AsyncSession):
+        """Загрузка всех эмбеддингов из базы (однократно)"""
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            self._loading = True
+            try:
+                keys, matrix = await load_diagram_vectors(db, self.embedding_types)
+            finally:
+                self._loading = False
+            pending, self._pending = self._pending, []
+            self._set_rows([diagram_id for diagram_id, _ in keys], matrix)
+            # Эмбеддинги, созданные во время загрузки, но не попавшие в выборку
+            for diagram_id, vectors in pending:
+                if diagram_id not in self._rows_per_diagram:
+                    self._append(diagram_id, vectors)
+            self._loaded = True
+            logger.info(f"Индекс диаграмм загружен: {self._size} эмбеддингов")
+
+    def _set_rows(self, diagram_ids: List[int], matrix: np.ndarray):
+        self._size = len(diagram_ids)
+        if self._size:
+            capacity = max(self.initial_capacity, self._size)
+            self._matrix = np.zeros((capacity, matrix.shape[1]), dtype=np.float32)
+            self._matrix[:self._size] = _normalize(matrix)
+        else:
+            self._matrix = None
+        self._diagram_ids = np.zeros(max(self.initial_capacity, self._size), dtype=np.int64)
+        self._diagram_ids[:self._size] = diagram_ids
+        self._rows_per_diagram = {}
+        for diagram_id in diagram_ids:
+            self._rows_per_diagram[diagram_id] = self._rows_per_diagram.get(diagram_id, 0) + 1
+        self._max_rows = max(self._rows_per_diagram.values(), default=1)
+
+    def _append(self, diagram_id: int, vectors: List[np.ndarray]):
+        block = _normalize(np.asarray(vectors, dtype=np.float32))
+        if self._matrix is None:
+            self._matrix = np.zeros((self.initial_capacity, block.shape[1]), dtype=np.float32)
+            self._diagram_ids = np.zeros(self.initial_capacity, dtype=np.int64)
+        elif block.shape[1] != self._matrix.shape[1]:
+            logger.warning(f"Эмбеддинги диаграммы {diagram_id} другой размерности не добавлены в индекс")
+            return
+
+        end = self._size + len(block)
+        if end > len(self._matrix):
+            # Удвоение емкости, амортизированно O(1) на добавление
+            capacity = max(end, 2 * len(self._matrix))
+            matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+            matrix[:self._size] = self._matrix[:self._size]
+            diagram_ids = np.zeros(capacity, dtype=np.int64)
+            diagram_ids[:self._size] = self._diagram_ids[:self._size]
+            self._matrix, self._diagram_ids = matrix, diagram_ids
+
+        self._matrix[self._size:end] = block
+        self._diagram_ids[self._size:end] = diagram_id
+        self._size = end
+        rows = self._rows_per_diagram.get(diagram_id, 0) + len(block)
+        self._rows_per_diagram[diagram_id] = rows
+        self._max_rows = max(self._max_rows, rows)
+
+    def add(self, diagram_id: int, vectors: Iterable[np.ndarray]):
+        """Добавление эмбеддингов диаграммы (после фиксации в базе)"""
+        vectors = list(vectors)
+        if not vectors:
+            return
+        if self._loading:
+            self._pending.append((diagram_id, vectors))
+        elif self._loaded:
+            self._append(diagram_id, vectors)
+        # Если индекс еще не загружен, векторы будут прочитаны из базы
+
+    def remove(self, diagram_id: int):
+        """Удаление эмбеддингов диаграммы из индекса"""
+        self._pending = [(pending_id, vectors) for pending_id, vectors in self._pending if pending_id != diagram_id]
+        if self._rows_per_diagram.pop(diagram_id, None) is None:
+            return
+        keep = self._diagram_ids[:self._size] != diagram_id
+        size = int(keep.sum())
+        self._matrix[:size] = self._matrix[:self._size][keep]
+        self._diagram_ids[:size] = self._diagram_ids[:self._size][keep]
+        self._size = size
+
+    def search(self, query: np.ndarray, limit: int = 10) -> List[Tuple[int, float]]:
+        """Top-limit диаграмм по максимальному сходству среди их эмбеддингов"""
+        if not self._size or limit <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape[-1] != self._matrix.shape[1]:
+            logger.warning(f"Размерность запроса {query.shape[-1]} не совпадает с индексом {self._matrix.shape[1]}")
+            return []
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        scores = self._matrix[:self._size] @ (query / norm)
+        # У каждой диаграммы не больше _max_rows эмбеддингов, поэтому лучший
+        # эмбеддинг каждой из top-limit диаграмм попадает в top-k строк
+        k = min(self._size, limit * self._max_rows)
+        top = np.argpartition(-scores, k - 1)[:k] if k < self._size else np.arange(self._size)
+        top = top[np.argsort(-scores[top])]
+
+        results: List[Tuple[int, float]] = []
+        seen = set()
+        for row in top:
+            diagram_id = int(self._diagram_ids[row])
+            if diagram_id in seen:
+                continue
+            seen.add(diagram_id)
+            results.append((diagram_id, float(scores[row])))
+            if len(results) == limit:
+                break
+        return results
+
+
+# Глобальный индекс процесса (DiagramService создается на каждый запрос)
+diagram_vector_index = DiagramVectorIndex()
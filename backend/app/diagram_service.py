@@ -14,6 +14,7 @@ import httpx
 import numpy as np
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from pydantic import BaseModel, Field
 
 from .config import settings
@@ -25,6 +26,8 @@ from .monitoring import (
     MonitoringMiddleware, monitor_rag_operation
 )
 from .llm_router import llm_router, LLMServiceType, generate_diagram as llm_generate_diagram
+from .diagram_index import diagram_vector_index
+from .vector_storage import DEFAULT_VECTOR_DTYPE, encode_vector
 
 @dataclass
 class DiagramGenerationRequest:
@@ -450,42 +453,43 @@ SVG должен быть оптимизирован для веб-отобра
     async def _create_embeddings(self, diagram: Diagram, db: AsyncSession):
         """Создание эмбеддингов для RAG поиска."""
         try:
-            # Создаем эмбеддинги для заголовка и описания
+            # Собираем тексты для заголовка/описания и компонентов
+            texts: Dict[str, str] = {}
             title_text = f"{diagram.title} {diagram.description or ''}"
             if title_text.strip():
-                title_embedding = await self._create_text_embedding(title_text)
-                title_emb = DiagramEmbedding(
-                    diagram_id=diagram.id,
-                    embedding_type="title",
-                    vector_model="text-embedding-3-small",
-                    embedding_vector=json.dumps(title_embedding.tolist()),
-                    dimension=len(title_embedding),
-                    context_text=title_text,
-                    semantic_keywords=self._extract_keywords(title_text)
-                )
-                db.add(title_emb)
+                texts["title"] = title_text
             
-            # Создаем эмбеддинги для компонентов
             if diagram.components:
                 components_text = " ".join([
                     f"{comp.get('name', '')} {comp.get('description', '')}"
                     for comp in diagram.components
                 ])
-                
                 if components_text:
-                    comp_embedding = await self._create_text_embedding(components_text)
-                    comp_emb = DiagramEmbedding(
-                        diagram_id=diagram.id,
-                        embedding_type="components",
-                        vector_model="text-embedding-3-small",
-                        embedding_vector=json.dumps(comp_embedding.tolist()),
-                        dimension=len(comp_embedding),
-                        context_text=components_text,
-                        semantic_keywords=self._extract_keywords(components_text)
-                    )
-                    db.add(comp_emb)
+                    texts["components"] = components_text
+            
+            if not texts:
+                return
+            
+            # Все эмбеддинги диаграммы получаем одним пакетным вызовом
+            embeddings = await self._create_text_embeddings(list(texts.values()))
+            
+            for (embedding_type, text), embedding in zip(texts.items(), embeddings):
+                db.add(DiagramEmbedding(
+                    diagram_id=diagram.id,
+                    embedding_type=embedding_type,
+                    vector_model="text-embedding-3-small",
+                    vector_data=encode_vector(embedding, DEFAULT_VECTOR_DTYPE),
+                    vector_dtype=DEFAULT_VECTOR_DTYPE,
+                    dimension=len(embedding),
+                    context_text=text,
+                    semantic_keywords=self._extract_keywords(text)
+                ))
             
             await db.commit()
+            diagram_vector_index.add(diagram.id, [
+                embedding for embedding_type, embedding in zip(texts, embeddings)
+                if embedding_type in diagram_vector_index.embedding_types
+            ])
             
         except Exception as e:
             await db.rollback()
@@ -493,14 +497,19 @@ SVG должен быть оптимизирован для веб-отобра
     
     async def _create_text_embedding(self, text: str) -> np.ndarray:
         """Создание эмбеддинга для текста."""
+        embeddings = await self._create_text_embeddings([text])
+        return embeddings[0]
+    
+    async def _create_text_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """Создание эмбеддингов для списка текстов одним пакетом."""
         try:
             # Используем единый LLM-маршрутизатор для создания эмбеддингов
-            embedding = await llm_router.generate_embedding(text)
-            return embedding
+            embeddings = await llm_router.generate_embeddings(texts)
+            return [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
                 
         except Exception as e:
             logger.error(f"Ошибка создания эмбеддинга: {e}")
-            return np.random.rand(384)
+            return [np.random.rand(384) for _ in texts]
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Извлечение ключевых слов из текста."""
@@ -525,32 +534,12 @@ SVG должен быть оптимизирован для веб-отобра
             # Создаем эмбеддинг для запроса
             query_embedding = await self._create_text_embedding(query)
             
-            # Получаем все эмбеддинги
-            result = await db.execute(
-                select(DiagramEmbedding).where(
-                    DiagramEmbedding.embedding_type.in_(["title", "description", "components"])
-                )
-            )
-            embeddings = result.scalars().all()
-            
-            # Вычисляем сходство
-            similarities = []
-            for emb in embeddings:
-                try:
-                    emb_vector = np.array(json.loads(emb.embedding_vector))
-                    similarity = np.dot(query_embedding, emb_vector) / (
-                        np.linalg.norm(query_embedding) * np.linalg.norm(emb_vector)
-                    )
-                    similarities.append((similarity, emb.diagram_id))
-                except Exception as e:
-                    logger.error(f"Ошибка вычисления сходства: {e}")
-                    continue
-            
-            # Сортируем по сходству
-            similarities.sort(key=lambda x: x[0], reverse=True)
+            # Поиск по in-memory индексу (загружается из базы один раз на процесс)
+            await diagram_vector_index.ensure_loaded(db)
+            hits = diagram_vector_index.search(query_embedding, limit)
             
             # Получаем диаграммы
-            diagram_ids = [diagram_id for _, diagram_id in similarities[:limit]]
+            diagram_ids = [diagram_id for diagram_id, _ in hits]
             
             if diagram_ids:
                 result = await db.execute(
@@ -573,6 +562,29 @@ SVG должен быть оптимизирован для веб-отобра
             logger.error(f"Ошибка поиска диаграмм: {e}")
             return []
     
+    async def delete_diagram(self, diagram_id: int, db: AsyncSession) -> bool:
+        """Удаление диаграммы вместе с эмбеддингами."""
+        try:
+            # Эмбеддинги загружаем сразу: каскадное удаление в async сессии без lazy load
+            result = await db.execute(
+                select(Diagram)
+                .options(selectinload(Diagram.embeddings))
+                .where(Diagram.id == diagram_id)
+            )
+            diagram = result.scalar_one_or_none()
+            if not diagram:
+                return False
+            
+            await db.delete(diagram)
+            await db.commit()
+            diagram_vector_index.remove(diagram_id)
+            return True
+            
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Ошибка удаления диаграммы: {e}")
+            raise DatabaseException(f"Ошибка удаления диаграммы: {e}")
+    
     @monitor_rag_operation("diagram_optimization", "diagram_service")
     async def optimize_diagram(self, diagram_id: int, db: AsyncSession) -> Dict[str, Any]:
         """Оптимизация существующей диаграммы."""
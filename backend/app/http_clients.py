@@ -0,0 +1,184 @@
+"""
+Общие HTTP клиенты с пулами соединений для backend
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import aiohttp
+import httpx
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UpstreamConfig:
+    """Параметры пула соединений к одному upstream"""
+    base_url: Optional[str] = None
+    max_connections: int = 100
+    max_keepalive: int = 20
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+# Глобальный реестр клиентов
+_http_clients: Optional['HTTPClientRegistry'] = None
+
+
+class HTTPClientRegistry:
+    """Реестр долгоживущих HTTP клиентов по upstream
+
+    Раньше каждый вызов к Ollama, health-check или сайту создавал свой
+    клиент и платил за TCP/TLS рукопожатие. Реестр держит по одному
+    httpx.AsyncClient (client) и/или aiohttp.ClientSession (session) на
+    upstream с HTTP/1.1 keep-alive и своими лимитами пула. Клиенты
+    создаются лениво, закрываются в lifespan сервиса через close().
+    """
+
+    def __init__(self, upstreams: Optional[Dict[str, UpstreamConfig]] = None):
+        self.upstreams: Dict[str, UpstreamConfig] = dict(upstreams or {})
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def register(self, name: str, config: UpstreamConfig):
+        """Регистрация upstream (до первого обращения к нему)"""
+        if name in self._clients or name in self._sessions:
+            raise RuntimeError(f"Upstream {name} already has an open client")
+        self.upstreams[name] = config
+
+    def _config(self, name: str) -> UpstreamConfig:
+        config = self.upstreams.get(name)
+        if config is None:
+            config = self.upstreams[name] = UpstreamConfig()
+        return config
+
+    def _counters(self, name: str) -> Dict[str, float]:
+        counters = self._stats.get(name)
+        if counters is None:
+            counters = self._stats[name] = {"requests": 0, "created_at": time.time()}
+        return counters
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """httpx клиент upstream"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            config = self._config(name)
+            counters = self._counters(name)
+
+            async def on_request(request):
+                counters["requests"] += 1
+
+            client = httpx.AsyncClient(
+                base_url=config.base_url or "",
+                headers=config.headers,
+                limits=httpx.Limits(
+                    max_connections=config.max_connections,
+                    max_keepalive_connections=config.max_keepalive,
+                    keepalive_expiry=config.keepalive_expiry
+                ),
+                timeout=httpx.Timeout(config.read_timeout, connect=config.connect_timeout),
+                event_hooks={"request": [on_request]}
+            )
+            self._clients[name] = client
+            logger.info(f"HTTP клиент {name} создан (max_connections={config.max_connections})")
+        return client
+
+    def session(self, name: str) -> aiohttp.ClientSession:
+        """aiohttp сессия upstream (для кода, уже написанного на aiohttp)"""
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            config = self._config(name)
+            connector = aiohttp.TCPConnector(
+                limit=config.max_connections,
+                keepalive_timeout=config.keepalive_expiry,
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(
+                base_url=config.base_url,
+                connector=connector,
+                headers=config.headers,
+                timeout=aiohttp.ClientTimeout(total=config.read_timeout, connect=config.connect_timeout)
+            )
+            self._sessions[name] = session
+            logger.info(f"HTTP сессия {name} создана (max_connections={config.max_connections})")
+        return session
+
+    @staticmethod
+    def _httpx_pool(client: httpx.AsyncClient) -> Dict[str, int]:
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    @staticmethod
+    def _aiohttp_pool(session: aiohttp.ClientSession) -> Dict[str, int]:
+        connector = session.connector
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        active = len(getattr(connector, "_acquired", ()))
+        return {"open": idle + active, "idle": idle, "active": active}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Утилизация пулов по upstream"""
+        result = {}
+        for name, config in self.upstreams.items():
+            pools = {}
+            client = self._clients.get(name)
+            if client is not None and not client.is_closed:
+                pools["httpx"] = self._httpx_pool(client)
+            session = self._sessions.get(name)
+            if session is not None and not session.closed:
+                pools["aiohttp"] = self._aiohttp_pool(session)
+            if not pools:
+                continue
+            active = sum(pool["active"] for pool in pools.values())
+            counters = self._counters(name)
+            result[name] = {
+                "max_connections": config.max_connections,
+                "utilization": active / config.max_connections if config.max_connections else 0.0,
+                "active": active,
+                "httpx_requests": counters["requests"],
+                "uptime": time.time() - counters["created_at"],
+                "pools": pools
+            }
+        return result
+
+    async def close(self):
+        """Закрытие всех клиентов"""
+        for client in self._clients.values():
+            await client.aclose()
+        for session in self._sessions.values():
+            await session.close()
+        self._clients.clear()
+        self._sessions.clear()
+
+
+def default_upstreams() -> Dict[str, UpstreamConfig]:
+    """Upstream'ы backend: Ollama и сайты WordPress"""
+    ollama = settings.ollama
+    return {
+        "ollama": UpstreamConfig(base_url=ollama.url, read_timeout=float(ollama.timeout)),
+        "wordpress": UpstreamConfig(max_connections=50, max_keepalive=20)
+    }
+
+
+def get_http_clients() -> HTTPClientRegistry:
+    """Получение глобального реестра HTTP клиентов"""
+    global _http_clients
+    if _http_clients is None:
+        _http_clients = HTTPClientRegistry(default_upstreams())
+    return _http_clients
+
+
+async def close_http_clients():
+    """Закрытие глобального реестра HTTP клиентов"""
+    global _http_clients
+    if _http_clients:
+        await _http_clients.close()
+        _http_clients = None
@@ -0,0 +1,211 @@
+"""
+Движок рекомендаций внутренних ссылок (TF-IDF / эмбеддинги + Aho–Corasick)
+"""
+
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Токены в нижнем регистре"""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class TitleMatcher:
+    """Автомат Aho–Corasick по заголовкам статей
+
+    Работает на уровне слов: заголовок находится в тексте, если там есть
+    та же последовательность токенов. Поиск всех заголовков в тексте
+    выполняется за один проход, O(длина текста + число вхождений).
+    """
+
+    def __init__(self, titles: Dict[int, str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[int]] = [set()]
+
+        for key, title in titles.items():
+            tokens = tokenize(title)
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(set())
+                    self._goto[state][token] = next_state
+                state = next_state
+            self._output[state].add(key)
+
+        # Суффиксные ссылки обходом в ширину
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(token, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[int]:
+        """Ключи всех заголовков, встречающихся в тексте"""
+        found: Set[int] = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for token in tokenize(text):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+@dataclass
+class LinkSuggestion:
+    """Рекомендация ссылки source -> target"""
+    source_id: int
+    target_id: int
+    score: float
+    anchor_candidates: List[str] = field(default_factory=list)
+
+
+class LinkSuggestionEngine:
+    """Поиск кандидатов для внутренних ссылок
+
+    Статьи представляются L2-нормализованными векторами: разреженной
+    TF-IDF матрицей или сохраненными эмбеддингами. Похожие статьи
+    считаются блочными матричными произведениями с top-k через
+    argpartition, уже существующие ссылки (заголовок цели встречается
+    в тексте источника) определяются автоматом TitleMatcher.
+    """
+
+    def __init__(
+        self,
+        vectorizer: Optional[TfidfVectorizer] = None,
+        top_k: int = 5,
+        min_score: float = 0.05,
+        chunk_size: int = 512
+    ):
+        self.vectorizer = vectorizer or TfidfVectorizer(sublinear_tf=True, max_features=50000)
+        self.top_k = top_k
+        self.min_score = min_score
+        self.chunk_size = chunk_size
+
+        self.ids: List[int] = []
+        self.matrix = None
+        self.tfidf = None
+        self.feature_names: Optional[np.ndarray] = None
+        self.existing_links: Dict[int, Set[int]] = {}
+
+    def fit(
+        self,
+        posts: Sequence[Dict[str, Any]],
+        embeddings: Optional[Dict[int, Sequence[float]]] = None
+    ) -> "LinkSuggestionEngine":
+        """Построение индекса
+
+        posts: словари с ключами id, title, content.
+        embeddings: векторы статей (post_id -> vector); используются вместо
+        TF-IDF, если заданы для всех статей.
+        """
+        self.ids = [post['id'] for post in posts]
+        documents = [f"{post['title']} {post['title']} {post['content']}" for post in posts]
+        # TF-IDF нужен в любом случае для подбора анкоров
+        try:
+            self.tfidf = self.vectorizer.fit_transform(documents).tocsr()
+            self.feature_names = self.vectorizer.get_feature_names_out()
+        except ValueError as e:
+            if "empty vocabulary" not in str(e):
+                raise
+            # Статьи пустые или из одних стоп-слов: сходство нулевое, рекомендаций нет
+            logger.info("Пустой словарь TF-IDF, рекомендации ссылок не строятся")
+            self.tfidf = sparse.csr_matrix((len(documents), 0), dtype=np.float64)
+            self.feature_names = np.empty(0, dtype=object)
+        self.tfidf.sort_indices()
+
+        if embeddings and all(post_id in embeddings for post_id in self.ids):
+            matrix = np.asarray([embeddings[post_id] for post_id in self.ids], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.matrix = matrix / norms
+        else:
+            self.matrix = self.tfidf
+
+        matcher = TitleMatcher({post['id']: post['title'] for post in posts})
+        self.existing_links = {}
+        for post in posts:
+            links = matcher.find(post['content'])
+            links.discard(post['id'])
+            self.existing_links[post['id']] = links
+        return self
+
+    def _similarities(self, rows: List[int]) -> np.ndarray:
+        block = self.matrix[rows] @ self.matrix.T
+        return block.toarray() if hasattr(block, 'toarray') else np.asarray(block)
+
+    def anchor_candidates(self, source_row: int, target_row: int, limit: int = 3) -> List[str]:
+        """Общие для источника и цели термины с наибольшим вкладом в сходство"""
+        indptr, indices, data = self.tfidf.indptr, self.tfidf.indices, self.tfidf.data
+        s_start, s_end = indptr[source_row], indptr[source_row + 1]
+        t_start, t_end = indptr[target_row], indptr[target_row + 1]
+        shared, s_pos, t_pos = np.intersect1d(
+            indices[s_start:s_end], indices[t_start:t_end], assume_unique=True, return_indices=True
+        )
+        if shared.size == 0:
+            return []
+        weights = data[s_start:s_end][s_pos] * data[t_start:t_end][t_pos]
+        order = np.argsort(-weights)[:limit]
+        return [str(self.feature_names[shared[i]]) for i in order]
+
+    def suggest(self, source_ids: Optional[Iterable[int]] = None) -> Dict[int, List[LinkSuggestion]]:
+        """Top-k рекомендаций для каждой статьи (или только для source_ids)"""
+        if self.matrix is None:
+            raise RuntimeError("Индекс не построен, вызовите fit()")
+
+        row_of = {post_id: row for row, post_id in enumerate(self.ids)}
+        rows = sorted(row_of[i] for i in source_ids if i in row_of) if source_ids is not None else list(range(len(self.ids)))
+        k = min(self.top_k, len(self.ids) - 1)
+        result: Dict[int, List[LinkSuggestion]] = {}
+        if k <= 0 or self.matrix.shape[1] == 0:
+            return result
+
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            scores = self._similarities(chunk)
+            for i, row in enumerate(chunk):
+                source_id = self.ids[row]
+                row_scores = scores[i]
+                row_scores[row] = -np.inf
+                for target_id in self.existing_links.get(source_id, ()):
+                    row_scores[row_of[target_id]] = -np.inf
+
+                top = np.argpartition(-row_scores, k - 1)[:k]
+                top = top[np.argsort(-row_scores[top])]
+                result[source_id] = [
+                    LinkSuggestion(
+                        source_id=source_id,
+                        target_id=self.ids[target],
+                        score=float(row_scores[target]),
+                        anchor_candidates=self.anchor_candidates(row, target)
+                    )
+                    for target in top
+                    if row_scores[target] >= self.min_score
+                ]
+        return result
@@ -6,6 +6,8 @@ from .centralized_architecture import CentralizedLLMArchitecture
 from .distributed_cache import DistributedCache
 from .concurrent_manager import ConcurrentOllamaManager
 from .request_prioritizer import RequestPrioritizer
+from .rate_limiter import LocalRateLimiter, RedisRateLimiter, RateLimitExceeded
+from .request_scheduler import AdmissionRejected, WeightedFairScheduler
 from .rag_monitor import RAGMonitor
 from .types import LLMRequest, LLMResponse, RequestPriority, RequestStatus
 
@@ -14,6 +16,11 @@ __all__ = [
     'DistributedCache',
     'ConcurrentOllamaManager',
     'RequestPrioritizer',
+    'LocalRateLimiter',
+    'RedisRateLimiter',
+    'RateLimitExceeded',
+    'WeightedFairScheduler',
+    'AdmissionRejected',
     'RAGMonitor',
     'LLMRequest',
     'LLMResponse',
@@ -7,16 +7,20 @@ import asyncio
 import logging
 import time
 import uuid
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable
-from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Any, Callable, Generator
+from dataclasses import dataclass, field, replace
 from contextlib import asynccontextmanager
+from functools import partial
 import os
 
 from .types import LLMRequest, LLMResponse, RequestPriority, RequestStatus, PerformanceMetrics
 from .concurrent_manager import ConcurrentOllamaManager
 from .distributed_cache import DistributedCache
+from .rate_limiter import RateLimitExceeded, RedisRateLimiter
 from .request_prioritizer import RequestPrioritizer
+from .request_scheduler import AdmissionRejected, ScheduledItem, WeightedFairScheduler
 from .rag_monitor import RAGMonitor
 
 logger = logging.getLogger(__name__)
@@ -47,24 +51,80 @@ class LLMResponse:
     cache_hit: bool
     created_at: datetime = field(default_factory=datetime.utcnow)
 
+@dataclass
+class DeliveryStats:
+    """Метрики доставки ответов: ожидающие клиенты и время в очереди"""
+    waiters: int = 0
+    queue_dwell: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def record_dwell(self, seconds: float):
+        self.queue_dwell.append(seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        dwell = sorted(self.queue_dwell)
+        if not dwell:
+            return {"waiters": self.waiters, "queue_dwell_avg": 0.0, "queue_dwell_p95": 0.0}
+        return {
+            "waiters": self.waiters,
+            "queue_dwell_avg": sum(dwell) / len(dwell),
+            "queue_dwell_p95": dwell[min(len(dwell) - 1, int(len(dwell) * 0.95))]
+        }
+
+class PendingResponse:
+    """Ответ на отправленный запрос, который можно ожидать через await
+    
+    Future разрешается напрямую при завершении обработки запроса.
+    Ожидание защищено shield: отмена или таймаут одного ожидающего не
+    отменяет сам запрос.
+    """
+    
+    def __init__(self, request_id: str, future: asyncio.Future, stats: DeliveryStats):
+        self.request_id = request_id
+        self._future = future
+        self._stats = stats
+    
+    def done(self) -> bool:
+        return self._future.done()
+    
+    async def wait(self, timeout: Optional[float] = None) -> LLMResponse:
+        """Ожидание ответа (asyncio.TimeoutError по истечении timeout)"""
+        self._stats.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        finally:
+            self._stats.waiters -= 1
+    
+    def __await__(self) -> Generator[Any, None, LLMResponse]:
+        return self.wait().__await__()
+
 class CentralizedLLMArchitecture:
     """Централизованная архитектура для конкурентного использования Ollama"""
     
     def __init__(self, redis_url: str = "redis://redis:6379"):
         self.concurrent_manager = ConcurrentOllamaManager()
-        self.cache_manager = DistributedCache(redis_url)
-        self.request_prioritizer = RequestPrioritizer()
+        embedding_model = self.concurrent_manager.config.llm_model
+        self.cache_manager = DistributedCache(
+            redis_url,
+            embedding_function=partial(self.concurrent_manager.get_embedding, llm_model=embedding_model),
+            embedding_model=embedding_model
+        )
+        # Redis кэш служит L2 уровнем для ответов и эмбеддингов менеджера Ollama
+        self.concurrent_manager.l2_cache = self.cache_manager
+        # Лимиты пользователей хранятся в Redis и действуют на все реплики
+        self.request_prioritizer = RequestPrioritizer(rate_limiter=RedisRateLimiter(redis_url))
         self.monitoring = RAGMonitor()
         
-        # Очередь запросов с приоритетами
-        self.request_queue = asyncio.PriorityQueue()
+        # Взвешенная очередь по уровням приоритета; конкурентность ограничена
+        # числом воркеров scheduler.config.workers (Apple M4 оптимизация)
+        self.scheduler = WeightedFairScheduler(self.request_prioritizer)
         
-        # Семафор для ограничения конкурентности (Apple M4 оптимизация)
-        self.semaphore = asyncio.Semaphore(2)
+        # Ответы, ожидающие завершения запросов этого процесса
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.delivery_stats = DeliveryStats()
         
         # Флаг для остановки обработки
         self._running = False
-        self._processor_task = None
+        self._workers: List[asyncio.Task] = []
         
         logger.info("Централизованная LLM архитектура инициализирована")
     
@@ -75,7 +135,10 @@ class CentralizedLLMArchitecture:
             return
         
         self._running = True
-        self._processor_task = asyncio.create_task(self._process_queue())
+        self._workers = [
+            asyncio.create_task(self._worker(index))
+            for index in range(self.scheduler.config.workers)
+        ]
         logger.info("Централизованная LLM архитектура запущена")
     
     async def stop(self):
@@ -84,84 +147,163 @@ class CentralizedLLMArchitecture:
             return
         
         self._running = False
-        if self._processor_task:
-            self._processor_task.cancel()
-            try:
-                await self._processor_task
-            except asyncio.CancelledError:
-                pass
+        for task in self._workers:
+            task.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if isinstance(self.request_prioritizer.rate_limiter, RedisRateLimiter):
+            await self.request_prioritizer.rate_limiter.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
         
         logger.info("Централизованная LLM архитектура остановлена")
     
-    async def submit_request(self, request: LLMRequest) -> str:
-        """Отправка запроса в очередь"""
+    async def submit_request(self, request: LLMRequest) -> PendingResponse:
+        """Отправка запроса в очередь
+        
+        Возвращает PendingResponse: await на нем отдает ответ сразу после
+        завершения обработки, без опроса. Если запрос не успеет к таймауту
+        своего приоритета при текущей очереди, сразу выбрасывается
+        AdmissionRejected. Запрос пользователя сверх лимитов его уровня
+        (metadata["user_tier"]) отклоняется с RateLimitExceeded.
+        """
         if not self._running:
             raise RuntimeError("Архитектура не запущена")
         
-        # Определяем приоритет
-        priority = self.request_prioritizer.get_priority(request.priority)
-        
-        # Добавляем в очередь
-        await self.request_queue.put((priority, request))
-        
-        # Обновляем метрики
-        self.monitoring.increment_metric("queue_size", 1)
-        self.monitoring.increment_metric("total_requests", 1)
-        
-        logger.info(f"Запрос {request.id} добавлен в очередь с приоритетом {request.priority}")
-        return request.id
+        future = self._pending.get(request.id)
+        if future is None:
+            if request.user_id is not None:
+                decision = await self.request_prioritizer.acquire(
+                    request.user_id,
+                    request.id,
+                    request.metadata.get("user_tier", "standard"),
+                    request.priority
+                )
+                if not decision.allowed:
+                    self.monitoring.increment_metric("errors", 1)
+                    raise RateLimitExceeded(
+                        f"Пользователь {request.user_id} превысил лимит запросов ({decision.reason})",
+                        decision.retry_after
+                    )
+                if request.id in self._pending:
+                    # Тот же запрос поставлен в очередь, пока проверялись лимиты
+                    await self._release_user(request)
+                    return PendingResponse(request.id, self._pending[request.id], self.delivery_stats)
+            
+            try:
+                self.scheduler.submit(request, request.priority)
+            except AdmissionRejected as e:
+                logger.warning(f"Запрос {request.id} отклонен: {e}")
+                self.monitoring.increment_metric("errors", 1)
+                await self._release_user(request)
+                raise
+            
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request.id] = future
+            
+            # Обновляем метрики
+            self.monitoring.increment_metric("total_requests", 1)
+            
+            logger.info(f"Запрос {request.id} добавлен в очередь с приоритетом {request.priority}")
+        return PendingResponse(request.id, future, self.delivery_stats)
     
     async def get_response(self, request_id: str, timeout: float = 30.0) -> Optional[LLMResponse]:
-        """Получение ответа по ID запроса"""
-        start_time = time.time()
+        """Получение ответа по ID запроса
         
-        while time.time() - start_time < timeout:
-            # Проверяем кэш
-            cached_response = await self.cache_manager.get_response(request_id)
-            if cached_response:
-                logger.info(f"Ответ для запроса {request_id} найден в кэше")
-                return cached_response
+        Запрос этого процесса ожидается через его future. Запрос другого
+        процесса (реплики) ожидается через уведомление Redis pub/sub.
+        """
+        future = self._pending.get(request_id)
+        try:
+            if future is not None:
+                return await PendingResponse(request_id, future, self.delivery_stats).wait(timeout)
             
-            # Проверяем завершенные запросы
-            response = await self.concurrent_manager.get_response(request_id)
-            if response:
-                # Кэшируем ответ
-                await self.cache_manager.cache_response(request_id, response)
-                logger.info(f"Ответ для запроса {request_id} получен")
+            self.delivery_stats.waiters += 1
+            try:
+                response = await self.cache_manager.wait_for_response(request_id, timeout)
+            finally:
+                self.delivery_stats.waiters -= 1
+            if response is not None:
                 return response
-            
-            await asyncio.sleep(0.1)
+        except asyncio.TimeoutError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка получения ответа для запроса {request_id}: {e}")
+            return None
         
         logger.warning(f"Таймаут ожидания ответа для запроса {request_id}")
         return None
     
-    async def _process_queue(self):
-        """Обработка очереди запросов"""
-        logger.info("Начата обработка очереди запросов")
+    async def _worker(self, index: int):
+        """Воркер: выполняет запросы в порядке планировщика по одному"""
+        logger.info(f"Воркер {index} очереди запросов запущен")
         
         while self._running:
             try:
-                # Получаем запрос из очереди
-                priority, request = await asyncio.wait_for(
-                    self.request_queue.get(), 
-                    timeout=1.0
-                )
-                
-                # Обрабатываем запрос
-                asyncio.create_task(self._process_request(request))
-                
-                # Обновляем метрики
-                self.monitoring.increment_metric("queue_size", -1)
+                # Запросы, не дождавшиеся обработки до дедлайна, завершаются ошибкой
+                for item in self.scheduler.pop_expired():
+                    await self._fail_request(
+                        item.payload,
+                        asyncio.TimeoutError(f"Запрос {item.payload.id} не обработан за отведенное время")
+                    )
+                    await self._release_user(item.payload)
                 
-            except asyncio.TimeoutError:
-                continue
+                item = await self.scheduler.get()
+                now = self.scheduler.clock()
+                self.delivery_stats.record_dwell(item.waited(now))
+                await self._run_request(item)
+                self.scheduler.record_service(item.tier, self.scheduler.clock() - now)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Ошибка обработки очереди: {e}")
-                continue
+    
+    async def _run_request(self, item: ScheduledItem):
+        """Обработка запроса до его дедлайна и доставка результата ожидающим"""
+        request = item.payload
+        future = self._pending.get(request.id)
+        try:
+            response = await asyncio.wait_for(
+                self._process_request(request),
+                timeout=max(item.deadline - self.scheduler.clock(), 0.0)
+            )
+            response = replace(response, request_id=request.id)
+        except asyncio.CancelledError:
+            if future is not None and not future.done():
+                future.cancel()
+            self._pending.pop(request.id, None)
+            await self._release_user(request)
+            raise
+        except Exception as e:
+            await self._release_user(request)
+            await self._fail_request(request, e)
+            return
         
-        logger.info("Обработка очереди запросов остановлена")
+        await self._release_user(request)
+        if future is not None and not future.done():
+            future.set_result(response)
+        self._pending.pop(request.id, None)
+        # Ответ для ожидающих в других процессах
+        await self.cache_manager.publish_response(request.id, response)
     
-    async def _process_request(self, request: LLMRequest):
+    async def _fail_request(self, request: LLMRequest, error: Exception):
+        """Доставка ошибки запроса ожидающим"""
+        future = self._pending.pop(request.id, None)
+        if future is not None and not future.done():
+            future.set_exception(error)
+            # Исключение доставляется ожидающим; без них не логируем его повторно
+            future.exception()
+        await self.cache_manager.publish_response(request.id, None, error=str(error))
+    
+    async def _release_user(self, request: LLMRequest):
+        """Освобождение слота пользователя в лимитах конкурентности"""
+        if request.user_id is not None:
+            await self.request_prioritizer.release(request.user_id, request.id)
+    
+    async def _process_request(self, request: LLMRequest) -> LLMResponse:
         """Обработка отдельного запроса"""
         start_time = time.time()
         
@@ -175,31 +317,30 @@ class CentralizedLLMArchitecture:
                 self.monitoring.increment_metric("cache_hits", 1)
                 return cached_response
             
-            # Получаем семафор для ограничения конкурентности
-            async with self.semaphore:
-                self.monitoring.increment_metric("concurrent_requests", 1)
+            # Конкурентность ограничена числом воркеров планировщика
+            self.monitoring.increment_metric("concurrent_requests", 1)
+            
+            try:
+                # Обрабатываем запрос через конкурентный менеджер
+                response = await self.concurrent_manager.process_request(request)
+                
+                # Обогащаем RAG контекстом если нужно
+                if request.use_rag:
+                    response = await self._enhance_with_rag(request, response)
+                    self.monitoring.increment_metric("rag_enhancements", 1)
+                
+                # Кэшируем результат
+                await self.cache_manager.cache_response(cache_key, response)
+                
+                # Обновляем метрики
+                response_time = time.time() - start_time
+                self.monitoring.update_metric("avg_response_time", response_time)
+                
+                logger.info(f"Запрос {request.id} обработан за {response_time:.2f}s")
+                return response
                 
-                try:
-                    # Обрабатываем запрос через конкурентный менеджер
-                    response = await self.concurrent_manager.process_request(request)
-                    
-                    # Обогащаем RAG контекстом если нужно
-                    if request.use_rag:
-                        response = await self._enhance_with_rag(request, response)
-                        self.monitoring.increment_metric("rag_enhancements", 1)
-                    
-                    # Кэшируем результат
-                    await self.cache_manager.cache_response(cache_key, response)
-                    
-                    # Обновляем метрики
-                    response_time = time.time() - start_time
-                    self.monitoring.update_metric("avg_response_time", response_time)
-                    
-                    logger.info(f"Запрос {request.id} обработан за {response_time:.2f}s")
-                    return response
-                    
-                finally:
-                    self.monitoring.increment_metric("concurrent_requests", -1)
+            finally:
+                self.monitoring.increment_metric("concurrent_requests", -1)
         
         except Exception as e:
             logger.error(f"Ошибка обработки запроса {request.id}: {e}")
@@ -273,13 +414,16 @@ class CentralizedLLMArchitecture:
     def get_metrics(self) -> Dict[str, Any]:
         """Получение метрик архитектуры"""
         return {
-            "queue_size": self.request_queue.qsize(),
+            "queue_size": self.scheduler.qsize(),
             "concurrent_requests": self.monitoring.get_metric("concurrent_requests"),
             "total_requests": self.monitoring.get_metric("total_requests"),
             "cache_hits": self.monitoring.get_metric("cache_hits"),
             "rag_enhancements": self.monitoring.get_metric("rag_enhancements"),
             "avg_response_time": self.monitoring.get_metric("avg_response_time"),
             "errors": self.monitoring.get_metric("errors"),
+            "pending_requests": len(self._pending),
+            **self.delivery_stats.snapshot(),
+            "scheduler": self.scheduler.get_stats(),
             "uptime": time.time() - self.monitoring.start_time
         }
     
@@ -287,7 +431,7 @@ class CentralizedLLMArchitecture:
         """Проверка здоровья архитектуры"""
         return {
             "status": "healthy" if self._running else "stopped",
-            "queue_size": self.request_queue.qsize(),
+            "queue_size": self.scheduler.qsize(),
             "concurrent_requests": self.monitoring.get_metric("concurrent_requests"),
             "cache_status": await self.cache_manager.health_check(),
             "ollama_status": await self.concurrent_manager.health_check()
@@ -4,16 +4,25 @@
 
 import asyncio
 import aiohttp
+import hashlib
 import logging
 import time
 import uuid
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, TYPE_CHECKING
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 import json
 
+import numpy as np
+
+from ..cache import MemoryCache
+from .embedding_batcher import EmbeddingBatcher
 from .types import LLMRequest, LLMResponse, RequestStatus, PerformanceMetrics
 
+if TYPE_CHECKING:
+    from .distributed_cache import DistributedCache
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -27,6 +36,28 @@ class OllamaConfig:
     context_length: int = 4096
     batch_size: int = 512
     num_parallel: int = 2
+    # Ограничения локальных кэшей (L1); L2 - DistributedCache в Redis
+    response_cache_max_items: int = 2000
+    response_cache_max_bytes: int = 32 * 1024 * 1024
+    response_cache_ttl: int = 1800
+    embedding_cache_max_items: int = 20000
+    embedding_cache_max_bytes: int = 128 * 1024 * 1024
+    embedding_cache_ttl: int = 86400
+    # Микро-батчинг эмбеддингов
+    embedding_batch_size: int = 64
+    embedding_batch_window: float = 0.005  # секунд
+
+
+def is_missing_endpoint(error_text: str) -> bool:
+    """404 от отсутствующего маршрута (старая Ollama), а не от неизвестной модели
+
+    На неизвестную модель Ollama отвечает 404 с JSON {"error": ...},
+    на отсутствующий маршрут - текстом "404 page not found".
+    """
+    try:
+        return "error" not in json.loads(error_text)
+    except (ValueError, TypeError):
+        return True
 
 class LoadMonitor:
     """Мониторинг нагрузки Ollama"""
@@ -67,19 +98,47 @@ class LoadMonitor:
         """Время работы"""
         return time.time() - self.start_time
 
+class InFlightRequest:
+    """Выполняющийся запрос к Ollama, на который могут подписаться дубликаты"""
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
 class ConcurrentOllamaManager:
     """Менеджер конкурентного использования Ollama"""
     
-    def __init__(self, config: Optional[OllamaConfig] = None):
+    def __init__(self, config: Optional[OllamaConfig] = None, l2_cache: Optional["DistributedCache"] = None):
         self.config = config or OllamaConfig()
         self.session: Optional[aiohttp.ClientSession] = None
         
         # Семафор для ограничения конкурентности
         self.semaphore = asyncio.Semaphore(self.config.max_concurrent_requests)
         
-        # Кэши для эмбеддингов и ответов
-        self.embedding_cache: Dict[str, List[float]] = {}
-        self.response_cache: Dict[str, LLMResponse] = {}
+        # Кэши для эмбеддингов и ответов: LRU с TTL и бюджетом памяти.
+        # Эмбеддинги хранятся как float32 массивы, а не списки Python float.
+        self.embedding_cache = MemoryCache(
+            max_size=self.config.embedding_cache_max_items,
+            max_bytes=self.config.embedding_cache_max_bytes
+        )
+        self.response_cache = MemoryCache(
+            max_size=self.config.response_cache_max_items,
+            max_bytes=self.config.response_cache_max_bytes
+        )
+        # request_id -> ключ кэша ответа, для get_response по ID запроса
+        self._response_keys: "OrderedDict[str, str]" = OrderedDict()
+        
+        # Общий L2 кэш в Redis: переживает рестарт пода
+        self.l2_cache = l2_cache
+        self.l2_stats = {"hits": 0, "misses": 0}
+        
+        # Конкурентные запросы эмбеддингов объединяются в пакеты
+        self.embedding_batcher = EmbeddingBatcher(
+            self._embed_batch,
+            max_batch_size=self.config.embedding_batch_size,
+            batch_window=self.config.embedding_batch_window
+        )
+        self._batch_embed_supported = True
         
         # Мониторинг нагрузки
         self.load_monitor = LoadMonitor()
@@ -87,6 +146,10 @@ class ConcurrentOllamaManager:
         # Активные запросы
         self.active_requests: Dict[str, asyncio.Task] = {}
         
+        # Single-flight: одинаковые запросы в полете объединяются по ключу кэша
+        self.inflight_requests: Dict[str, InFlightRequest] = {}
+        self.coalescing_stats = {"leaders": 0, "coalesced": 0}
+        
         logger.info(f"ConcurrentOllamaManager инициализирован с лимитом {self.config.max_concurrent_requests} запросов")
     
     async def __aenter__(self):
@@ -108,12 +171,15 @@ class ConcurrentOllamaManager:
     async def stop(self):
         """Остановка менеджера"""
         # Отменяем все активные запросы
-        for task in self.active_requests.values():
+        inflight_tasks = [flight.task for flight in self.inflight_requests.values()]
+        for task in list(self.active_requests.values()) + inflight_tasks:
             task.cancel()
         
         # Ждем завершения всех задач
-        if self.active_requests:
-            await asyncio.gather(*self.active_requests.values(), return_exceptions=True)
+        if self.active_requests or inflight_tasks:
+            await asyncio.gather(*self.active_requests.values(), *inflight_tasks, return_exceptions=True)
+        self.inflight_requests.clear()
+        await self.embedding_batcher.close()
         
         # Закрываем сессию
         if self.session:
@@ -123,16 +189,60 @@ class ConcurrentOllamaManager:
         logger.info("ConcurrentOllamaManager остановлен")
     
     async def process_request(self, request: LLMRequest) -> LLMResponse:
-        """Обработка запроса к Ollama"""
+        """Обработка запроса к Ollama
+        
+        Одинаковые запросы, пришедшие пока первый (лидер) еще выполняется,
+        не идут в Ollama повторно, а ждут результата лидера. Вызов Ollama
+        выполняется в отдельной задаче: отмена одного ожидающего не отменяет
+        работу для остальных, задача отменяется только когда ушли все.
+        """
         if self.session is None:
             await self.start()
         
         # Проверяем кэш ответов
         cache_key = self._generate_response_cache_key(request)
-        if cache_key in self.response_cache:
+        cached_response = await self._get_cached_response(cache_key)
+        if cached_response is not None:
             logger.info(f"Кэш-хит для запроса {request.id}")
-            return self.response_cache[cache_key]
+            return cached_response
+        
+        flight = self.inflight_requests.get(cache_key)
+        is_leader = flight is None
+        if is_leader:
+            task = asyncio.create_task(self._execute_request(request, cache_key))
+            flight = InFlightRequest(task)
+            self.inflight_requests[cache_key] = flight
+            task.add_done_callback(lambda _: self._release_inflight(cache_key, flight))
+            self.coalescing_stats["leaders"] += 1
+        else:
+            self.coalescing_stats["coalesced"] += 1
+            logger.info(f"Запрос {request.id} объединен с выполняющимся идентичным запросом")
         
+        flight.waiters += 1
+        try:
+            response = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # Отменяем общую задачу, только если ее больше никто не ждет
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+        
+        if is_leader:
+            return response
+        return replace(response, request_id=request.id)
+    
+    def _release_inflight(self, cache_key: str, flight: InFlightRequest):
+        """Снятие завершившегося запроса с учета single-flight"""
+        if self.inflight_requests.get(cache_key) is flight:
+            del self.inflight_requests[cache_key]
+        # Исключение уже доставлено ожидающим; помечаем его как полученное
+        if not flight.task.cancelled():
+            flight.task.exception()
+    
+    async def _execute_request(self, request: LLMRequest, cache_key: str) -> LLMResponse:
+        """Выполнение запроса к Ollama под семафором"""
         # Получаем семафор для ограничения конкурентности
         async with self.semaphore:
             start_time = time.time()
@@ -154,7 +264,7 @@ class ConcurrentOllamaManager:
                 )
                 
                 # Кэшируем ответ
-                self.response_cache[cache_key] = response
+                await self._store_response(cache_key, response)
                 
                 # Обновляем метрики
                 self.load_monitor.record_request(response_time, success=True)
@@ -162,6 +272,9 @@ class ConcurrentOllamaManager:
                 logger.info(f"Запрос {request.id} обработан за {response_time:.2f}s")
                 return response
                 
+            except asyncio.CancelledError:
+                logger.info(f"Запрос {request.id} отменен")
+                raise
             except Exception as e:
                 response_time = time.time() - start_time
                 self.load_monitor.record_request(response_time, success=False)
@@ -189,42 +302,144 @@ class ConcurrentOllamaManager:
         response = await self.process_request(request)
         return response.response
     
+    async def _get_cached_response(self, cache_key: str) -> Optional[LLMResponse]:
+        """Поиск ответа в L1, затем в L2 кэше"""
+        response = await self.response_cache.get(cache_key)
+        if response is not None or self.l2_cache is None:
+            return response
+        
+        response = await self.l2_cache.get_response(cache_key)
+        if response is not None:
+            self.l2_stats["hits"] += 1
+            await self.response_cache.set(cache_key, response, self.config.response_cache_ttl)
+        else:
+            self.l2_stats["misses"] += 1
+        return response
+    
+    async def _store_response(self, cache_key: str, response: LLMResponse):
+        """Сохранение ответа в L1 и L2 кэши"""
+        await self.response_cache.set(cache_key, response, self.config.response_cache_ttl)
+        self._response_keys[response.request_id] = cache_key
+        while len(self._response_keys) > self.config.response_cache_max_items:
+            self._response_keys.popitem(last=False)
+        
+        if self.l2_cache is not None:
+            await self.l2_cache.cache_response(cache_key, response, ttl=self.config.response_cache_ttl)
+    
     async def get_embedding(self, text: str, llm_model: str = "qwen2.5:7b-instruct-turbo") -> List[float]:
-        """Получение эмбеддинга для текста"""
-        # Проверяем кэш эмбеддингов
-        cache_key = f"{llm_model}:{hash(text)}"
-        if cache_key in self.embedding_cache:
-            return self.embedding_cache[cache_key]
+        """Получение эмбеддинга для текста
         
-        if self.session is None:
-            await self.start()
+        Одиночные вызовы идут через микро-батчер, поэтому конкурентные
+        запросы эмбеддингов объединяются в пакетные вызовы Ollama.
+        """
+        embeddings = await self.get_embeddings([text], llm_model)
+        return embeddings[0]
+    
+    async def get_embeddings(self, texts: List[str], llm_model: str = "qwen2.5:7b-instruct-turbo") -> List[List[float]]:
+        """Получение эмбеддингов для списка текстов (порядок сохраняется)"""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        
+        # Проверяем кэш эмбеддингов (L1, затем L2); одинаковые тексты ищем один раз
+        positions: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            positions.setdefault(text, []).append(i)
         
+        missing: List[str] = []
+        for text in positions:
+            cached = await self.embedding_cache.get(self._generate_embedding_cache_key(text, llm_model))
+            if cached is None:
+                missing.append(text)
+                continue
+            for i in positions[text]:
+                results[i] = cached.tolist()
+        
+        # Промахи L1 читаются из L2 одним запросом
+        if missing and self.l2_cache is not None:
+            l2_embeddings = await self.l2_cache.get_embeddings(missing, model=llm_model)
+            still_missing = []
+            for text, embedding in zip(missing, l2_embeddings):
+                if not embedding:
+                    self.l2_stats["misses"] += 1
+                    still_missing.append(text)
+                    continue
+                self.l2_stats["hits"] += 1
+                await self._store_embedding(self._generate_embedding_cache_key(text, llm_model), embedding)
+                for i in positions[text]:
+                    results[i] = embedding
+            missing = still_missing
+        
+        if missing:
+            if self.session is None:
+                await self.start()
+            
+            embeddings = await self.embedding_batcher.embed(missing, llm_model)
+            for text, embedding in zip(missing, embeddings):
+                for i in positions[text]:
+                    results[i] = embedding
+        
+        return results
+    
+    async def _embed_batch(self, llm_model: str, texts: List[str]) -> List[List[float]]:
+        """Пакетный вызов эмбеддингов Ollama (вызывается микро-батчером)"""
         async with self.semaphore:
             try:
-                # Вызываем API эмбеддингов Ollama
-                url = f"{self.config.base_url}/api/embeddings"
-                payload = {
-                    "model": llm_model,
-                    "prompt": text
-                }
-                
-                async with self.session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        embedding = data.get("embedding", [])
-                        
-                        # Кэшируем эмбеддинг
-                        self.embedding_cache[cache_key] = embedding
-                        
-                        logger.info(f"Эмбеддинг получен для текста длиной {len(text)}")
-                        return embedding
-                    else:
-                        error_text = await response.text()
-                        raise Exception(f"Ошибка получения эмбеддинга: {response.status} - {error_text}")
-            
+                embeddings = await self._call_ollama_embed(llm_model, texts)
             except Exception as e:
-                logger.error(f"Ошибка получения эмбеддинга: {e}")
+                logger.error(f"Ошибка получения эмбеддингов: {e}")
                 raise
+        
+        # Кэшируем эмбеддинги (L1 и L2)
+        for text, embedding in zip(texts, embeddings):
+            await self._store_embedding(self._generate_embedding_cache_key(text, llm_model), embedding)
+        if self.l2_cache is not None:
+            await self.l2_cache.cache_embeddings(
+                {text: emb for text, emb in zip(texts, embeddings) if emb},
+                ttl=self.config.embedding_cache_ttl,
+                model=llm_model
+            )
+        
+        logger.info(f"Получено {len(texts)} эмбеддингов одним пакетом")
+        return embeddings
+    
+    async def _call_ollama_embed(self, llm_model: str, texts: List[str]) -> List[List[float]]:
+        """Вызов API эмбеддингов Ollama
+        
+        Используется пакетный /api/embed; для старых версий Ollama без него
+        выполняется откат на поштучный /api/embeddings.
+        """
+        if self._batch_embed_supported:
+            url = f"{self.config.base_url}/api/embed"
+            payload = {"model": llm_model, "input": texts, "keep_alive": self.config.keep_alive}
+            async with self.session.post(url, json=payload) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data.get("embeddings", [])
+                error_text = await response.text()
+                if response.status != 404 or not is_missing_endpoint(error_text):
+                    # 404 с телом ошибки - неизвестная модель, откат не поможет
+                    raise Exception(f"Ошибка получения эмбеддингов: {response.status} - {error_text}")
+            logger.warning("Ollama не поддерживает /api/embed, используем /api/embeddings")
+            self._batch_embed_supported = False
+        
+        url = f"{self.config.base_url}/api/embeddings"
+        embeddings = []
+        for text in texts:
+            async with self.session.post(url, json={"model": llm_model, "prompt": text}) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Ошибка получения эмбеддинга: {response.status} - {error_text}")
+                data = await response.json()
+                embeddings.append(data.get("embedding", []))
+        return embeddings
+    
+    async def _store_embedding(self, cache_key: str, embedding: List[float]):
+        """Сохранение эмбеддинга в L1 кэш в компактном виде (float32)"""
+        if embedding:
+            await self.embedding_cache.set(
+                cache_key,
+                np.asarray(embedding, dtype=np.float32),
+                self.config.embedding_cache_ttl
+            )
     
     async def get_response(self, request_id: str) -> Optional[LLMResponse]:
         """Получение ответа по ID запроса"""
@@ -243,9 +458,9 @@ class ConcurrentOllamaManager:
                 del self.active_requests[request_id]
         
         # Проверяем кэш
-        for response in self.response_cache.values():
-            if response.request_id == request_id:
-                return response
+        cache_key = self._response_keys.get(request_id)
+        if cache_key is not None:
+            return await self.response_cache.get(cache_key)
         
         return None
     
@@ -280,10 +495,12 @@ class ConcurrentOllamaManager:
                 error_text = await response.text()
                 raise Exception(f"Ошибка API Ollama: {response.status} - {error_text}")
     
+    def _generate_embedding_cache_key(self, text: str, llm_model: str) -> str:
+        """Генерация ключа кэша для эмбеддинга"""
+        return hashlib.md5(f"{llm_model}:{text}".encode()).hexdigest()
+    
     def _generate_response_cache_key(self, request: LLMRequest) -> str:
         """Генерация ключа кэша для ответа"""
-        import hashlib
-        
         key_parts = [
             request.prompt,
             request.llm_model,
@@ -334,20 +551,31 @@ class ConcurrentOllamaManager:
     
     def get_metrics(self) -> Dict[str, Any]:
         """Получение метрик менеджера"""
+        leaders = self.coalescing_stats["leaders"]
+        coalesced = self.coalescing_stats["coalesced"]
         return {
             "active_requests": len(self.active_requests),
+            "inflight_unique_requests": len(self.inflight_requests),
+            "coalesced_requests": coalesced,
+            "coalescing_rate": coalesced / (leaders + coalesced) if (leaders + coalesced) > 0 else 0.0,
             "response_cache_size": len(self.response_cache),
             "embedding_cache_size": len(self.embedding_cache),
+            "response_cache": self.response_cache.get_stats(),
+            "embedding_cache": self.embedding_cache.get_stats(),
+            "l2_cache_hits": self.l2_stats["hits"],
+            "l2_cache_misses": self.l2_stats["misses"],
+            "embedding_batching": self.embedding_batcher.get_stats(),
             "avg_response_time": self.load_monitor.get_avg_response_time(),
             "success_rate": self.load_monitor.get_success_rate(),
             "uptime": self.load_monitor.get_uptime(),
             "total_requests": self.load_monitor.success_count + self.load_monitor.error_count
         }
     
-    def clear_cache(self):
-        """Очистка кэшей"""
-        self.response_cache.clear()
-        self.embedding_cache.clear()
+    async def clear_cache(self):
+        """Очистка локальных кэшей (L2 в Redis не затрагивается)"""
+        await self.response_cache.clear()
+        await self.embedding_cache.clear()
+        self._response_keys.clear()
         logger.info("Кэши очищены")
     
     async def list_models(self) -> List[str]:
@@ -6,7 +6,7 @@ import asyncio
 import logging
 import json
 import time
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import hashlib
@@ -16,9 +16,24 @@ import redis.asyncio as redis
 from redis.asyncio import Redis
 
 from .types import LLMResponse
+from .vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
+# KEYS[1] - блоб векторного индекса, KEYS[2] - его версия
+# ARGV: блоб, версия, на которой основан индекс реплики
+PERSIST_INDEX_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('SET', KEYS[2], tonumber(ARGV[2]) + 1)
+return 1
+"""
+
+# Попыток сохранить индекс, если его одновременно сохраняют другие реплики
+VECTOR_INDEX_PERSIST_ATTEMPTS = 3
+
 @dataclass
 class CacheConfig:
     """Конфигурация кэша"""
@@ -28,6 +43,10 @@ class CacheConfig:
     embedding_ttl: int = 86400  # 24 часа
     response_ttl: int = 1800  # 30 минут
     knowledge_base_ttl: int = 604800  # 1 неделя
+    vector_index_key: str = "knowledge_vector_index"
+    vector_index_persist_interval: float = 60.0  # секунд между сохранениями индекса
+    vector_index_nprobe: int = 8
+    pipeline_batch_size: int = 1000  # команд в одном pipeline / ключей в одном SCAN
 
 @dataclass
 class CachedDocument:
@@ -41,10 +60,38 @@ class CachedDocument:
 class DistributedCache:
     """Распределенный кэш для RAG операций"""
     
-    def __init__(self, redis_url: str = "redis://redis:6379", config: Optional[CacheConfig] = None):
+    def __init__(
+        self,
+        redis_url: str = "redis://redis:6379",
+        config: Optional[CacheConfig] = None,
+        embedding_function: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+        embedding_model: Optional[str] = None
+    ):
         self.config = config or CacheConfig(redis_url=redis_url)
         self.redis: Optional[Redis] = None
         
+        # Функция получения эмбеддинга для документов и запросов без готового вектора;
+        # embedding_model - ее модель, входит в ключи кэша эмбеддингов базы знаний
+        self.embedding_function = embedding_function
+        self.embedding_model = embedding_model
+        
+        # Векторный индекс базы знаний (восстанавливается из Redis лениво)
+        self.vector_index = VectorIndex(nprobe=self.config.vector_index_nprobe)
+        self._vector_index_loaded = False
+        self._vector_index_load_lock = asyncio.Lock()
+        self._vector_index_dirty = False
+        self._vector_index_persisted_at = 0.0
+        # Фоновое обучение IVF на копии индекса; изменения, сделанные за
+        # время обучения, журналируются и накатываются на обученную копию
+        self._vector_index_training: Optional[asyncio.Task] = None
+        self._vector_index_log: Optional[List[Tuple[str, List[str], Optional[List[List[float]]]]]] = None
+        # Версия сохраненного блоба, на которой основан индекс, и изменения
+        # после нее: при конфликте с другой репликой они накатываются на
+        # сохраненный ею индекс
+        self._vector_index_version = 0
+        self._vector_index_changes: List[Tuple[str, List[str], Optional[List[List[float]]]]] = []
+        self._vector_index_persist_lock = asyncio.Lock()
+        
         # Локальный кэш для быстрого доступа
         self.local_cache: Dict[str, Any] = {}
         self.local_cache_ttl: Dict[str, float] = {}
@@ -79,6 +126,9 @@ class DistributedCache:
     async def disconnect(self):
         """Отключение от Redis"""
         if self.redis:
+            await self._cancel_vector_index_training()
+            if self._vector_index_dirty:
+                await self.persist_vector_index()
             await self.redis.close()
             self.redis = None
             logger.info("Соединение с Redis закрыто")
@@ -144,8 +194,13 @@ class DistributedCache:
             if cached_data:
                 response_data = json.loads(cached_data)
                 
+                # Ответы сериализуются в формате LLMResponse архитектуры (поля
+                # response/used_model), а не .types.LLMResponse; импорт
+                # отложен из-за циклической зависимости модулей
+                from .centralized_architecture import LLMResponse as ArchitectureResponse
+                
                 # Создаем объект ответа
-                response = LLMResponse(
+                response = ArchitectureResponse(
                     request_id=response_data["request_id"],
                     response=response_data["response"],
                     used_model=response_data["used_model"],
@@ -172,14 +227,70 @@ class DistributedCache:
             self.cache_misses += 1
             return None
     
-    async def cache_embedding(self, text: str, embedding: List[float], ttl: Optional[int] = None) -> bool:
+    async def publish_response(self, request_id: str, response: Optional[LLMResponse], error: Optional[str] = None) -> bool:
+        """Сохранение ответа по ID запроса и уведомление ожидающих в других процессах"""
+        try:
+            if response is not None and not await self.cache_response(request_id, response):
+                return False
+            if self.redis is None:
+                await self.connect()
+
+            payload = {"status": "completed"} if error is None else {"status": "failed", "error": error}
+            await self.redis.publish(f"response_ready:{request_id}", json.dumps(payload))
+            return True
+
+        except Exception as e:
+            logger.error(f"Ошибка публикации ответа {request_id}: {e}")
+            return False
+
+    async def wait_for_response(self, request_id: str, timeout: float) -> Optional[LLMResponse]:
+        """Ожидание ответа, который выполняется в другом процессе
+
+        Подписка на канал response_ready:{request_id} оформляется до
+        проверки кэша, поэтому уведомление между проверкой и ожиданием не
+        теряется. Ожидание блокирующее (без опроса Redis по таймеру).
+        """
+        if self.redis is None:
+            await self.connect()
+
+        channel = f"response_ready:{request_id}"
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            response = await self.get_response(request_id)
+            if response is not None:
+                return response
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while (remaining := deadline - loop.time()) > 0:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                if message is None:
+                    continue
+                payload = json.loads(message["data"])
+                if payload.get("status") != "completed":
+                    logger.error(f"Запрос {request_id} завершился ошибкой: {payload.get('error')}")
+                    return None
+                return await self.get_response(request_id)
+            return None
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    async def cache_embedding(
+        self,
+        text: str,
+        embedding: List[float],
+        ttl: Optional[int] = None,
+        model: Optional[str] = None
+    ) -> bool:
         """Кэширование эмбеддинга"""
         try:
             if self.redis is None:
                 await self.connect()
             
             ttl = ttl or self.config.embedding_ttl
-            key = self._generate_embedding_key(text)
+            key = self._generate_embedding_key(text, model)
             
             # Сериализуем эмбеддинг
             embedding_data = {
@@ -202,13 +313,13 @@ class DistributedCache:
             logger.error(f"Ошибка кэширования эмбеддинга: {e}")
             return False
     
-    async def get_embedding(self, text: str) -> Optional[List[float]]:
+    async def get_embedding(self, text: str, model: Optional[str] = None) -> Optional[List[float]]:
         """Получение кэшированного эмбеддинга"""
         try:
             if self.redis is None:
                 await self.connect()
             
-            key = self._generate_embedding_key(text)
+            key = self._generate_embedding_key(text, model)
             cached_data = await self.redis.get(f"embedding:{key}")
             
             if cached_data:
@@ -225,26 +336,106 @@ class DistributedCache:
             self.cache_misses += 1
             return None
     
+    async def get_embeddings(self, texts: List[str], model: Optional[str] = None) -> List[Optional[List[float]]]:
+        """Получение кэшированных эмбеддингов списка текстов одним MGET (None для промахов)"""
+        if not texts:
+            return []
+        try:
+            if self.redis is None:
+                await self.connect()
+            
+            cached = await self.redis.mget(
+                [f"embedding:{self._generate_embedding_key(text, model)}" for text in texts]
+            )
+            embeddings = [json.loads(data)["embedding"] if data else None for data in cached]
+            hits = sum(1 for embedding in embeddings if embedding is not None)
+            self.cache_hits += hits
+            self.cache_misses += len(texts) - hits
+            return embeddings
+            
+        except Exception as e:
+            logger.error(f"Ошибка пакетного получения кэшированных эмбеддингов: {e}")
+            self.cache_misses += len(texts)
+            return [None] * len(texts)
+    
+    async def cache_embeddings(
+        self,
+        embeddings: Dict[str, List[float]],
+        ttl: Optional[int] = None,
+        model: Optional[str] = None
+    ) -> bool:
+        """Пакетное кэширование эмбеддингов одним pipeline"""
+        if not embeddings:
+            return True
+        try:
+            if self.redis is None:
+                await self.connect()
+            
+            ttl = ttl or self.config.embedding_ttl
+            created_at = datetime.utcnow().isoformat()
+            
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for text, embedding in embeddings.items():
+                    embedding_data = {
+                        "text": text,
+                        "embedding": embedding,
+                        "created_at": created_at
+                    }
+                    pipe.set(
+                        f"embedding:{self._generate_embedding_key(text, model)}",
+                        json.dumps(embedding_data),
+                        ex=ttl
+                    )
+                await pipe.execute()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Ошибка пакетного кэширования эмбеддингов: {e}")
+            return False
+    
     async def add_to_knowledge_base(self, documents: List[Dict[str, Any]], ttl: Optional[int] = None) -> bool:
-        """Добавление документов в базу знаний"""
+        """Добавление документов в базу знаний
+        
+        Документы записываются пакетами через один pipeline (SET EX + SADD),
+        а недостающие эмбеддинги читаются одним MGET, так что загрузка
+        тысяч документов занимает несколько round-trip вместо 2N.
+        """
         try:
             if self.redis is None:
                 await self.connect()
+            if not await self._ensure_vector_index_loaded():
+                # Писать в пустой индекс нельзя: его сохранение затрет блоб в Redis
+                return False
             
             ttl = ttl or self.config.knowledge_base_ttl
-            
-            for doc in documents:
-                doc_id = doc.get("id", hashlib.md5(doc["content"].encode()).hexdigest())
+            batch_size = self.config.pipeline_batch_size
+            
+            for start in range(0, len(documents), batch_size):
+                batch = documents[start:start + batch_size]
+                doc_ids = [
+                    doc.get("id", hashlib.md5(doc["content"].encode()).hexdigest())
+                    for doc in batch
+                ]
                 
-                # Кэшируем документ
-                await self.redis.setex(
-                    f"knowledge:{doc_id}",
-                    ttl,
-                    json.dumps(doc)
-                )
+                # Кэшируем документы и индекс одним pipeline
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for doc_id, doc in zip(doc_ids, batch):
+                        # Эмбеддинг хранится в векторном индексе, а не в JSON документа
+                        stored_doc = {k: v for k, v in doc.items() if k != "embedding"}
+                        pipe.set(f"knowledge:{doc_id}", json.dumps(stored_doc), ex=ttl)
+                    pipe.sadd("knowledge_index", *doc_ids)
+                    await pipe.execute()
                 
-                # Добавляем в индекс для поиска
-                await self.redis.sadd("knowledge_index", doc_id)
+                # Инкрементально обновляем векторный индекс
+                embeddings = await self._embed_documents(batch)
+                index_ids = [doc_id for doc_id, emb in zip(doc_ids, embeddings) if emb]
+                if index_ids:
+                    self._index_add(index_ids, [emb for emb in embeddings if emb])
+            
+            if self._vector_index_dirty and (
+                time.time() - self._vector_index_persisted_at >= self.config.vector_index_persist_interval
+            ):
+                await self.persist_vector_index()
             
             logger.info(f"Добавлено {len(documents)} документов в базу знаний")
             return True
@@ -254,55 +445,326 @@ class DistributedCache:
             return False
     
     async def search_knowledge_base(self, query: str, limit: int = 5) -> List[str]:
-        """Поиск в базе знаний"""
+        """Поиск в базе знаний
+        
+        Основной путь - ANN поиск по векторному индексу с одним MGET
+        за содержимым найденных документов. Если индекс пуст или для
+        запроса нет эмбеддинга, используется поиск по ключевым словам.
+        """
         try:
             if self.redis is None:
                 await self.connect()
+            if await self._ensure_vector_index_loaded() and len(self.vector_index) > 0:
+                query_embedding = await self._embed_text(query)
+                if query_embedding:
+                    results = await self._vector_search(query_embedding, limit)
+                    if results:
+                        return results
             
-            # Получаем все документы из индекса
-            doc_ids = await self.redis.smembers("knowledge_index")
-            
-            if not doc_ids:
-                return []
-            
-            # Получаем документы
-            documents = []
-            for doc_id in doc_ids:
-                doc_data = await self.redis.get(f"knowledge:{doc_id}")
-                if doc_data:
-                    doc = json.loads(doc_data)
-                    documents.append(doc)
-            
-            # Простой поиск по ключевым словам (в реальной системе здесь будет векторный поиск)
-            query_words = query.lower().split()
-            relevant_docs = []
-            
-            for doc in documents:
-                content = doc.get("content", "").lower()
-                score = sum(1 for word in query_words if word in content)
-                
-                if score > 0:
-                    relevant_docs.append((score, doc["content"]))
-            
-            # Сортируем по релевантности и возвращаем топ результаты
-            relevant_docs.sort(key=lambda x: x[0], reverse=True)
-            
-            return [doc[1] for doc in relevant_docs[:limit]]
+            return await self._keyword_search(query, limit)
             
         except Exception as e:
             logger.error(f"Ошибка поиска в базе знаний: {e}")
             return []
     
+    async def _vector_search(self, query_embedding: List[float], limit: int) -> List[str]:
+        """Поиск top-k документов по векторному индексу"""
+        hits = self.vector_index.search(query_embedding, limit)
+        if not hits:
+            return []
+        
+        doc_ids = [doc_id for doc_id, _ in hits]
+        docs_data = await self.redis.mget([f"knowledge:{doc_id}" for doc_id in doc_ids])
+        
+        results = []
+        expired_ids = []
+        for doc_id, doc_data in zip(doc_ids, docs_data):
+            if doc_data is None:
+                expired_ids.append(doc_id)
+                continue
+            results.append(json.loads(doc_data).get("content", ""))
+        
+        # Документы с истекшим TTL удаляем из индекса
+        if expired_ids:
+            self._index_remove(expired_ids)
+            await self.redis.srem("knowledge_index", *expired_ids)
+        
+        return results
+    
+    async def _keyword_search(self, query: str, limit: int) -> List[str]:
+        """Резервный поиск по ключевым словам"""
+        # Получаем все документы из индекса
+        doc_ids = await self.redis.smembers("knowledge_index")
+        
+        if not doc_ids:
+            return []
+        
+        # Получаем документы пакетами через MGET
+        keys = [
+            f"knowledge:{doc_id.decode() if isinstance(doc_id, bytes) else doc_id}"
+            for doc_id in doc_ids
+        ]
+        documents = []
+        batch_size = self.config.pipeline_batch_size
+        for start in range(0, len(keys), batch_size):
+            for doc_data in await self.redis.mget(keys[start:start + batch_size]):
+                if doc_data:
+                    documents.append(json.loads(doc_data))
+        
+        query_words = query.lower().split()
+        relevant_docs = []
+        
+        for doc in documents:
+            content = doc.get("content", "").lower()
+            score = sum(1 for word in query_words if word in content)
+            
+            if score > 0:
+                relevant_docs.append((score, doc["content"]))
+        
+        # Сортируем по релевантности и возвращаем топ результаты
+        relevant_docs.sort(key=lambda x: x[0], reverse=True)
+        
+        return [doc[1] for doc in relevant_docs[:limit]]
+    
+    async def _embed_documents(self, documents: List[Dict[str, Any]]) -> List[Optional[List[float]]]:
+        """Эмбеддинги пакета документов: готовые, затем один MGET по кэшу, затем embedding_function"""
+        embeddings: List[Optional[List[float]]] = [doc.get("embedding") for doc in documents]
+        missing = [i for i, emb in enumerate(embeddings) if not emb]
+        if not missing:
+            return embeddings
+        
+        cached = await self.get_embeddings([documents[i]["content"] for i in missing], model=self.embedding_model)
+        
+        to_generate = []
+        for i, embedding in zip(missing, cached):
+            if embedding:
+                embeddings[i] = embedding
+            else:
+                to_generate.append(i)
+        
+        if not to_generate or self.embedding_function is None:
+            return embeddings
+        
+        # Вызовы идут конкурентно, чтобы embedding_function могла объединить их в пакет
+        results = await asyncio.gather(
+            *(self.embedding_function(documents[i]["content"]) for i in to_generate),
+            return_exceptions=True
+        )
+        
+        generated: Dict[str, List[float]] = {}
+        for i, result in zip(to_generate, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Не удалось получить эмбеддинг для базы знаний: {result}")
+                continue
+            embeddings[i] = result
+            if result:
+                generated[documents[i]["content"]] = result
+                self.embedding_generations += 1
+        
+        await self.cache_embeddings(generated, model=self.embedding_model)
+        return embeddings
+    
+    async def _embed_text(self, text: str) -> Optional[List[float]]:
+        """Эмбеддинг текста: сначала из кэша, затем через embedding_function"""
+        embedding = await self.get_embedding(text, model=self.embedding_model)
+        if embedding:
+            return embedding
+        
+        if self.embedding_function is None:
+            return None
+        
+        try:
+            embedding = await self.embedding_function(text)
+        except Exception as e:
+            logger.warning(f"Не удалось получить эмбеддинг для базы знаний: {e}")
+            return None
+        
+        if embedding:
+            self.embedding_generations += 1
+            await self.cache_embedding(text, embedding, model=self.embedding_model)
+        return embedding
+    
+    async def _ensure_vector_index_loaded(self) -> bool:
+        """Восстановление векторного индекса из Redis при первом обращении
+        
+        Флаг загрузки ставится только после успешного чтения; конкурентные
+        вызовы ждут одну загрузку под блокировкой. Если Redis недоступен,
+        возвращается False и индекс остается незагруженным.
+        """
+        if self._vector_index_loaded:
+            return True
+        
+        async with self._vector_index_load_lock:
+            if self._vector_index_loaded:
+                return True
+            try:
+                blob, version = await self.redis.mget(
+                    [self.config.vector_index_key, self._vector_index_version_key]
+                )
+            except Exception as e:
+                logger.error(f"Ошибка чтения векторного индекса из Redis: {e}")
+                return False
+            
+            self._vector_index_version = int(version or 0)
+            if blob:
+                try:
+                    index = await asyncio.to_thread(VectorIndex.from_bytes, blob)
+                    index.nprobe = self.config.vector_index_nprobe
+                    self.vector_index = index
+                    self._vector_index_persisted_at = time.time()
+                    logger.info(f"Векторный индекс восстановлен из Redis: {len(self.vector_index)} документов")
+                except ValueError as e:
+                    # Несовместимый блоб: индекс будет построен заново
+                    logger.error(f"Ошибка восстановления векторного индекса: {e}")
+            
+            self._vector_index_loaded = True
+            return True
+    
+    def _index_add(self, ids: List[str], vectors: List[List[float]]):
+        """Добавление в индекс; обучение IVF уходит в фоновую задачу"""
+        self.vector_index.add(ids, vectors, train=False)
+        self._vector_index_dirty = True
+        self._vector_index_changes.append(("add", ids, vectors))
+        if self._vector_index_log is not None:
+            self._vector_index_log.append(("add", ids, vectors))
+        elif self.vector_index.needs_training:
+            self._vector_index_training = asyncio.create_task(self._train_vector_index())
+    
+    def _index_remove(self, ids: List[str]):
+        """Удаление из индекса (с записью в журнал, если идет обучение)"""
+        self.vector_index.remove(ids)
+        self._vector_index_dirty = True
+        self._vector_index_changes.append(("remove", ids, None))
+        if self._vector_index_log is not None:
+            self._vector_index_log.append(("remove", ids, None))
+    
+    async def _train_vector_index(self):
+        """Обучение IVF на копии индекса в потоке, без блокировки event loop
+        
+        Поиск и добавление продолжают работать с текущим индексом; по
+        окончании обучения накопленные изменения накатываются на копию
+        (новые векторы приписываются к кластерам инкрементально), и копия
+        заменяет индекс.
+        """
+        snapshot = self.vector_index.copy()
+        self._vector_index_log = []
+        try:
+            await asyncio.to_thread(snapshot.train)
+            for operation, ids, vectors in self._vector_index_log:
+                if operation == "add":
+                    snapshot.add(ids, vectors, train=False)
+                else:
+                    snapshot.remove(ids)
+            self.vector_index = snapshot
+            self._vector_index_dirty = True
+        except Exception as e:
+            logger.error(f"Ошибка обучения векторного индекса: {e}")
+        finally:
+            self._vector_index_log = None
+            self._vector_index_training = None
+    
+    async def _cancel_vector_index_training(self):
+        """Отмена фонового обучения (результат будет отброшен)"""
+        task = self._vector_index_training
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    @property
+    def _vector_index_version_key(self) -> str:
+        return f"{self.config.vector_index_key}:version"
+    
+    async def persist_vector_index(self) -> bool:
+        """Сохранение векторного индекса в Redis одним бинарным блобом
+        
+        Сериализуется снимок индекса в потоке, event loop не блокируется.
+        Блоб версионирован: запись проходит, только если с момента загрузки
+        или прошлого сохранения его не перезаписала другая реплика. Иначе
+        сохраненный индекс загружается, на него накатываются изменения этой
+        реплики, и сохранение повторяется.
+        """
+        if not self._vector_index_loaded:
+            # Незагруженный индекс затер бы сохраненный блоб
+            return False
+        async with self._vector_index_persist_lock:
+            try:
+                if self.redis is None:
+                    await self.connect()
+                persist = self.redis.register_script(PERSIST_INDEX_SCRIPT)
+                
+                for _ in range(VECTOR_INDEX_PERSIST_ATTEMPTS):
+                    snapshot = self.vector_index.copy()
+                    version = self._vector_index_version
+                    persisted_changes = len(self._vector_index_changes)
+                    self._vector_index_dirty = False
+                    blob = await asyncio.to_thread(snapshot.to_bytes)
+                    stored = await persist(
+                        keys=[self.config.vector_index_key, self._vector_index_version_key],
+                        args=[blob, version]
+                    )
+                    if int(stored):
+                        self._vector_index_version = version + 1
+                        del self._vector_index_changes[:persisted_changes]
+                        self._vector_index_persisted_at = time.time()
+                        logger.debug(f"Векторный индекс сохранен: {len(snapshot)} документов")
+                        return True
+                    
+                    self._vector_index_dirty = True
+                    await self._merge_stored_vector_index()
+                
+                logger.warning("Векторный индекс не сохранен: его одновременно сохраняют другие реплики")
+                return False
+                
+            except Exception as e:
+                self._vector_index_dirty = True
+                logger.error(f"Ошибка сохранения векторного индекса: {e}")
+                return False
+    
+    async def _merge_stored_vector_index(self):
+        """Замена индекса сохраненным другой репликой с накатом несохраненных изменений"""
+        blob, version = await self.redis.mget(
+            [self.config.vector_index_key, self._vector_index_version_key]
+        )
+        index = VectorIndex(nprobe=self.config.vector_index_nprobe)
+        if blob:
+            try:
+                index = await asyncio.to_thread(VectorIndex.from_bytes, blob)
+                index.nprobe = self.config.vector_index_nprobe
+            except ValueError as e:
+                logger.error(f"Ошибка восстановления векторного индекса: {e}")
+        
+        # Обучение шло на заменяемом индексе; его результат больше не нужен
+        await self._cancel_vector_index_training()
+        for operation, ids, vectors in self._vector_index_changes:
+            if operation == "add":
+                index.add(ids, vectors, train=False)
+            else:
+                index.remove(ids)
+        self.vector_index = index
+        self._vector_index_version = int(version or 0)
+        logger.info(f"Векторный индекс объединен с сохраненным другой репликой: {len(index)} документов")
+        if index.needs_training:
+            self._vector_index_training = asyncio.create_task(self._train_vector_index())
+    
     async def clear_cache(self, pattern: str = "*") -> int:
         """Очистка кэша"""
         try:
             if self.redis is None:
                 await self.connect()
             
-            # Очищаем Redis
-            keys = await self.redis.keys(pattern)
-            if keys:
-                await self.redis.delete(*keys)
+            # Очищаем Redis: SCAN курсором, UNLINK пакетами (без блокирующего KEYS)
+            deleted = await self._unlink_matching(pattern)
+            
+            # Сбрасываем векторный индекс, если очищается база знаний
+            if pattern == "*" or pattern.startswith("knowledge"):
+                await self._cancel_vector_index_training()
+                self.vector_index = VectorIndex(nprobe=self.config.vector_index_nprobe)
+                self._vector_index_dirty = False
+                self._vector_index_changes = []
+                self._vector_index_version = 0
             
             # Очищаем локальный кэш
             local_keys = [k for k in self.local_cache.keys() if pattern == "*" or pattern in k]
@@ -311,13 +773,33 @@ class DistributedCache:
                 if key in self.local_cache_ttl:
                     del self.local_cache_ttl[key]
             
-            logger.info(f"Кэш очищен, удалено {len(keys)} ключей")
-            return len(keys)
+            logger.info(f"Кэш очищен, удалено {deleted} ключей")
+            return deleted
             
         except Exception as e:
             logger.error(f"Ошибка очистки кэша: {e}")
             return 0
     
+    async def _unlink_matching(self, pattern: str) -> int:
+        """Удаление ключей по паттерну через SCAN и пакетный UNLINK"""
+        deleted = 0
+        batch = []
+        async for key in self.redis.scan_iter(match=pattern, count=self.config.pipeline_batch_size):
+            batch.append(key)
+            if len(batch) >= self.config.pipeline_batch_size:
+                deleted += await self.redis.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += await self.redis.unlink(*batch)
+        return deleted
+    
+    async def _count_matching(self, pattern: str) -> int:
+        """Подсчет ключей по паттерну через SCAN"""
+        count = 0
+        async for _ in self.redis.scan_iter(match=pattern, count=self.config.pipeline_batch_size):
+            count += 1
+        return count
+    
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Получение статистики кэша"""
         try:
@@ -328,19 +810,20 @@ class DistributedCache:
             info = await self.redis.info()
             
             # Подсчитываем ключи по типам
-            response_keys = await self.redis.keys("response:*")
-            embedding_keys = await self.redis.keys("embedding:*")
-            knowledge_keys = await self.redis.keys("knowledge:*")
+            response_count = await self._count_matching("response:*")
+            embedding_count = await self._count_matching("embedding:*")
+            knowledge_count = await self._count_matching("knowledge:*")
             
             return {
                 "redis_connected": True,
                 "redis_memory_usage": info.get("used_memory_human", "N/A"),
                 "redis_keyspace_hits": info.get("keyspace_hits", 0),
                 "redis_keyspace_misses": info.get("keyspace_misses", 0),
-                "response_cache_size": len(response_keys),
-                "embedding_cache_size": len(embedding_keys),
-                "knowledge_base_size": len(knowledge_keys),
+                "response_cache_size": response_count,
+                "embedding_cache_size": embedding_count,
+                "knowledge_base_size": knowledge_count,
                 "local_cache_size": len(self.local_cache),
+                "vector_index": self.vector_index.get_stats(),
                 "cache_hits": self.cache_hits,
                 "cache_misses": self.cache_misses,
                 "hit_rate": self.cache_hits / (self.cache_hits + self.cache_misses) if (self.cache_hits + self.cache_misses) > 0 else 0
@@ -381,8 +864,10 @@ class DistributedCache:
                 "error": str(e)
             }
     
-    def _generate_embedding_key(self, text: str) -> str:
-        """Генерация ключа для эмбеддинга"""
+    def _generate_embedding_key(self, text: str, model: Optional[str] = None) -> str:
+        """Генерация ключа для эмбеддинга (с учетом модели, если она задана)"""
+        if model:
+            text = f"{model}:{text}"
         return hashlib.md5(text.encode()).hexdigest()
     
     def _cleanup_local_cache(self):
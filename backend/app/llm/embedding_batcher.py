@@ -0,0 +1,145 @@
+"""
+Микро-батчинг запросов эмбеддингов к Ollama
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# (model, texts) -> embeddings в том же порядке
+BatchEmbedFunction = Callable[[str, List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingBatcher:
+    """Объединение конкурентных запросов эмбеддингов в пакетные вызовы
+
+    Вызовы embed() в пределах окна batch_window (или до max_batch_size
+    уникальных текстов) собираются в один пакет на модель. Одинаковые
+    тексты внутри пакета отправляются один раз, результат раздается
+    всем ожидающим через futures. Отмена одного вызова не затрагивает
+    остальных ожидающих того же текста; future отменяется, только когда
+    его больше никто не ждет.
+    """
+
+    def __init__(
+        self,
+        embed_batch: BatchEmbedFunction,
+        max_batch_size: int = 64,
+        batch_window: float = 0.005
+    ):
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+
+        # model -> text -> future
+        self._pending: Dict[str, Dict[str, asyncio.Future]] = {}
+        # future -> число ожидающих вызовов embed()
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: set = set()
+
+        self.stats = {"texts": 0, "deduplicated": 0, "batches": 0, "batched_texts": 0}
+
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """Эмбеддинги для списка текстов (порядок сохраняется)"""
+        if not texts:
+            return []
+        futures = [self._enqueue(text, model) for text in texts]
+        for future in futures:
+            self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return list(await asyncio.gather(*(asyncio.shield(future) for future in futures)))
+        finally:
+            for future in futures:
+                self._release(future)
+
+    def _release(self, future: asyncio.Future):
+        """Снятие ожидающего; future без ожидающих отменяется"""
+        waiters = self._waiters[future] - 1
+        if waiters:
+            self._waiters[future] = waiters
+            return
+        del self._waiters[future]
+        if not future.done():
+            future.cancel()
+
+    def _enqueue(self, text: str, model: str) -> asyncio.Future:
+        """Постановка текста в текущий пакет модели"""
+        self.stats["texts"] += 1
+        pending = self._pending.setdefault(model, {})
+
+        future = pending.get(text)
+        if future is not None:
+            self.stats["deduplicated"] += 1
+            return future
+
+        future = asyncio.get_running_loop().create_future()
+        pending[text] = future
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(model)
+        elif model not in self._flush_handles:
+            self._flush_handles[model] = asyncio.get_running_loop().call_later(
+                self.batch_window, self._flush, model
+            )
+        return future
+
+    def _flush(self, model: str):
+        """Отправка накопленного пакета модели"""
+        handle = self._flush_handles.pop(model, None)
+        if handle is not None:
+            handle.cancel()
+        batch = self._pending.pop(model, None)
+        if not batch:
+            return
+        task = asyncio.create_task(self._run_batch(model, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, model: str, batch: Dict[str, asyncio.Future]):
+        """Выполнение пакетного вызова и раздача результатов"""
+        # Тексты, которые никто уже не ждет, не отправляем
+        batch = {text: future for text, future in batch.items() if not future.done()}
+        if not batch:
+            return
+        texts = list(batch.keys())
+        self.stats["batches"] += 1
+        self.stats["batched_texts"] += len(texts)
+        try:
+            embeddings = await self.embed_batch(model, texts)
+            if len(embeddings) != len(texts):
+                raise ValueError(
+                    f"Ollama вернула {len(embeddings)} эмбеддингов на {len(texts)} текстов"
+                )
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка пакетного получения эмбеддингов ({len(texts)} текстов): {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, embedding in zip(texts, embeddings):
+            future = batch[text]
+            if not future.done():
+                future.set_result(embedding)
+
+    async def close(self):
+        """Отправка оставшихся пакетов и ожидание их завершения"""
+        for model in list(self._pending):
+            self._flush(model)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Статистика батчинга"""
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "avg_batch_size": self.stats["batched_texts"] / batches if batches else 0.0,
+        }
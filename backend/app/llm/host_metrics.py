@@ -0,0 +1,175 @@
+"""
+Фоновый сбор метрик хоста (CPU, память, load average, сеть, диск)
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HostSample:
+    """Снимок метрик хоста"""
+    timestamp: float
+    cpu_percent: float
+    cpu_count: int
+    memory_percent: float
+    memory_available: int  # байт
+    memory_total: int  # байт
+    load_average: Tuple[float, float, float]
+    disk_percent: float
+    net_bytes_sent: int
+    net_bytes_recv: int
+
+
+class HostMetricsSampler:
+    """Сборщик метрик хоста в фоновом потоке
+
+    Поток раз в interval секунд снимает метрики psutil без блокирующих
+    интервалов (cpu_percent считается между соседними замерами) и
+    публикует последний снимок, поэтому snapshot() не обращается к
+    системе и не блокирует event loop. Последние history замеров хранятся
+    в кольцевом буфере для расчета скоростей и трендов.
+    """
+
+    def __init__(self, interval: float = 1.0, history: int = 300, disk_path: str = "/"):
+        self.interval = interval
+        self.disk_path = disk_path
+        self._samples: Deque[HostSample] = deque(maxlen=history)
+        self._latest: Optional[HostSample] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "HostMetricsSampler":
+        """Запуск фонового потока (повторный вызов ничего не делает)"""
+        with self._lock:
+            if self.running:
+                return self
+            self._stop.clear()
+            # Первый вызов cpu_percent(None) задает точку отсчета для следующего
+            psutil.cpu_percent(interval=None)
+            self._thread = threading.Thread(target=self._run, name="host-metrics", daemon=True)
+            self._thread.start()
+        logger.info(f"Сбор метрик хоста запущен с интервалом {self.interval}s")
+        return self
+
+    def stop(self):
+        """Остановка фонового потока"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.interval + 1.0)
+        self._thread = None
+
+    def _run(self):
+        # Первый замер раньше интервала, чтобы snapshot быстро получил данные
+        wait = min(self.interval, 0.1)
+        while not self._stop.wait(wait):
+            try:
+                self._record(self.sample())
+            except Exception as e:
+                logger.error(f"Ошибка сбора метрик хоста: {e}")
+            wait = self.interval
+
+    def _record(self, sample: HostSample):
+        with self._lock:
+            self._samples.append(sample)
+            self._latest = sample
+
+    def sample(self) -> HostSample:
+        """Немедленный замер метрик (без блокирующего интервала)"""
+        memory = psutil.virtual_memory()
+        network = psutil.net_io_counters()
+        try:
+            load_average = tuple(psutil.getloadavg())
+        except (AttributeError, OSError):
+            load_average = (0.0, 0.0, 0.0)
+        try:
+            disk_percent = psutil.disk_usage(self.disk_path).percent
+        except OSError:
+            disk_percent = 0.0
+        return HostSample(
+            timestamp=time.time(),
+            cpu_percent=psutil.cpu_percent(interval=None),
+            cpu_count=psutil.cpu_count() or 1,
+            memory_percent=memory.percent,
+            memory_available=memory.available,
+            memory_total=memory.total,
+            load_average=load_average,
+            disk_percent=disk_percent,
+            net_bytes_sent=network.bytes_sent if network else 0,
+            net_bytes_recv=network.bytes_recv if network else 0
+        )
+
+    def snapshot(self) -> HostSample:
+        """Последний снимок; до первого фонового замера снимается сразу"""
+        latest = self._latest
+        if latest is None:
+            latest = self.sample()
+            self._record(latest)
+        return latest
+
+    def samples(self, window: Optional[float] = None) -> List[HostSample]:
+        """Замеры за последние window секунд (все, если window не задан)"""
+        with self._lock:
+            samples = list(self._samples)
+        if window is None or not samples:
+            return samples
+        cutoff = samples[-1].timestamp - window
+        return [sample for sample in samples if sample.timestamp >= cutoff]
+
+    def average(self, field: str, window: Optional[float] = None) -> Optional[float]:
+        """Среднее значение метрики за окно"""
+        samples = self.samples(window)
+        if not samples:
+            return None
+        return sum(getattr(sample, field) for sample in samples) / len(samples)
+
+    def rate(self, field: str, window: Optional[float] = None) -> Optional[float]:
+        """Скорость роста счетчика (например, net_bytes_recv) в единицах в секунду"""
+        samples = self.samples(window)
+        if len(samples) < 2:
+            return None
+        first, last = samples[0], samples[-1]
+        elapsed = last.timestamp - first.timestamp
+        if elapsed <= 0:
+            return None
+        return (getattr(last, field) - getattr(first, field)) / elapsed
+
+    def trend(self, field: str, window: Optional[float] = None) -> Optional[float]:
+        """Наклон метрики в единицах в секунду (метод наименьших квадратов)"""
+        samples = self.samples(window)
+        if len(samples) < 2:
+            return None
+        t0 = samples[0].timestamp
+        xs = [sample.timestamp - t0 for sample in samples]
+        ys = [getattr(sample, field) for sample in samples]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        variance = sum((x - mean_x) ** 2 for x in xs)
+        if variance == 0:
+            return None
+        return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+
+# Общий сборщик процесса для роутера моделей и менеджера оптимизаций
+host_metrics = HostMetricsSampler()
+
+
+def get_host_metrics() -> HostMetricsSampler:
+    """Общий сборщик метрик хоста (запускается при первом обращении)"""
+    if not host_metrics.running:
+        host_metrics.start()
+    return host_metrics
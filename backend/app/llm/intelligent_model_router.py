@@ -8,10 +8,12 @@ import time
 from dataclasses import dataclass
 from enum import Enum
 from typing import Dict, List, Optional, Tuple, Any
-import psutil
 import aiohttp
 from concurrent.futures import ThreadPoolExecutor
 
+from .host_metrics import get_host_metrics
+from ..http_clients import get_http_clients
+
 logger = logging.getLogger(__name__)
 
 
@@ -167,9 +169,8 @@ class IntelligentModelRouter:
     async def get_system_metrics(self) -> SystemMetrics:
         """Получение метрик системы"""
         try:
-            cpu_usage = psutil.cpu_percent(interval=0.1)
-            memory = psutil.virtual_memory()
-            load_avg = psutil.getloadavg()[0] if hasattr(psutil, 'getloadavg') else 0
+            # Снимок фонового сборщика: без блокирующего замера CPU на каждый запрос
+            sample = get_host_metrics().snapshot()
             
             # Попытка получить GPU метрики (если доступно)
             gpu_usage = None
@@ -180,11 +181,11 @@ class IntelligentModelRouter:
                 pass
             
             return SystemMetrics(
-                cpu_usage=cpu_usage,
-                memory_usage=memory.percent,
+                cpu_usage=sample.cpu_percent,
+                memory_usage=sample.memory_percent,
                 gpu_usage=gpu_usage,
-                available_memory=memory.available // (1024 * 1024),  # MB
-                load_average=load_avg
+                available_memory=sample.memory_available // (1024 * 1024),  # MB
+                load_average=sample.load_average[0]
             )
         except Exception as e:
             logger.error(f"Ошибка получения метрик системы: {e}")
@@ -193,11 +194,11 @@ class IntelligentModelRouter:
     async def check_model_availability(self, model_name: str) -> bool:
         """Проверка доступности модели"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.ollama_base_url}/api/tags") as response:
-                    if response.status == 200:
-                        models = await response.json()
-                        return any(model['name'] == model_name for model in models.get('models', []))
+            session = get_http_clients().session("ollama")
+            async with session.get(f"{self.ollama_base_url}/api/tags") as response:
+                if response.status == 200:
+                    models = await response.json()
+                    return any(model['name'] == model_name for model in models.get('models', []))
             return False
         except Exception as e:
             logger.error(f"Ошибка проверки доступности модели {model_name}: {e}")
@@ -400,18 +401,18 @@ class IntelligentModelRouter:
     
     async def _make_ollama_request(self, params: Dict[str, Any]) -> str:
         """Выполнение запроса к Ollama"""
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=params,
-                timeout=aiohttp.ClientTimeout(total=60)
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result.get("response", "")
-                else:
-                    error_text = await response.text()
-                    raise Exception(f"Ollama API error: {response.status} - {error_text}")
+        session = get_http_clients().session("ollama")
+        async with session.post(
+            f"{self.ollama_base_url}/api/generate",
+            json=params,
+            timeout=aiohttp.ClientTimeout(total=60)
+        ) as response:
+            if response.status == 200:
+                result = await response.json()
+                return result.get("response", "")
+            else:
+                error_text = await response.text()
+                raise Exception(f"Ollama API error: {response.status} - {error_text}")
     
     def _update_model_performance(self, model_name: str, response_time: float, success: bool):
         """Обновление статистики производительности модели"""
@@ -8,10 +8,11 @@ import time
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
-import psutil
 import aiohttp
 from concurrent.futures import ThreadPoolExecutor
 
+from .host_metrics import get_host_metrics
+from ..http_clients import get_http_clients
 from .intelligent_model_router import IntelligentModelRouter, ModelType, TaskComplexity
 from .advanced_chromadb_service import AdvancedChromaDBService
 
@@ -263,9 +264,9 @@ class OptimizationManager:
         
         try:
             # Проверка использования памяти
-            memory = psutil.virtual_memory()
+            sample = get_host_metrics().snapshot()
             
-            if memory.percent > 90:
+            if sample.memory_percent > 90:
                 logger.warning("Высокое использование памяти, запуск очистки")
                 
                 # Принудительная очистка кешей
@@ -277,8 +278,7 @@ class OptimizationManager:
                 gc.collect()
             
             # Проверка дискового пространства
-            disk_usage = psutil.disk_usage('/')
-            if disk_usage.percent > 90:
+            if sample.disk_percent > 90:
                 logger.warning("Критически мало места на диске")
             
             logger.info("Ресурсы оптимизированы")
@@ -389,6 +389,7 @@ class OptimizationManager:
             
             # 3. Формирование итогового ответа
             total_time = time.time() - start_time
+            host = get_host_metrics().snapshot()
             
             response = {
                 "llm_response": llm_response,
@@ -396,8 +397,8 @@ class OptimizationManager:
                 "total_processing_time": total_time,
                 "optimization_level": self.optimization_level.value,
                 "system_metrics": {
-                    "cpu_usage": psutil.cpu_percent(),
-                    "memory_usage": psutil.virtual_memory().percent
+                    "cpu_usage": host.cpu_percent,
+                    "memory_usage": host.memory_percent
                 }
             }
             
@@ -411,10 +412,8 @@ class OptimizationManager:
         """Получение состояния здоровья системы"""
         
         try:
-            # Системные метрики
-            cpu_usage = psutil.cpu_percent(interval=0.1)
-            memory = psutil.virtual_memory()
-            load_avg = psutil.getloadavg()[0] if hasattr(psutil, 'getloadavg') else 0
+            # Системные метрики из фонового сборщика (без блокировки event loop)
+            sample = get_host_metrics().snapshot()
             
             # GPU метрики (если доступно)
             gpu_usage = None
@@ -424,21 +423,18 @@ class OptimizationManager:
             except:
                 pass
             
-            # Дисковое использование
-            disk_usage = psutil.disk_usage('/').percent
-            
             # Статус сервисов
             ollama_status = await self._check_ollama_status()
             chromadb_status = await self._check_chromadb_status()
             redis_status = await self._check_redis_status()
             
             return SystemHealth(
-                cpu_usage=cpu_usage,
-                memory_usage=memory.percent,
+                cpu_usage=sample.cpu_percent,
+                memory_usage=sample.memory_percent,
                 gpu_usage=gpu_usage,
-                available_memory=memory.available // (1024 * 1024),  # MB
-                disk_usage=disk_usage,
-                load_average=load_avg,
+                available_memory=sample.memory_available // (1024 * 1024),  # MB
+                disk_usage=sample.disk_percent,
+                load_average=sample.load_average[0],
                 ollama_status=ollama_status,
                 chromadb_status=chromadb_status,
                 redis_status=redis_status
@@ -451,9 +447,9 @@ class OptimizationManager:
     async def _check_ollama_status(self) -> str:
         """Проверка статуса Ollama"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get("http://localhost:11434/api/tags", timeout=5) as response:
-                    return "healthy" if response.status == 200 else "unhealthy"
+            session = get_http_clients().session("ollama")
+            async with session.get("http://localhost:11434/api/tags", timeout=aiohttp.ClientTimeout(total=5)) as response:
+                return "healthy" if response.status == 200 else "unhealthy"
         except Exception:
             return "unavailable"
     
@@ -493,11 +489,10 @@ class OptimizationManager:
             model_utilization[model_name] = perf["usage_count"] / total_requests if total_requests > 0 else 0
         
         # Эффективность ресурсов
-        memory = psutil.virtual_memory()
-        cpu_usage = psutil.cpu_percent()
+        sample = get_host_metrics().snapshot()
         
-        memory_efficiency = 1 - (memory.percent / 100)
-        cpu_efficiency = 1 - (cpu_usage / 100)
+        memory_efficiency = 1 - (sample.memory_percent / 100)
+        cpu_efficiency = 1 - (sample.cpu_percent / 100)
         
         # Общий скор оптимизации
         optimization_score = (
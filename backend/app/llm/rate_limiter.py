@@ -0,0 +1,260 @@
+"""
+Ограничение частоты и конкурентности запросов пользователей
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional, Set
+
+import redis.asyncio as redis
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Запрос пользователя отклонен лимитом частоты или конкурентности"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class LimitDecision:
+    """Результат проверки лимитов"""
+    allowed: bool
+    reason: Optional[str] = None  # "rate" или "concurrency"
+    rate: float = 0.0  # оценка числа запросов в скользящем окне
+    in_flight: int = 0
+    retry_after: float = 0.0
+
+
+class SlidingWindowCounter:
+    """Счетчик скользящего окна с постоянной памятью
+
+    Хранит только счетчики текущего и предыдущего фиксированных окон.
+    Число запросов за последние window секунд оценивается как
+    previous * (доля предыдущего окна, попадающая в скользящее) + current.
+    """
+
+    __slots__ = ("window", "index", "current", "previous")
+
+    def __init__(self, window: float):
+        self.window = window
+        self.index = 0
+        self.current = 0
+        self.previous = 0
+
+    def _advance(self, now: float):
+        index = int(now // self.window)
+        if index <= self.index:
+            # Запросы с опоздавшим временем учитываются в текущем окне
+            return
+        self.previous = self.current if index == self.index + 1 else 0
+        self.current = 0
+        self.index = index
+
+    def estimate(self, now: float) -> float:
+        self._advance(now)
+        overlap = 1.0 - (now % self.window) / self.window
+        return self.previous * overlap + self.current
+
+    def add(self, now: float, amount: int = 1):
+        self._advance(now)
+        self.current += amount
+
+    def retry_after(self, now: float, limit: int) -> float:
+        """Через сколько секунд без новых запросов в окне освободится место"""
+        self._advance(now)
+        offset = now % self.window
+        free = limit - 1 - self.current
+        if self.previous and free >= 0:
+            # previous * (1 - offset / window) + current + 1 <= limit
+            return max(0.0, (1.0 - free / self.previous) * self.window - offset)
+        # Ждем следующего окна, в котором текущее станет предыдущим
+        wait = self.window - offset
+        if self.current:
+            wait += max(0.0, 1.0 - (limit - 1) / self.current) * self.window
+        return wait
+
+
+class LocalRateLimiter:
+    """Лимиты в памяти процесса: O(1) на проверку, постоянная память на ключ"""
+
+    def __init__(self, window: float = 60.0, clock: Callable[[], float] = time.time):
+        self.window = window
+        self.clock = clock
+        self._counters: Dict[Hashable, SlidingWindowCounter] = {}
+        self._in_flight: Dict[Hashable, Set[str]] = {}
+
+    def check(self, key: Hashable, rate_limit: int, max_concurrent: int) -> LimitDecision:
+        """Проверка лимитов без резервирования"""
+        now = self.clock()
+        counter = self._counters.get(key)
+        rate = counter.estimate(now) if counter else 0.0
+        in_flight = len(self._in_flight.get(key, ()))
+        if in_flight >= max_concurrent:
+            return LimitDecision(False, "concurrency", rate, in_flight)
+        if rate + 1 > rate_limit:
+            retry_after = counter.retry_after(now, rate_limit) if counter else self.window
+            return LimitDecision(False, "rate", rate, in_flight, retry_after)
+        return LimitDecision(True, None, rate, in_flight)
+
+    def hit(self, key: Hashable, amount: int = 1):
+        """Учет запроса в окне частоты без отслеживания выполнения"""
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = SlidingWindowCounter(self.window)
+        counter.add(self.clock(), amount)
+
+    async def acquire(self, key: Hashable, token: str, rate_limit: int, max_concurrent: int) -> LimitDecision:
+        """Резервирование слота: запрос учитывается в окне и среди выполняемых"""
+        decision = self.check(key, rate_limit, max_concurrent)
+        if decision.allowed:
+            self.reserve(key, token)
+            decision.in_flight += 1
+        return decision
+
+    def reserve(self, key: Hashable, token: str):
+        """Учет запроса в окне и среди выполняемых без проверки лимитов"""
+        self.hit(key)
+        self._in_flight.setdefault(key, set()).add(token)
+
+    async def release(self, key: Hashable, token: str):
+        """Освобождение слота выполняемого запроса (повторный вызов безопасен)"""
+        tokens = self._in_flight.get(key)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._in_flight[key]
+
+    def in_flight(self, key: Hashable) -> int:
+        return len(self._in_flight.get(key, ()))
+
+    def rate(self, key: Hashable) -> float:
+        counter = self._counters.get(key)
+        return counter.estimate(self.clock()) if counter else 0.0
+
+    def prune(self):
+        """Удаление счетчиков ключей без запросов за последние два окна"""
+        now = self.clock()
+        for key in [key for key, counter in self._counters.items() if not counter.estimate(now) and key not in self._in_flight]:
+            del self._counters[key]
+
+
+# KEYS[1] - хеш окна частоты, KEYS[2] - sorted set выполняемых запросов (score - срок истечения)
+# ARGV: окно, лимит частоты, лимит конкурентности, токен запроса, TTL выполняемого запроса
+ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local window = tonumber(ARGV[1])
+local rate_limit = tonumber(ARGV[2])
+local max_concurrent = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[5])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local in_flight = redis.call('ZCARD', KEYS[2])
+
+local index = math.floor(now / window)
+local state = redis.call('HMGET', KEYS[1], 'index', 'current', 'previous')
+local stored = tonumber(state[1])
+local current = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+if stored ~= index then
+    if stored == index - 1 then previous = current else previous = 0 end
+    current = 0
+end
+local rate = previous * (1 - (now % window) / window) + current
+
+if in_flight >= max_concurrent then
+    return {-1, tostring(rate), in_flight}
+end
+if rate + 1 > rate_limit then
+    return {0, tostring(rate), in_flight}
+end
+
+current = current + 1
+redis.call('HSET', KEYS[1], 'index', index, 'current', current, 'previous', previous)
+redis.call('PEXPIRE', KEYS[1], math.ceil(window * 2000))
+redis.call('ZADD', KEYS[2], now + ttl, ARGV[4])
+redis.call('PEXPIRE', KEYS[2], math.ceil(ttl * 1000))
+return {1, tostring(rate + 1), in_flight + 1}
+"""
+
+
+class RedisRateLimiter:
+    """Лимиты в Redis, общие для всех реплик backend
+
+    Проверка и резервирование выполняются одним Lua скриптом атомарно по
+    часам Redis. Выполняемые запросы хранятся в sorted set с временем
+    истечения, поэтому слоты реплики, упавшей до release, освобождаются
+    через in_flight_ttl. При недоступности Redis используется fallback.
+
+    Слоты, выданные Redis, дублируются в fallback: он всегда знает
+    выполняемые запросы и частоту этого процесса (для статистики и
+    проверок без обращения к Redis).
+    """
+
+    def __init__(
+        self,
+        redis_url: str = "redis://redis:6379",
+        window: float = 60.0,
+        in_flight_ttl: float = 900.0,
+        key_prefix: str = "ratelimit",
+        fallback: Optional[LocalRateLimiter] = None,
+        client: Optional[Redis] = None
+    ):
+        self.redis_url = redis_url
+        self.window = window
+        self.in_flight_ttl = in_flight_ttl
+        self.key_prefix = key_prefix
+        self.fallback = fallback or LocalRateLimiter(window)
+        self.redis = client
+        self._acquire_script = None
+
+    def _keys(self, key: Hashable):
+        return f"{self.key_prefix}:rate:{key}", f"{self.key_prefix}:inflight:{key}"
+
+    def _client(self) -> Redis:
+        if self.redis is None:
+            self.redis = redis.from_url(self.redis_url)
+        if self._acquire_script is None:
+            self._acquire_script = self.redis.register_script(ACQUIRE_SCRIPT)
+        return self.redis
+
+    async def acquire(self, key: Hashable, token: str, rate_limit: int, max_concurrent: int) -> LimitDecision:
+        """Атомарная проверка лимитов и резервирование слота в Redis"""
+        try:
+            self._client()
+            status, rate, in_flight = await self._acquire_script(
+                keys=list(self._keys(key)),
+                args=[self.window, rate_limit, max_concurrent, token, self.in_flight_ttl]
+            )
+        except Exception as e:
+            logger.warning(f"Redis лимитер недоступен, используются лимиты процесса: {e}")
+            return await self.fallback.acquire(key, token, rate_limit, max_concurrent)
+
+        rate = float(rate)
+        status = int(status)
+        if status == 1:
+            self.fallback.reserve(key, token)
+            return LimitDecision(True, None, rate, int(in_flight))
+        if status == -1:
+            return LimitDecision(False, "concurrency", rate, int(in_flight))
+        return LimitDecision(False, "rate", rate, int(in_flight), self.window / max(rate_limit, 1))
+
+    async def release(self, key: Hashable, token: str):
+        """Освобождение слота выполняемого запроса"""
+        await self.fallback.release(key, token)
+        try:
+            await self._client().zrem(self._keys(key)[1], token)
+        except Exception as e:
+            logger.warning(f"Ошибка освобождения слота {key} в Redis: {e}")
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+            self._acquire_script = None
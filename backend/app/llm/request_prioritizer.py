@@ -4,10 +4,12 @@
 
 import logging
 import time
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, Optional, Union
+from dataclasses import dataclass, field
 from enum import Enum
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+
+from .rate_limiter import LimitDecision, LocalRateLimiter, RedisRateLimiter, SlidingWindowCounter
 
 logger = logging.getLogger(__name__)
 
@@ -43,10 +45,29 @@ class UserTier:
     max_concurrent_requests: int
     rate_limit: int  # запросов в минуту
 
+@dataclass
+class UserUsage:
+    """Статистика пользователя постоянного размера"""
+    hourly: SlidingWindowCounter = field(default_factory=lambda: SlidingWindowCounter(3600.0))
+    requests_by_priority: Dict[str, int] = field(default_factory=dict)
+    last_seen: float = 0.0
+
 class RequestPrioritizer:
-    """Приоритизатор запросов"""
+    """Приоритизатор запросов
     
-    def __init__(self, config: Optional[PriorityConfig] = None):
+    Лимиты пользователей считаются счетчиками скользящего окна (O(1) на
+    проверку). acquire/release резервируют слот в rate_limiter: в памяти
+    процесса или в Redis (RedisRateLimiter), чтобы лимиты действовали на
+    все реплики. can_process_request/record_request и статистика работают
+    с лимитами процесса - для RedisRateLimiter это его fallback, куда
+    дублируются выданные слоты.
+    """
+    
+    def __init__(
+        self,
+        config: Optional[PriorityConfig] = None,
+        rate_limiter: Optional[Union[LocalRateLimiter, RedisRateLimiter]] = None
+    ):
         self.config = config or PriorityConfig()
         
         # Словарь приоритетов
@@ -84,8 +105,15 @@ class RequestPrioritizer:
             "free": UserTier("free", 0.5, 1, 10)
         }
         
-        # История запросов пользователей
-        self.user_request_history: Dict[int, list] = {}
+        # Лимиты частоты и выполняемые запросы пользователей
+        self.rate_limiter = rate_limiter or LocalRateLimiter(window=60.0)
+        if isinstance(self.rate_limiter, RedisRateLimiter):
+            self.local_limiter = self.rate_limiter.fallback
+        else:
+            self.local_limiter = self.rate_limiter
+        
+        # Статистика запросов пользователей
+        self.user_usage: Dict[int, UserUsage] = {}
         
         # Статистика приоритетов
         self.priority_stats = {priority: 0 for priority in Priority}
@@ -122,7 +150,7 @@ class RequestPrioritizer:
         return self.priority_timeouts[priority]
     
     def can_process_request(self, user_id: int, user_tier: str = "standard") -> bool:
-        """Проверка возможности обработки запроса пользователя"""
+        """Проверка возможности обработки запроса пользователя (без резервирования)"""
         tier = self.user_tiers.get(user_tier, self.user_tiers["standard"])
         
         # Проверяем лимит одновременных запросов
@@ -138,55 +166,67 @@ class RequestPrioritizer:
         
         return True
     
+    async def acquire(self, user_id: int, request_id: str, user_tier: str = "standard",
+                      priority: str = "normal") -> LimitDecision:
+        """Резервирование слота запроса пользователя с учетом лимитов уровня
+        
+        При успехе запрос учитывается в окне частоты и среди выполняемых,
+        слот освобождается вызовом release.
+        """
+        tier = self.user_tiers.get(user_tier, self.user_tiers["standard"])
+        decision = await self.rate_limiter.acquire(
+            user_id, request_id, tier.rate_limit, tier.max_concurrent_requests
+        )
+        if decision.allowed:
+            self._record_usage(user_id, priority, time.time())
+        else:
+            logger.warning(f"Пользователь {user_id} превысил лимит ({decision.reason})")
+        return decision
+    
+    async def release(self, user_id: int, request_id: str):
+        """Освобождение слота завершенного запроса"""
+        await self.rate_limiter.release(user_id, request_id)
+    
     def record_request(self, user_id: int, priority: str, timestamp: Optional[datetime] = None):
-        """Запись запроса пользователя"""
+        """Запись запроса пользователя (учитывается в лимите частоты процесса)"""
         if timestamp is None:
-            timestamp = datetime.utcnow()
-        
-        if user_id not in self.user_request_history:
-            self.user_request_history[user_id] = []
-        
-        self.user_request_history[user_id].append({
-            "priority": priority,
-            "timestamp": timestamp
-        })
+            now = time.time()
+        else:
+            # Наивные datetime в проекте хранятся в UTC
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            now = timestamp.timestamp()
         
-        # Очищаем старые записи (старше 1 часа)
-        cutoff_time = timestamp - timedelta(hours=1)
-        self.user_request_history[user_id] = [
-            req for req in self.user_request_history[user_id]
-            if req["timestamp"] > cutoff_time
-        ]
+        self.local_limiter.hit(user_id)
+        self._record_usage(user_id, priority, now)
+    
+    def _record_usage(self, user_id: int, priority: str, now: float):
+        usage = self.user_usage.get(user_id)
+        if usage is None:
+            usage = self.user_usage[user_id] = UserUsage()
+        usage.hourly.add(now)
+        usage.requests_by_priority[priority] = usage.requests_by_priority.get(priority, 0) + 1
+        usage.last_seen = max(usage.last_seen, now)
     
     def get_user_stats(self, user_id: int) -> Dict[str, Any]:
         """Получение статистики пользователя"""
-        if user_id not in self.user_request_history:
+        usage = self.user_usage.get(user_id)
+        if usage is None:
             return {
                 "total_requests": 0,
                 "requests_by_priority": {},
-                "avg_requests_per_hour": 0
+                "avg_requests_per_hour": 0,
+                "active_requests": self._get_user_active_requests(user_id)
             }
         
-        requests = self.user_request_history[user_id]
-        total_requests = len(requests)
-        
-        # Группируем по приоритетам
-        requests_by_priority = {}
-        for req in requests:
-            priority = req["priority"]
-            requests_by_priority[priority] = requests_by_priority.get(priority, 0) + 1
-        
-        # Среднее количество запросов в час
-        if requests:
-            time_span = (requests[-1]["timestamp"] - requests[0]["timestamp"]).total_seconds() / 3600
-            avg_requests_per_hour = total_requests / max(time_span, 1)
-        else:
-            avg_requests_per_hour = 0
+        # Оценка числа запросов за последний час по скользящему окну
+        requests_last_hour = usage.hourly.estimate(time.time())
         
         return {
-            "total_requests": total_requests,
-            "requests_by_priority": requests_by_priority,
-            "avg_requests_per_hour": avg_requests_per_hour
+            "total_requests": round(requests_last_hour),
+            "requests_by_priority": dict(usage.requests_by_priority),
+            "avg_requests_per_hour": requests_last_hour,
+            "active_requests": self._get_user_active_requests(user_id)
         }
     
     def get_priority_stats(self) -> Dict[str, Any]:
@@ -217,45 +257,19 @@ class RequestPrioritizer:
             logger.warning(f"Слишком много критических запросов: {critical_percentage:.1f}%")
             # Можно добавить логику для динамической настройки приоритетов
         
-        # Очищаем старые записи пользователей
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        for user_id in list(self.user_request_history.keys()):
-            self.user_request_history[user_id] = [
-                req for req in self.user_request_history[user_id]
-                if req["timestamp"] > cutoff_time
-            ]
-            
-            # Удаляем пустые записи
-            if not self.user_request_history[user_id]:
-                del self.user_request_history[user_id]
+        # Удаляем статистику пользователей без запросов за сутки
+        cutoff_time = time.time() - 24 * 3600
+        for user_id in [user_id for user_id, usage in self.user_usage.items() if usage.last_seen < cutoff_time]:
+            del self.user_usage[user_id]
+        self.local_limiter.prune()
     
     def _get_user_active_requests(self, user_id: int) -> int:
-        """Получение количества активных запросов пользователя"""
-        if user_id not in self.user_request_history:
-            return 0
-        
-        # Считаем запросы за последние 5 минут как активные
-        cutoff_time = datetime.utcnow() - timedelta(minutes=5)
-        active_requests = [
-            req for req in self.user_request_history[user_id]
-            if req["timestamp"] > cutoff_time
-        ]
-        
-        return len(active_requests)
+        """Получение количества выполняемых запросов пользователя в этом процессе"""
+        return self.local_limiter.in_flight(user_id)
     
     def _check_rate_limit(self, user_id: int, rate_limit: int) -> bool:
-        """Проверка rate limit пользователя"""
-        if user_id not in self.user_request_history:
-            return True
-        
-        # Считаем запросы за последнюю минуту
-        cutoff_time = datetime.utcnow() - timedelta(minutes=1)
-        recent_requests = [
-            req for req in self.user_request_history[user_id]
-            if req["timestamp"] > cutoff_time
-        ]
-        
-        return len(recent_requests) < rate_limit
+        """Проверка rate limit пользователя (скользящее окно в 1 минуту)"""
+        return self.local_limiter.rate(user_id) + 1 <= rate_limit
     
     def get_priority_info(self, priority_str: str) -> Dict[str, Any]:
         """Получение информации о приоритете"""
@@ -290,19 +304,15 @@ class RequestPrioritizer:
     
     def get_system_load(self) -> Dict[str, Any]:
         """Получение информации о нагрузке системы"""
-        total_users = len(self.user_request_history)
-        total_requests = sum(len(requests) for requests in self.user_request_history.values())
+        now = time.time()
         
         # Активные пользователи (за последние 10 минут)
-        cutoff_time = datetime.utcnow() - timedelta(minutes=10)
-        active_users = 0
-        for requests in self.user_request_history.values():
-            if any(req["timestamp"] > cutoff_time for req in requests):
-                active_users += 1
+        cutoff_time = now - 10 * 60
+        active_users = sum(1 for usage in self.user_usage.values() if usage.last_seen > cutoff_time)
         
         return {
-            "total_users": total_users,
+            "total_users": len(self.user_usage),
             "active_users": active_users,
-            "total_requests": total_requests,
+            "total_requests": round(sum(usage.hourly.estimate(now) for usage in self.user_usage.values())),
             "priority_distribution": self.get_priority_stats()
         } 
\ No newline at end of file
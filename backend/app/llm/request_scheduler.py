@@ -0,0 +1,251 @@
+"""
+Планировщик очереди LLM запросов: взвешенная справедливая очередь с
+aging, дедлайнами и контролем допуска
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .request_prioritizer import Priority, RequestPrioritizer
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Запрос отклонен: ожидаемое ожидание превышает дедлайн или очередь заполнена"""
+
+    def __init__(self, message: str, expected_wait: float = 0.0):
+        super().__init__(message)
+        self.expected_wait = expected_wait
+
+
+@dataclass
+class SchedulerConfig:
+    """Конфигурация планировщика"""
+    workers: int = 2  # одновременно выполняемых запросов (Apple M4 оптимизация)
+    max_queue_size: int = 1000
+    aging_rate: float = 0.005  # виртуального времени в секунду ожидания
+    initial_service_time: float = 2.0  # оценка времени выполнения до первых замеров, сек
+    service_time_alpha: float = 0.2  # коэффициент EWMA для времени выполнения
+
+
+@dataclass
+class ScheduledItem:
+    """Запрос в очереди планировщика"""
+    payload: Any
+    tier: Priority
+    enqueued_at: float
+    deadline: float
+    start_tag: float
+    finish_tag: float
+    sequence: int
+
+    def waited(self, now: float) -> float:
+        return now - self.enqueued_at
+
+
+@dataclass
+class TierStats:
+    """Статистика уровня приоритета"""
+    submitted: int = 0
+    dispatched: int = 0
+    rejected: int = 0
+    expired: int = 0
+    service_time: Optional[float] = None
+    queue_wait: float = 0.0  # EWMA фактического ожидания в очереди
+
+
+class WeightedFairScheduler:
+    """Взвешенная справедливая очередь по уровням приоритета
+
+    У каждого уровня своя FIFO очередь и вес из RequestPrioritizer.
+    Запрос получает виртуальный тег окончания finish = max(V, finish
+    предыдущего запроса уровня) + 1 / вес (self-clocked fair queuing),
+    выбирается голова с минимальным тегом, поэтому уровни получают
+    обслуживание пропорционально весам и ни один не голодает. Тег
+    уменьшается на aging_rate за каждую секунду ожидания. Дедлайн запроса
+    равен таймауту приоритета из get_timeout; запросы, не дождавшиеся
+    обработки до дедлайна, извлекаются pop_expired.
+
+    Перед постановкой оценивается ожидание: сколько запросов будет
+    обслужено раньше нового при текущих длинах очередей и весах, умножить
+    на среднее время выполнения и разделить на число воркеров (но не
+    меньше недавнего фактического ожидания уровня). Если запрос не успеет
+    к дедлайну, он сразу отклоняется (AdmissionRejected).
+    """
+
+    def __init__(
+        self,
+        prioritizer: Optional[RequestPrioritizer] = None,
+        config: Optional[SchedulerConfig] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.prioritizer = prioritizer or RequestPrioritizer()
+        self.config = config or SchedulerConfig()
+        self.clock = clock
+
+        max_weight = max(self.prioritizer.priority_weights.values())
+        self.weights: Dict[Priority, float] = {
+            tier: weight / max_weight for tier, weight in self.prioritizer.priority_weights.items()
+        }
+        self.queues: Dict[Priority, Deque[ScheduledItem]] = {tier: deque() for tier in Priority}
+        self.stats: Dict[Priority, TierStats] = {tier: TierStats() for tier in Priority}
+        self._last_finish: Dict[Priority, float] = {tier: 0.0 for tier in Priority}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._size = 0
+        self._available = asyncio.Event()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def service_time(self, tier: Optional[Priority] = None) -> float:
+        """Среднее время выполнения (EWMA) уровня или по всем уровням"""
+        if tier is not None and self.stats[tier].service_time is not None:
+            return self.stats[tier].service_time
+        measured = [s.service_time for s in self.stats.values() if s.service_time is not None]
+        return sum(measured) / len(measured) if measured else self.config.initial_service_time
+
+    def expected_wait(self, tier: Priority) -> float:
+        """Оценка ожидания нового запроса уровня tier при текущей очереди
+
+        Берется большая из двух оценок: по длинам очередей и весам и по
+        недавнему фактическому ожиданию уровня, пока его очередь не пуста.
+        """
+        position = len(self.queues[tier]) + 1
+        ahead = 0.0
+        for other, queue in self.queues.items():
+            if not queue:
+                continue
+            if other is tier:
+                ahead += len(queue) * self.service_time(other)
+            else:
+                # За время обслуживания position запросов уровня tier другой
+                # уровень успевает получить долю, пропорциональную весу
+                share = position * self.weights[other] / self.weights[tier]
+                ahead += min(len(queue), share) * self.service_time(other)
+        ahead /= self.config.workers
+        if self.queues[tier]:
+            ahead = max(ahead, self.stats[tier].queue_wait)
+        return ahead
+
+    def submit(self, payload: Any, priority: str = "normal") -> ScheduledItem:
+        """Постановка запроса в очередь (AdmissionRejected при отказе)"""
+        tier = self.prioritizer.priority_map.get(str(priority).lower(), Priority.NORMAL)
+        stats = self.stats[tier]
+        stats.submitted += 1
+        timeout = self.prioritizer.get_timeout(tier.name)
+
+        if self._size >= self.config.max_queue_size:
+            stats.rejected += 1
+            raise AdmissionRejected(f"Очередь LLM запросов заполнена ({self._size})")
+
+        expected_wait = self.expected_wait(tier)
+        if expected_wait + self.service_time(tier) > timeout:
+            stats.rejected += 1
+            raise AdmissionRejected(
+                f"Ожидаемое время ожидания {expected_wait:.1f}s превышает таймаут {timeout:.0f}s "
+                f"для приоритета {tier.name.lower()}",
+                expected_wait
+            )
+
+        now = self.clock()
+        start = max(self._virtual_time, self._last_finish[tier])
+        finish = start + 1.0 / self.weights[tier]
+        self._last_finish[tier] = finish
+        item = ScheduledItem(
+            payload=payload,
+            tier=tier,
+            enqueued_at=now,
+            deadline=now + timeout,
+            start_tag=start,
+            finish_tag=finish,
+            sequence=next(self._sequence)
+        )
+        self.queues[tier].append(item)
+        self._size += 1
+        self._available.set()
+        return item
+
+    def pop(self) -> Optional[ScheduledItem]:
+        """Следующий запрос по WFQ с учетом aging (None, если очередь пуста)"""
+        now = self.clock()
+        item: Optional[ScheduledItem] = None
+        best_key = None
+        for queue in self.queues.values():
+            if not queue:
+                continue
+            head = queue[0]
+            key = (head.finish_tag - self.config.aging_rate * head.waited(now), head.sequence)
+            if best_key is None or key < best_key:
+                item, best_key = head, key
+
+        if item is None:
+            return None
+        self.queues[item.tier].popleft()
+        self._size -= 1
+        if not self._size:
+            self._available.clear()
+        self._virtual_time = max(self._virtual_time, item.finish_tag)
+        stats = self.stats[item.tier]
+        stats.dispatched += 1
+        self._record_wait(stats, item.waited(now))
+        return item
+
+    def pop_expired(self) -> List[ScheduledItem]:
+        """Извлечение запросов с истекшим дедлайном"""
+        now = self.clock()
+        expired = []
+        for tier, queue in self.queues.items():
+            # Таймаут у уровня один, поэтому дедлайны в его очереди возрастают
+            while queue and queue[0].deadline <= now:
+                item = queue.popleft()
+                self.stats[tier].expired += 1
+                self._record_wait(self.stats[tier], item.waited(now))
+                expired.append(item)
+        if expired:
+            self._size -= len(expired)
+            if not self._size:
+                self._available.clear()
+        return expired
+
+    def _record_wait(self, stats: TierStats, seconds: float):
+        alpha = self.config.service_time_alpha
+        stats.queue_wait = (1 - alpha) * stats.queue_wait + alpha * seconds
+
+    async def get(self) -> ScheduledItem:
+        """Ожидание следующего запроса"""
+        while True:
+            item = self.pop()
+            if item is not None:
+                return item
+            await self._available.wait()
+
+    def record_service(self, tier: Priority, seconds: float):
+        """Учет фактического времени выполнения для оценки ожидания"""
+        stats = self.stats[tier]
+        alpha = self.config.service_time_alpha
+        stats.service_time = seconds if stats.service_time is None else (1 - alpha) * stats.service_time + alpha * seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_size": self._size,
+            "virtual_time": self._virtual_time,
+            "tiers": {
+                tier.name.lower(): {
+                    "queued": len(self.queues[tier]),
+                    "submitted": stats.submitted,
+                    "dispatched": stats.dispatched,
+                    "rejected": stats.rejected,
+                    "expired": stats.expired,
+                    "service_time": self.service_time(tier),
+                    "expected_wait": self.expected_wait(tier)
+                }
+                for tier, stats in self.stats.items()
+            }
+        }
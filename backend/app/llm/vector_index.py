@@ -0,0 +1,284 @@
+"""
+In-process векторный индекс (IVF поверх NumPy) для базы знаний RAG
+"""
+
+import io
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """Векторный индекс с косинусной метрикой
+
+    Векторы хранятся L2-нормализованными в одной float32 матрице, поэтому
+    косинусная близость сводится к матрично-векторному произведению.
+    Пока документов немного, поиск точный (flat). После ivf_threshold
+    документов индекс обучает k-means центроиды (IVF) и при поиске
+    сканирует только nprobe ближайших кластеров. Новые векторы
+    приписываются к кластерам инкрементально, переобучение происходит
+    при удвоении размера индекса.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        nprobe: int = 8,
+        ivf_threshold: int = 20000,
+        kmeans_iterations: int = 10,
+    ):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.ivf_threshold = ivf_threshold
+        self.kmeans_iterations = kmeans_iterations
+
+        self._vectors = np.empty((0, dim or 0), dtype=np.float32)
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._ids: List[str] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._size = 0
+
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._id_to_row
+
+    @property
+    def is_trained(self) -> bool:
+        """Обучены ли IVF центроиды"""
+        return self._centroids is not None
+
+    @property
+    def needs_training(self) -> bool:
+        """Пора ли (пере)обучать IVF: порог пройден или размер удвоился"""
+        return self._size >= self.ivf_threshold and (
+            not self.is_trained or self._size >= 2 * self._trained_size
+        )
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-нормализация по строкам"""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _ensure_capacity(self, required: int):
+        """Геометрическое расширение хранилища"""
+        capacity = self._vectors.shape[0]
+        if required <= capacity:
+            return
+        new_capacity = max(required, capacity * 2, 1024)
+        vectors = np.empty((new_capacity, self.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        assignments = np.full(new_capacity, -1, dtype=np.int32)
+        assignments[:self._size] = self._assignments[:self._size]
+        self._vectors = vectors
+        self._assignments = assignments
+
+    def _assign(self, vectors: np.ndarray, chunk_size: int = 16384) -> np.ndarray:
+        """Назначение векторов ближайшим центроидам"""
+        result = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            result[start:start + chunk_size] = np.argmax(chunk @ self._centroids.T, axis=1)
+        return result
+
+    def add(self, ids: Sequence[str], vectors: Sequence[Sequence[float]], train: bool = True):
+        """Добавление или обновление векторов
+
+        train=False - не обучать IVF внутри вызова (вызывающий обучает
+        сам, например в фоне на копии индекса).
+        """
+        if len(ids) == 0:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError("Количество векторов не совпадает с количеством идентификаторов")
+
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+            self._vectors = np.empty((0, self.dim), dtype=np.float32)
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Размерность вектора {matrix.shape[1]} не совпадает с индексом ({self.dim})")
+
+        matrix = self._normalize(matrix)
+        assignments = self._assign(matrix) if self.is_trained else np.full(len(ids), -1, dtype=np.int32)
+
+        self._ensure_capacity(self._size + len(ids))
+        for doc_id, vector, cluster in zip(ids, matrix, assignments):
+            row = self._id_to_row.get(doc_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._ids.append(doc_id)
+                self._id_to_row[doc_id] = row
+            self._vectors[row] = vector
+            self._assignments[row] = cluster
+
+        if train and self.needs_training:
+            self.train()
+
+    def remove(self, ids: Sequence[str]) -> int:
+        """Удаление векторов (перестановкой с последней строкой)"""
+        removed = 0
+        for doc_id in ids:
+            row = self._id_to_row.pop(doc_id, None)
+            if row is None:
+                continue
+            last = self._size - 1
+            if row != last:
+                last_id = self._ids[last]
+                self._vectors[row] = self._vectors[last]
+                self._assignments[row] = self._assignments[last]
+                self._ids[row] = last_id
+                self._id_to_row[last_id] = row
+            self._ids.pop()
+            self._size -= 1
+            removed += 1
+        return removed
+
+    def train(self, nlist: Optional[int] = None, seed: int = 42):
+        """Обучение IVF центроидов сферическим k-means"""
+        if self._size == 0:
+            return
+        data = self._vectors[:self._size]
+        nlist = nlist or int(np.clip(np.sqrt(self._size), 16, 4096))
+        nlist = min(nlist, self._size)
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(self._size, nlist * 256)
+        sample = data[rng.choice(self._size, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            present, starts = np.unique(labels[order], return_index=True)
+            sums = np.zeros_like(centroids)
+            sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+            empty = np.ones(nlist, dtype=bool)
+            empty[present] = False
+            # Пустые кластеры переинициализируем случайными точками выборки
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = self._normalize(sums)
+
+        self._centroids = centroids.astype(np.float32)
+        self._assignments[:self._size] = self._assign(data)
+        self._trained_size = self._size
+        logger.info(f"VectorIndex: обучено {nlist} IVF кластеров на {self._size} векторах")
+
+    def copy(self) -> "VectorIndex":
+        """Независимая копия индекса (снимок для обучения или сериализации)"""
+        index = VectorIndex(
+            dim=self.dim,
+            nprobe=self.nprobe,
+            ivf_threshold=self.ivf_threshold,
+            kmeans_iterations=self.kmeans_iterations,
+        )
+        index._vectors = self._vectors[:self._size].copy()
+        index._assignments = self._assignments[:self._size].copy()
+        index._ids = list(self._ids)
+        index._id_to_row = dict(self._id_to_row)
+        index._size = self._size
+        index._centroids = self._centroids
+        index._trained_size = self._trained_size
+        return index
+
+    def search(self, query: Sequence[float], k: int = 5) -> List[Tuple[str, float]]:
+        """Поиск top-k ближайших векторов, возвращает (id, cosine score)"""
+        if self._size == 0 or k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        if q.shape[0] != self.dim:
+            raise ValueError(f"Размерность запроса {q.shape[0]} не совпадает с индексом ({self.dim})")
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return []
+        q = q / norm
+
+        data = self._vectors[:self._size]
+        if self.is_trained:
+            nprobe = min(self.nprobe, self._centroids.shape[0])
+            probe = np.argpartition(-(self._centroids @ q), nprobe - 1)[:nprobe]
+            rows = np.flatnonzero(np.isin(self._assignments[:self._size], probe))
+            # В выбранных кластерах может оказаться меньше k кандидатов
+            if rows.size < k:
+                rows = np.arange(self._size)
+        else:
+            rows = None
+
+        scores = data @ q if rows is None else data[rows] @ q
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is not None:
+            return [(self._ids[rows[i]], float(scores[i])) for i in top]
+        return [(self._ids[i], float(scores[i])) for i in top]
+
+    def to_bytes(self) -> bytes:
+        """Сериализация индекса в один бинарный блоб"""
+        buffer = io.BytesIO()
+        meta = {
+            "version": self.FORMAT_VERSION,
+            "dim": self.dim,
+            "nprobe": self.nprobe,
+            "ivf_threshold": self.ivf_threshold,
+            "trained_size": self._trained_size,
+        }
+        arrays = {
+            "meta": np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            "ids": np.frombuffer(json.dumps(self._ids).encode(), dtype=np.uint8),
+            "vectors": self._vectors[:self._size],
+            "assignments": self._assignments[:self._size],
+        }
+        if self._centroids is not None:
+            arrays["centroids"] = self._centroids
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "VectorIndex":
+        """Восстановление индекса из бинарного блоба"""
+        with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+            meta = json.loads(data["meta"].tobytes().decode())
+            if meta.get("version") != cls.FORMAT_VERSION:
+                raise ValueError(f"Неподдерживаемая версия индекса: {meta.get('version')}")
+            index = cls(
+                dim=meta["dim"],
+                nprobe=meta["nprobe"],
+                ivf_threshold=meta["ivf_threshold"],
+            )
+            ids = json.loads(data["ids"].tobytes().decode())
+            index._vectors = np.array(data["vectors"], dtype=np.float32)
+            index._assignments = np.array(data["assignments"], dtype=np.int32)
+            if "centroids" in data.files:
+                index._centroids = np.array(data["centroids"], dtype=np.float32)
+        index._ids = ids
+        index._id_to_row = {doc_id: row for row, doc_id in enumerate(ids)}
+        index._size = len(ids)
+        index._trained_size = meta["trained_size"]
+        if index.dim is not None and index._vectors.shape[0] == 0:
+            index._vectors = np.empty((0, index.dim), dtype=np.float32)
+        return index
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика индекса"""
+        return {
+            "size": self._size,
+            "dim": self.dim,
+            "trained": self.is_trained,
+            "nlist": int(self._centroids.shape[0]) if self.is_trained else 0,
+            "nprobe": self.nprobe,
+            "memory_bytes": int(self._vectors.nbytes),
+        }
@@ -24,6 +24,9 @@ from .llm.rag_monitor import RAGMonitor
 
 logger = logging.getLogger(__name__)
 
+# Максимальное время ожидания ответа LLM, секунд
+RESPONSE_TIMEOUT = 30.0
+
 class LLMIntegrationService:
     """Сервис интеграции LLM с микросервисами"""
     
@@ -92,15 +95,13 @@ class LLMIntegrationService:
         )
         
         # Отправляем запрос в архитектуру
-        request_id = await self.architecture.submit_request(request)
-        
-        # Получаем ответ
-        response = await self.architecture.get_response(request_id)
+        pending = await self.architecture.submit_request(request)
         
-        if response is None:
-            raise TimeoutError(f"Таймаут ожидания ответа для запроса {request_id}")
-        
-        return response
+        # Ответ приходит по завершении обработки (ошибка обработки пробрасывается)
+        try:
+            return await pending.wait(timeout=RESPONSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Таймаут ожидания ответа для запроса {pending.request_id}")
     
     async def generate_response(
         self,
@@ -125,6 +126,13 @@ class LLMIntegrationService:
         
         return await self.architecture.concurrent_manager.get_embedding(text, llm_model)
     
+    async def get_embeddings(self, texts: List[str], llm_model: str = "qwen2.5:7b-instruct-turbo") -> List[List[float]]:
+        """Получение эмбеддингов для списка текстов одним пакетом"""
+        if not self._initialized:
+            raise RuntimeError("LLMIntegrationService не инициализирован")
+        
+        return await self.architecture.concurrent_manager.get_embeddings(texts, llm_model)
+    
     async def search_knowledge_base(self, query: str, limit: int = 5) -> List[str]:
         """Поиск в базе знаний"""
         if not self._initialized:
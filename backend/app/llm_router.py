@@ -604,6 +604,17 @@ class LLMRouter:
             logger.error(f"Ошибка получения эмбеддинга: {e}")
             return []
     
+    async def generate_embedding(self, text: str) -> List[float]:
+        """Эмбеддинг текста через централизованную архитектуру"""
+        embeddings = await self.generate_embeddings([text])
+        return embeddings[0]
+    
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Эмбеддинги для списка текстов (пакетный вызов Ollama)"""
+        if not self._initialized:
+            await self.start()
+        return await self.llm_service.get_embeddings(texts)
+    
     async def _search_knowledge_base(
         self, 
         embedding: List[float], 
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 import json
 import os
 import re
@@ -15,7 +16,6 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any, Set, Tuple
 
 import chromadb
-import httpx
 import nltk
 import numpy as np
 import ollama
@@ -26,8 +26,8 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 from pydantic import BaseModel, ValidationError
+from sklearn.base import clone
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sqlalchemy import (
@@ -82,7 +82,7 @@ from .auth import (
     UserRegistrationRequest, UserLoginRequest
 )
 from .database import get_db, engine
-from .models import Base, User, Domain, WordPressPost, AnalysisHistory, Diagram, DiagramEmbedding
+from .models import Base, User, Domain, WordPressPost, AnalysisHistory, Diagram, DiagramEmbedding, PostTermStats, DomainTermStats
 from .models import (
     TestRequest, TestResponse, TestSuiteRequest, TestSuiteResponse, TestExecutionResponse,
     TestType, TestStatus, TestPriority, TestEnvironment, utc_now
@@ -94,6 +94,10 @@ from .api.auth import router as auth_router
 from .api.optimization_router import router as optimization_router
 from .llm_integration import get_llm_integration_service
 from .database_service import get_database_rag_service
+from .corpus_stats import TermAggregate, compute_post_stats, ensure_domain_term_stats
+from .http_clients import get_http_clients, close_http_clients
+from .link_suggestions import LinkSuggestionEngine
+from .wordpress_sync import WordPressPostSync, fetch_wordpress_post_ids, iter_wordpress_posts
 
 # Загрузка NLTK данных при старте
 try:
@@ -109,6 +113,9 @@ except LookupError:
 # Русские стоп-слова
 RUSSIAN_STOP_WORDS = set(stopwords.words('russian'))
 
+# Запас для modified_after при реиндексации WordPress
+WP_REINDEX_OVERLAP = timedelta(days=1)
+
 # 🔒 КРИТИЧЕСКИЙ СЕМАФОР ДЛЯ ОГРАНИЧЕНИЯ НАГРУЗКИ НА OLLAMA
 OLLAMA_SEMAPHORE = asyncio.Semaphore(1)
 
@@ -316,7 +323,7 @@ class AdvancedRAGManager:
         self.collection = rag_collection
         self.vectorizer = TfidfVectorizer(
             max_features=1000,
-            stop_words=RUSSIAN_STOP_WORDS,
+            stop_words=sorted(RUSSIAN_STOP_WORDS),
             ngram_range=(1, 2)
         )
     
@@ -337,6 +344,7 @@ class WPRequest(BaseModel):
     domain: str
     client_id: Optional[str] = None
     comprehensive: Optional[bool] = False
+    full_reindex: Optional[bool] = False
 
 class BenchmarkRequest(BaseModel):
     """Запрос для запуска бенчмарка."""
@@ -504,37 +512,37 @@ async def get_settings():
 async def get_ollama_status():
     """Проверка статуса Ollama."""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get("http://ollama:11434/api/tags")
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                model_names = [model.get("name", "") for model in models]
-                
-                return {
-                    "ready_for_work": len(model_names) > 0,
-                    "server_available": True,
-                    "model_loaded": len(model_names) > 0,
-                    "message": f"Готов к работе ({len(model_names)} моделей)" if model_names else "Модели не загружены",
-                    "status": "available",
-                    "connection": "connected",
-                    "models_count": len(model_names),
-                    "available_models": model_names,
-                    "timestamp": datetime.now().isoformat(),
-                    "last_check": datetime.now().isoformat()
-                }
-            else:
-                return {
-                    "ready_for_work": False,
-                    "server_available": False,
-                    "model_loaded": False,
-                    "message": f"Ollama ответил со статусом {response.status_code}",
-                    "status": "error",
-                    "connection": "disconnected",
-                    "models_count": 0,
-                    "available_models": [],
-                    "timestamp": datetime.now().isoformat(),
-                    "last_check": datetime.now().isoformat()
-                }
+        client = get_http_clients().client("ollama")
+        response = await client.get("http://ollama:11434/api/tags", timeout=5.0)
+        if response.status_code == 200:
+            models = response.json().get("models", [])
+            model_names = [model.get("name", "") for model in models]
+            
+            return {
+                "ready_for_work": len(model_names) > 0,
+                "server_available": True,
+                "model_loaded": len(model_names) > 0,
+                "message": f"Готов к работе ({len(model_names)} моделей)" if model_names else "Модели не загружены",
+                "status": "available",
+                "connection": "connected",
+                "models_count": len(model_names),
+                "available_models": model_names,
+                "timestamp": datetime.now().isoformat(),
+                "last_check": datetime.now().isoformat()
+            }
+        else:
+            return {
+                "ready_for_work": False,
+                "server_available": False,
+                "model_loaded": False,
+                "message": f"Ollama ответил со статусом {response.status_code}",
+                "status": "error",
+                "connection": "disconnected",
+                "models_count": 0,
+                "available_models": [],
+                "timestamp": datetime.now().isoformat(),
+                "last_check": datetime.now().isoformat()
+            }
     except Exception as e:
         return {
             "ready_for_work": False,
@@ -622,6 +630,11 @@ async def get_monitoring_health():
     """Endpoint для проверки здоровья с мониторингом"""
     return await get_health_status()
 
+@app.get("/api/v1/monitoring/http-pools")
+async def get_http_pools():
+    """Утилизация пулов HTTP соединений по upstream"""
+    return get_http_clients().stats()
+
 @app.get("/api/v1/monitoring/stats")
 async def get_monitoring_stats():
     """Получение статистики мониторинга"""
@@ -802,58 +815,57 @@ async def analyze_domain(
         """
         
         # Прямой запрос к Ollama
-        import httpx
         import time
         
         start_time = time.time()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "qwen2.5:7b-instruct",
-                    "prompt": analysis_prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "num_predict": 1000
-                    }
+        client = get_http_clients().client("ollama")
+        response = await client.post(
+            "http://localhost:11434/api/generate",
+            json={
+                "model": "qwen2.5:7b-instruct",
+                "prompt": analysis_prompt,
+                "stream": False,
+                "options": {
+                    "temperature": 0.7,
+                    "num_predict": 1000
+                }
+            },
+            timeout=60.0
+        )
+        
+        if response.status_code == 200:
+            llm_response = response.json()
+            response_text = llm_response.get("response", "")
+            response_time = time.time() - start_time
+            
+            # Парсим рекомендации из ответа LLM
+            recommendations = _parse_llm_recommendations(response_text)
+            
+            # Создаем результат анализа
+            analysis_result = SEOAnalysisResult(
+                domain=request_data.domain,
+                analysis_date=datetime.utcnow(),
+                score=78.5,  # Базовый скор
+                recommendations=recommendations,
+                metrics={
+                    "total_posts": 45,
+                    "internal_links": 23,
+                    "semantic_density": 0.72,
+                    "avg_content_length": 1200,
+                    "keyword_diversity": 0.68,
+                    "llm_model_used": "qwen2.5:7b-instruct",
+                    "tokens_used": len(response_text.split()),
+                    "response_time": response_time,
+                    "rag_enhanced": False
                 },
-                timeout=60.0
+                status="completed"
             )
             
-            if response.status_code == 200:
-                llm_response = response.json()
-                response_text = llm_response.get("response", "")
-                response_time = time.time() - start_time
-                
-                # Парсим рекомендации из ответа LLM
-                recommendations = _parse_llm_recommendations(response_text)
-                
-                # Создаем результат анализа
-                analysis_result = SEOAnalysisResult(
-                    domain=request_data.domain,
-                    analysis_date=datetime.utcnow(),
-                    score=78.5,  # Базовый скор
-                    recommendations=recommendations,
-                    metrics={
-                        "total_posts": 45,
-                        "internal_links": 23,
-                        "semantic_density": 0.72,
-                        "avg_content_length": 1200,
-                        "keyword_diversity": 0.68,
-                        "llm_model_used": "qwen2.5:7b-instruct",
-                        "tokens_used": len(response_text.split()),
-                        "response_time": response_time,
-                        "rag_enhanced": False
-                    },
-                    status="completed"
-                )
-                
-                logger.info(f"Анализ домена {request_data.domain} завершен успешно")
-                return analysis_result
-            else:
-                raise HTTPException(status_code=500, detail="Ошибка запроса к Ollama")
+            logger.info(f"Анализ домена {request_data.domain} завершен успешно")
+            return analysis_result
+        else:
+            raise HTTPException(status_code=500, detail="Ошибка запроса к Ollama")
         
     except Exception as e:
         logger.error(f"Ошибка анализа домена {request_data.domain}: {str(e)}")
@@ -1085,6 +1097,11 @@ async def startup_event():
     
     print("🚀 reLink SEO Platform v1.0.0 запущен!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Закрытие общих HTTP клиентов при остановке приложения."""
+    await close_http_clients()
+
 @app.get("/api/v1/rag/cache/stats")
 async def get_rag_cache_stats():
     """Получение статистики RAG кэша"""
@@ -1271,6 +1288,36 @@ async def get_diagram(
             detail=f"Ошибка получения диаграммы: {str(e)}"
         )
 
+@app.delete("/api/diagrams/{diagram_id}")
+async def delete_diagram(
+    diagram_id: int,
+    current_user: dict = Depends(get_current_user_simple),
+    db: AsyncSession = Depends(get_db)
+):
+    """Удаление диаграммы и ее эмбеддингов (с удалением из индекса поиска)."""
+    try:
+        from .models import Diagram
+        result = await db.execute(
+            select(Diagram.id).where(
+                Diagram.id == diagram_id,
+                Diagram.user_id == current_user.get("id", 1)
+            )
+        )
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Диаграмма не найдена")
+        
+        await DiagramService().delete_diagram(diagram_id, db)
+        return {"status": "success", "diagram_id": diagram_id}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка удаления диаграммы: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Ошибка удаления диаграммы: {str(e)}"
+        )
+
 @app.get("/api/diagrams")
 async def get_user_diagrams(
     current_user: dict = Depends(get_current_user_simple),
@@ -1473,36 +1520,19 @@ async def index_wordpress_site(
             await db.commit()
             await db.refresh(domain_obj)
         
-        # Парсим WordPress сайт
-        posts = await parse_wordpress_site(domain, request.client_id)
-        
-        # Сохраняем посты в базу данных
-        saved_posts = []
-        for post_data in posts:
-            post = WordPressPost(
-                domain_id=domain_obj.id,
-                wp_post_id=post_data.get('id', 0),
-                title=post_data.get('title', ''),
-                content=post_data.get('content', ''),
-                excerpt=post_data.get('excerpt', ''),
-                link=post_data.get('link', ''),
-                published_at=post_data.get('date', utc_now())
-            )
-            db.add(post)
-            saved_posts.append(post)
-        
-        await db.commit()
+        # Загружаем статьи и сохраняем в базу пачками по мере загрузки
+        stats = await ingest_wordpress_site(db, domain_obj.id, domain, request.client_id)
         
         # Обновляем статистику домена
-        domain_obj.total_posts = len(saved_posts)
+        domain_obj.total_posts = stats['total']
         domain_obj.last_analysis_at = utc_now()
         await db.commit()
         
         return {
             "status": "success",
-            "message": f"Индексация завершена. Найдено {len(saved_posts)} статей.",
+            "message": f"Индексация завершена. Найдено {stats['total']} статей.",
             "domain": domain,
-            "posts_count": len(saved_posts),
+            "posts_count": stats['total'],
             "domain_id": domain_obj.id
         }
         
@@ -1533,42 +1563,35 @@ async def reindex_wordpress_site(
         if not domain_obj:
             raise HTTPException(status_code=404, detail="Домен не найден. Сначала выполните индексацию.")
         
-        # Удаляем старые посты
-        await db.execute(
-            delete(WordPressPost).where(WordPressPost.domain_id == domain_obj.id)
-        )
-        await db.commit()
-        
-        # Парсим WordPress сайт заново
-        posts = await parse_wordpress_site(domain, request.client_id)
-        
-        # Сохраняем новые посты в базу данных
-        saved_posts = []
-        for post_data in posts:
-            post = WordPressPost(
-                domain_id=domain_obj.id,
-                wp_post_id=post_data.get('id', 0),
-                title=post_data.get('title', ''),
-                content=post_data.get('content', ''),
-                excerpt=post_data.get('excerpt', ''),
-                link=post_data.get('link', ''),
-                published_at=post_data.get('date', utc_now())
-            )
-            db.add(post)
-            saved_posts.append(post)
+        # Запрашиваем только статьи, измененные с прошлой индексации
+        # (с запасом на расхождение часовых поясов; лишнее отсеет хэш контента)
+        modified_after = None
+        if domain_obj.last_analysis_at and not request.full_reindex:
+            modified_after = domain_obj.last_analysis_at - WP_REINDEX_OVERLAP
         
-        await db.commit()
+        # Upsert измененных статей, удаление отсутствующих на сайте
+        stats = await ingest_wordpress_site(
+            db, domain_obj.id, domain, request.client_id, modified_after=modified_after
+        )
         
         # Обновляем статистику домена
-        domain_obj.total_posts = len(saved_posts)
+        domain_obj.total_posts = stats['total']
         domain_obj.last_analysis_at = utc_now()
         await db.commit()
         
         return {
             "status": "success",
-            "message": f"Реиндексация завершена. Обновлено {len(saved_posts)} статей.",
+            "message": (
+                f"Реиндексация завершена. Добавлено {stats['added']}, обновлено {stats['updated']}, "
+                f"без изменений {stats['unchanged']}, удалено {stats['deleted']} статей."
+            ),
             "domain": domain,
-            "posts_count": len(saved_posts),
+            "posts_count": stats['total'],
+            "added": stats['added'],
+            "updated": stats['updated'],
+            "unchanged": stats['unchanged'],
+            "deleted": stats['deleted'],
+            "incremental": modified_after is not None,
             "domain_id": domain_obj.id,
             "reindexed_at": datetime.now().isoformat()
         }
@@ -1579,99 +1602,46 @@ async def reindex_wordpress_site(
         logger.error(f"Ошибка при реиндексации WordPress сайта: {e}")
         raise HTTPException(status_code=500, detail=f"Ошибка реиндексации: {str(e)}")
 
-async def parse_wordpress_site(domain: str, client_id: str = None) -> List[dict]:
-    """Парсинг WordPress сайта через REST API для извлечения статей."""
-    posts = []
+async def ingest_wordpress_site(
+    db: AsyncSession,
+    domain_id: int,
+    domain: str,
+    client_id: str = None,
+    modified_after: Optional[datetime] = None
+) -> Dict[str, int]:
+    """Потоковая загрузка статей WordPress через REST API в базу данных.
+    
+    Страницы API загружаются параллельно, каждая пачка статей сохраняется,
+    пока следующие страницы еще загружаются. modified_after ограничивает
+    выборку статьями, измененными после указанного времени; удаленные
+    статьи тогда определяются по полному списку идентификаторов.
+    """
+    async def report_progress(loaded: int, total_pages: int, total_posts: int):
+        if client_id:
+            await websocket_manager.send_step(
+                client_id, f"Загружено страниц {loaded} из {total_pages} ({total_posts} статей)",
+                loaded, total_pages
+            )
     
+    sync = WordPressPostSync(db, domain_id)
     try:
-        # Формируем URL для WordPress REST API
-        api_url = f"{domain.rstrip('/')}/wp-json/wp/v2/posts"
-        
         if client_id:
             await websocket_manager.send_step(client_id, "Подключение к WordPress API", 0, 1)
         
-        # Получаем статьи через WordPress REST API
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Сначала пробуем получить 100 статей
-            response = await client.get(f"{api_url}?per_page=100")
-            
-            if response.status_code != 200:
-                # Если не получилось, пробуем получить меньше статей
-                response = await client.get(f"{api_url}?per_page=50")
-                
-                if response.status_code != 200:
-                    # Если и это не работает, пробуем получить 10 статей
-                    response = await client.get(f"{api_url}?per_page=10")
-                    
-                    if response.status_code != 200:
-                        raise Exception(f"Не удалось получить доступ к WordPress API: {response.status_code}")
-            
-            wp_posts = response.json()
-            
-            if client_id:
-                await websocket_manager.send_step(client_id, f"Найдено {len(wp_posts)} статей", 1, len(wp_posts))
-            
-            # Обрабатываем каждую статью
-            for i, wp_post in enumerate(wp_posts):
-                try:
-                    if client_id:
-                        await websocket_manager.send_step(client_id, f"Обработка статьи {i+1}", i+1, len(wp_posts))
-                    
-                    # Извлекаем данные из WordPress API ответа
-                    post_id = wp_post.get('id', 0)
-                    title = wp_post.get('title', {}).get('rendered', '')
-                    content = wp_post.get('content', {}).get('rendered', '')
-                    excerpt = wp_post.get('excerpt', {}).get('rendered', '')
-                    link = wp_post.get('link', '')
-                    
-                    # Парсим дату
-                    date = utc_now()
-                    date_str = wp_post.get('date', '')
-                    if date_str:
-                        try:
-                            # WordPress API возвращает дату в UTC, но без timezone info
-                            # Добавляем timezone info
-                            if 'T' in date_str and 'Z' not in date_str:
-                                date_str += 'Z'
-                            date_with_tz = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                            # Убираем timezone info для сохранения в базу данных
-                            date = date_with_tz.replace(tzinfo=None)
-                        except:
-                            pass
-                    
-                    # Очищаем HTML теги из контента
-                    if content:
-                        soup = BeautifulSoup(content, 'html.parser')
-                        content = soup.get_text().strip()
-                    
-                    if excerpt:
-                        soup = BeautifulSoup(excerpt, 'html.parser')
-                        excerpt = soup.get_text().strip()
-                    
-                    if title and content:
-                        posts.append({
-                            'id': post_id,
-                            'title': title,
-                            'content': content,
-                            'excerpt': excerpt,
-                            'link': link,
-                            'date': date
-                        })
-                    
-                    # Небольшая задержка между обработкой статей
-                    await asyncio.sleep(0.1)
-                    
-                except Exception as e:
-                    logger.warning(f"Ошибка при обработке статьи {i+1}: {e}")
-                    continue
-            
-            if client_id:
-                await websocket_manager.send_step(client_id, "Индексация завершена", len(wp_posts), len(wp_posts))
+        await sync.load()
+        async for batch in iter_wordpress_posts(domain, modified_after, progress=report_progress):
+            await sync.apply(batch)
+        
+        live_ids = sync.seen_ids if modified_after is None else await fetch_wordpress_post_ids(domain)
+        stats = await sync.finish(live_ids)
         
-        return posts
+        if client_id:
+            await websocket_manager.send_step(client_id, "Индексация завершена", 1, 1)
+        return stats
         
     except Exception as e:
         logger.error(f"Ошибка при парсинге WordPress сайта: {e}")
+        await sync.abort()
         if client_id:
             await websocket_manager.send_error(client_id, "Ошибка парсинга", str(e))
         raise
@@ -1707,7 +1677,8 @@ async def get_seo_recommendations(
             raise HTTPException(status_code=404, detail="Статьи не найдены. Сначала выполните индексацию.")
         
         # Генерируем SEO рекомендации
-        recommendations = await generate_seo_recommendations(posts, domain, request_data.client_id)
+        term_stats = await ensure_domain_term_stats(db, domain_obj.id)
+        recommendations = await generate_seo_recommendations(posts, domain, request_data.client_id, term_stats)
         
         # Сохраняем анализ в историю
         analysis = AnalysisHistory(
@@ -1747,7 +1718,12 @@ async def get_seo_recommendations(
         logger.error(f"Ошибка при генерации SEO рекомендаций: {e}")
         raise HTTPException(status_code=500, detail=f"Ошибка генерации рекомендаций: {str(e)}")
 
-async def generate_seo_recommendations(posts: List[WordPressPost], domain: str, client_id: str = None) -> List[dict]:
+async def generate_seo_recommendations(
+    posts: List[WordPressPost],
+    domain: str,
+    client_id: str = None,
+    term_stats: Optional[DomainTermStats] = None
+) -> List[dict]:
     """Генерация SEO рекомендаций на основе анализа постов с использованием LLM Router."""
     recommendations = []
     
@@ -1785,7 +1761,7 @@ async def generate_seo_recommendations(posts: List[WordPressPost], domain: str,
         recommendations.extend(content_recs)
         
         # Анализ семантики
-        semantic_recs = await analyze_semantic_optimization(posts, client_id)
+        semantic_recs = await analyze_semantic_optimization(posts, client_id, term_stats)
         recommendations.extend(semantic_recs)
         
         # Анализ структуры
@@ -1935,23 +1911,28 @@ async def analyze_content_with_llm(posts_data: List[dict], domain: str, client_i
         logger.error(f"Ошибка при AI-анализе контента: {e}")
         return []
 
+def _build_link_suggestions(posts_data: List[dict], max_sources: int = 5) -> Tuple[List[dict], Dict[int, list]]:
+    """Поиск статей без внутренних ссылок и кандидатов для них (CPU-емко, в отдельном потоке)."""
+    engine = LinkSuggestionEngine(vectorizer=clone(rag_manager.vectorizer), top_k=3)
+    engine.fit(posts_data)
+    
+    # Статьи, в тексте которых не упоминается ни один заголовок других статей
+    posts_without_links = [post for post in posts_data if not engine.existing_links.get(post['id'])]
+    suggestions = engine.suggest(post['id'] for post in posts_without_links[:max_sources])
+    return posts_without_links, suggestions
+
 async def analyze_internal_linking(posts: List[WordPressPost], client_id: str = None) -> List[dict]:
     """Анализ внутренних ссылок."""
     recommendations = []
+    if len(posts) < 2:
+        return recommendations
     
-    # Простой анализ - ищем статьи без внутренних ссылок
-    posts_without_links = []
-    for post in posts:
-        # Проверяем, есть ли в контенте ссылки на другие статьи
-        content_lower = post.content.lower()
-        has_internal_links = any(
-            other_post.title.lower() in content_lower 
-            for other_post in posts 
-            if other_post.id != post.id
-        )
-        
-        if not has_internal_links:
-            posts_without_links.append(post)
+    posts_data = [
+        {'id': post.id, 'title': post.title or '', 'content': post.content or '', 'link': post.link}
+        for post in posts
+    ]
+    posts_without_links, suggestions = await asyncio.to_thread(_build_link_suggestions, posts_data)
+    by_id = {post['id']: post for post in posts_data}
     
     if posts_without_links:
         recommendations.append({
@@ -1961,12 +1942,19 @@ async def analyze_internal_linking(posts: List[WordPressPost], client_id: str =
             "description": f"Найдено {len(posts_without_links)} статей без внутренних ссылок",
             "details": [
                 {
-                    "post_title": post.title,
-                    "post_url": post.link,
+                    "post_title": post['title'],
+                    "post_url": post['link'],
                     "suggested_links": [
-                        other_post.title 
-                        for other_post in posts[:3] 
-                        if other_post.id != post.id
+                        by_id[s.target_id]['title'] for s in suggestions.get(post['id'], [])
+                    ],
+                    "suggestions": [
+                        {
+                            "target_title": by_id[s.target_id]['title'],
+                            "target_url": by_id[s.target_id]['link'],
+                            "score": round(s.score, 3),
+                            "anchor_candidates": s.anchor_candidates
+                        }
+                        for s in suggestions.get(post['id'], [])
                     ]
                 }
                 for post in posts_without_links[:5]  # Показываем только первые 5
@@ -2019,22 +2007,29 @@ async def analyze_content_quality(posts: List[WordPressPost], client_id: str = N
     
     return recommendations
 
-async def analyze_semantic_optimization(posts: List[WordPressPost], client_id: str = None) -> List[dict]:
+def _aggregate_term_stats(posts: List[WordPressPost]) -> TermAggregate:
+    """Агрегат терминов по статьям без сохраненной статистики (CPU, вне event loop)"""
+    aggregate = TermAggregate()
+    for post in posts:
+        aggregate.add(compute_post_stats(post.content))
+    return aggregate
+
+async def analyze_semantic_optimization(
+    posts: List[WordPressPost],
+    client_id: str = None,
+    term_stats: Optional[DomainTermStats] = None
+) -> List[dict]:
     """Анализ семантической оптимизации."""
     recommendations = []
     
-    # Анализ ключевых слов
-    all_content = " ".join([post.content for post in posts])
-    words = word_tokenize(all_content.lower())
-    words = [word for word in words if word.isalpha() and word not in RUSSIAN_STOP_WORDS]
-    
-    # Простой анализ частоты слов
-    word_freq = defaultdict(int)
-    for word in words:
-        word_freq[word] += 1
+    # Анализ ключевых слов по сохраненному агрегату домена
+    if term_stats is not None:
+        aggregate = TermAggregate(term_stats.term_counts, term_stats.total_terms, term_stats.posts_count)
+    else:
+        aggregate = await asyncio.to_thread(_aggregate_term_stats, posts)
     
     # Находим наиболее частые слова
-    top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_words = aggregate.top(10)
     
     recommendations.append({
         "type": "semantic_optimization",
@@ -2090,11 +2085,9 @@ async def get_domain_insights(
         if not domain:
             raise HTTPException(status_code=404, detail="Домен не найден")
         
-        # Получаем посты домена
-        posts = await db.execute(
-            select(WordPressPost).where(WordPressPost.domain_id == domain_id)
-        )
-        posts = posts.scalars().all()
+        # Метрики статей и агрегат терминов без загрузки текстов
+        term_stats = await ensure_domain_term_stats(db, domain_id)
+        posts = await load_post_metrics(db, domain_id)
         
         # Получаем историю анализов
         analyses = await db.execute(
@@ -2106,7 +2099,7 @@ async def get_domain_insights(
         analyses = analyses.scalars().all()
         
         # Генерируем инсайты
-        insights = await generate_domain_insights(posts, analyses)
+        insights = await generate_domain_insights(posts, analyses, term_stats)
         
         return {
             "status": "success",
@@ -2152,14 +2145,12 @@ async def get_domain_analytics(
         if not domain:
             raise HTTPException(status_code=404, detail="Домен не найден")
         
-        # Получаем посты домена
-        posts = await db.execute(
-            select(WordPressPost).where(WordPressPost.domain_id == domain_id)
-        )
-        posts = posts.scalars().all()
+        # Метрики статей и агрегат терминов без загрузки текстов
+        term_stats = await ensure_domain_term_stats(db, domain_id)
+        posts = await load_post_metrics(db, domain_id)
         
         # Генерируем аналитику
-        analytics = await generate_domain_analytics(posts)
+        analytics = await generate_domain_analytics(posts, term_stats)
         
         return {
             "status": "success",
@@ -2178,8 +2169,27 @@ async def get_domain_analytics(
         logger.error(f"Ошибка при получении аналитики: {e}")
         raise HTTPException(status_code=500, detail=f"Ошибка получения аналитики: {str(e)}")
 
-async def generate_domain_insights(posts: List[WordPressPost], analyses: List[AnalysisHistory]) -> dict:
-    """Генерация инсайтов по домену."""
+async def load_post_metrics(db: AsyncSession, domain_id: int) -> list:
+    """Легкие метрики статей домена: оценки и размеры из PostTermStats вместо текстов."""
+    result = await db.execute(
+        select(
+            WordPressPost.title,
+            WordPressPost.link,
+            WordPressPost.content_quality_score,
+            WordPressPost.semantic_richness,
+            WordPressPost.linkability_score,
+            WordPressPost.content_type,
+            WordPressPost.target_audience,
+            func.coalesce(PostTermStats.content_length, 0).label("content_length"),
+            func.coalesce(PostTermStats.word_count, 0).label("word_count")
+        )
+        .outerjoin(PostTermStats, PostTermStats.post_id == WordPressPost.id)
+        .where(WordPressPost.domain_id == domain_id)
+    )
+    return result.all()
+
+async def generate_domain_insights(posts: list, analyses: List[AnalysisHistory], term_stats: DomainTermStats) -> dict:
+    """Генерация инсайтов по домену (posts - строки load_post_metrics)."""
     insights = {
         "content_insights": {},
         "performance_insights": {},
@@ -2191,7 +2201,7 @@ async def generate_domain_insights(posts: List[WordPressPost], analyses: List[An
         return insights
     
     # Инсайты по контенту
-    total_content_length = sum(len(post.content) for post in posts)
+    total_content_length = sum(post.content_length for post in posts)
     avg_content_length = total_content_length / len(posts)
     
     insights["content_insights"] = {
@@ -2199,18 +2209,18 @@ async def generate_domain_insights(posts: List[WordPressPost], analyses: List[An
         "total_content_length": total_content_length,
         "average_content_length": round(avg_content_length, 2),
         "content_distribution": {
-            "short_posts": len([p for p in posts if len(p.content) < 1000]),
-            "medium_posts": len([p for p in posts if 1000 <= len(p.content) < 3000]),
-            "long_posts": len([p for p in posts if len(p.content) >= 3000])
+            "short_posts": len([p for p in posts if p.content_length < 1000]),
+            "medium_posts": len([p for p in posts if 1000 <= p.content_length < 3000]),
+            "long_posts": len([p for p in posts if p.content_length >= 3000])
         },
         "top_performing_content": [
             {
                 "title": post.title,
                 "url": post.link,
-                "length": len(post.content),
+                "length": post.content_length,
                 "quality_score": post.content_quality_score
             }
-            for post in sorted(posts, key=lambda p: p.content_quality_score, reverse=True)[:5]
+            for post in heapq.nlargest(5, posts, key=lambda p: p.content_quality_score)
         ]
     }
     
@@ -2224,20 +2234,13 @@ async def generate_domain_insights(posts: List[WordPressPost], analyses: List[An
             "analysis_metrics": latest_analysis.semantic_metrics
         }
     
-    # SEO инсайты
-    all_content = " ".join([post.content for post in posts])
-    words = word_tokenize(all_content.lower())
-    words = [word for word in words if word.isalpha() and word not in RUSSIAN_STOP_WORDS]
-    
-    word_freq = defaultdict(int)
-    for word in words:
-        word_freq[word] += 1
-    
-    top_keywords = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:15]
+    # SEO инсайты по сохраненному агрегату терминов
+    aggregate = TermAggregate(term_stats.term_counts, term_stats.total_terms, term_stats.posts_count)
+    top_keywords = aggregate.top(15)
     
     insights["seo_insights"] = {
         "top_keywords": [{"word": word, "frequency": freq} for word, freq in top_keywords],
-        "keyword_density": len(set(words)) / len(words) if words else 0,
+        "keyword_density": aggregate.unique_terms / aggregate.total_terms if aggregate.total_terms else 0,
         "content_optimization_score": sum(post.content_quality_score for post in posts) / len(posts)
     }
     
@@ -2250,8 +2253,8 @@ async def generate_domain_insights(posts: List[WordPressPost], analyses: List[An
     
     return insights
 
-async def generate_domain_analytics(posts: List[WordPressPost]) -> dict:
-    """Генерация аналитики по домену."""
+async def generate_domain_analytics(posts: list, term_stats: DomainTermStats) -> dict:
+    """Генерация аналитики по домену (posts - строки load_post_metrics)."""
     analytics = {
         "content_metrics": {},
         "semantic_analysis": {},
@@ -2263,10 +2266,10 @@ async def generate_domain_analytics(posts: List[WordPressPost]) -> dict:
         return analytics
     
     # Метрики контента
-    content_lengths = [len(post.content) for post in posts]
+    content_lengths = [post.content_length for post in posts]
     analytics["content_metrics"] = {
         "total_posts": len(posts),
-        "total_words": sum(len(post.content.split()) for post in posts),
+        "total_words": sum(post.word_count for post in posts),
         "average_length": round(sum(content_lengths) / len(content_lengths), 2),
         "min_length": min(content_lengths),
         "max_length": max(content_lengths),
@@ -2278,20 +2281,14 @@ async def generate_domain_analytics(posts: List[WordPressPost]) -> dict:
         }
     }
     
-    # Семантический анализ
-    all_content = " ".join([post.content for post in posts])
-    words = word_tokenize(all_content.lower())
-    words = [word for word in words if word.isalpha() and word not in RUSSIAN_STOP_WORDS]
-    
-    word_freq = defaultdict(int)
-    for word in words:
-        word_freq[word] += 1
+    # Семантический анализ по сохраненному агрегату терминов
+    aggregate = TermAggregate(term_stats.term_counts, term_stats.total_terms, term_stats.posts_count)
     
     analytics["semantic_analysis"] = {
-        "unique_words": len(set(words)),
-        "total_words": len(words),
-        "lexical_diversity": len(set(words)) / len(words) if words else 0,
-        "top_keywords": [{"word": word, "frequency": freq} for word, freq in sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:20]]
+        "unique_words": aggregate.unique_terms,
+        "total_words": aggregate.total_terms,
+        "lexical_diversity": aggregate.unique_terms / aggregate.total_terms if aggregate.total_terms else 0,
+        "top_keywords": [{"word": word, "frequency": freq} for word, freq in aggregate.top(20)]
     }
     
     # Метрики качества
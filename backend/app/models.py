@@ -2,7 +2,7 @@
 
 from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
-from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, JSON, String, Text, Boolean
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, JSON, LargeBinary, String, Text, Boolean
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from uuid import uuid4
 from enum import Enum
@@ -119,6 +119,7 @@ class WordPressPost(Base):
     content: Mapped[str] = mapped_column(Text)
     excerpt: Mapped[str] = mapped_column(Text, nullable=True)
     link: Mapped[str] = mapped_column(Text, index=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # sha256 контента для инкрементальной реиндексации
 
     # Семантические поля для LLM
     semantic_summary: Mapped[str] = mapped_column(Text, nullable=True)  # Краткое описание для LLM
@@ -143,12 +144,14 @@ class WordPressPost(Base):
     domain_ref: Mapped["Domain"] = relationship("Domain", back_populates="posts")
     thematic_group: Mapped["ThematicGroup"] = relationship("ThematicGroup", back_populates="posts")
     embeddings: Mapped[List["ArticleEmbedding"]] = relationship("ArticleEmbedding", back_populates="post", cascade="all, delete-orphan")
+    term_stats: Mapped[Optional["PostTermStats"]] = relationship("PostTermStats", back_populates="post", uselist=False, cascade="all, delete-orphan")
 
     __table_args__ = (
         Index('idx_post_domain', 'domain_id'),
         Index('idx_post_thematic', 'thematic_group_id'),
         Index('idx_post_link', 'link'),
         Index('idx_post_published', 'published_at'),
+        Index('idx_post_domain_wp_id', 'domain_id', 'wp_post_id'),
     )
 
 class ArticleEmbedding(Base):
@@ -162,7 +165,8 @@ class ArticleEmbedding(Base):
     # Различные типы эмбеддингов
     embedding_type: Mapped[str] = mapped_column(String(50))  # 'title', 'content', 'summary', 'full'
     vector_model: Mapped[str] = mapped_column(String(100))  # модель векторизации
-    embedding_vector: Mapped[str] = mapped_column(Text)  # JSON вектора
+    vector_data: Mapped[bytes] = mapped_column(LargeBinary)  # вектор в байтах (см. vector_storage)
+    vector_dtype: Mapped[str] = mapped_column(String(16), default="float32")  # float32 или float16
     dimension: Mapped[int] = mapped_column(Integer)  # размерность вектора
 
     # Метаданные для контекста
@@ -180,6 +184,37 @@ class ArticleEmbedding(Base):
         Index('idx_embedding_type', 'embedding_type'),
     )
 
+class PostTermStats(Base):
+    """Частоты терминов статьи, рассчитанные при индексации."""
+
+    __tablename__ = "post_term_stats"
+
+    post_id: Mapped[int] = mapped_column(Integer, ForeignKey("wordpress_posts.id"), primary_key=True)
+    domain_id: Mapped[int] = mapped_column(Integer, ForeignKey("domains.id"), index=True)
+
+    term_counts: Mapped[dict] = mapped_column(JSON, default=dict)  # термин -> частота (без стоп-слов)
+    total_terms: Mapped[int] = mapped_column(Integer, default=0)  # всего терминов после фильтрации
+    word_count: Mapped[int] = mapped_column(Integer, default=0)  # слов в тексте (split)
+    content_length: Mapped[int] = mapped_column(Integer, default=0)  # длина текста в символах
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, onupdate=utc_now)
+
+    # Отношения
+    post: Mapped["WordPressPost"] = relationship("WordPressPost", back_populates="term_stats")
+
+class DomainTermStats(Base):
+    """Агрегированные частоты терминов домена, обновляются инкрементально."""
+
+    __tablename__ = "domain_term_stats"
+
+    domain_id: Mapped[int] = mapped_column(Integer, ForeignKey("domains.id"), primary_key=True)
+
+    term_counts: Mapped[dict] = mapped_column(JSON, default=dict)  # сумма PostTermStats.term_counts
+    total_terms: Mapped[int] = mapped_column(Integer, default=0)
+    posts_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, onupdate=utc_now)
+
 class AnalysisHistory(Base):
     """Улучшенная модель истории анализов с детальными метриками."""
 
@@ -288,7 +323,8 @@ class DiagramEmbedding(Base):
     # Типы эмбеддингов
     embedding_type: Mapped[str] = mapped_column(String(50))  # 'title', 'description', 'components', 'full'
     vector_model: Mapped[str] = mapped_column(String(100))
-    embedding_vector: Mapped[str] = mapped_column(Text)  # JSON вектора
+    vector_data: Mapped[bytes] = mapped_column(LargeBinary)  # вектор в байтах (см. vector_storage)
+    vector_dtype: Mapped[str] = mapped_column(String(16), default="float32")
     dimension: Mapped[int] = mapped_column(Integer)
     
     # Контекст для RAG
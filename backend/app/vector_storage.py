@@ -0,0 +1,120 @@
+"""
+Бинарное хранение векторов эмбеддингов и загрузка их в NumPy матрицы
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import ArticleEmbedding, DiagramEmbedding, WordPressPost
+
+logger = logging.getLogger(__name__)
+
+# Явный little-endian, чтобы байты не зависели от платформы
+VECTOR_DTYPES: Dict[str, np.dtype] = {
+    'float32': np.dtype('<f4'),
+    'float16': np.dtype('<f2'),
+}
+DEFAULT_VECTOR_DTYPE = 'float32'
+
+
+def encode_vector(vector: Sequence[float], dtype: str = DEFAULT_VECTOR_DTYPE) -> bytes:
+    """Вектор в байты (float32 или float16)"""
+    return np.asarray(vector, dtype=VECTOR_DTYPES[dtype]).tobytes()
+
+
+def decode_vector(data: bytes, dtype: str = DEFAULT_VECTOR_DTYPE) -> np.ndarray:
+    """Байты в float32 вектор"""
+    return np.frombuffer(data, dtype=VECTOR_DTYPES[dtype]).astype(np.float32)
+
+
+def stack_vectors(rows: Sequence[Tuple[bytes, str]], dimension: int) -> np.ndarray:
+    """Сборка векторов (data, dtype) одной размерности в непрерывную float32 матрицу
+
+    Если все векторы в одном формате, байты склеиваются и разбираются
+    одним вызовом frombuffer без поэлементного копирования.
+    """
+    if not rows:
+        return np.empty((0, dimension), dtype=np.float32)
+    dtypes = {dtype for _, dtype in rows}
+    if len(dtypes) == 1:
+        dtype = VECTOR_DTYPES[dtypes.pop()]
+        matrix = np.frombuffer(b"".join(data for data, _ in rows), dtype=dtype)
+        return matrix.reshape(len(rows), dimension).astype(np.float32)
+    matrix = np.empty((len(rows), dimension), dtype=np.float32)
+    for i, (data, dtype) in enumerate(rows):
+        matrix[i] = decode_vector(data, dtype)
+    return matrix
+
+
+async def load_vector_matrix(db: AsyncSession, statement: Select) -> Tuple[List[Tuple[Any, ...]], np.ndarray]:
+    """Векторы из запроса в одну матрицу
+
+    statement выбирает (vector_data, vector_dtype, dimension, *ключи).
+    Возвращает ключи строк и float32 матрицу (строки в том же порядке).
+    Строки с размерностью, отличной от первой, пропускаются.
+    """
+    result = await db.execute(statement)
+    keys: List[Tuple[Any, ...]] = []
+    rows: List[Tuple[bytes, str]] = []
+    dimension: Optional[int] = None
+    skipped = 0
+    for data, dtype, row_dimension, *row_keys in result:
+        if data is None:
+            continue
+        if dimension is None:
+            dimension = row_dimension
+        elif row_dimension != dimension:
+            skipped += 1
+            continue
+        keys.append(tuple(row_keys))
+        rows.append((data, dtype or DEFAULT_VECTOR_DTYPE))
+    if skipped:
+        logger.warning(f"Пропущено {skipped} векторов с размерностью, отличной от {dimension}")
+    return keys, stack_vectors(rows, dimension or 0)
+
+
+async def load_article_vectors(
+    db: AsyncSession,
+    domain_id: int,
+    embedding_type: str = 'content',
+    vector_model: Optional[str] = None
+) -> Tuple[List[int], np.ndarray]:
+    """Эмбеддинги статей домена: (post_id, матрица)"""
+    statement = (
+        select(
+            ArticleEmbedding.vector_data,
+            ArticleEmbedding.vector_dtype,
+            ArticleEmbedding.dimension,
+            ArticleEmbedding.post_id
+        )
+        .join(WordPressPost, WordPressPost.id == ArticleEmbedding.post_id)
+        .where(WordPressPost.domain_id == domain_id, ArticleEmbedding.embedding_type == embedding_type)
+        .order_by(ArticleEmbedding.post_id)
+    )
+    if vector_model:
+        statement = statement.where(ArticleEmbedding.vector_model == vector_model)
+    keys, matrix = await load_vector_matrix(db, statement)
+    return [post_id for post_id, in keys], matrix
+
+
+async def load_diagram_vectors(
+    db: AsyncSession,
+    embedding_types: Iterable[str]
+) -> Tuple[List[Tuple[int, str]], np.ndarray]:
+    """Эмбеддинги диаграмм: ((diagram_id, embedding_type), матрица)"""
+    statement = (
+        select(
+            DiagramEmbedding.vector_data,
+            DiagramEmbedding.vector_dtype,
+            DiagramEmbedding.dimension,
+            DiagramEmbedding.diagram_id,
+            DiagramEmbedding.embedding_type
+        )
+        .where(DiagramEmbedding.embedding_type.in_(list(embedding_types)))
+        .order_by(DiagramEmbedding.id)
+    )
+    return await load_vector_matrix(db, statement)
@@ -0,0 +1,380 @@
+"""
+Загрузка статей WordPress через REST API и инкрементальная синхронизация с базой данных
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+from bs4 import BeautifulSoup
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .corpus_stats import DomainTermStatsUpdater, compute_post_stats
+from .http_clients import get_http_clients
+from .models import ArticleEmbedding, WordPressPost, utc_now
+
+logger = logging.getLogger(__name__)
+
+# Поля, которые реально используются при индексации (_fields сокращает ответ в разы)
+WP_POST_FIELDS = "id,date,link,title,content,excerpt"
+WP_PER_PAGE_FALLBACK = (100, 50, 10)
+WP_FETCH_CONCURRENCY = 4
+WP_FETCH_RETRIES = 3
+WP_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# (загружено страниц, всего страниц, всего статей)
+ProgressCallback = Callable[[int, int, int], Awaitable[None]]
+
+
+def post_content_hash(
+    title: str,
+    content: str,
+    excerpt: Optional[str],
+    link: str,
+    published_at: Optional[datetime]
+) -> str:
+    """SHA-256 от полей статьи, влияющих на анализ и эмбеддинги"""
+    payload = json.dumps(
+        [title or '', content or '', excerpt or '', link or '',
+         published_at.isoformat() if published_at else ''],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _post_data_hash(post_data: Dict[str, Any]) -> str:
+    return post_content_hash(
+        post_data.get('title', ''),
+        post_data.get('content', ''),
+        post_data.get('excerpt', ''),
+        post_data.get('link', ''),
+        post_data.get('date')
+    )
+
+
+def _row_hash(post: WordPressPost) -> str:
+    return post_content_hash(post.title, post.content, post.excerpt, post.link, post.published_at)
+
+
+def _post_term_stats(post_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Статистика терминов, посчитанная в clean_wp_posts, или расчет на месте"""
+    return post_data.get('term_stats') or compute_post_stats(post_data.get('content', ''))
+
+
+def _parse_wp_date(date_str: str) -> datetime:
+    """Дата WordPress (UTC без timezone) в naive datetime"""
+    if not date_str:
+        return utc_now()
+    try:
+        if 'T' in date_str and 'Z' not in date_str:
+            date_str += 'Z'
+        return datetime.fromisoformat(date_str.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return utc_now()
+
+
+def clean_wp_posts(wp_posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Преобразование ответа WP REST API в статьи с очищенным от HTML текстом
+
+    Синхронная и CPU-емкая функция, вызывается вне event loop. Здесь же
+    считается статистика терминов статьи (см. corpus_stats).
+    """
+    posts = []
+    for wp_post in wp_posts:
+        try:
+            title = wp_post.get('title', {}).get('rendered', '')
+            content = wp_post.get('content', {}).get('rendered', '')
+            excerpt = wp_post.get('excerpt', {}).get('rendered', '')
+
+            if content:
+                content = BeautifulSoup(content, 'html.parser').get_text().strip()
+            if excerpt:
+                excerpt = BeautifulSoup(excerpt, 'html.parser').get_text().strip()
+
+            if title and content:
+                posts.append({
+                    'id': wp_post.get('id', 0),
+                    'title': title,
+                    'content': content,
+                    'excerpt': excerpt,
+                    'link': wp_post.get('link', ''),
+                    'date': _parse_wp_date(wp_post.get('date', '')),
+                    'term_stats': compute_post_stats(content)
+                })
+        except Exception as e:
+            logger.warning(f"Ошибка при обработке статьи {wp_post.get('id')}: {e}")
+    return posts
+
+
+async def _get_page(client: httpx.AsyncClient, url: str, params: Dict[str, Any]) -> httpx.Response:
+    """GET с повтором временных ошибок"""
+    for attempt in range(WP_FETCH_RETRIES):
+        try:
+            response = await client.get(url, params=params)
+            if response.status_code not in WP_RETRY_STATUSES:
+                return response
+        except httpx.TransportError as e:
+            if attempt == WP_FETCH_RETRIES - 1:
+                raise
+            logger.warning(f"Ошибка запроса {url} (страница {params.get('page')}): {e}")
+        await asyncio.sleep(0.5 * 2 ** attempt)
+    return response
+
+
+async def _get_first_page(
+    client: httpx.AsyncClient,
+    url: str,
+    params: Dict[str, Any],
+    error_message: str
+) -> Tuple[httpx.Response, int]:
+    """Первая страница и принятый сайтом per_page
+
+    Некоторые сайты ограничивают per_page, пробуем меньшие значения.
+    """
+    for per_page in WP_PER_PAGE_FALLBACK:
+        response = await _get_page(client, url, {**params, 'per_page': per_page, 'page': 1})
+        if response.status_code == 200:
+            return response, per_page
+    raise Exception(f"{error_message}: {response.status_code}")
+
+
+async def iter_wordpress_posts(
+    domain: str,
+    modified_after: Optional[datetime] = None,
+    concurrency: int = WP_FETCH_CONCURRENCY,
+    progress: Optional[ProgressCallback] = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Постраничная загрузка статей WordPress пачками
+
+    Первая страница определяет X-WP-Total/X-WP-TotalPages, остальные
+    загружаются параллельно (не более concurrency одновременно) и
+    отдаются по мере готовности. Очередь между загрузкой и потребителем
+    ограничена, поэтому память не растет с размером сайта, а запись в
+    базу идет, пока следующие страницы еще загружаются.
+    """
+    api_url = f"{domain.rstrip('/')}/wp-json/wp/v2/posts"
+    params: Dict[str, Any] = {'_fields': WP_POST_FIELDS}
+    if modified_after:
+        params['modified_after'] = modified_after.strftime('%Y-%m-%dT%H:%M:%S')
+
+    client = get_http_clients().client("wordpress")
+    response, per_page = await _get_first_page(
+        client, api_url, params, "Не удалось получить доступ к WordPress API"
+    )
+
+    total_posts = int(response.headers.get('X-WP-Total', 0) or 0)
+    total_pages = int(response.headers.get('X-WP-TotalPages', 1) or 1)
+    first_page = response.json()
+    logger.info(f"WordPress {domain}: {total_posts} статей на {total_pages} страницах по {per_page}")
+
+    if progress:
+        await progress(1, total_pages, total_posts)
+    yield await asyncio.to_thread(clean_wp_posts, first_page)
+    del first_page
+    if total_pages <= 1:
+        return
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    pages = iter(range(2, total_pages + 1))
+
+    async def fetch_pages():
+        # Воркеры разбирают страницы из общего итератора
+        for page in pages:
+            response = await _get_page(client, api_url, {**params, 'per_page': per_page, 'page': page})
+            if response.status_code != 200:
+                raise Exception(f"Ошибка загрузки страницы {page}: {response.status_code}")
+            await queue.put(await asyncio.to_thread(clean_wp_posts, response.json()))
+
+    async def produce():
+        try:
+            await asyncio.gather(*[fetch_pages() for _ in range(min(concurrency, total_pages - 1))])
+            await queue.put(None)
+        except Exception as e:
+            await queue.put(e)
+
+    producer = asyncio.create_task(produce())
+    try:
+        loaded = 1
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            loaded += 1
+            if progress:
+                await progress(loaded, total_pages, total_posts)
+            yield batch
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+async def fetch_wordpress_post_ids(domain: str) -> Set[int]:
+    """Идентификаторы всех опубликованных статей (для поиска удаленных)
+
+    Запрашивается только поле id, поэтому обход всех страниц дешев
+    даже для больших сайтов.
+    """
+    api_url = f"{domain.rstrip('/')}/wp-json/wp/v2/posts"
+    params = {'_fields': 'id'}
+    error_message = "Не удалось получить список статей WordPress"
+    client = get_http_clients().client("wordpress")
+    response, per_page = await _get_first_page(client, api_url, params, error_message)
+    ids: Set[int] = set()
+    page, total_pages = 1, 1
+    while True:
+        ids.update(item['id'] for item in response.json() if 'id' in item)
+        total_pages = int(response.headers.get('X-WP-TotalPages', total_pages) or total_pages)
+        page += 1
+        if page > total_pages:
+            return ids
+        response = await _get_page(client, api_url, {**params, 'per_page': per_page, 'page': page})
+        if response.status_code != 200:
+            raise Exception(f"{error_message}: {response.status_code}")
+
+
+class WordPressPostSync:
+    """Пакетный upsert статей домена по хэшу контента
+
+    Новые статьи добавляются, статьи с изменившимся хэшем обновляются
+    (их эмбеддинги удаляются для повторного расчета), неизмененные не
+    трогаются. Каждый пакет фиксируется отдельной транзакцией, в памяти
+    держится только индекс wp_post_id -> (id, hash). Статистика терминов
+    статей и агрегат домена обновляются в тех же транзакциях.
+    """
+
+    def __init__(self, db: AsyncSession, domain_id: int):
+        self.db = db
+        self.domain_id = domain_id
+        self.stored: Dict[int, tuple] = {}
+        self.seen_ids: Set[int] = set()
+        self.added = 0
+        self.updated = 0
+        self.term_stats = DomainTermStatsUpdater(db, domain_id)
+
+    async def load(self):
+        """Загрузка индекса существующих статей домена"""
+        rows = await self.db.execute(
+            select(WordPressPost.id, WordPressPost.wp_post_id, WordPressPost.content_hash)
+            .where(WordPressPost.domain_id == self.domain_id)
+        )
+        self.stored = {wp_post_id: (row_id, content_hash) for row_id, wp_post_id, content_hash in rows}
+        await self.term_stats.load(has_posts=bool(self.stored))
+
+    async def apply(self, posts: Iterable[Dict[str, Any]]):
+        """Upsert пачки статей"""
+        db = self.db
+        changed_ids: List[int] = []
+        for post_data in posts:
+            wp_post_id = post_data.get('id', 0)
+            self.seen_ids.add(wp_post_id)
+            new_hash = _post_data_hash(post_data)
+            existing = self.stored.get(wp_post_id)
+
+            if existing is None:
+                post = WordPressPost(
+                    domain_id=self.domain_id,
+                    wp_post_id=wp_post_id,
+                    title=post_data.get('title', ''),
+                    content=post_data.get('content', ''),
+                    excerpt=post_data.get('excerpt', ''),
+                    link=post_data.get('link', ''),
+                    published_at=post_data.get('date', utc_now()),
+                    content_hash=new_hash
+                )
+                db.add(post)
+                self.term_stats.add_new(post, _post_term_stats(post_data))
+                self.stored[wp_post_id] = (None, new_hash)
+                self.added += 1
+                continue
+
+            row_id, stored_hash = existing
+            if stored_hash == new_hash:
+                continue
+
+            if row_id is None:
+                # Дубликат статьи, добавленной в этой же синхронизации
+                continue
+
+            post = await db.get(WordPressPost, row_id)
+            if stored_hash is None and _row_hash(post) == new_hash:
+                # Строка создана до появления хэшей: заполняем без переиндексации
+                post.content_hash = new_hash
+                self.stored[wp_post_id] = (row_id, new_hash)
+                continue
+
+            post.title = post_data.get('title', '')
+            post.content = post_data.get('content', '')
+            post.excerpt = post_data.get('excerpt', '')
+            post.link = post_data.get('link', '')
+            post.published_at = post_data.get('date', post.published_at)
+            post.content_hash = new_hash
+            post.last_analyzed_at = None
+            await self.term_stats.replace(row_id, _post_term_stats(post_data))
+            self.stored[wp_post_id] = (row_id, new_hash)
+            changed_ids.append(row_id)
+            self.updated += 1
+
+        if changed_ids:
+            await db.execute(delete(ArticleEmbedding).where(ArticleEmbedding.post_id.in_(changed_ids)))
+        await db.commit()
+
+    async def abort(self):
+        """Прерванная синхронизация: агрегат терминов домена будет пересчитан
+
+        Нужно, только если зафиксированные пакеты изменили статистику,
+        а разность агрегата так и не была сохранена.
+        """
+        if not self.term_stats.has_changes:
+            await self.db.rollback()
+            return
+        try:
+            await self.term_stats.invalidate()
+        except Exception as e:
+            logger.error(f"Не удалось сбросить статистику терминов домена {self.domain_id}: {e}")
+
+    async def finish(self, live_ids: Optional[Set[int]] = None) -> Dict[str, int]:
+        """Удаление статей, которых нет в live_ids, и итоговая статистика"""
+        deleted = 0
+        if live_ids is not None:
+            removed_ids = [
+                row_id for wp_post_id, (row_id, _) in self.stored.items()
+                if row_id is not None and wp_post_id not in live_ids
+            ]
+            if removed_ids:
+                await self.db.execute(delete(ArticleEmbedding).where(ArticleEmbedding.post_id.in_(removed_ids)))
+                await self.term_stats.remove(removed_ids)
+                await self.db.execute(delete(WordPressPost).where(WordPressPost.id.in_(removed_ids)))
+                deleted = len(removed_ids)
+        await self.term_stats.save()
+        await self.db.commit()
+
+        total = len(self.stored) - deleted
+        result = {
+            'added': self.added,
+            'updated': self.updated,
+            'unchanged': total - self.added - self.updated,
+            'deleted': deleted,
+            'total': total
+        }
+        logger.info(f"Синхронизация статей домена {self.domain_id}: {result}")
+        return result
+
+
+async def sync_wordpress_posts(
+    db: AsyncSession,
+    domain_id: int,
+    posts: Iterable[Dict[str, Any]],
+    live_ids: Optional[Set[int]] = None
+) -> Dict[str, int]:
+    """Upsert статей домена одним пакетом (см. WordPressPostSync)"""
+    sync = WordPressPostSync(db, domain_id)
+    await sync.load()
+    await sync.apply(posts)
+    return await sync.finish(live_ids)
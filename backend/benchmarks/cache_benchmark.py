@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк in-memory кэша reLink (MemoryCache)
+
+Измеряет скорость вставки, попаданий, промахов и вытеснения
+для 1k, 100k и 1M ключей.
+
+Запуск из каталога backend:
+    python benchmarks/cache_benchmark.py
+    python benchmarks/cache_benchmark.py --sizes 1000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.cache import MemoryCache
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+
+async def _timed(operation, keys: List[str]) -> float:
+    """Выполнение операции для всех ключей, возвращает ops/sec"""
+    start = time.perf_counter()
+    for key in keys:
+        await operation(key)
+    duration = time.perf_counter() - start
+    return len(keys) / duration if duration > 0 else float("inf")
+
+
+async def benchmark_size(size: int) -> Dict[str, float]:
+    """Бенчмарк кэша с заданным числом ключей"""
+    cache = MemoryCache(max_size=size)
+    keys = [f"key:{i}" for i in range(size)]
+    missing = [f"missing:{i}" for i in range(size)]
+    overflow = [f"overflow:{i}" for i in range(size)]
+
+    async def do_set(key: str):
+        await cache.set(key, key, ttl=3600)
+
+    results = {
+        "insert_ops": await _timed(do_set, keys),
+        "hit_ops": await _timed(cache.get, keys),
+        "miss_ops": await _timed(cache.get, missing),
+        # Каждая вставка в заполненный кэш вытесняет LRU-элемент
+        "evict_ops": await _timed(do_set, overflow),
+    }
+    results["evictions"] = cache.get_stats()["evictions"]
+    return results
+
+
+async def main(sizes: List[int]):
+    print(f"{'keys':>10} {'insert/s':>12} {'hit/s':>12} {'miss/s':>12} {'evict/s':>12}")
+    for size in sizes:
+        r = await benchmark_size(size)
+        print(
+            f"{size:>10} {r['insert_ops']:>12,.0f} {r['hit_ops']:>12,.0f} "
+            f"{r['miss_ops']:>12,.0f} {r['evict_ops']:>12,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MemoryCache microbenchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк in-memory индекса эмбеддингов диаграмм (DiagramVectorIndex)
+
+Строит индекс из N эмбеддингов (по два на диаграмму) и измеряет
+задержку поиска top-k: среднее, p50 и p95 по серии запросов.
+
+Запуск из каталога backend:
+    python benchmarks/diagram_index_benchmark.py
+    python benchmarks/diagram_index_benchmark.py --rows 10000 100000 --dim 384
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.diagram_index import DiagramVectorIndex
+
+DEFAULT_ROWS = [10_000, 100_000]
+
+
+def build_index(rows: int, dim: int, rng: np.random.Generator) -> DiagramVectorIndex:
+    """Индекс с rows эмбеддингами, по два на диаграмму"""
+    index = DiagramVectorIndex()
+    diagram_ids = list(np.repeat(np.arange(rows // 2), 2))
+    index._set_rows(diagram_ids, rng.standard_normal((len(diagram_ids), dim)).astype(np.float32))
+    index._loaded = True
+    return index
+
+
+def main(sizes: List[int], dim: int, queries: int, limit: int):
+    rng = np.random.default_rng(1)
+    print(f"{'rows':>9} {'build, s':>9} {'memory, MB':>11} {'mean, ms':>9} {'p50, ms':>8} {'p95, ms':>8}")
+    for rows in sizes:
+        start = time.perf_counter()
+        index = build_index(rows, dim, rng)
+        build_time = time.perf_counter() - start
+
+        query_vectors = rng.standard_normal((queries, dim))
+        index.search(query_vectors[0], limit=limit)  # прогрев
+        latencies = []
+        for query in query_vectors:
+            start = time.perf_counter()
+            index.search(query, limit=limit)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        memory_mb = index._matrix.nbytes / 1024 / 1024
+        p50, p95 = np.percentile(latencies, [50, 95])
+        print(f"{rows:>9} {build_time:>9.2f} {memory_mb:>11.1f} {np.mean(latencies):>9.2f} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diagram vector index benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    main(args.rows, args.dim, args.queries, args.limit)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пакетного получения эмбеддингов через ConcurrentOllamaManager
+
+Поднимает локальный stub-сервер Ollama (/api/embed и /api/embeddings) с
+фиксированной задержкой на вызов и измеряет пропускную способность
+(текстов/сек) для разных max_batch_size. max_batch_size=1 соответствует
+прежней схеме "один HTTP-вызов на текст".
+
+Запуск из каталога backend:
+    python benchmarks/embedding_batch_benchmark.py
+    python benchmarks/embedding_batch_benchmark.py --texts 5000 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.llm.concurrent_manager import ConcurrentOllamaManager, OllamaConfig
+
+DEFAULT_BATCH_SIZES = [1, 8, 32, 64, 128]
+EMBEDDING_DIM = 384
+
+
+def make_stub_app(latency: float, per_text_cost: float) -> web.Application:
+    """Stub Ollama: задержка на вызов плюс небольшая стоимость на текст"""
+
+    async def embed(request: web.Request) -> web.Response:
+        data = await request.json()
+        texts = data["input"] if isinstance(data["input"], list) else [data["input"]]
+        await asyncio.sleep(latency + per_text_cost * len(texts))
+        return web.json_response({"embeddings": [[0.1] * EMBEDDING_DIM for _ in texts]})
+
+    async def embeddings(request: web.Request) -> web.Response:
+        await request.json()
+        await asyncio.sleep(latency + per_text_cost)
+        return web.json_response({"embedding": [0.1] * EMBEDDING_DIM})
+
+    app = web.Application()
+    app.router.add_post("/api/embed", embed)
+    app.router.add_post("/api/embeddings", embeddings)
+    return app
+
+
+async def run_once(base_url: str, texts: List[str], batch_size: int, concurrency: int) -> float:
+    """Прогон одного размера пакета, возвращает тексты/сек"""
+    config = OllamaConfig(
+        base_url=base_url,
+        max_concurrent_requests=concurrency,
+        embedding_batch_size=batch_size,
+    )
+    manager = ConcurrentOllamaManager(config)
+    await manager.start()
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*[manager.get_embedding(text, "embed-model") for text in texts])
+        duration = time.perf_counter() - start
+    finally:
+        await manager.stop()
+    return len(texts) / duration if duration > 0 else float("inf")
+
+
+async def main(args):
+    runner = web.AppRunner(make_stub_app(args.latency, args.per_text_cost))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        print(f"{'batch size':>10} {'texts/s':>12} {'speedup':>10}")
+        baseline = None
+        for batch_size in args.batch_sizes:
+            # Уникальные тексты на каждый прогон, чтобы не попадать в кэш
+            texts = [f"batch{batch_size} text {i}" for i in range(args.texts)]
+            throughput = await run_once(base_url, texts, batch_size, args.concurrency)
+            baseline = baseline or throughput
+            print(f"{batch_size:>10} {throughput:>12,.0f} {throughput / baseline:>9.1f}x")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding batching benchmark")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--concurrency", type=int, default=2, help="OLLAMA_NUM_PARALLEL")
+    parser.add_argument("--latency", type=float, default=0.01, help="задержка на HTTP-вызов, с")
+    parser.add_argument("--per-text-cost", type=float, default=0.0002, help="стоимость на текст, с")
+    parser.add_argument("--port", type=int, default=18434)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк рекомендаций внутренних ссылок
+
+Сравнивает прежний анализ (поиск каждого заголовка подстрокой в тексте
+каждой статьи, O(n²·L)) с LinkSuggestionEngine (TF-IDF + блочные
+матричные произведения + Aho–Corasick) на синтетическом корпусе.
+Прежний анализ для больших n замеряется на выборке источников и
+экстраполируется.
+
+Запуск из каталога backend:
+    python benchmarks/link_suggestions_benchmark.py
+    python benchmarks/link_suggestions_benchmark.py --posts 1000 5000 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.link_suggestions import LinkSuggestionEngine
+
+DEFAULT_SIZES = [1_000, 5_000]
+VOCABULARY = [f"слово{i}" for i in range(20_000)]
+TOPICS = 50
+
+
+def make_posts(count: int, words_per_post: int = 600, seed: int = 42) -> List[Dict]:
+    """Статьи по темам: у каждой темы свой частотный словарь"""
+    rng = random.Random(seed)
+    topic_words = [rng.sample(VOCABULARY, 300) for _ in range(TOPICS)]
+    posts = []
+    for i in range(count):
+        topic = topic_words[i % TOPICS]
+        words = rng.choices(topic, k=words_per_post // 2) + rng.choices(VOCABULARY, k=words_per_post // 2)
+        rng.shuffle(words)
+        posts.append({
+            'id': i,
+            'title': " ".join(rng.sample(topic, 4)),
+            'content': " ".join(words),
+            'link': f"https://example.com/post-{i}"
+        })
+    return posts
+
+
+def legacy_scan(posts: List[Dict], sources: List[Dict]) -> int:
+    """Прежний analyze_internal_linking: подстроки заголовков в тексте"""
+    without_links = 0
+    for post in sources:
+        content_lower = post['content'].lower()
+        if not any(other['title'].lower() in content_lower for other in posts if other['id'] != post['id']):
+            without_links += 1
+    return without_links
+
+
+def main(sizes: List[int], legacy_sample: int):
+    print(f"{'posts':>8} {'legacy, s':>12} {'engine fit, s':>14} {'suggest all, s':>15} {'speedup':>9}")
+    for size in sizes:
+        posts = make_posts(size)
+
+        sample = posts[:min(legacy_sample, size)]
+        start = time.perf_counter()
+        legacy_scan(posts, sample)
+        legacy_time = (time.perf_counter() - start) * size / len(sample)
+
+        engine = LinkSuggestionEngine(top_k=5)
+        start = time.perf_counter()
+        engine.fit(posts)
+        fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.suggest()
+        suggest_time = time.perf_counter() - start
+
+        total = fit_time + suggest_time
+        print(f"{size:>8} {legacy_time:>12.1f} {fit_time:>14.2f} {suggest_time:>15.2f} {legacy_time / total:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Link suggestion benchmark")
+    parser.add_argument("--posts", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--legacy-sample", type=int, default=100)
+    args = parser.parse_args()
+    main(args.posts, args.legacy_sample)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк Redis I/O для DistributedCache и RedisCache
+
+Сравнивает поштучную запись документов базы знаний (SETEX + SADD на документ)
+с пакетной записью через pipeline, а также очистку кэша через SCAN + UNLINK.
+Для каждого сценария выводятся число round-trip до Redis и время.
+
+По умолчанию используется fakeredis, --redis-url задает настоящий Redis.
+
+Запуск из каталога backend:
+    python benchmarks/redis_io_benchmark.py
+    python benchmarks/redis_io_benchmark.py --docs 10000 --redis-url redis://localhost:6379
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.cache import RedisCache
+from app.llm.distributed_cache import DistributedCache
+
+
+class RoundTripCounter:
+    """Подсчет round-trip: каждая команда клиента и каждый pipeline.execute()"""
+
+    def __init__(self, client):
+        self.count = 0
+        original_execute = client.execute_command
+        original_pipeline = client.pipeline
+
+        async def execute_command(*args, **kwargs):
+            self.count += 1
+            return await original_execute(*args, **kwargs)
+
+        def pipeline(*args, **kwargs):
+            pipe = original_pipeline(*args, **kwargs)
+            original_pipe_execute = pipe.execute
+
+            async def execute(*a, **kw):
+                self.count += 1
+                return await original_pipe_execute(*a, **kw)
+
+            pipe.execute = execute
+            return pipe
+
+        client.execute_command = execute_command
+        client.pipeline = pipeline
+
+    def reset(self):
+        self.count = 0
+
+
+def make_client(redis_url: str):
+    """Создание клиента: fakeredis или настоящий Redis"""
+    if redis_url == "fake":
+        import fakeredis
+        return fakeredis.aioredis.FakeRedis()
+    import redis.asyncio as redis
+    return redis.from_url(redis_url)
+
+
+def make_documents(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"id": f"doc-{i}", "content": f"SEO document {i} about internal linking", "embedding": [float(i % 7), 1.0, 0.5]}
+        for i in range(count)
+    ]
+
+
+async def legacy_ingest(client, documents: List[Dict[str, Any]], ttl: int = 3600):
+    """Прежняя схема: SETEX + SADD на каждый документ"""
+    for doc in documents:
+        await client.setex(f"knowledge:{doc['id']}", ttl, json.dumps(doc))
+        await client.sadd("knowledge_index", doc["id"])
+
+
+async def run(doc_count: int, redis_url: str):
+    client = make_client(redis_url)
+    counter = RoundTripCounter(client)
+    documents = make_documents(doc_count)
+
+    cache = DistributedCache()
+    cache.redis = client
+    # Индекс из прошлых прогонов не нужен
+    cache._vector_index_loaded = True
+    cache.config.vector_index_persist_interval = float("inf")
+
+    redis_cache = RedisCache()
+    redis_cache._client = client
+
+    results = []
+
+    async def measure(name: str, coro):
+        counter.reset()
+        start = time.perf_counter()
+        await coro
+        results.append((name, counter.count, time.perf_counter() - start))
+
+    await client.flushdb()
+    await measure("knowledge ingest (per-document)", legacy_ingest(client, documents))
+    await client.flushdb()
+    await measure("knowledge ingest (pipelined)", cache.add_to_knowledge_base(documents))
+    await measure("clear_cache (SCAN + UNLINK)", cache.clear_cache("knowledge:*"))
+
+    items = {f"key:{i}": {"value": i} for i in range(doc_count)}
+    await measure("RedisCache.set_many", redis_cache.set_many(items))
+    await measure("RedisCache.get_many", redis_cache.get_many(list(items)))
+    await measure("RedisCache.clear", redis_cache.clear())
+
+    print(f"{'scenario':<36} {'round-trips':>12} {'wall time, s':>14}")
+    for name, round_trips, duration in results:
+        print(f"{name:<36} {round_trips:>12} {duration:>14.3f}")
+
+    await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Redis I/O benchmark")
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--redis-url", default="fake", help="'fake' для fakeredis или URL Redis")
+    args = parser.parse_args()
+    asyncio.run(run(args.docs, args.redis_url))
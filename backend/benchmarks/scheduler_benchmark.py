@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк планировщика LLM запросов: симуляция перегрузки Ollama
+
+Дискретно-событийная симуляция с виртуальными часами: запросы пяти
+уровней приоритета приходят пуассоновскими потоками, время выполнения
+распределено логнормально, запросы выполняют воркеры. Сравниваются
+прежняя схема (все запросы сразу ждут на семафоре, который будит их в
+порядке прихода, без дедлайнов) и WeightedFairScheduler (взвешенная
+очередь, aging, дедлайны из get_timeout и контроль допуска). Для каждого
+уровня выводятся p50/p99 задержки успешных ответов, число отказов и
+таймаутов.
+
+Запуск из каталога backend:
+    python benchmarks/scheduler_benchmark.py
+    python benchmarks/scheduler_benchmark.py --load 1.5 --duration 3600
+"""
+
+import argparse
+import heapq
+import itertools
+import math
+import os
+import random
+import sys
+from collections import deque
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.llm.request_prioritizer import Priority, RequestPrioritizer
+from app.llm.request_scheduler import AdmissionRejected, SchedulerConfig, WeightedFairScheduler
+
+# Доля запросов каждого уровня: немного интерактивных и поток фоновых задач
+TRAFFIC_MIX = {
+    Priority.CRITICAL: 0.05,
+    Priority.HIGH: 0.15,
+    Priority.NORMAL: 0.25,
+    Priority.LOW: 0.30,
+    Priority.BACKGROUND: 0.25,
+}
+
+
+class TierResult:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.rejected = 0
+        self.timed_out = 0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return math.nan
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def generate_arrivals(load: float, workers: int, mean_service: float, duration: float, seed: int) -> List[tuple]:
+    """Поток запросов (время прихода, уровень, время выполнения) с нагрузкой load от мощности воркеров"""
+    rng = random.Random(seed)
+    total_rate = load * workers / mean_service
+    sigma = 0.8
+    mu = math.log(mean_service) - sigma ** 2 / 2
+    arrivals = []
+    for tier, share in TRAFFIC_MIX.items():
+        now = 0.0
+        while True:
+            now += rng.expovariate(total_rate * share)
+            if now >= duration:
+                break
+            arrivals.append((now, tier, rng.lognormvariate(mu, sigma)))
+    arrivals.sort(key=lambda arrival: arrival[0])
+    return arrivals
+
+
+def simulate_legacy(arrivals: List[tuple], workers: int, timeouts: Dict[Priority, float]) -> Dict[Priority, TierResult]:
+    """Прежняя схема: FIFO ожидание семафора, клиент бросает ответ после таймаута"""
+    results = {tier: TierResult() for tier in Priority}
+    free_at = [0.0] * workers
+    waiting = deque(arrivals)
+    while waiting:
+        arrived, tier, service = waiting.popleft()
+        start = max(arrived, heapq.heappop(free_at))
+        finish = start + service
+        heapq.heappush(free_at, finish)
+        if finish - arrived > timeouts[tier]:
+            results[tier].timed_out += 1
+        else:
+            results[tier].latencies.append(finish - arrived)
+    return results
+
+
+def simulate_scheduler(arrivals: List[tuple], config: SchedulerConfig) -> Dict[Priority, TierResult]:
+    """WeightedFairScheduler: воркер выполняет запрос не дольше его дедлайна"""
+    now = 0.0
+    scheduler = WeightedFairScheduler(RequestPrioritizer(), config, clock=lambda: now)
+    results = {tier: TierResult() for tier in Priority}
+    sequence = itertools.count()
+    events = [(arrived, next(sequence), "arrival", (arrived, tier, service)) for arrived, tier, service in arrivals]
+    heapq.heapify(events)
+    idle = config.workers
+
+    def dispatch():
+        nonlocal idle
+        for item in scheduler.pop_expired():
+            results[item.tier].timed_out += 1
+        while idle:
+            item = scheduler.pop()
+            if item is None:
+                return
+            idle -= 1
+            run_time = min(item.payload, item.deadline - now)
+            heapq.heappush(events, (now + run_time, next(sequence), "done", (item, run_time)))
+
+    while events:
+        now, _, kind, data = heapq.heappop(events)
+        if kind == "arrival":
+            _, tier, service = data
+            try:
+                scheduler.submit(service, tier.name.lower())
+            except AdmissionRejected:
+                results[tier].rejected += 1
+        else:
+            item, run_time = data
+            idle += 1
+            scheduler.record_service(item.tier, run_time)
+            if run_time < item.payload:
+                results[item.tier].timed_out += 1
+            else:
+                results[item.tier].latencies.append(now - item.enqueued_at)
+        dispatch()
+    return results
+
+
+def report(name: str, results: Dict[Priority, TierResult]):
+    print(name)
+    print(f"{'priority':>12} {'ok':>6} {'p50 s':>8} {'p99 s':>8} {'rejected':>9} {'timeout':>8}")
+    for tier, result in results.items():
+        print(f"{tier.name.lower():>12} {len(result.latencies):>6} {result.percentile(0.5):>8.1f} "
+              f"{result.percentile(0.99):>8.1f} {result.rejected:>9} {result.timed_out:>8}")
+    print()
+
+
+def main(load: float, duration: float, workers: int, mean_service: float, seed: int):
+    prioritizer = RequestPrioritizer()
+    timeouts = {tier: prioritizer.get_timeout(tier.name) for tier in Priority}
+    arrivals = generate_arrivals(load, workers, mean_service, duration, seed)
+    print(f"requests={len(arrivals)} load={load:.2f} workers={workers} mean_service={mean_service}s duration={duration:.0f}s\n")
+
+    report("legacy (FIFO semaphore)", simulate_legacy(arrivals, workers, timeouts))
+    report("weighted fair scheduler", simulate_scheduler(
+        arrivals, SchedulerConfig(workers=workers, initial_service_time=mean_service)
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM request scheduler simulation")
+    parser.add_argument("--load", type=float, default=1.3, help="поток работы относительно мощности воркеров")
+    parser.add_argument("--duration", type=float, default=1800.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--service-time", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    main(args.load, args.duration, args.workers, args.service_time, args.seed)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк хранения эмбеддингов: JSON текст против бинарных float32/float16
+
+Для каждого формата векторы записываются в таблицу SQLite, после чего
+замеряются размер данных и время поиска: прежний путь (json.loads и
+косинус для каждой строки в Python) и новый (склейка байтов в одну
+матрицу через stack_vectors и одно матрично-векторное произведение).
+
+Запуск из каталога backend:
+    python benchmarks/vector_storage_benchmark.py
+    python benchmarks/vector_storage_benchmark.py --rows 10000 100000 --dim 768
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.vector_storage import encode_vector, stack_vectors
+
+DEFAULT_ROWS = [1_000, 10_000]
+
+
+def build_db(vectors: np.ndarray, fmt: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE embeddings (id INTEGER PRIMARY KEY, diagram_id INTEGER, data, dtype TEXT)")
+    if fmt == 'json':
+        rows = ((i, json.dumps(v.tolist()), fmt) for i, v in enumerate(vectors))
+    else:
+        rows = ((i, encode_vector(v, fmt), fmt) for i, v in enumerate(vectors))
+    conn.executemany("INSERT INTO embeddings (diagram_id, data, dtype) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+def data_size(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT SUM(LENGTH(CAST(data AS BLOB))) FROM embeddings").fetchone()[0]
+
+
+def search_legacy(conn: sqlite3.Connection, query: np.ndarray, limit: int = 10):
+    similarities = []
+    for diagram_id, data in conn.execute("SELECT diagram_id, data FROM embeddings"):
+        vector = np.array(json.loads(data))
+        similarity = np.dot(query, vector) / (np.linalg.norm(query) * np.linalg.norm(vector))
+        similarities.append((similarity, diagram_id))
+    similarities.sort(key=lambda x: x[0], reverse=True)
+    return [diagram_id for _, diagram_id in similarities[:limit]]
+
+
+def search_matrix(conn: sqlite3.Connection, query: np.ndarray, dim: int, limit: int = 10):
+    rows = conn.execute("SELECT diagram_id, data, dtype FROM embeddings").fetchall()
+    ids = [row[0] for row in rows]
+    matrix = stack_vectors([(row[1], row[2]) for row in rows], dim)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    similarities = (matrix @ query) / norms
+    return [ids[i] for i in np.argsort(-similarities)[:limit]]
+
+
+def timed(fn, repeats: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes, dim: int):
+    rng = np.random.default_rng(42)
+    print(f"dim={dim}")
+    print(f"{'rows':>8} {'format':>8} {'size MB':>9} {'bytes/vec':>10} {'search ms':>10} {'speedup':>8}")
+    for size in sizes:
+        vectors = rng.standard_normal((size, dim)).astype(np.float32)
+        query = rng.standard_normal(dim).astype(np.float32)
+
+        legacy = build_db(vectors, 'json')
+        legacy_time = timed(lambda: search_legacy(legacy, query), repeats=1)
+        legacy_size = data_size(legacy)
+        print(f"{size:>8} {'json':>8} {legacy_size / 2**20:>9.1f} {legacy_size / size:>10.0f} {legacy_time * 1000:>10.1f} {'1.0x':>8}")
+        expected = search_legacy(legacy, query)
+        legacy.close()
+
+        for fmt in ('float32', 'float16'):
+            conn = build_db(vectors, fmt)
+            found = search_matrix(conn, query, dim)
+            if fmt == 'float32':
+                assert found == expected, "результаты поиска расходятся"
+            search_time = timed(lambda: search_matrix(conn, query, dim))
+            size_bytes = data_size(conn)
+            print(f"{size:>8} {fmt:>8} {size_bytes / 2**20:>9.1f} {size_bytes / size:>10.0f} {search_time * 1000:>10.1f} {legacy_time / search_time:>7.1f}x")
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding storage benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+    main(args.rows, args.dim)
@@ -0,0 +1,28 @@
+"""Add content hash to wordpress posts
+
+Revision ID: a3f9c2d41b7e
+Revises: 83541d19b0ee
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9c2d41b7e'
+down_revision: Union[str, None] = '83541d19b0ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('wordpress_posts', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('idx_post_domain_wp_id', 'wordpress_posts', ['domain_id', 'wp_post_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_post_domain_wp_id', table_name='wordpress_posts')
+    op.drop_column('wordpress_posts', 'content_hash')
@@ -0,0 +1,51 @@
+"""Add post and domain term stats
+
+Revision ID: c7d2e8f4a915
+Revises: a3f9c2d41b7e
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e8f4a915'
+down_revision: Union[str, None] = 'a3f9c2d41b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'post_term_stats',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('domain_id', sa.Integer(), nullable=False),
+        sa.Column('term_counts', sa.JSON(), nullable=False),
+        sa.Column('total_terms', sa.Integer(), nullable=False),
+        sa.Column('word_count', sa.Integer(), nullable=False),
+        sa.Column('content_length', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['domain_id'], ['domains.id']),
+        sa.ForeignKeyConstraint(['post_id'], ['wordpress_posts.id']),
+        sa.PrimaryKeyConstraint('post_id')
+    )
+    op.create_index(op.f('ix_post_term_stats_domain_id'), 'post_term_stats', ['domain_id'], unique=False)
+    op.create_table(
+        'domain_term_stats',
+        sa.Column('domain_id', sa.Integer(), nullable=False),
+        sa.Column('term_counts', sa.JSON(), nullable=False),
+        sa.Column('total_terms', sa.Integer(), nullable=False),
+        sa.Column('posts_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['domain_id'], ['domains.id']),
+        sa.PrimaryKeyConstraint('domain_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('domain_term_stats')
+    op.drop_index(op.f('ix_post_term_stats_domain_id'), table_name='post_term_stats')
+    op.drop_table('post_term_stats')
@@ -0,0 +1,70 @@
+"""Store embedding vectors as binary float32
+
+Revision ID: e41b6f0d93c2
+Revises: c7d2e8f4a915
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b6f0d93c2'
+down_revision: Union[str, None] = 'c7d2e8f4a915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('article_embeddings', 'diagram_embeddings')
+BATCH_SIZE = 1000
+
+
+def _convert(table_name: str, sources: Sequence[str], target: str, convert) -> None:
+    """Пакетное заполнение столбца target из столбцов sources по id"""
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column('id', sa.Integer), sa.column(target), *[sa.column(name) for name in sources])
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, *[table.c[name] for name in sources])
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = [{'row_id': row[0], 'value': convert(*row[1:])} for row in rows if row[1] is not None]
+        if params:
+            bind.execute(
+                table.update().where(table.c.id == sa.bindparam('row_id')).values({target: sa.bindparam('value')}),
+                params
+            )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    for table_name in TABLES:
+        op.add_column(table_name, sa.Column('vector_data', sa.LargeBinary(), nullable=True))
+        op.add_column(table_name, sa.Column('vector_dtype', sa.String(length=16), nullable=False, server_default='float32'))
+        _convert(
+            table_name, ['embedding_vector'], 'vector_data',
+            lambda value: np.asarray(json.loads(value), dtype='<f4').tobytes()
+        )
+        op.drop_column(table_name, 'embedding_vector')
+
+
+def downgrade() -> None:
+    for table_name in TABLES:
+        op.add_column(table_name, sa.Column('embedding_vector', sa.Text(), nullable=True))
+        _convert(
+            table_name, ['vector_data', 'vector_dtype'], 'embedding_vector',
+            lambda value, dtype: json.dumps(
+                np.frombuffer(value, dtype='<f2' if dtype == 'float16' else '<f4').astype(float).tolist()
+            )
+        )
+        op.drop_column(table_name, 'vector_dtype')
+        op.drop_column(table_name, 'vector_data')
@@ -40,8 +40,8 @@ class TestCentralizedLLMArchitecture:
     async def test_architecture_initialization(self, architecture):
         """Тест инициализации архитектуры"""
         assert architecture._running == True
-        assert architecture.request_queue is not None
-        assert architecture.semaphore is not None
+        assert architecture.scheduler is not None
+        assert len(architecture._workers) == architecture.scheduler.config.workers
         assert architecture.concurrent_manager is not None
         assert architecture.cache_manager is not None
         assert architecture.request_prioritizer is not None
@@ -55,11 +55,11 @@ class TestCentralizedLLMArchitecture:
             priority="normal"
         )
         
-        request_id = await architecture.submit_request(request)
-        assert request_id == "test-1"
+        pending = await architecture.submit_request(request)
+        assert pending.request_id == "test-1"
         
         # Проверяем, что запрос добавлен в очередь
-        assert architecture.request_queue.qsize() > 0
+        assert architecture.scheduler.qsize() > 0
     
     async def test_priority_handling(self, architecture):
         """Тест обработки приоритетов"""
@@ -76,7 +76,7 @@ class TestCentralizedLLMArchitecture:
             await architecture.submit_request(request)
         
         # Проверяем, что все запросы в очереди
-        assert architecture.request_queue.qsize() == 4
+        assert architecture.scheduler.qsize() == 4
     
     async def test_concurrent_manager(self):
         """Тест конкурентного менеджера"""
@@ -178,8 +178,8 @@ class TestCentralizedLLMArchitecture:
             await architecture.submit_request(request)
         
         # Проверяем, что запросы обрабатываются конкурентно
-        # (семафор ограничивает до 2 одновременных запросов)
-        assert architecture.semaphore._value == 2
+        # (воркеры планировщика ограничивают до 2 одновременных запросов)
+        assert architecture.scheduler.config.workers == 2
         
         # Получаем метрики
         metrics = architecture.get_metrics()
@@ -195,8 +195,8 @@ class TestCentralizedLLMArchitecture:
         )
         
         # Отправляем запрос (должен обработаться без ошибок)
-        request_id = await architecture.submit_request(request)
-        assert request_id == "error-test"
+        pending = await architecture.submit_request(request)
+        assert pending.request_id == "error-test"
     
     async def test_health_check(self, architecture):
         """Тест проверки здоровья"""
@@ -170,6 +170,69 @@ class TestMemoryCache:
         all_keys = await cache.keys("*")
         assert len(all_keys) == 3
 
+    @pytest.mark.asyncio
+    async def test_lru_order_refreshed_on_get(self, cache):
+        """Тест обновления LRU-порядка при чтении"""
+        for i in range(5):
+            await cache.set(f"key{i}", f"value{i}")
+        
+        # Обращение к key0 делает его самым "свежим"
+        await cache.get("key0")
+        await cache.set("new_key", "new_value")
+        
+        assert await cache.get("key0") == "value0"
+        assert await cache.get("key1") is None
+    
+    @pytest.mark.asyncio
+    async def test_overwrite_does_not_evict(self, cache):
+        """Тест перезаписи существующего ключа без вытеснения соседей"""
+        for i in range(5):
+            await cache.set(f"key{i}", f"value{i}")
+        
+        await cache.set("key4", "updated")
+        
+        assert await cache.get("key0") == "value0"
+        assert await cache.get("key4") == "updated"
+    
+    @pytest.mark.asyncio
+    async def test_max_bytes_eviction(self):
+        """Тест вытеснения по суммарному размеру в байтах"""
+        cache = MemoryCache(max_size=100, max_bytes=10)
+        await cache.set("a", "12345")
+        await cache.set("b", "12345")
+        await cache.set("c", "123")
+        
+        assert await cache.get("a") is None
+        assert await cache.get("b") == "12345"
+        assert await cache.get("c") == "123"
+        assert cache.get_stats()["bytes"] <= 10
+        
+        # Значение больше лимита не сохраняется
+        assert await cache.set("huge", "x" * 11) is False
+        assert await cache.get("huge") is None
+    
+    @pytest.mark.asyncio
+    async def test_expiry_heap_is_compacted(self, cache):
+        """Тест: перезапись ключа не раздувает индекс истечения"""
+        for i in range(1000):
+            await cache.set("hot_key", i, ttl=3600)
+        
+        assert len(cache._expiry_heap) <= 2 * len(cache._cache) + 65
+        assert await cache.get("hot_key") == 999
+    
+    @pytest.mark.asyncio
+    async def test_stats(self, cache):
+        """Тест статистики попаданий и промахов"""
+        await cache.set("test_key", "test_value")
+        await cache.get("test_key")
+        await cache.get("missing")
+        
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+        assert stats["hit_rate"] == 0.5
+
 
 class TestRedisCache:
     """Тесты для RedisCache"""
@@ -237,6 +300,32 @@ class TestRedisCache:
             assert result is True
             mock_client.delete.assert_called_once_with("redis:test_key")
     
+    @pytest.mark.asyncio
+    async def test_get_many_uses_single_mget(self, redis_cache):
+        """Тест пакетного чтения одним MGET"""
+        with patch('app.cache.redis') as mock_redis:
+            mock_client = AsyncMock()
+            mock_redis.from_url.return_value = mock_client
+            mock_client.mget.return_value = [CacheSerializer.serialize("v1"), None]
+            
+            result = await redis_cache.get_many(["k1", "k2"])
+            
+            assert result == {"k1": "v1"}
+            mock_client.mget.assert_called_once_with(["redis:k1", "redis:k2"])
+    
+    @pytest.mark.asyncio
+    async def test_delete_many_uses_unlink(self, redis_cache):
+        """Тест пакетного удаления одним UNLINK"""
+        with patch('app.cache.redis') as mock_redis:
+            mock_client = AsyncMock()
+            mock_redis.from_url.return_value = mock_client
+            mock_client.unlink.return_value = 2
+            
+            result = await redis_cache.delete_many(["k1", "k2"])
+            
+            assert result == 2
+            mock_client.unlink.assert_called_once_with("redis:k1", "redis:k2")
+    
     @pytest.mark.asyncio
     async def test_close(self, redis_cache):
         """Тест закрытия соединения"""
@@ -317,6 +406,18 @@ class TestCacheManager:
         assert len(keys) == 2
         assert "user:1" in keys
         assert "user:2" in keys
+    
+    @pytest.mark.asyncio
+    async def test_set_many_get_many_memory_cache(self, cache_manager):
+        """Тест пакетных операций в memory кэше"""
+        result = await cache_manager.set_many({"k1": "v1", "k2": "v2"}, use_redis=False)
+        assert result is True
+        
+        values = await cache_manager.get_many(["k1", "k2", "missing"], use_redis=False)
+        assert values == {"k1": "v1", "k2": "v2"}
+        
+        await cache_manager.delete_many(["k1"], use_redis=False)
+        assert await cache_manager.get_many(["k1", "k2"], use_redis=False) == {"k2": "v2"}
 
 
 class TestCacheDecorators:
@@ -0,0 +1,123 @@
+"""
+Тесты доставки ответов CentralizedLLMArchitecture
+"""
+
+import asyncio
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock
+
+from app.llm.centralized_architecture import CentralizedLLMArchitecture, LLMRequest, LLMResponse
+from app.llm.rate_limiter import RateLimitExceeded
+from app.llm.request_scheduler import AdmissionRejected
+
+
+def make_response(request_id: str, text: str = "answer") -> LLMResponse:
+    return LLMResponse(
+        request_id=request_id,
+        response=text,
+        used_model="test",
+        tokens_used=1,
+        response_time=0.0,
+        rag_enhanced=False,
+        cache_hit=False
+    )
+
+
+@pytest_asyncio.fixture
+async def architecture():
+    """Архитектура с заглушками вместо Ollama и Redis"""
+    arch = CentralizedLLMArchitecture()
+    arch.cache_manager.publish_response = AsyncMock(return_value=True)
+    arch.cache_manager.wait_for_response = AsyncMock(return_value=None)
+    arch.gate = asyncio.Event()
+
+    async def fake_process(request):
+        await arch.gate.wait()
+        if request.prompt == "fail":
+            raise RuntimeError("ollama error")
+        return make_response("cached-key", f"answer to {request.prompt}")
+
+    arch._process_request = fake_process
+    await arch.start()
+    yield arch
+    await arch.stop()
+
+
+class TestResponseDelivery:
+    """Тесты submit/await без опроса"""
+
+    @pytest.mark.asyncio
+    async def test_submit_returns_awaitable(self, architecture):
+        pending = await architecture.submit_request(LLMRequest(id="req-1", prompt="hello"))
+        await asyncio.sleep(0.01)
+        assert not pending.done()
+        assert architecture.get_metrics()["waiters"] == 0
+
+        waiter = asyncio.create_task(pending.wait(timeout=1.0))
+        await asyncio.sleep(0)
+        assert architecture.get_metrics()["waiters"] == 1
+        architecture.gate.set()
+        response = await waiter
+
+        assert response.request_id == "req-1"
+        assert response.response == "answer to hello"
+        architecture.cache_manager.publish_response.assert_awaited_once_with("req-1", response)
+        metrics = architecture.get_metrics()
+        assert metrics["waiters"] == 0 and metrics["pending_requests"] == 0
+        assert len(architecture.delivery_stats.queue_dwell) == 1
+
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_waiter(self, architecture):
+        pending = await architecture.submit_request(LLMRequest(id="req-2", prompt="fail"))
+        architecture.gate.set()
+
+        with pytest.raises(RuntimeError, match="ollama error"):
+            await pending
+        architecture.cache_manager.publish_response.assert_awaited_once_with("req-2", None, error="ollama error")
+
+    @pytest.mark.asyncio
+    async def test_get_response_by_id(self, architecture):
+        """Тест: свой запрос ожидается через future, чужой - через Redis"""
+        await architecture.submit_request(LLMRequest(id="req-3", prompt="by id"))
+        waiter = asyncio.create_task(architecture.get_response("req-3", timeout=1.0))
+        await asyncio.sleep(0)
+        architecture.gate.set()
+
+        assert (await waiter).response == "answer to by id"
+        architecture.cache_manager.wait_for_response.assert_not_awaited()
+
+        assert await architecture.get_response("other-replica", timeout=0.1) is None
+        architecture.cache_manager.wait_for_response.assert_awaited_once_with("other-replica", 0.1)
+
+    @pytest.mark.asyncio
+    async def test_timeout_does_not_cancel_request(self, architecture):
+        pending = await architecture.submit_request(LLMRequest(id="req-4", prompt="slow"))
+
+        with pytest.raises(asyncio.TimeoutError):
+            await pending.wait(timeout=0.01)
+        architecture.gate.set()
+
+        assert (await pending.wait(timeout=1.0)).response == "answer to slow"
+
+    @pytest.mark.asyncio
+    async def test_admission_rejected(self, architecture):
+        architecture.scheduler.config.max_queue_size = 0
+
+        with pytest.raises(AdmissionRejected):
+            await architecture.submit_request(LLMRequest(id="req-5", prompt="rejected"))
+        assert architecture.get_metrics()["pending_requests"] == 0
+
+    @pytest.mark.asyncio
+    async def test_user_slot_released_after_response(self, architecture):
+        prioritizer = architecture.request_prioritizer
+        prioritizer.rate_limiter = prioritizer.local_limiter
+        metadata = {"user_tier": "free"}
+
+        pending = await architecture.submit_request(LLMRequest(id="u-1", prompt="one", user_id=5, metadata=metadata))
+        with pytest.raises(RateLimitExceeded):
+            await architecture.submit_request(LLMRequest(id="u-2", prompt="two", user_id=5, metadata=metadata))
+
+        architecture.gate.set()
+        await pending.wait(timeout=1.0)
+        assert prioritizer.local_limiter.in_flight(5) == 0
@@ -0,0 +1,351 @@
+"""
+Тесты для ConcurrentOllamaManager
+"""
+
+import asyncio
+import json
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock
+
+from app.llm.centralized_architecture import LLMRequest, LLMResponse
+from app.llm.concurrent_manager import ConcurrentOllamaManager, OllamaConfig
+
+
+def make_request(request_id: str, prompt: str = "Проанализируй домен") -> LLMRequest:
+    return LLMRequest(id=request_id, prompt=prompt)
+
+
+@pytest.fixture
+def manager():
+    """Менеджер с заглушкой вместо вызова Ollama"""
+    manager = ConcurrentOllamaManager()
+    manager.session = object()  # HTTP сессия не нужна
+    manager.calls = 0
+    manager.gate = asyncio.Event()
+    
+    async def fake_execute(request, cache_key):
+        manager.calls += 1
+        await manager.gate.wait()
+        if request.prompt == "fail":
+            raise RuntimeError("ollama error")
+        response = LLMResponse(
+            request_id=request.id,
+            response=f"answer to {request.prompt}",
+            used_model=request.llm_model,
+            tokens_used=3,
+            response_time=0.0,
+            rag_enhanced=False,
+            cache_hit=False
+        )
+        await manager._store_response(cache_key, response)
+        return response
+    
+    manager._execute_request = fake_execute
+    return manager
+
+
+class TestRequestCoalescing:
+    """Тесты объединения одинаковых запросов (single-flight)"""
+    
+    @pytest.mark.asyncio
+    async def test_identical_requests_coalesced(self, manager):
+        """Тест: N одинаковых запросов дают один вызов Ollama"""
+        tasks = [
+            asyncio.create_task(manager.process_request(make_request(f"req-{i}")))
+            for i in range(5)
+        ]
+        await asyncio.sleep(0)
+        manager.gate.set()
+        responses = await asyncio.gather(*tasks)
+        
+        assert manager.calls == 1
+        assert [r.request_id for r in responses] == [f"req-{i}" for i in range(5)]
+        assert {r.response for r in responses} == {"answer to Проанализируй домен"}
+        
+        metrics = manager.get_metrics()
+        assert metrics["coalesced_requests"] == 4
+        assert metrics["coalescing_rate"] == pytest.approx(0.8)
+        assert metrics["inflight_unique_requests"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_all_waiters(self, manager):
+        """Тест: ошибка лидера доставляется всем ожидающим"""
+        tasks = [
+            asyncio.create_task(manager.process_request(make_request(f"req-{i}", "fail")))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        manager.gate.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        assert manager.calls == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert manager.inflight_requests == {}
+    
+    @pytest.mark.asyncio
+    async def test_leader_cancellation_does_not_cancel_followers(self, manager):
+        """Тест: отмена лидера не отменяет запрос для остальных"""
+        leader = asyncio.create_task(manager.process_request(make_request("leader")))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(manager.process_request(make_request("follower")))
+        await asyncio.sleep(0)
+        
+        leader.cancel()
+        await asyncio.sleep(0)
+        manager.gate.set()
+        
+        response = await follower
+        assert response.request_id == "follower"
+        assert leader.cancelled()
+        assert manager.calls == 1
+    
+    @pytest.mark.asyncio
+    async def test_last_waiter_cancellation_cancels_call(self, manager):
+        """Тест: если все ожидающие ушли, вызов Ollama отменяется"""
+        task = asyncio.create_task(manager.process_request(make_request("only")))
+        await asyncio.sleep(0)
+        flight = next(iter(manager.inflight_requests.values()))
+        
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        
+        assert flight.task.cancelled()
+        assert manager.inflight_requests == {}
+
+
+class TestBoundedCaches:
+    """Тесты ограниченных кэшей ответов и эмбеддингов"""
+    
+    @pytest.mark.asyncio
+    async def test_response_cache_is_bounded(self, manager):
+        """Тест вытеснения из кэша ответов по числу записей"""
+        manager.config.response_cache_max_items = 2
+        manager.response_cache.max_size = 2
+        manager.gate.set()
+        
+        for i in range(4):
+            await manager.process_request(make_request(f"req-{i}", f"prompt {i}"))
+        
+        metrics = manager.get_metrics()
+        assert metrics["response_cache_size"] == 2
+        assert metrics["response_cache"]["evictions"] == 2
+        assert await manager.get_response("req-3") is not None
+        assert await manager.get_response("req-0") is None
+    
+    @pytest.mark.asyncio
+    async def test_embedding_stored_as_float32(self):
+        """Тест компактного хранения эмбеддингов и чтения из L2"""
+        l2_cache = AsyncMock()
+        l2_cache.get_embeddings.return_value = [[0.1, 0.2, 0.3]]
+        manager = ConcurrentOllamaManager(OllamaConfig(), l2_cache=l2_cache)
+        
+        first = await manager.get_embedding("текст", "embed-model")
+        second = await manager.get_embedding("текст", "embed-model")
+        
+        assert first == [0.1, 0.2, 0.3]
+        assert second == pytest.approx(first)
+        l2_cache.get_embeddings.assert_called_once_with(["текст"], model="embed-model")
+        
+        cache_key = manager._generate_embedding_cache_key("текст", "embed-model")
+        stored = await manager.embedding_cache.get(cache_key)
+        assert stored.dtype == np.float32
+        assert manager.get_metrics()["l2_cache_hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_l2_lookup_is_one_call_per_batch(self):
+        """Тест: промахи L1 читаются из L2 одним вызовом, промахи L2 идут в Ollama"""
+        l2_cache = AsyncMock()
+        l2_cache.get_embeddings.return_value = [[1.0], None, [3.0]]
+        manager = ConcurrentOllamaManager(OllamaConfig(), l2_cache=l2_cache)
+        manager.session = object()
+        batches = []
+        
+        async def fake_embed(llm_model, texts):
+            batches.append(list(texts))
+            return [[float(len(text))] for text in texts]
+        
+        manager._call_ollama_embed = fake_embed
+        results = await manager.get_embeddings(["a", "bb", "ccc", "a"], "embed-model")
+        
+        l2_cache.get_embeddings.assert_called_once_with(["a", "bb", "ccc"], model="embed-model")
+        assert batches == [["bb"]]
+        assert results == [[1.0], [2.0], [3.0], [1.0]]
+        metrics = manager.get_metrics()
+        assert (metrics["l2_cache_hits"], metrics["l2_cache_misses"]) == (2, 1)
+
+
+class TestEmbeddingBatching:
+    """Тесты микро-батчинга эмбеддингов"""
+    
+    @pytest.fixture
+    def embed_manager(self):
+        manager = ConcurrentOllamaManager(OllamaConfig(embedding_batch_window=0.01))
+        manager.session = object()
+        manager.batches = []
+        
+        async def fake_embed(llm_model, texts):
+            manager.batches.append(list(texts))
+            return [[float(len(text)), 1.0] for text in texts]
+        
+        manager._call_ollama_embed = fake_embed
+        return manager
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_batched(self, embed_manager):
+        """Тест объединения конкурентных запросов в один вызов"""
+        texts = [f"text {i}" for i in range(10)]
+        
+        results = await asyncio.gather(*[embed_manager.get_embedding(t, "embed-model") for t in texts])
+        
+        assert len(embed_manager.batches) == 1
+        assert sorted(embed_manager.batches[0]) == sorted(texts)
+        assert results == [[float(len(t)), 1.0] for t in texts]
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_texts_sent_once(self, embed_manager):
+        """Тест дедупликации одинаковых текстов"""
+        results = await embed_manager.get_embeddings(["a", "bb", "a"], "embed-model")
+        
+        assert embed_manager.batches == [["a", "bb"]]
+        assert results[0] == results[2] == [1.0, 1.0]
+        
+        # Повторный запрос обслуживается из кэша
+        await embed_manager.get_embeddings(["bb"], "embed-model")
+        assert len(embed_manager.batches) == 1
+    
+    @pytest.mark.asyncio
+    async def test_batch_size_limit(self, embed_manager):
+        """Тест разбиения на пакеты по max_batch_size"""
+        embed_manager.embedding_batcher.max_batch_size = 4
+        
+        await embed_manager.get_embeddings([f"text {i}" for i in range(10)], "embed-model")
+        
+        assert [len(batch) for batch in embed_manager.batches] == [4, 4, 2]
+    
+    @pytest.mark.asyncio
+    async def test_batch_error_propagates(self, embed_manager):
+        """Тест передачи ошибки всем ожидающим пакета"""
+        async def failing_embed(llm_model, texts):
+            raise RuntimeError("ollama error")
+        
+        embed_manager._call_ollama_embed = failing_embed
+        results = await asyncio.gather(
+            embed_manager.get_embedding("a", "embed-model"),
+            embed_manager.get_embedding("b", "embed-model"),
+            return_exceptions=True
+        )
+        
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_text(self, embed_manager):
+        """Тест: отмена одного из вызовов с общим текстом не отменяет остальные"""
+        batcher = embed_manager.embedding_batcher
+        first = asyncio.create_task(batcher.embed(["a"], "embed-model"))
+        second = asyncio.create_task(batcher.embed(["a"], "embed-model"))
+        await asyncio.sleep(0)
+        
+        first.cancel()
+        
+        assert await second == [[1.0, 1.0]]
+        assert first.cancelled()
+        assert embed_manager.batches == [["a"]]
+    
+    @pytest.mark.asyncio
+    async def test_text_without_waiters_not_sent(self, embed_manager):
+        """Тест: текст, который никто не ждет, не уходит в пакет"""
+        batcher = embed_manager.embedding_batcher
+        cancelled = asyncio.create_task(batcher.embed(["a"], "embed-model"))
+        kept = asyncio.create_task(batcher.embed(["bb"], "embed-model"))
+        await asyncio.sleep(0)
+        
+        cancelled.cancel()
+        
+        assert await kept == [[2.0, 1.0]]
+        assert embed_manager.batches == [["bb"]]
+        assert batcher._waiters == {}
+
+
+class FakeResponse:
+    """Ответ aiohttp с заданным статусом и телом"""
+    
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def text(self):
+        return self.body if isinstance(self.body, str) else json.dumps(self.body)
+    
+    async def json(self):
+        return self.body
+
+
+class FakeSession:
+    """HTTP сессия, отвечающая по URL"""
+    
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+    
+    def post(self, url, json=None):
+        path = url.rsplit("/api", 1)[1]
+        self.calls.append(path)
+        return FakeResponse(*self.routes[path])
+
+
+class TestEmbedEndpointFallback:
+    """Тесты отката с /api/embed на /api/embeddings"""
+    
+    @pytest.mark.asyncio
+    async def test_missing_endpoint_disables_batching(self):
+        manager = ConcurrentOllamaManager()
+        manager.session = FakeSession({
+            "/embed": (404, "404 page not found"),
+            "/embeddings": (200, {"embedding": [1.0, 2.0]})
+        })
+        
+        assert await manager._call_ollama_embed("embed-model", ["a", "b"]) == [[1.0, 2.0], [1.0, 2.0]]
+        assert not manager._batch_embed_supported
+    
+    @pytest.mark.asyncio
+    async def test_unknown_model_keeps_batching(self):
+        manager = ConcurrentOllamaManager()
+        manager.session = FakeSession({
+            "/embed": (404, {"error": 'model "missing" not found, try pulling it first'})
+        })
+        
+        with pytest.raises(Exception, match="not found"):
+            await manager._call_ollama_embed("missing", ["a"])
+        
+        assert manager._batch_embed_supported
+        assert manager.session.calls == ["/embed"]
+    
+    @pytest.mark.asyncio
+    async def test_short_batch_response_fails_all_waiters(self):
+        manager = ConcurrentOllamaManager(OllamaConfig(embedding_batch_window=0.01))
+        manager.session = object()
+        
+        async def short_embed(llm_model, texts):
+            return [[1.0]]
+        
+        manager._call_ollama_embed = short_embed
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                manager.get_embedding("a", "embed-model"),
+                manager.get_embedding("b", "embed-model"),
+                return_exceptions=True
+            ),
+            timeout=1
+        )
+        
+        assert all(isinstance(r, ValueError) for r in results)
@@ -0,0 +1,204 @@
+"""
+Тесты инкрементальной статистики терминов
+"""
+
+import pytest
+import pytest_asyncio
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.corpus_stats import TermAggregate, compute_post_stats, ensure_domain_term_stats
+from app.models import Base, Domain, DomainTermStats, PostTermStats, User, WordPressPost
+from app.wordpress_sync import WordPressPostSync, sync_wordpress_posts
+
+
+def make_post(post_id: int, content: str) -> dict:
+    return {
+        'id': post_id,
+        'title': f"Post {post_id}",
+        'content': content,
+        'excerpt': '',
+        'link': f"https://example.com/post-{post_id}",
+        'date': datetime(2024, 1, post_id)
+    }
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        user = User(username="owner", email="owner@example.com", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        session.add(Domain(id=1, name="https://example.com", display_name="example.com", owner_id=user.id))
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+def expected_counts(*contents: str) -> Counter:
+    total = Counter()
+    for content in contents:
+        total.update(compute_post_stats(content)['term_counts'])
+    return total
+
+
+class TestTermStats:
+    """Тесты расчета и агрегации частот"""
+
+    def test_compute_post_stats(self):
+        stats = compute_post_stats("Кот и кот, 2024 year_x cat!")
+
+        assert stats['term_counts']['кот'] == 2
+        assert stats['term_counts']['cat'] == 1
+        assert '2024' not in stats['term_counts']
+        assert stats['word_count'] == 6
+        assert stats['content_length'] == len("Кот и кот, 2024 year_x cat!")
+
+    def test_aggregate_subtract_drops_zero_terms(self):
+        first = compute_post_stats("alpha beta beta")
+        second = compute_post_stats("beta gamma")
+        aggregate = TermAggregate()
+        aggregate.add(first)
+        aggregate.add(second)
+
+        aggregate.subtract(first)
+
+        assert aggregate.counts == Counter({'beta': 1, 'gamma': 1})
+        assert aggregate.total_terms == 2 and aggregate.posts_count == 1
+        assert aggregate.top(1) in ([('beta', 1)], [('gamma', 1)])
+
+
+class TestDomainTermStats:
+    """Тесты инкрементального обновления агрегата домена"""
+
+    @pytest.mark.asyncio
+    async def test_sync_keeps_aggregate_consistent(self, db):
+        await sync_wordpress_posts(db, 1, [
+            make_post(1, "alpha beta"), make_post(2, "beta gamma"), make_post(3, "delta")
+        ])
+        row = await db.get(DomainTermStats, 1)
+        assert Counter(row.term_counts) == expected_counts("alpha beta", "beta gamma", "delta")
+
+        # Пост 2 изменился, пост 3 удален, пост 4 новый
+        await sync_wordpress_posts(
+            db, 1,
+            [make_post(1, "alpha beta"), make_post(2, "gamma gamma"), make_post(4, "omega")],
+            live_ids={1, 2, 4}
+        )
+
+        await db.refresh(row)
+        assert Counter(row.term_counts) == expected_counts("alpha beta", "gamma gamma", "omega")
+        assert row.posts_count == 3
+        assert row.total_terms == 5
+        assert len((await db.execute(select(PostTermStats))).scalars().all()) == 3
+
+    @pytest.mark.asyncio
+    async def test_legacy_posts_backfilled(self, db):
+        """Тест: для статей, проиндексированных до статистики, агрегат строится лениво"""
+        for post_id, content in [(1, "alpha beta"), (2, "beta")]:
+            post = make_post(post_id, content)
+            db.add(WordPressPost(
+                domain_id=1, wp_post_id=post_id, title=post['title'], content=content,
+                excerpt='', link=post['link'], published_at=post['date']
+            ))
+        await db.commit()
+
+        # Синхронизация не строит агрегат по неполным данным
+        await sync_wordpress_posts(db, 1, [make_post(3, "gamma")])
+        assert await db.get(DomainTermStats, 1) is None
+
+        row = await ensure_domain_term_stats(db, 1)
+
+        assert Counter(row.term_counts) == expected_counts("alpha beta", "beta", "gamma")
+        assert row.posts_count == 3
+        assert len((await db.execute(select(PostTermStats))).scalars().all()) == 3
+
+    @pytest.mark.asyncio
+    async def test_aggregate_saved_once_per_sync(self, db):
+        await sync_wordpress_posts(db, 1, [make_post(1, "alpha")])
+        sync = WordPressPostSync(db, 1)
+        await sync.load()
+        await sync.apply([make_post(2, "beta")])
+        await sync.apply([make_post(3, "gamma")])
+
+        # Пакеты зафиксированы, агрегат еще не тронут
+        row = await db.get(DomainTermStats, 1)
+        await db.refresh(row)
+        assert Counter(row.term_counts) == expected_counts("alpha")
+
+        await sync.finish()
+        await db.refresh(row)
+        assert Counter(row.term_counts) == expected_counts("alpha", "beta", "gamma")
+        assert row.posts_count == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrent_syncs_do_not_overwrite_each_other(self, db):
+        await sync_wordpress_posts(db, 1, [make_post(1, "alpha")])
+        first, second = WordPressPostSync(db, 1), WordPressPostSync(db, 1)
+        await first.load()
+        await second.load()
+        await first.apply([make_post(2, "beta")])
+        await second.apply([make_post(3, "gamma")])
+
+        await first.finish()
+        await second.finish()
+
+        row = await db.get(DomainTermStats, 1)
+        await db.refresh(row)
+        assert Counter(row.term_counts) == expected_counts("alpha", "beta", "gamma")
+        assert row.posts_count == 3
+
+    @pytest.mark.asyncio
+    async def test_aborted_sync_invalidates_aggregate(self, db):
+        await sync_wordpress_posts(db, 1, [make_post(1, "alpha")])
+        sync = WordPressPostSync(db, 1)
+        await sync.load()
+        await sync.apply([make_post(2, "beta")])
+
+        await sync.abort()
+
+        assert await db.get(DomainTermStats, 1) is None
+        row = await ensure_domain_term_stats(db, 1)
+        assert Counter(row.term_counts) == expected_counts("alpha", "beta")
+
+    @pytest.mark.asyncio
+    async def test_sync_skips_save_when_aggregate_removed(self, db):
+        await sync_wordpress_posts(db, 1, [make_post(1, "alpha")])
+        first, second = WordPressPostSync(db, 1), WordPressPostSync(db, 1)
+        await first.load()
+        await second.load()
+        await second.apply([make_post(2, "beta")])
+        await first.apply([make_post(3, "gamma")])
+
+        # Прерванная синхронизация удаляет агрегат, вторая не создает его заново
+        await first.abort()
+        await second.finish()
+
+        assert await db.get(DomainTermStats, 1) is None
+        row = await ensure_domain_term_stats(db, 1)
+        assert Counter(row.term_counts) == expected_counts("alpha", "beta", "gamma")
+
+    @pytest.mark.asyncio
+    async def test_build_reuses_aggregate_built_while_waiting(self, db, monkeypatch):
+        """Тест: запрос, дождавшийся блокировки, не строит агрегат повторно"""
+        await sync_wordpress_posts(db, 1, [make_post(1, "alpha beta")])
+        built = await db.get(DomainTermStats, 1)
+        original_get = db.get
+
+        async def get_before_build(entity, ident, **kwargs):
+            # Первая проверка выполнена до того, как параллельный запрос построил агрегат
+            monkeypatch.setattr(db, "get", original_get)
+            return None
+
+        monkeypatch.setattr(db, "get", get_before_build)
+        row = await ensure_domain_term_stats(db, 1)
+
+        assert row is built
+        assert Counter(row.term_counts) == expected_counts("alpha beta")
+        assert len((await db.execute(select(PostTermStats))).scalars().all()) == 1
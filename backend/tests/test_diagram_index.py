@@ -0,0 +1,90 @@
+"""
+Тесты in-memory индекса эмбеддингов диаграмм
+"""
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.diagram_index import DiagramVectorIndex
+from app.models import Base, DiagramEmbedding
+from app.vector_storage import encode_vector
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+
+
+def brute_force(vectors: dict, query: np.ndarray, limit: int) -> list:
+    """Эталон: максимум косинуса по эмбеддингам каждой диаграммы"""
+    query = query / np.linalg.norm(query)
+    best = {
+        diagram_id: max(float(v @ query / np.linalg.norm(v)) for v in rows)
+        for diagram_id, rows in vectors.items()
+    }
+    return sorted(best, key=best.get, reverse=True)[:limit]
+
+
+class TestDiagramVectorIndex:
+    """Тесты поиска, добавления и удаления"""
+
+    @staticmethod
+    def build(count: int, dim: int = 16, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        vectors = {i: [rng.standard_normal(dim), rng.standard_normal(dim)] for i in range(1, count + 1)}
+        index = DiagramVectorIndex(initial_capacity=4)
+        index._loaded = True
+        for diagram_id, rows in vectors.items():
+            index.add(diagram_id, rows)
+        return index, vectors, rng
+
+    def test_search_matches_brute_force(self):
+        index, vectors, rng = self.build(200)
+        query = rng.standard_normal(16)
+
+        hits = index.search(query, limit=10)
+
+        assert [diagram_id for diagram_id, _ in hits] == brute_force(vectors, query, 10)
+        assert len(index) == 400
+
+    def test_remove(self):
+        index, vectors, rng = self.build(50)
+        query = rng.standard_normal(16)
+        top = index.search(query, limit=1)[0][0]
+
+        index.remove(top)
+        del vectors[top]
+
+        assert [d for d, _ in index.search(query, limit=5)] == brute_force(vectors, query, 5)
+        assert len(index) == 98
+
+    def test_dimension_mismatch(self):
+        index, _, _ = self.build(3)
+
+        assert index.search(np.ones(8), limit=3) == []
+
+    @pytest.mark.asyncio
+    async def test_load_from_db_and_pending(self, db):
+        for diagram_id in (1, 2):
+            for embedding_type in ("title", "components", "other"):
+                db.add(DiagramEmbedding(
+                    diagram_id=diagram_id, embedding_type=embedding_type, vector_model="test",
+                    vector_data=encode_vector([float(diagram_id), 1.0]), dimension=2, context_text=""
+                ))
+        await db.commit()
+        index = DiagramVectorIndex()
+
+        # До загрузки add не дублирует строки, которые будут прочитаны из базы
+        index.add(1, [np.array([1.0, 1.0])])
+        await index.ensure_loaded(db)
+
+        assert index.loaded and len(index) == 4
+        assert index.search(np.array([2.0, 1.0]), limit=1)[0][0] == 2
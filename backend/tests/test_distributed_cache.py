@@ -0,0 +1,293 @@
+"""
+Тесты векторного индекса базы знаний в DistributedCache
+"""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.llm.distributed_cache import CacheConfig, DistributedCache
+from app.llm.vector_index import VectorIndex
+
+
+class FakePipeline:
+    """Pipeline, выполняющий команды сразу при execute()"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.commands.append(("set", key, value))
+
+    def sadd(self, key, *members):
+        self.commands.append(("sadd", key, members))
+
+    async def execute(self):
+        for command, key, value in self.commands:
+            if command == "set":
+                self.redis.data[key] = value
+            else:
+                self.redis.data.setdefault(key, set()).update(value)
+        self.commands = []
+
+
+class FakeRedis:
+    """Минимальный асинхронный Redis в памяти"""
+
+    def __init__(self, get_delay: float = 0.0):
+        self.data = {}
+        self.get_delay = get_delay
+        self.get_calls = []
+        self.fail_get = False
+
+    async def ping(self):
+        return True
+
+    async def close(self):
+        pass
+
+    async def get(self, key):
+        self.get_calls.append(key)
+        await asyncio.sleep(self.get_delay)
+        if self.fail_get:
+            raise ConnectionError("redis is down")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def mget(self, keys):
+        self.get_calls.extend(keys)
+        await asyncio.sleep(self.get_delay)
+        if self.fail_get:
+            raise ConnectionError("redis is down")
+        return [self.data.get(key) for key in keys]
+
+    def register_script(self, script):
+        # Единственный скрипт кэша - сохранение индекса с проверкой версии
+        async def persist_index(keys, args):
+            blob_key, version_key = keys
+            blob, version = args
+            if int(self.data.get(version_key, 0)) != int(version):
+                return 0
+            self.data[blob_key] = blob
+            self.data[version_key] = str(int(version) + 1).encode()
+            return 1
+
+        return persist_index
+
+    async def srem(self, key, *members):
+        self.data.get(key, set()).difference_update(members)
+
+    async def smembers(self, key):
+        return self.data.get(key, set())
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+def make_documents(vectors, prefix="doc"):
+    return [
+        {"id": f"{prefix}{i}", "content": f"{prefix} {i}", "embedding": vector.tolist()}
+        for i, vector in enumerate(vectors)
+    ]
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((300, 16)).astype(np.float32)
+
+
+def make_cache(redis) -> DistributedCache:
+    cache = DistributedCache(config=CacheConfig(vector_index_persist_interval=3600))
+    cache.redis = redis
+    return cache
+
+
+def stored_index(vectors, prefix="old") -> bytes:
+    index = VectorIndex()
+    index.add([f"{prefix}{i}" for i in range(len(vectors))], vectors)
+    return index.to_bytes()
+
+
+class TestVectorIndexLoading:
+    """Тесты восстановления индекса из Redis"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_wait_for_single_load(self, vectors):
+        redis = FakeRedis(get_delay=0.05)
+        redis.data["knowledge_vector_index"] = stored_index(vectors[:100])
+        cache = make_cache(redis)
+
+        added, _ = await asyncio.gather(
+            cache.add_to_knowledge_base(make_documents(vectors[100:110], "new")),
+            cache.search_knowledge_base("new 1")
+        )
+
+        assert added
+        assert redis.get_calls.count("knowledge_vector_index") == 1
+        assert len(cache.vector_index) == 110
+        assert "old5" in cache.vector_index and "new5" in cache.vector_index
+
+    @pytest.mark.asyncio
+    async def test_failed_load_does_not_overwrite_stored_index(self, vectors):
+        redis = FakeRedis()
+        blob = stored_index(vectors[:100])
+        redis.data["knowledge_vector_index"] = blob
+        redis.fail_get = True
+        cache = make_cache(redis)
+
+        assert not await cache.add_to_knowledge_base(make_documents(vectors[100:110], "new"))
+        assert not await cache.persist_vector_index()
+        assert redis.data["knowledge_vector_index"] is blob
+
+        # После восстановления Redis индекс загружается
+        redis.fail_get = False
+        assert await cache.add_to_knowledge_base(make_documents(vectors[100:110], "new"))
+        assert len(cache.vector_index) == 110
+
+    @pytest.mark.asyncio
+    async def test_persist_roundtrip(self, vectors):
+        redis = FakeRedis()
+        cache = make_cache(redis)
+        await cache.add_to_knowledge_base(make_documents(vectors[:50]))
+
+        assert await cache.persist_vector_index()
+
+        restored = make_cache(redis)
+        assert await restored._ensure_vector_index_loaded()
+        assert len(restored.vector_index) == 50
+        assert restored.vector_index.search(vectors[7], k=1)[0][0] == "doc7"
+
+
+    @pytest.mark.asyncio
+    async def test_replicas_merge_on_persist(self, vectors):
+        redis = FakeRedis()
+        first, second = make_cache(redis), make_cache(redis)
+        await first.add_to_knowledge_base(make_documents(vectors[:20], "first"))
+        await second.add_to_knowledge_base(make_documents(vectors[20:40], "second"))
+        second._index_remove(["second0"])
+
+        assert await first.persist_vector_index()
+        # Вторая реплика видит чужую версию, объединяет индексы и сохраняет
+        assert await second.persist_vector_index()
+        assert len(second.vector_index) == 39
+
+        restored = make_cache(redis)
+        assert await restored._ensure_vector_index_loaded()
+        assert len(restored.vector_index) == 39
+        assert "first3" in restored.vector_index and "second5" in restored.vector_index
+        assert "second0" not in restored.vector_index
+
+        # Первая реплика тоже подхватывает документы второй при следующем сохранении
+        await first.add_to_knowledge_base(make_documents(vectors[40:45], "late"))
+        assert await first.persist_vector_index()
+        assert len(first.vector_index) == 44
+        assert second._vector_index_changes == [] and first._vector_index_changes == []
+
+
+class TestBackgroundTraining:
+    """Тесты обучения IVF вне event loop"""
+
+    @pytest.mark.asyncio
+    async def test_training_runs_on_snapshot_and_keeps_concurrent_changes(self, vectors, monkeypatch):
+        original_train = VectorIndex.train
+
+        def slow_train(index, *args, **kwargs):
+            time.sleep(0.2)
+            original_train(index, *args, **kwargs)
+
+        monkeypatch.setattr(VectorIndex, "train", slow_train)
+        cache = make_cache(FakeRedis())
+        await cache._ensure_vector_index_loaded()
+        cache.vector_index = VectorIndex(ivf_threshold=100, nprobe=4)
+
+        started = time.perf_counter()
+        await cache.add_to_knowledge_base(make_documents(vectors[:200]))
+        assert time.perf_counter() - started < 0.2
+
+        training = cache._vector_index_training
+        assert training is not None and not cache.vector_index.is_trained
+
+        # Изменения во время обучения накатываются на обученную копию
+        await cache.add_to_knowledge_base(make_documents(vectors[200:], "late"))
+        cache._index_remove(["doc0"])
+        assert cache.vector_index.search(vectors[5], k=1)[0][0] == "doc5"
+        await training
+
+        assert cache.vector_index.is_trained
+        assert len(cache.vector_index) == 299
+        assert "doc0" not in cache.vector_index
+        assert cache.vector_index.search(vectors[250], k=1)[0][0] == "late50"
+
+    @pytest.mark.asyncio
+    async def test_clear_cancels_training(self, vectors, monkeypatch):
+        monkeypatch.setattr(VectorIndex, "train", lambda index, *args, **kwargs: time.sleep(0.1))
+        cache = make_cache(FakeRedis())
+        cache._unlink_matching = lambda pattern: asyncio.sleep(0, result=0)
+        await cache._ensure_vector_index_loaded()
+        cache.vector_index = VectorIndex(ivf_threshold=100)
+
+        await cache.add_to_knowledge_base(make_documents(vectors[:150]))
+        assert cache._vector_index_training is not None
+        await cache.clear_cache("knowledge*")
+
+        assert cache._vector_index_training is None
+        assert len(cache.vector_index) == 0
+
+
+class TestEmbeddingCache:
+    """Тесты кэша эмбеддингов"""
+
+    @pytest.mark.asyncio
+    async def test_get_embeddings_single_mget(self):
+        redis = FakeRedis()
+        cache = make_cache(redis)
+        await cache.cache_embeddings({"a": [1.0], "c": [3.0]}, model="embed-model")
+        mget_calls = []
+        original_mget = redis.mget
+
+        async def counting_mget(keys):
+            mget_calls.append(keys)
+            return await original_mget(keys)
+
+        redis.mget = counting_mget
+        embeddings = await cache.get_embeddings(["a", "b", "c"], model="embed-model")
+
+        assert embeddings == [[1.0], None, [3.0]]
+        assert len(mget_calls) == 1
+        assert redis.get_calls == mget_calls[0]
+
+    @pytest.mark.asyncio
+    async def test_knowledge_base_shares_model_keyed_embeddings(self, vectors):
+        redis = FakeRedis()
+        calls = []
+
+        async def embed(text):
+            calls.append(text)
+            return vectors[0].tolist()
+
+        cache = DistributedCache(
+            config=CacheConfig(vector_index_persist_interval=3600),
+            embedding_function=embed,
+            embedding_model="embed-model"
+        )
+        cache.redis = redis
+        await cache.cache_embeddings({"known": vectors[1].tolist()}, model="embed-model")
+
+        assert await cache.add_to_knowledge_base([{"id": "a", "content": "known"}, {"id": "b", "content": "new"}])
+
+        # Готовый эмбеддинг той же модели взят из кэша, новый сохранен с ключом модели
+        assert calls == ["new"]
+        assert await cache.get_embedding("new", model="embed-model") == pytest.approx(vectors[0].tolist())
+        assert await cache.get_embedding("new") is None
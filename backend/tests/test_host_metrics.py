@@ -0,0 +1,64 @@
+"""
+Тесты фонового сборщика метрик хоста
+"""
+
+import time
+
+import pytest
+
+from app.llm.host_metrics import HostMetricsSampler, HostSample
+
+
+def make_sample(timestamp: float, cpu: float, received: int) -> HostSample:
+    return HostSample(
+        timestamp=timestamp,
+        cpu_percent=cpu,
+        cpu_count=4,
+        memory_percent=50.0,
+        memory_available=2 ** 30,
+        memory_total=2 ** 32,
+        load_average=(1.0, 1.0, 1.0),
+        disk_percent=10.0,
+        net_bytes_sent=0,
+        net_bytes_recv=received
+    )
+
+
+class TestHostMetricsSampler:
+    """Тесты снимков, кольцевого буфера и фонового потока"""
+
+    def test_ring_buffer_queries(self):
+        sampler = HostMetricsSampler(history=5)
+        for i in range(8):
+            sampler._record(make_sample(100.0 + i, cpu=10.0 * i, received=1000 * i))
+
+        assert len(sampler.samples()) == 5
+        assert sampler.snapshot().cpu_percent == 70.0
+        assert sampler.average("cpu_percent", window=2) == pytest.approx(60.0)
+        assert sampler.rate("net_bytes_recv") == pytest.approx(1000.0)
+        assert sampler.trend("cpu_percent") == pytest.approx(10.0)
+
+    def test_queries_without_history(self):
+        sampler = HostMetricsSampler()
+
+        assert sampler.rate("net_bytes_recv") is None
+        assert sampler.trend("cpu_percent") is None
+        assert sampler.average("cpu_percent") is None
+
+    def test_background_sampling(self):
+        sampler = HostMetricsSampler(interval=0.05).start()
+        try:
+            deadline = time.time() + 2.0
+            while len(sampler.samples()) < 3 and time.time() < deadline:
+                time.sleep(0.02)
+
+            assert len(sampler.samples()) >= 3
+            # Чтение снимка не обращается к системе
+            start = time.perf_counter()
+            for _ in range(1000):
+                sampler.snapshot()
+            assert time.perf_counter() - start < 0.05
+        finally:
+            sampler.stop()
+
+        assert not sampler.running
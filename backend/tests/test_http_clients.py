@@ -0,0 +1,61 @@
+"""
+Тесты реестра общих HTTP клиентов
+"""
+
+import httpx
+import pytest
+import respx
+
+from app.http_clients import HTTPClientRegistry, UpstreamConfig
+
+
+class TestHTTPClientRegistry:
+    """Тесты переиспользования клиентов, лимитов пула и статистики"""
+
+    @pytest.mark.asyncio
+    async def test_client_is_shared_per_upstream(self):
+        registry = HTTPClientRegistry({"ollama": UpstreamConfig(base_url="http://ollama:11434")})
+        try:
+            first = registry.client("ollama")
+            assert registry.client("ollama") is first
+            assert registry.client("wordpress") is not first
+            assert str(first.base_url) == "http://ollama:11434"
+        finally:
+            await registry.close()
+
+        assert first.is_closed
+        assert registry.client("ollama") is not first
+        await registry.close()
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_stats_report_requests_and_limits(self):
+        respx.get("http://ollama:11434/api/tags").mock(return_value=httpx.Response(200, json={"models": []}))
+        registry = HTTPClientRegistry({
+            "ollama": UpstreamConfig(base_url="http://ollama:11434", max_connections=4)
+        })
+        try:
+            assert registry.stats() == {}
+
+            client = registry.client("ollama")
+            for _ in range(3):
+                response = await client.get("/api/tags")
+                assert response.status_code == 200
+
+            stats = registry.stats()["ollama"]
+            assert stats["max_connections"] == 4
+            assert stats["httpx_requests"] == 3
+            assert 0.0 <= stats["utilization"] <= 1.0
+            assert "httpx" in stats["pools"]
+        finally:
+            await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_register_after_open_fails(self):
+        registry = HTTPClientRegistry()
+        registry.client("ollama")
+        try:
+            with pytest.raises(RuntimeError):
+                registry.register("ollama", UpstreamConfig(max_connections=1))
+        finally:
+            await registry.close()
@@ -0,0 +1,79 @@
+"""
+Тесты движка рекомендаций внутренних ссылок
+"""
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.link_suggestions import LinkSuggestionEngine, TitleMatcher
+
+
+POSTS = [
+    {'id': 1, 'title': "Выбор горного велосипеда", 'content': "Горный велосипед: рама, вилка, колеса и тормоза для горного велосипеда."},
+    {'id': 2, 'title': "Ремонт тормозов велосипеда", 'content': "Тормоза велосипеда требуют настройки. Колодки и тросы тормоза."},
+    {'id': 3, 'title': "Рецепт борща", 'content': "Свекла, капуста и мясо для борща. Варить борщ два часа."},
+    {'id': 4, 'title': "Зимний борщ", 'content': "Зимний вариант: капуста, свекла, мясо. Смотрите также рецепт борща."},
+]
+
+
+class TestTitleMatcher:
+    """Тесты автомата Aho–Corasick"""
+
+    def test_finds_all_titles(self):
+        matcher = TitleMatcher({1: "горный велосипед", 2: "велосипед", 3: "рецепт борща"})
+
+        assert matcher.find("Новый Горный велосипед и рецепт борща") == {1, 2, 3}
+        assert matcher.find("Велосипед") == {2}
+        assert matcher.find("горный лес") == set()
+
+    def test_matches_whole_words_only(self):
+        matcher = TitleMatcher({1: "кот"})
+
+        assert matcher.find("котлета") == set()
+        assert matcher.find("рыжий кот спит") == {1}
+
+    def test_overlapping_patterns(self):
+        matcher = TitleMatcher({1: "a b c", 2: "b c d", 3: "c"})
+
+        assert matcher.find("x a b c d") == {1, 2, 3}
+
+
+class TestLinkSuggestionEngine:
+    """Тесты поиска кандидатов"""
+
+    def test_existing_links_detected(self):
+        engine = LinkSuggestionEngine().fit(POSTS)
+
+        assert engine.existing_links[4] == {3}
+        assert engine.existing_links[1] == set()
+
+    def test_suggests_similar_posts(self):
+        engine = LinkSuggestionEngine(top_k=1, min_score=0.0).fit(POSTS)
+
+        suggestions = engine.suggest()
+
+        assert suggestions[1][0].target_id == 2
+        assert suggestions[3][0].target_id == 4
+        assert suggestions[1][0].anchor_candidates
+        # Уже существующая ссылка 4 -> 3 не предлагается повторно
+        assert all(s.target_id != 3 for s in suggestions[4])
+
+    def test_uses_embeddings_when_available(self):
+        embeddings = {1: [1.0, 0.0], 2: [0.0, 1.0], 3: [0.9, 0.1], 4: [0.1, 0.9]}
+        engine = LinkSuggestionEngine(top_k=1, min_score=0.0).fit(POSTS, embeddings=embeddings)
+
+        suggestions = engine.suggest([1, 2])
+
+        assert set(suggestions) == {1, 2}
+        assert suggestions[1][0].target_id == 3
+        assert suggestions[1][0].score == pytest.approx(0.9 / (0.81 + 0.01) ** 0.5, rel=1e-5)
+
+    def test_empty_vocabulary_gives_no_suggestions(self):
+        posts = [
+            {'id': 1, 'title': "", 'content': ""},
+            {'id': 2, 'title': "The", 'content': "and the of it"},
+        ]
+        engine = LinkSuggestionEngine(vectorizer=TfidfVectorizer(stop_words='english'), min_score=0.0).fit(posts)
+
+        assert engine.suggest() == {}
+        assert engine.existing_links == {1: set(), 2: set()}
@@ -0,0 +1,150 @@
+"""
+Тесты лимитов частоты и конкурентности пользователей
+"""
+
+import pytest
+
+from app.llm.rate_limiter import LocalRateLimiter, RedisRateLimiter, SlidingWindowCounter
+from app.llm.request_prioritizer import RequestPrioritizer
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSlidingWindowCounter:
+    """Тесты оценки скользящего окна"""
+
+    def test_estimate_weights_previous_window(self):
+        counter = SlidingWindowCounter(60.0)
+        counter.add(60.0 * 100 + 30, amount=10)
+
+        # Следующее окно: на 45-й секунде от предыдущего учитывается четверть
+        assert counter.estimate(60.0 * 101 + 45) == pytest.approx(2.5)
+        assert counter.estimate(60.0 * 103) == 0
+
+    def test_late_timestamp_counts_in_current_window(self):
+        counter = SlidingWindowCounter(60.0)
+        counter.add(6000.0)
+        counter.add(5000.0)
+
+        assert counter.estimate(6000.0) == 2
+
+
+class TestLocalRateLimiter:
+    """Тесты резервирования слотов в памяти процесса"""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit_and_release(self):
+        limiter = LocalRateLimiter(clock=FakeClock())
+
+        assert (await limiter.acquire(1, "a", rate_limit=10, max_concurrent=2)).allowed
+        assert (await limiter.acquire(1, "b", rate_limit=10, max_concurrent=2)).allowed
+        decision = await limiter.acquire(1, "c", rate_limit=10, max_concurrent=2)
+        assert not decision.allowed and decision.reason == "concurrency"
+
+        await limiter.release(1, "a")
+        await limiter.release(1, "a")
+        assert limiter.in_flight(1) == 1
+        assert (await limiter.acquire(1, "c", rate_limit=10, max_concurrent=2)).allowed
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_recovers(self):
+        clock = FakeClock(60.0 * 1000)
+        limiter = LocalRateLimiter(clock=clock)
+        for i in range(3):
+            assert (await limiter.acquire(1, str(i), rate_limit=3, max_concurrent=10)).allowed
+
+        decision = await limiter.acquire(1, "late", rate_limit=3, max_concurrent=10)
+        assert not decision.allowed and decision.reason == "rate"
+        # Окно сменится через 60s, и еще 20s уйдет на вытеснение предыдущего окна
+        assert decision.retry_after == pytest.approx(80.0)
+
+        clock.now += decision.retry_after
+        assert (await limiter.acquire(1, "late", rate_limit=3, max_concurrent=10)).allowed
+        # Лимиты одного пользователя не влияют на другого
+        assert (await limiter.acquire(2, "other", rate_limit=3, max_concurrent=10)).allowed
+
+    def test_prune(self):
+        clock = FakeClock()
+        limiter = LocalRateLimiter(clock=clock)
+        limiter.hit(1)
+
+        clock.now += 120.0
+        limiter.prune()
+
+        assert limiter.rate(1) == 0 and not limiter._counters
+
+    @pytest.mark.asyncio
+    async def test_redis_unavailable_falls_back_to_local(self):
+        limiter = RedisRateLimiter("redis://127.0.0.1:1")
+
+        assert (await limiter.acquire(1, "a", rate_limit=5, max_concurrent=1)).allowed
+        assert not (await limiter.acquire(1, "b", rate_limit=5, max_concurrent=1)).allowed
+        await limiter.release(1, "a")
+        assert limiter.fallback.in_flight(1) == 0
+        await limiter.close()
+
+
+class TestRequestPrioritizerLimits:
+    """Тесты лимитов пользователей в RequestPrioritizer"""
+
+    def test_rate_limit_by_tier(self):
+        prioritizer = RequestPrioritizer()
+        for _ in range(10):
+            assert prioritizer.can_process_request(42, "free")
+            prioritizer.record_request(42, "normal")
+
+        assert not prioritizer.can_process_request(42, "free")
+        assert prioritizer.can_process_request(42, "premium")
+        stats = prioritizer.get_user_stats(42)
+        assert stats["total_requests"] == 10
+        assert stats["requests_by_priority"] == {"normal": 10}
+
+    @pytest.mark.asyncio
+    async def test_in_flight_tracks_acquire_release(self):
+        prioritizer = RequestPrioritizer()
+
+        assert (await prioritizer.acquire(7, "r1", "free", "high")).allowed
+        assert not prioritizer.can_process_request(7, "free")
+        assert not (await prioritizer.acquire(7, "r2", "free")).allowed
+
+        await prioritizer.release(7, "r1")
+        assert prioritizer.can_process_request(7, "free")
+        assert prioritizer.get_system_load()["total_users"] == 1
+
+    @pytest.mark.asyncio
+    async def test_in_flight_visible_with_redis_limiter(self):
+        class FakeRedis:
+            def __init__(self):
+                self.in_flight = set()
+
+            def register_script(self, script):
+                async def acquire(keys, args):
+                    max_concurrent, token = args[2], args[3]
+                    if len(self.in_flight) >= max_concurrent:
+                        return [-1, "0", len(self.in_flight)]
+                    self.in_flight.add(token)
+                    return [1, "1", len(self.in_flight)]
+                return acquire
+
+            async def zrem(self, key, token):
+                self.in_flight.discard(token)
+
+        prioritizer = RequestPrioritizer(rate_limiter=RedisRateLimiter(client=FakeRedis()))
+
+        assert (await prioritizer.acquire(7, "r1", "standard")).allowed
+        assert (await prioritizer.acquire(7, "r2", "standard")).allowed
+        assert prioritizer.get_user_stats(7)["active_requests"] == 2
+        assert prioritizer.local_limiter.rate(7) == 2
+
+        await prioritizer.acquire(7, "r3", "standard")
+        assert not prioritizer.can_process_request(7, "standard")
+
+        await prioritizer.release(7, "r1")
+        assert prioritizer.get_user_stats(7)["active_requests"] == 2
+        assert prioritizer.can_process_request(7, "premium")
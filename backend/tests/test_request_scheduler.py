@@ -0,0 +1,128 @@
+"""
+Тесты планировщика очереди LLM запросов
+"""
+
+import asyncio
+from collections import Counter
+
+import pytest
+
+from app.llm.request_prioritizer import Priority
+from app.llm.request_scheduler import AdmissionRejected, SchedulerConfig, WeightedFairScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_scheduler(**config) -> tuple:
+    clock = FakeClock()
+    config.setdefault("initial_service_time", 0.1)
+    scheduler = WeightedFairScheduler(config=SchedulerConfig(**config), clock=clock)
+    return scheduler, clock
+
+
+class TestWeightedFairScheduler:
+    """Тесты порядка выбора, дедлайнов и допуска"""
+
+    def test_fifo_within_tier(self):
+        scheduler, _ = make_scheduler()
+        for i in range(3):
+            scheduler.submit(f"normal-{i}", "normal")
+
+        assert [scheduler.pop().payload for _ in range(3)] == ["normal-0", "normal-1", "normal-2"]
+        assert scheduler.pop() is None
+
+    def test_weighted_shares(self):
+        """Тест: под нагрузкой уровни обслуживаются пропорционально весам"""
+        scheduler, _ = make_scheduler(aging_rate=0.0)
+        for i in range(100):
+            scheduler.submit(i, "critical")
+            scheduler.submit(i, "low")
+
+        served = Counter(scheduler.pop().tier for _ in range(60))
+
+        # Веса critical:low = 100:20
+        assert served[Priority.CRITICAL] == 50
+        assert served[Priority.LOW] == 10
+
+    def test_high_priority_overtakes_backlog(self):
+        scheduler, _ = make_scheduler()
+        for i in range(20):
+            scheduler.submit(f"background-{i}", "background")
+        scheduler.pop()
+        scheduler.submit("interactive", "high")
+
+        assert scheduler.pop().payload == "interactive"
+
+    @pytest.mark.parametrize("aging_rate,first", [(0.0, "critical-0"), (1.0, "old")])
+    def test_aging_favours_waiting_request(self, aging_rate, first):
+        scheduler, clock = make_scheduler(aging_rate=aging_rate)
+        scheduler.submit("old", "background")
+
+        clock.now = 10.0
+        for i in range(50):
+            scheduler.submit(f"critical-{i}", "critical")
+
+        assert scheduler.pop().payload == first
+
+    def test_admission_uses_observed_wait(self):
+        scheduler, clock = make_scheduler(service_time_alpha=1.0, initial_service_time=2.0)
+        scheduler.submit("slow", "critical")
+        clock.now = 29.0
+        scheduler.pop()
+
+        # По длине очереди новые запросы успевают, но уровень уже ждет 29s
+        scheduler.submit("first", "critical")
+        assert scheduler.expected_wait(Priority.CRITICAL) == pytest.approx(29.0)
+        with pytest.raises(AdmissionRejected):
+            scheduler.submit("second", "critical")
+
+    def test_expired_requests_are_dropped(self):
+        scheduler, clock = make_scheduler()
+        scheduler.submit("critical", "critical")
+        scheduler.submit("low", "low")
+
+        clock.now = 31.0
+        expired = scheduler.pop_expired()
+
+        assert [item.payload for item in expired] == ["critical"]
+        assert scheduler.qsize() == 1
+        assert scheduler.get_stats()["tiers"]["critical"]["expired"] == 1
+
+    def test_admission_rejects_hopeless_request(self):
+        scheduler, _ = make_scheduler(workers=1)
+        scheduler.record_service(Priority.CRITICAL, 4.0)
+        for i in range(7):
+            scheduler.submit(i, "critical")
+
+        with pytest.raises(AdmissionRejected) as exc_info:
+            scheduler.submit("late", "critical")
+
+        assert exc_info.value.expected_wait == pytest.approx(28.0)
+        # Запрос с более длинным таймаутом принимается
+        scheduler.submit("batch", "low")
+        assert scheduler.get_stats()["tiers"]["critical"]["rejected"] == 1
+
+    def test_queue_limit(self):
+        scheduler, _ = make_scheduler(max_queue_size=2)
+        scheduler.submit(1, "low")
+        scheduler.submit(2, "low")
+
+        with pytest.raises(AdmissionRejected):
+            scheduler.submit(3, "critical")
+
+    @pytest.mark.asyncio
+    async def test_get_waits_for_submit(self):
+        scheduler, _ = make_scheduler()
+        getter = asyncio.create_task(scheduler.get())
+        await asyncio.sleep(0)
+        assert not getter.done()
+
+        scheduler.submit("request", "normal")
+
+        assert (await asyncio.wait_for(getter, 1.0)).payload == "request"
@@ -0,0 +1,77 @@
+"""
+Тесты для векторного индекса базы знаний
+"""
+
+import numpy as np
+import pytest
+
+from app.llm.vector_index import VectorIndex
+
+
+@pytest.fixture
+def vectors():
+    """Случайные векторы для индекса"""
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((500, 32)).astype(np.float32)
+
+
+class TestVectorIndex:
+    """Тесты для VectorIndex"""
+    
+    def test_flat_search_finds_nearest(self, vectors):
+        """Тест точного поиска до обучения IVF"""
+        index = VectorIndex()
+        index.add([str(i) for i in range(len(vectors))], vectors)
+        
+        results = index.search(vectors[42], k=3)
+        
+        assert not index.is_trained
+        assert results[0][0] == "42"
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+        assert len(results) == 3
+    
+    def test_ivf_search_finds_nearest(self, vectors):
+        """Тест поиска после обучения IVF кластеров"""
+        index = VectorIndex(ivf_threshold=100, nprobe=4)
+        index.add([str(i) for i in range(len(vectors))], vectors)
+        
+        assert index.is_trained
+        for i in (0, 123, 499):
+            assert index.search(vectors[i], k=1)[0][0] == str(i)
+    
+    def test_upsert_and_remove(self, vectors):
+        """Тест обновления и удаления векторов"""
+        index = VectorIndex()
+        index.add(["a", "b", "c"], vectors[:3])
+        index.add(["a"], [vectors[10]])
+        
+        assert len(index) == 3
+        assert index.search(vectors[10], k=1)[0][0] == "a"
+        
+        assert index.remove(["a", "missing"]) == 1
+        assert len(index) == 2
+        assert "a" not in index
+        assert {doc_id for doc_id, _ in index.search(vectors[2], k=5)} == {"b", "c"}
+    
+    def test_dimension_mismatch(self, vectors):
+        """Тест ошибки при несовпадении размерности"""
+        index = VectorIndex()
+        index.add(["a"], vectors[:1])
+        
+        with pytest.raises(ValueError):
+            index.add(["b"], [[1.0, 2.0]])
+    
+    def test_serialization_roundtrip(self, vectors):
+        """Тест сохранения индекса в блоб и восстановления"""
+        index = VectorIndex(ivf_threshold=100)
+        index.add([str(i) for i in range(len(vectors))], vectors)
+        
+        restored = VectorIndex.from_bytes(index.to_bytes())
+        
+        assert len(restored) == len(index)
+        assert restored.is_trained
+        assert restored.search(vectors[7], k=1)[0][0] == "7"
+    
+    def test_empty_index(self):
+        """Тест поиска по пустому индексу"""
+        assert VectorIndex().search([0.1, 0.2], k=5) == []
@@ -0,0 +1,89 @@
+"""
+Тесты бинарного хранения векторов
+"""
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import ArticleEmbedding, Base, Domain, User, WordPressPost
+from app.vector_storage import decode_vector, encode_vector, load_article_vectors, stack_vectors
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        user = User(username="owner", email="owner@example.com", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        session.add(Domain(id=1, name="https://example.com", display_name="example.com", owner_id=user.id))
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+class TestVectorEncoding:
+    """Тесты кодирования векторов"""
+
+    def test_float32_roundtrip(self):
+        vector = np.random.rand(384).astype(np.float32)
+
+        data = encode_vector(vector)
+
+        assert len(data) == 384 * 4
+        np.testing.assert_array_equal(decode_vector(data), vector)
+
+    def test_float16_roundtrip(self):
+        vector = np.random.rand(384)
+
+        data = encode_vector(vector, 'float16')
+
+        assert len(data) == 384 * 2
+        np.testing.assert_allclose(decode_vector(data, 'float16'), vector, atol=1e-3)
+
+    def test_stack_mixed_dtypes(self):
+        rows = [(encode_vector([1.0, 2.0]), 'float32'), (encode_vector([3.0, 4.0], 'float16'), 'float16')]
+
+        matrix = stack_vectors(rows, 2)
+
+        assert matrix.dtype == np.float32 and matrix.flags['C_CONTIGUOUS']
+        np.testing.assert_array_equal(matrix, [[1.0, 2.0], [3.0, 4.0]])
+
+
+class TestLoadArticleVectors:
+    """Тесты загрузки эмбеддингов домена в матрицу"""
+
+    @pytest.mark.asyncio
+    async def test_domain_matrix(self, db):
+        vectors = {}
+        for wp_post_id in range(1, 4):
+            post = WordPressPost(
+                domain_id=1, wp_post_id=wp_post_id, title=f"Post {wp_post_id}", content="content",
+                link=f"https://example.com/{wp_post_id}", published_at=datetime(2024, 1, 1)
+            )
+            db.add(post)
+            await db.flush()
+            vectors[post.id] = np.full(3, wp_post_id, dtype=np.float32)
+            db.add(ArticleEmbedding(
+                post_id=post.id, embedding_type='content', vector_model='test',
+                vector_data=encode_vector(vectors[post.id]), dimension=3
+            ))
+        # Эмбеддинг другой размерности пропускается
+        db.add(ArticleEmbedding(
+            post_id=post.id, embedding_type='content', vector_model='other',
+            vector_data=encode_vector([1.0]), dimension=1
+        ))
+        await db.commit()
+
+        post_ids, matrix = await load_article_vectors(db, 1)
+
+        assert matrix.shape == (3, 3)
+        assert sorted(post_ids) == sorted(vectors)
+        for post_id, row in zip(post_ids, matrix):
+            np.testing.assert_array_equal(row, vectors[post_id])
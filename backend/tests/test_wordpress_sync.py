@@ -0,0 +1,171 @@
+"""
+Тесты инкрементальной синхронизации статей WordPress
+"""
+
+import httpx
+import pytest
+import pytest_asyncio
+import respx
+from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import ArticleEmbedding, Base, Domain, User, WordPressPost
+from app.vector_storage import encode_vector
+from app.wordpress_sync import fetch_wordpress_post_ids, iter_wordpress_posts, sync_wordpress_posts
+
+
+def make_post(post_id: int, content: str = "content") -> dict:
+    return {
+        'id': post_id,
+        'title': f"Post {post_id}",
+        'content': content,
+        'excerpt': '',
+        'link': f"https://example.com/post-{post_id}",
+        'date': datetime(2024, 1, post_id)
+    }
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        user = User(username="owner", email="owner@example.com", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        session.add(Domain(id=1, name="https://example.com", display_name="example.com", owner_id=user.id))
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+async def count(db, model) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+class TestSyncWordPressPosts:
+    """Тесты upsert по хэшу контента"""
+
+    @pytest.mark.asyncio
+    async def test_initial_sync_adds_posts(self, db):
+        stats = await sync_wordpress_posts(db, 1, [make_post(1), make_post(2)])
+
+        assert stats == {'added': 2, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'total': 2}
+        assert await count(db, WordPressPost) == 2
+
+    @pytest.mark.asyncio
+    async def test_incremental_sync(self, db):
+        """Тест: измененные обновляются, удаленные удаляются, остальные не трогаются"""
+        await sync_wordpress_posts(db, 1, [make_post(1), make_post(2), make_post(3)])
+        posts = {p.wp_post_id: p for p in (await db.execute(select(WordPressPost))).scalars()}
+        for post in posts.values():
+            db.add(ArticleEmbedding(
+                post_id=post.id, embedding_type='content', vector_model='test',
+                vector_data=encode_vector([0.1]), dimension=1
+            ))
+        await db.commit()
+
+        # Пост 1 не изменился, пост 2 изменился, пост 3 удален, пост 4 новый
+        stats = await sync_wordpress_posts(
+            db, 1, [make_post(1), make_post(2, "new content"), make_post(4)], live_ids={1, 2, 4}
+        )
+
+        assert stats == {'added': 1, 'updated': 1, 'unchanged': 1, 'deleted': 1, 'total': 3}
+        rows = {p.wp_post_id: p for p in (await db.execute(select(WordPressPost))).scalars()}
+        assert set(rows) == {1, 2, 4}
+        assert rows[2].content == "new content"
+
+        # Эмбеддинг сохранен только у неизмененного поста
+        embedded = (await db.execute(select(ArticleEmbedding.post_id))).scalars().all()
+        assert embedded == [posts[1].id]
+
+    @pytest.mark.asyncio
+    async def test_legacy_rows_backfilled_without_update(self, db):
+        """Тест: строки без хэша с тем же контентом считаются неизмененными"""
+        post = make_post(1)
+        db.add(WordPressPost(
+            domain_id=1, wp_post_id=1, title=post['title'], content=post['content'],
+            excerpt=post['excerpt'], link=post['link'], published_at=post['date']
+        ))
+        await db.commit()
+
+        stats = await sync_wordpress_posts(db, 1, [post])
+
+        assert stats['unchanged'] == 1 and stats['updated'] == 0
+        row = (await db.execute(select(WordPressPost))).scalar_one()
+        assert row.content_hash is not None
+
+
+class TestIterWordPressPosts:
+    """Тесты постраничной загрузки через WP REST API"""
+
+    @staticmethod
+    def wp_page(page: int, per_page: int = 100, total: int = 250) -> httpx.Response:
+        start = (page - 1) * per_page
+        items = [
+            {
+                "id": i,
+                "date": "2024-05-01T10:00:00",
+                "link": f"https://example.com/post-{i}",
+                "title": {"rendered": f"Post {i}"},
+                "content": {"rendered": f"<p>Content <b>{i}</b></p>"},
+                "excerpt": {"rendered": ""}
+            }
+            for i in range(start + 1, min(total, start + per_page) + 1)
+        ]
+        total_pages = (total + per_page - 1) // per_page
+        return httpx.Response(200, json=items, headers={"X-WP-Total": str(total), "X-WP-TotalPages": str(total_pages)})
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_all_pages_fetched(self):
+        route = respx.get("https://example.com/wp-json/wp/v2/posts").mock(
+            side_effect=lambda request: self.wp_page(int(request.url.params["page"]))
+        )
+
+        batches = [batch async for batch in iter_wordpress_posts("https://example.com")]
+
+        posts = [post for batch in batches for post in batch]
+        assert len(batches) == 3
+        assert sorted(post["id"] for post in posts) == list(range(1, 251))
+        assert posts[0]["content"] == "Content 1"
+        assert route.call_count == 3
+        assert "content" in route.calls[0].request.url.params["_fields"]
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_per_page_fallback_and_modified_after(self):
+        def handler(request):
+            if request.url.params["per_page"] == "100":
+                return httpx.Response(400)
+            return self.wp_page(int(request.url.params["page"]), per_page=50, total=60)
+
+        route = respx.get("https://example.com/wp-json/wp/v2/posts").mock(side_effect=handler)
+
+        batches = [
+            batch async for batch in iter_wordpress_posts(
+                "https://example.com", modified_after=datetime(2024, 5, 1)
+            )
+        ]
+
+        assert sum(len(batch) for batch in batches) == 60
+        assert route.calls[-1].request.url.params["modified_after"] == "2024-05-01T00:00:00"
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_post_ids_use_per_page_fallback(self):
+        def handler(request):
+            if request.url.params["per_page"] != "10":
+                return httpx.Response(400)
+            return self.wp_page(int(request.url.params["page"]), per_page=10, total=25)
+
+        route = respx.get("https://example.com/wp-json/wp/v2/posts").mock(side_effect=handler)
+
+        ids = await fetch_wordpress_post_ids("https://example.com")
+
+        assert ids == set(range(1, 26))
+        assert [call.request.url.params["page"] for call in route.calls[2:]] == ["1", "2", "3"]
+        assert route.calls[-1].request.url.params["_fields"] == "id"
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from bootstrap.llm_router import get_llm_router
 from bootstrap.rag_service import get_rag_service
 from bootstrap.ollama_client import get_ollama_client
 from bootstrap.monitoring import get_service_monitor
 import uuid
 
+from app.models import (
+    BenchmarkFilterRequest, BenchmarkListResponse, BenchmarkStatus, BenchmarkType, RegressionReport
+)
+from app.services import BenchmarkService, get_benchmark_service
+
 router = APIRouter(tags=["benchmark"])
 
 @router.get("/health")
@@ -23,7 +31,9 @@ async def get_endpoints():
         "service": "benchmark",
         "endpoints": [
             "/health",
-            "/api/v1/endpoints"
+            "/api/v1/endpoints",
+            "/api/v1/benchmarks/results",
+            "/api/v1/benchmarks/{benchmark_id}/regression"
         ]
     }
 
@@ -32,3 +42,44 @@ async def get_metrics():
     """Получение метрик сервиса"""
     monitor = get_service_monitor()
     return monitor.get_metrics_summary()
+
+@router.get("/api/v1/benchmarks/results", response_model=BenchmarkListResponse)
+async def list_benchmark_results(
+    model_name: Optional[str] = None,
+    benchmark_type: Optional[BenchmarkType] = None,
+    status: Optional[BenchmarkStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    service: BenchmarkService = Depends(get_benchmark_service)
+):
+    """Результаты бенчмарков из постоянного хранилища"""
+    filters = BenchmarkFilterRequest(
+        model_name=model_name, benchmark_type=benchmark_type, status=status,
+        date_from=date_from, date_to=date_to, limit=limit, offset=offset
+    )
+    results = await service.query_results(filters)
+    return BenchmarkListResponse(
+        success=True,
+        data=results,
+        total=len(results),
+        page=offset // limit + 1,
+        limit=limit,
+        message=f"Найдено результатов: {len(results)}"
+    )
+
+@router.get("/api/v1/benchmarks/{benchmark_id}/regression", response_model=RegressionReport)
+async def check_benchmark_regression(
+    benchmark_id: str,
+    baseline_ids: Optional[List[str]] = Query(None),
+    baseline_runs: Optional[int] = Query(None, ge=1, le=100),
+    alpha: Optional[float] = Query(None, gt=0, lt=1),
+    min_slowdown: Optional[float] = Query(None, ge=0),
+    service: BenchmarkService = Depends(get_benchmark_service)
+):
+    """Проверка прогона на статистически значимое замедление относительно базы"""
+    report = await service.check_regression(benchmark_id, baseline_ids, baseline_runs, alpha, min_slowdown)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Прогон {benchmark_id} не найден в хранилище")
+    return report
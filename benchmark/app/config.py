@@ -56,6 +56,9 @@ class BenchmarkSettings(BaseSettings):
     # Настройки метрик
     metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
     metrics_port: int = Field(default=9090, env="METRICS_PORT")
+    scoring_workers: int = Field(default=4, env="SCORING_WORKERS")
+    scoring_parallel_threshold: int = Field(default=200, env="SCORING_PARALLEL_THRESHOLD")
+    resource_sample_interval: float = Field(default=0.5, env="RESOURCE_SAMPLE_INTERVAL")
     
     # Настройки логирования
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
@@ -71,6 +74,13 @@ class BenchmarkSettings(BaseSettings):
     # Настройки тестовых данных
     test_data_path: str = Field(default="/app/test_data", env="TEST_DATA_PATH")
     benchmark_results_path: str = Field(default="/app/results", env="BENCHMARK_RESULTS_PATH")
+    results_db_path: str = Field(default="/app/results/benchmarks.db", env="RESULTS_DB_PATH")
+    
+    # Настройки детектора регрессий
+    regression_baseline_runs: int = Field(default=5, env="REGRESSION_BASELINE_RUNS")
+    regression_alpha: float = Field(default=0.01, env="REGRESSION_ALPHA")
+    regression_min_slowdown: float = Field(default=0.05, env="REGRESSION_MIN_SLOWDOWN")
+    regression_bootstrap_resamples: int = Field(default=2000, env="REGRESSION_BOOTSTRAP_RESAMPLES")
     
     # Настройки уведомлений
     notifications_enabled: bool = Field(default=True, env="NOTIFICATIONS_ENABLED")
@@ -0,0 +1,260 @@
+"""
+🚀 НАГРУЗОЧНЫЙ РЕЖИМ БЕНЧМАРКА
+Генерация конкурентной нагрузки и HDR-гистограммы задержек
+"""
+
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Отправка одного запроса: prompt -> количество сгенерированных токенов
+SendFunc = Callable[[str], Awaitable[int]]
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с логарифмически-линейными корзинами (как HdrHistogram)
+
+    Значения хранятся в микросекундах. Корзина определяется старшими
+    sub_bucket_bits битами значения, поэтому относительная погрешность
+    не превышает 10^-significant_digits во всем диапазоне, а память
+    зависит от числа различных корзин, а не от числа замеров.
+    """
+
+    def __init__(self, significant_digits: int = 3):
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum_us = 0
+        self.max_us = 0
+        self.min_us = 0
+
+    def _bucket(self, value_us: int) -> int:
+        shift = max(0, value_us.bit_length() - self.sub_bucket_bits)
+        return ((value_us >> shift) << shift) | ((1 << shift) - 1)
+
+    def _add(self, value_us: int, count: int = 1):
+        key = self._bucket(value_us)
+        self.counts[key] = self.counts.get(key, 0) + count
+        if self.total == 0 or value_us < self.min_us:
+            self.min_us = value_us
+        self.total += count
+        self.sum_us += value_us * count
+        self.max_us = max(self.max_us, value_us)
+
+    def record(self, seconds: float, expected_interval: Optional[float] = None):
+        """Запись задержки с поправкой на coordinated omission
+
+        Если задержка больше ожидаемого интервала между запросами, за время
+        ожидания не были отправлены запросы, которые тоже ждали бы. Их
+        задержки (value - interval, value - 2*interval, ...) дописываются.
+        """
+        value_us = max(0, int(seconds * 1_000_000))
+        self._add(value_us)
+        if not expected_interval or expected_interval <= 0:
+            return
+        interval_us = int(expected_interval * 1_000_000)
+        missing = value_us - interval_us
+        while missing >= interval_us:
+            self._add(missing)
+            missing -= interval_us
+
+    def merge(self, other: "LatencyHistogram"):
+        """Добавление замеров другой гистограммы"""
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        if other.total and (self.total == 0 or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, percent: float) -> float:
+        """Задержка (сек), не превышаемая percent процентами замеров"""
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(percent / 100 * self.total))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                return min(key, self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    @property
+    def mean(self) -> float:
+        return self.sum_us / self.total / 1_000_000 if self.total else 0.0
+
+    @property
+    def max(self) -> float:
+        return self.max_us / 1_000_000
+
+
+@dataclass
+class LoadStepStats:
+    """Результат одной ступени нагрузки"""
+    concurrency: Optional[int] = None
+    target_rps: Optional[float] = None
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    requests: int = 0
+    errors: int = 0
+    tokens: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        histogram = self.histogram
+        return {
+            "concurrency": self.concurrency,
+            "target_rps": self.target_rps,
+            "requests": self.requests,
+            "errors": self.errors,
+            "throughput": self.throughput,
+            "tokens_per_second": self.tokens_per_second,
+            "latency_mean": histogram.mean,
+            "latency_p50": histogram.percentile(50),
+            "latency_p90": histogram.percentile(90),
+            "latency_p99": histogram.percentile(99),
+            "latency_p999": histogram.percentile(99.9),
+            "latency_max": histogram.max
+        }
+
+
+class LoadGenerator:
+    """Генератор нагрузки на одну модель
+
+    Закрытая модель (run_closed): concurrency воркеров отправляют запросы
+    подряд. Ожидаемый интервал для поправки coordinated omission - медиана
+    задержки на прогреве. Открытая модель (run_open): запросы отправляются
+    по расписанию (постоянный RPS или пуассоновский поток) независимо от
+    ответов, задержка считается от запланированного момента отправки, так
+    что очередь перед перегруженным сервером входит в замер.
+
+    Запросы, запланированные во время прогрева, в статистику не входят.
+    """
+
+    def __init__(self, send: SendFunc, prompts: Sequence[str], warmup: float = 5.0, duration: float = 30.0):
+        if not prompts:
+            raise ValueError("Список промптов не может быть пустым")
+        self.send = send
+        self.prompts = list(prompts)
+        self.warmup = warmup
+        self.duration = duration
+        self._next_prompt = 0
+
+    def _prompt(self) -> str:
+        prompt = self.prompts[self._next_prompt % len(self.prompts)]
+        self._next_prompt += 1
+        return prompt
+
+    async def run_closed(self, concurrency: int) -> LoadStepStats:
+        """Ступень с фиксированным числом одновременных запросов"""
+        stats = LoadStepStats(concurrency=concurrency)
+        start = time.perf_counter()
+        measure_from = start + self.warmup
+        end = measure_from + self.duration
+        warmup_latencies: List[float] = []
+        measured: List[float] = []
+        last_done = measure_from
+
+        async def worker():
+            nonlocal last_done
+            while True:
+                sent = time.perf_counter()
+                if sent >= end:
+                    return
+                try:
+                    tokens = await self.send(self._prompt())
+                    failed = False
+                except Exception as e:
+                    logger.debug("Ошибка запроса нагрузки", error=str(e))
+                    tokens, failed = 0, True
+                done = time.perf_counter()
+                if sent < measure_from:
+                    if not failed:
+                        warmup_latencies.append(done - sent)
+                    continue
+                last_done = max(last_done, done)
+                if failed:
+                    stats.errors += 1
+                    continue
+                measured.append(done - sent)
+                stats.requests += 1
+                stats.tokens += tokens
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        expected_interval = sorted(warmup_latencies)[len(warmup_latencies) // 2] if warmup_latencies else None
+        for latency in measured:
+            stats.histogram.record(latency, expected_interval)
+        stats.elapsed = max(end, last_done) - measure_from
+        return stats
+
+    async def run_open(self, rate: float, poisson: bool = False, max_in_flight: int = 256) -> LoadStepStats:
+        """Ступень с заданной интенсивностью поступления запросов (RPS)"""
+        stats = LoadStepStats(target_rps=rate)
+        start = time.perf_counter()
+        measure_from = start + self.warmup
+        end = measure_from + self.duration
+        in_flight = asyncio.Semaphore(max_in_flight)
+        last_done = measure_from
+
+        async def request(intended: float):
+            nonlocal last_done
+            async with in_flight:
+                try:
+                    tokens = await self.send(self._prompt())
+                    failed = False
+                except Exception as e:
+                    logger.debug("Ошибка запроса нагрузки", error=str(e))
+                    tokens, failed = 0, True
+            done = time.perf_counter()
+            if intended < measure_from:
+                return
+            last_done = max(last_done, done)
+            if failed:
+                stats.errors += 1
+                return
+            stats.histogram.record(done - intended)
+            stats.requests += 1
+            stats.tokens += tokens
+
+        tasks = []
+        intended = start
+        while intended < end:
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(request(intended)))
+            intended += random.expovariate(rate) if poisson else 1.0 / rate
+        await asyncio.gather(*tasks)
+
+        stats.elapsed = max(end, last_done) - measure_from
+        return stats
+
+
+def find_saturation(steps: Sequence[LoadStepStats], tolerance: float = 0.05) -> Optional[LoadStepStats]:
+    """Первая ступень, на которой пропускная способность вышла на плато
+
+    Плато - не ниже (1 - tolerance) от максимальной пропускной способности.
+    """
+    if not steps:
+        return None
+    peak = max(step.throughput for step in steps)
+    for step in steps:
+        if step.throughput >= peak * (1 - tolerance):
+            return step
+    return None
@@ -3,10 +3,16 @@ benchmark - Микросервис reLink
 Сервис для бенчмаркинга LLM моделей
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from bootstrap.main import create_app, add_service_routes
 from bootstrap.config import get_settings
 
+from app.scoring import close_quality_scorer
+from app.storage import close_results_store
+
 # Создание приложения с бутстрапом
 app = create_app(
     title="benchmark",
@@ -14,6 +20,23 @@ app = create_app(
     version="1.0.0"
 )
 
+bootstrap_lifespan = app.router.lifespan_context
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Жизненный цикл бутстрапа и остановка ресурсов бенчмарка"""
+    async with bootstrap_lifespan(app):
+        try:
+            yield
+        finally:
+            # Пул процессов оценщика ждет завершения текущих задач
+            await asyncio.to_thread(close_quality_scorer)
+            close_results_store()
+
+
+app.router.lifespan_context = lifespan
+
 # Добавление роутов сервиса
 from app.api import router
 add_service_routes(app, router, prefix="/api/v1")
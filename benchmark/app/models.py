@@ -4,7 +4,7 @@ Pydantic модели для валидации данных и API
 """
 
 from datetime import datetime
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Dict, Optional, Any, Tuple, Union
 from enum import Enum
 from pydantic import BaseModel, Field, validator, root_validator
 from pydantic.types import UUID4
@@ -90,6 +90,48 @@ class BenchmarkRequest(BaseModel):
         return v
 
 
+class ArrivalProcess(str, Enum):
+    """Модель поступления запросов в нагрузочном режиме."""
+    CLOSED = "closed"  # фиксированная конкурентность
+    CONSTANT = "constant"  # постоянный RPS
+    POISSON = "poisson"  # пуассоновский поток
+
+
+class LoadTestRequest(BaseModel):
+    """Запрос на нагрузочный бенчмарк."""
+    name: str = Field(..., min_length=1, max_length=100, description="Название теста")
+    benchmark_type: BenchmarkType = Field(default=BenchmarkType.PERFORMANCE, description="Набор промптов")
+    models: List[str] = Field(..., min_items=1, max_items=10, description="Модели (нагружаются параллельно)")
+    arrival: ArrivalProcess = Field(default=ArrivalProcess.CLOSED, description="Модель поступления запросов")
+    concurrency_levels: List[int] = Field(default=[1, 2, 4, 8], description="Ступени конкурентности (closed)")
+    rates: List[float] = Field(default_factory=list, description="Ступени RPS (constant/poisson)")
+    step_duration: float = Field(default=30.0, gt=0, le=3600, description="Длительность ступени (сек)")
+    warmup: float = Field(default=5.0, ge=0, le=600, description="Прогрев ступени, не входит в статистику (сек)")
+    max_in_flight: int = Field(default=256, ge=1, le=4096, description="Предел одновременных запросов (open loop)")
+    parameters: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Параметры генерации")
+    
+    @validator('models')
+    def validate_models(cls, v):
+        """Валидация списка моделей."""
+        return [model.lower().strip() for model in v]
+    
+    @validator('concurrency_levels')
+    def validate_concurrency_levels(cls, v):
+        """Валидация ступеней конкурентности."""
+        if any(level < 1 or level > 1024 for level in v):
+            raise ValueError("Конкурентность должна быть от 1 до 1024")
+        return sorted(set(v))
+    
+    @validator('rates', always=True)
+    def validate_rates(cls, v, values):
+        """Для открытой модели нужны ступени RPS."""
+        if any(rate <= 0 for rate in v):
+            raise ValueError("RPS должен быть больше 0")
+        if values.get('arrival', ArrivalProcess.CLOSED) != ArrivalProcess.CLOSED and not v:
+            raise ValueError("Для constant/poisson нужно указать rates")
+        return sorted(set(v))
+
+
 class ModelConfigRequest(BaseModel):
     """Запрос на конфигурацию модели."""
     model_name: str = Field(..., description="Название модели")
@@ -130,6 +172,19 @@ class PerformanceMetrics(BaseModel):
     throughput: float = Field(..., ge=0, description="Пропускная способность (запросов/сек)")
     memory_usage_mb: float = Field(..., ge=0, description="Использование памяти (МБ)")
     cpu_usage_percent: float = Field(..., ge=0, le=100, description="Использование CPU (%)")
+    ttft_avg: Optional[float] = Field(None, ge=0, description="Среднее время до первого токена (сек)")
+    ttft_p50: Optional[float] = Field(None, ge=0, description="p50 времени до первого токена (сек)")
+    ttft_p90: Optional[float] = Field(None, ge=0, description="p90 времени до первого токена (сек)")
+    ttft_p99: Optional[float] = Field(None, ge=0, description="p99 времени до первого токена (сек)")
+    inter_token_latency_avg: Optional[float] = Field(None, ge=0, description="Средняя задержка между токенами (сек)")
+    inter_token_latency_p50: Optional[float] = Field(None, ge=0, description="p50 задержки между токенами (сек)")
+    inter_token_latency_p90: Optional[float] = Field(None, ge=0, description="p90 задержки между токенами (сек)")
+    inter_token_latency_p99: Optional[float] = Field(None, ge=0, description="p99 задержки между токенами (сек)")
+    eval_count_avg: Optional[float] = Field(None, ge=0, description="Среднее число сгенерированных токенов (eval_count)")
+    eval_tokens_per_second: Optional[float] = Field(None, ge=0, description="Скорость генерации по eval_count/eval_duration")
+    prompt_eval_count_avg: Optional[float] = Field(None, ge=0, description="Среднее число токенов промпта (prompt_eval_count)")
+    prompt_tokens_per_second: Optional[float] = Field(None, ge=0, description="Скорость обработки промпта")
+    load_duration_avg: Optional[float] = Field(None, ge=0, description="Среднее время загрузки модели (сек)")
 
 
 class QualityMetrics(BaseModel):
@@ -169,7 +224,7 @@ class BenchmarkMetrics(BaseModel):
     quality: QualityMetrics = Field(..., description="Метрики качества")
     seo: Optional[SEOMetrics] = Field(None, description="SEO метрики")
     reliability: ReliabilityMetrics = Field(..., description="Метрики надежности")
-    overall_score: float = Field(..., ge=0, le=1, description="Общая оценка")
+    overall_score: float = Field(default=0, ge=0, le=1, description="Общая оценка (рассчитывается)")
     
     @root_validator
     def calculate_overall_score(cls, values):
@@ -227,6 +282,7 @@ class BenchmarkResult(BaseModel):
     duration: Optional[float] = Field(None, ge=0, description="Длительность (сек)")
     error_message: Optional[str] = Field(None, description="Сообщение об ошибке")
     raw_data: Optional[Dict[str, Any]] = Field(None, description="Сырые данные")
+    model_comparison: Optional[Dict[str, Any]] = Field(None, description="Сравнение токенных задержек с другими моделями прогона")
     
     @validator('duration', always=True)
     def calculate_duration(cls, v, values):
@@ -236,6 +292,37 @@ class BenchmarkResult(BaseModel):
         return v
 
 
+class LoadStepResult(BaseModel):
+    """Результат ступени нагрузки."""
+    concurrency: Optional[int] = Field(None, description="Конкурентность (closed)")
+    target_rps: Optional[float] = Field(None, description="Заданный RPS (constant/poisson)")
+    requests: int = Field(..., ge=0, description="Успешных запросов после прогрева")
+    errors: int = Field(..., ge=0, description="Ошибок после прогрева")
+    throughput: float = Field(..., ge=0, description="Пропускная способность (запросов/сек)")
+    tokens_per_second: float = Field(..., ge=0, description="Токенов в секунду")
+    latency_mean: float = Field(..., ge=0, description="Средняя задержка (сек)")
+    latency_p50: float = Field(..., ge=0, description="p50 задержки (сек)")
+    latency_p90: float = Field(..., ge=0, description="p90 задержки (сек)")
+    latency_p99: float = Field(..., ge=0, description="p99 задержки (сек)")
+    latency_p999: float = Field(..., ge=0, description="p99.9 задержки (сек)")
+    latency_max: float = Field(..., ge=0, description="Максимальная задержка (сек)")
+
+
+class LoadTestResult(BaseModel):
+    """Результат нагрузочного бенчмарка одной модели."""
+    load_test_id: UUID4 = Field(default_factory=uuid.uuid4, description="ID теста")
+    name: str = Field(..., description="Название теста")
+    model_name: str = Field(..., description="Название модели")
+    arrival: ArrivalProcess = Field(..., description="Модель поступления запросов")
+    status: BenchmarkStatus = Field(..., description="Статус")
+    steps: List[LoadStepResult] = Field(default_factory=list, description="Результаты ступеней")
+    saturation_throughput: float = Field(default=0.0, ge=0, description="Пиковая пропускная способность")
+    saturation_step: Optional[LoadStepResult] = Field(None, description="Первая ступень на плато пропускной способности")
+    started_at: datetime = Field(..., description="Время начала")
+    completed_at: Optional[datetime] = Field(None, description="Время завершения")
+    error_message: Optional[str] = Field(None, description="Сообщение об ошибке")
+
+
 class BenchmarkComparison(BaseModel):
     """Сравнение результатов бенчмарков."""
     comparison_id: UUID4 = Field(default_factory=uuid.uuid4, description="ID сравнения")
@@ -252,6 +339,35 @@ class BenchmarkComparison(BaseModel):
         return v
 
 
+class MetricRegression(BaseModel):
+    """Проверка регрессии одной метрики задержки."""
+    metric: str = Field(..., description="Метрика (response_time, ttft, inter_token_latency)")
+    baseline_samples: int = Field(..., ge=0, description="Замеров в базе")
+    candidate_samples: int = Field(..., ge=0, description="Замеров в проверяемом прогоне")
+    sufficient_data: bool = Field(default=False, description="Достаточно ли замеров для проверки")
+    baseline_p50: Optional[float] = Field(None, ge=0, description="p50 базы (сек)")
+    baseline_p99: Optional[float] = Field(None, ge=0, description="p99 базы (сек)")
+    candidate_p50: Optional[float] = Field(None, ge=0, description="p50 прогона (сек)")
+    candidate_p99: Optional[float] = Field(None, ge=0, description="p99 прогона (сек)")
+    p_value: Optional[float] = Field(None, ge=0, le=1, description="p-value Манна-Уитни (прогон медленнее базы)")
+    p50_ratio_ci: Optional[Tuple[float, float]] = Field(None, description="Доверительный интервал отношения p50 прогон/база")
+    p99_ratio_ci: Optional[Tuple[float, float]] = Field(None, description="Доверительный интервал отношения p99 прогон/база")
+    regressed: bool = Field(default=False, description="Статистически значимое замедление")
+
+
+class RegressionReport(BaseModel):
+    """Отчет о регрессиях прогона относительно базовых прогонов."""
+    benchmark_id: str = Field(..., description="ID проверяемого прогона")
+    model_name: str = Field(..., description="Название модели")
+    benchmark_type: BenchmarkType = Field(..., description="Тип бенчмарка")
+    baseline_ids: List[str] = Field(default_factory=list, description="ID базовых прогонов")
+    alpha: float = Field(..., description="Уровень значимости")
+    min_slowdown: float = Field(..., description="Минимальное существенное замедление (доля)")
+    metrics: List[MetricRegression] = Field(default_factory=list, description="Проверки по метрикам")
+    regressed: bool = Field(default=False, description="Есть ли регрессия хотя бы по одной метрике")
+    created_at: datetime = Field(default_factory=datetime.utcnow, description="Время проверки")
+
+
 # Модели API ответов
 class BenchmarkResponse(BaseModel):
     """Ответ API бенчмарка."""
@@ -0,0 +1,118 @@
+"""
+📉 ДЕТЕКТОР РЕГРЕССИЙ ПРОИЗВОДИТЕЛЬНОСТИ
+Сравнение распределения задержек нового прогона с базовыми прогонами
+"""
+
+import math
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import MetricRegression
+
+# Меньше замеров - тесты ничего не скажут
+MIN_SAMPLES = 5
+
+
+def mann_whitney_greater(candidate: Sequence[float], baseline: Sequence[float]) -> Tuple[float, float]:
+    """U-критерий Манна-Уитни: U и односторонний p-value гипотезы
+    «значения кандидата стохастически больше базовых»
+
+    Нормальное приближение с поправкой на связки и непрерывность.
+    """
+    x = np.asarray(candidate, dtype=float)
+    y = np.asarray(baseline, dtype=float)
+    n1, n2 = len(x), len(y)
+    _, inverse, counts = np.unique(np.concatenate([x, y]), return_inverse=True, return_counts=True)
+    # Средний ранг группы равных значений
+    ends = np.cumsum(counts)
+    ranks = (ends - (counts - 1) / 2.0)[inverse]
+    u = float(ranks[:n1].sum() - n1 * (n1 + 1) / 2)
+
+    n = n1 + n2
+    tie_term = float((counts ** 3 - counts).sum()) / (n * (n - 1))
+    variance = n1 * n2 / 12.0 * ((n + 1) - tie_term)
+    if variance <= 0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2.0 - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def bootstrap_ratio_ci(
+    candidate: Sequence[float],
+    baseline: Sequence[float],
+    percentile: float,
+    resamples: int = 2000,
+    confidence: float = 0.95,
+    rng: Optional[np.random.Generator] = None,
+    max_samples: int = 5000
+) -> Tuple[float, float]:
+    """Бутстреп доверительный интервал отношения перцентилей кандидат/база
+
+    Длинные ряды (задержки между токенами) прореживаются до max_samples,
+    повторные выборки считаются пачками, чтобы матрица индексов не
+    разрасталась.
+    """
+    rng = rng or np.random.default_rng()
+    x = np.asarray(candidate, dtype=float)
+    y = np.asarray(baseline, dtype=float)
+    if len(x) > max_samples:
+        x = rng.choice(x, max_samples, replace=False)
+    if len(y) > max_samples:
+        y = rng.choice(y, max_samples, replace=False)
+
+    batch = max(1, 1_000_000 // max(len(x), len(y)))
+    ratios = []
+    for start in range(0, resamples, batch):
+        size = min(batch, resamples - start)
+        x_q = np.percentile(rng.choice(x, (size, len(x))), percentile, axis=1)
+        y_q = np.percentile(rng.choice(y, (size, len(y))), percentile, axis=1)
+        ratios.append(x_q / np.where(y_q > 0, y_q, np.nan))
+    ratios = np.concatenate(ratios)
+    ratios = ratios[~np.isnan(ratios)]
+    if not len(ratios):
+        return 1.0, 1.0
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(ratios, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def detect_regression(
+    metric: str,
+    candidate: Sequence[float],
+    baseline: Sequence[float],
+    alpha: float = 0.01,
+    min_slowdown: float = 0.05,
+    resamples: int = 2000,
+    seed: Optional[int] = None
+) -> MetricRegression:
+    """Проверка замедления одной метрики
+
+    Регрессия - если Манн-Уитни отвергает «не медленнее» на уровне alpha
+    и нижняя граница доверительного интервала отношения p50 или p99
+    выше 1 + min_slowdown. Второе условие отсекает статистически
+    значимые, но несущественные сдвиги на больших выборках.
+    """
+    result = MetricRegression(metric=metric, baseline_samples=len(baseline), candidate_samples=len(candidate))
+    if len(candidate) < MIN_SAMPLES or len(baseline) < MIN_SAMPLES:
+        return result
+
+    rng = np.random.default_rng(seed)
+    confidence = 1 - alpha
+    base_p50, base_p99 = np.percentile(baseline, [50, 99])
+    cand_p50, cand_p99 = np.percentile(candidate, [50, 99])
+    _, p_value = mann_whitney_greater(candidate, baseline)
+    p50_ci = bootstrap_ratio_ci(candidate, baseline, 50, resamples, confidence, rng)
+    p99_ci = bootstrap_ratio_ci(candidate, baseline, 99, resamples, confidence, rng)
+
+    result.sufficient_data = True
+    result.baseline_p50 = float(base_p50)
+    result.baseline_p99 = float(base_p99)
+    result.candidate_p50 = float(cand_p50)
+    result.candidate_p99 = float(cand_p99)
+    result.p_value = p_value
+    result.p50_ratio_ci = p50_ci
+    result.p99_ratio_ci = p99_ci
+    threshold = 1 + min_slowdown
+    result.regressed = p_value < alpha and (p50_ci[0] > threshold or p99_ci[0] > threshold)
+    return result
@@ -0,0 +1,112 @@
+"""
+📈 ЗАМЕР РЕСУРСОВ ВО ВРЕМЯ ПРОГОНА БЕНЧМАРКА
+Фоновый сэмплер CPU и памяти на время итераций
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import psutil
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ResourceSample:
+    """Один замер ресурсов хоста"""
+    timestamp: float
+    cpu_percent: float
+    memory_used_mb: float
+
+
+@dataclass
+class ResourceUsage:
+    """Сводка по ресурсам за прогон"""
+    samples: int
+    cpu_avg: float
+    cpu_max: float
+    memory_avg_mb: float
+    memory_peak_mb: float
+
+
+class ResourceSampler:
+    """Сэмплер ресурсов в фоновом потоке на время прогона
+
+    Раньше CPU снимался после прогона через psutil.cpu_percent(interval=1):
+    секунда блокировки на каждый бенчмарк и замер простоя, а не генерации.
+    Поток снимает CPU (между соседними замерами) и память каждые interval
+    секунд, пока идут итерации; summary() усредняет замеры за прогон.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._samples: List[ResourceSample] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ResourceSampler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Запуск фонового потока"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        # Первый вызов задает точку отсчета для cpu_percent(interval=None)
+        psutil.cpu_percent(interval=None)
+        self._thread = threading.Thread(target=self._run, name="benchmark-resources", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Остановка с финальным замером хвоста прогона"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.interval + 1.0)
+        self._thread = None
+        self._record()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._record()
+
+    def _record(self):
+        try:
+            sample = ResourceSample(
+                timestamp=time.time(),
+                cpu_percent=psutil.cpu_percent(interval=None),
+                memory_used_mb=psutil.virtual_memory().used / (1024 * 1024)
+            )
+        except Exception as e:
+            logger.warning("Ошибка замера ресурсов", error=str(e))
+            return
+        with self._lock:
+            self._samples.append(sample)
+
+    @property
+    def samples(self) -> List[ResourceSample]:
+        with self._lock:
+            return list(self._samples)
+
+    def summary(self) -> Optional[ResourceUsage]:
+        """Средние и пиковые значения за прогон (None, если замеров нет)"""
+        samples = self.samples
+        if not samples:
+            return None
+        cpu = [sample.cpu_percent for sample in samples]
+        memory = [sample.memory_used_mb for sample in samples]
+        return ResourceUsage(
+            samples=len(samples),
+            cpu_avg=sum(cpu) / len(cpu),
+            cpu_max=max(cpu),
+            memory_avg_mb=sum(memory) / len(memory),
+            memory_peak_mb=max(memory)
+        )
@@ -0,0 +1,149 @@
+"""
+⚡ ПАКЕТНАЯ ОЦЕНКА КАЧЕСТВА ОТВЕТОВ
+Векторное семантическое сходство и текстовые метрики в пуле процессов
+"""
+
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+import textstat
+from nltk.tokenize import sent_tokenize
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .config import settings
+from .models import QualityMetrics
+
+logger = structlog.get_logger(__name__)
+
+# Глобальный оценщик
+_quality_scorer: Optional['BatchQualityScorer'] = None
+
+
+def text_statistics(texts: Sequence[str]) -> List[Tuple[int, float]]:
+    """Число предложений и беглость (Flesch / 100) для каждого текста
+
+    Функция уровня модуля, чтобы передаваться в пул процессов: один вызов
+    обрабатывает целый срез ответов, а не один ответ.
+    """
+    result = []
+    for text in texts:
+        sentences = len(sent_tokenize(text))
+        try:
+            fluency = max(0, min(1, textstat.flesch_reading_ease(text) / 100))
+        except Exception:
+            fluency = 0.5
+        result.append((sentences, fluency))
+    return result
+
+
+def row_cosine(left, right) -> np.ndarray:
+    """Косинусное сходство соответствующих строк двух матриц
+
+    Строки TF-IDF уже нормированы по L2, поэтому косинус пары - скалярное
+    произведение строк: одно поэлементное умножение разреженных матриц и
+    сумма по строкам вместо cosine_similarity на каждую пару.
+    """
+    return np.asarray(left.multiply(right).sum(axis=1)).ravel()
+
+
+class BatchQualityScorer:
+    """Оценка качества всех ответов прогона за один проход
+
+    TF-IDF обучается один раз на весь прогон, сходство ответ/эталон
+    считается одной матричной операцией. Токенизация предложений и
+    textstat выполняются срезами в пуле процессов, если ответов не меньше
+    parallel_threshold; при workers=0 или меньшем объеме - в текущем
+    процессе, где запуск пула обошелся бы дороже самой работы.
+    """
+
+    def __init__(self, workers: int = 0, parallel_threshold: int = 200):
+        self.workers = workers
+        self.parallel_threshold = parallel_threshold
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def semantic_similarity(self, responses: List[str], expected_responses: List[str], prompts: List[str]) -> np.ndarray:
+        """Сходство каждого ответа со своим эталоном"""
+        pairs = min(len(responses), len(expected_responses))
+        if not pairs:
+            return np.zeros(0)
+        vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
+        tfidf_matrix = vectorizer.fit_transform(responses + expected_responses + prompts)
+        response_vectors = tfidf_matrix[:pairs]
+        expected_vectors = tfidf_matrix[len(responses):len(responses) + pairs]
+        return row_cosine(response_vectors, expected_vectors)
+
+    def text_statistics(self, responses: List[str]) -> List[Tuple[int, float]]:
+        """Предложения и беглость ответов, при большом объеме - в пуле процессов"""
+        if self.workers <= 0 or len(responses) < self.parallel_threshold:
+            return text_statistics(responses)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Несколько срезов на воркер сглаживают разную длину ответов
+        chunk_size = max(1, len(responses) // (self.workers * 4))
+        chunks = [responses[i:i + chunk_size] for i in range(0, len(responses), chunk_size)]
+        result = []
+        for chunk_result in self._pool.map(text_statistics, chunks):
+            result.extend(chunk_result)
+        return result
+
+    def score(self, responses: List[str], expected_responses: List[str], prompts: List[str]) -> QualityMetrics:
+        """Метрики качества прогона"""
+        if not responses:
+            raise ValueError("Список ответов не может быть пустым")
+
+        try:
+            similarities = self.semantic_similarity(responses, expected_responses, prompts)
+            semantic_similarity = float(similarities.mean()) if similarities.size else 0
+        except Exception as e:
+            logger.warning(f"Ошибка расчета семантического сходства: {e}")
+            semantic_similarity = 0
+
+        prompt_words = set(prompts[0].lower().split()) if prompts else set()
+        accuracy_scores = []
+        relevance_scores = []
+        for response in responses:
+            words = response.split()
+            accuracy_scores.append(min(1.0, len(words) / 50))
+            relevance_scores.append(min(1.0, len(set(response.lower().split()) & prompt_words) / 10))
+
+        text_stats = self.text_statistics(responses)
+        coherence_scores = [min(1.0, sentences / 5) for sentences, _ in text_stats]
+        fluency_scores = [fluency for _, fluency in text_stats]
+
+        return QualityMetrics(
+            accuracy_score=statistics.mean(accuracy_scores),
+            relevance_score=statistics.mean(relevance_scores),
+            coherence_score=statistics.mean(coherence_scores),
+            fluency_score=statistics.mean(fluency_scores),
+            semantic_similarity=max(0, min(1, semantic_similarity)),
+            hallucination_rate=0.1,  # Заглушка
+            factual_accuracy=0.8  # Заглушка
+        )
+
+    def close(self):
+        """Остановка пула процессов"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def get_quality_scorer() -> BatchQualityScorer:
+    """Получение глобального оценщика качества"""
+    global _quality_scorer
+    if _quality_scorer is None:
+        _quality_scorer = BatchQualityScorer(
+            workers=settings.scoring_workers,
+            parallel_threshold=settings.scoring_parallel_threshold
+        )
+    return _quality_scorer
+
+
+def close_quality_scorer():
+    """Остановка глобального оценщика качества"""
+    global _quality_scorer
+    if _quality_scorer:
+        _quality_scorer.close()
+        _quality_scorer = None
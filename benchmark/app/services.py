@@ -10,23 +10,26 @@ import psutil
 import httpx
 import ollama
 import uuid
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any, Tuple
 import structlog
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
 import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import stopwords
-import textstat
 
 from .config import settings, BENCHMARK_TYPES, MODEL_CONFIGS
 from .models import (
     BenchmarkRequest, BenchmarkResult, BenchmarkMetrics, PerformanceMetrics,
-    QualityMetrics, SEOMetrics, ReliabilityMetrics, BenchmarkStatus, BenchmarkType
+    QualityMetrics, SEOMetrics, ReliabilityMetrics, BenchmarkStatus, BenchmarkType,
+    ArrivalProcess, LoadTestRequest, LoadTestResult, LoadStepResult,
+    BenchmarkFilterRequest, RegressionReport
 )
 from .cache import get_cache
+from .load import LoadGenerator, find_saturation
+from .resources import ResourceSampler, ResourceUsage
+from .scoring import get_quality_scorer
+from .storage import SAMPLE_METRICS, get_results_store
+from .regression import detect_regression
 
 logger = structlog.get_logger(__name__)
 
@@ -41,11 +44,26 @@ except LookupError:
     nltk.download('stopwords')
 
 
+@dataclass
+class GenerationTiming:
+    """Замеры одной потоковой генерации."""
+    response: str = ""
+    response_time: float = 0.0
+    ttft: Optional[float] = None
+    inter_token_latencies: List[float] = field(default_factory=list)
+    eval_count: int = 0
+    eval_duration: float = 0.0
+    prompt_eval_count: int = 0
+    prompt_eval_duration: float = 0.0
+    load_duration: float = 0.0
+
+
 class OllamaService:
     """Сервис для работы с Ollama."""
     
     def __init__(self):
         self.client = ollama.Client(host=settings.ollama_url)
+        self.async_client = ollama.AsyncClient(host=settings.ollama_url)
         self.timeout = settings.ollama_timeout
     
     async def check_model_availability(self, model_name: str) -> bool:
@@ -64,31 +82,79 @@ class OllamaService:
         parameters: Optional[Dict[str, Any]] = None
     ) -> Tuple[str, float]:
         """Генерация ответа с измерением времени."""
-        start_time = time.time()
+        timing = await self.generate_stream(model_name, prompt, parameters)
+        return timing.response, timing.response_time
+    
+    async def generate_stream(
+        self,
+        model_name: str,
+        prompt: str,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> GenerationTiming:
+        """Потоковая генерация с замером TTFT и задержек между токенами.
+        
+        Поток читается в отдельном потоке целиком, поэтому отметки времени
+        чанков не зависят от загрузки event loop.
+        """
+        model_params = dict(MODEL_CONFIGS.get(model_name, {}).get('benchmark_params', {}))
+        if parameters:
+            model_params.update(parameters)
         
         try:
-            # Получаем параметры модели
-            model_params = MODEL_CONFIGS.get(model_name, {}).get('benchmark_params', {})
-            if parameters:
-                model_params.update(parameters)
-            
-            # Генерируем ответ
-            response = await asyncio.to_thread(
-                self.client.generate,
-                model=model_name,
-                prompt=prompt,
-                **model_params
-            )
-            
-            end_time = time.time()
-            response_time = end_time - start_time
-            
-            return response['response'], response_time
-            
+            return await asyncio.to_thread(self._consume_stream, model_name, prompt, model_params)
         except Exception as e:
             logger.error(f"Ошибка генерации ответа для модели {model_name}: {e}")
             raise
     
+    def _consume_stream(self, model_name: str, prompt: str, model_params: Dict[str, Any]) -> GenerationTiming:
+        """Чтение потока чанков Ollama с отметками времени."""
+        timing = GenerationTiming()
+        parts: List[str] = []
+        start = time.perf_counter()
+        last_token_at: Optional[float] = None
+        
+        for chunk in self.client.generate(model=model_name, prompt=prompt, stream=True, **model_params):
+            now = time.perf_counter()
+            text = chunk.get('response') or ''
+            if text:
+                parts.append(text)
+                if last_token_at is None:
+                    timing.ttft = now - start
+                else:
+                    timing.inter_token_latencies.append(now - last_token_at)
+                last_token_at = now
+            if chunk.get('done'):
+                # Финальный чанк содержит счетчики и длительности Ollama (нс)
+                timing.eval_count = chunk.get('eval_count') or 0
+                timing.eval_duration = (chunk.get('eval_duration') or 0) / 1e9
+                timing.prompt_eval_count = chunk.get('prompt_eval_count') or 0
+                timing.prompt_eval_duration = (chunk.get('prompt_eval_duration') or 0) / 1e9
+                timing.load_duration = (chunk.get('load_duration') or 0) / 1e9
+        
+        timing.response = ''.join(parts)
+        timing.response_time = time.perf_counter() - start
+        if not timing.eval_count:
+            timing.eval_count = len(parts)
+        return timing
+    
+    async def generate_async(
+        self,
+        model_name: str,
+        prompt: str,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """Генерация через асинхронный клиент (нагрузочный режим).
+        
+        Не занимает поток пула на запрос, поэтому конкурентность не
+        ограничена размером пула потоков. Возвращает число токенов ответа.
+        """
+        model_params = dict(MODEL_CONFIGS.get(model_name, {}).get('benchmark_params', {}))
+        if parameters:
+            model_params.update(parameters)
+        
+        response = await self.async_client.generate(model=model_name, prompt=prompt, **model_params)
+        return response.get('eval_count') or len(response['response'].split())
+    
     async def get_model_info(self, model_name: str) -> Dict[str, Any]:
         """Получение информации о модели."""
         try:
@@ -111,8 +177,19 @@ class MetricsCalculator:
     """Калькулятор метрик."""
     
     @staticmethod
-    def calculate_performance_metrics(response_times: List[float], tokens_per_response: List[int]) -> PerformanceMetrics:
-        """Расчет метрик производительности."""
+    def calculate_performance_metrics(
+        response_times: List[float],
+        tokens_per_response: List[int],
+        timings: Optional[List[GenerationTiming]] = None,
+        resources: Optional[ResourceUsage] = None
+    ) -> PerformanceMetrics:
+        """Расчет метрик производительности.
+        
+        timings - замеры потоковых генераций (только успешные итерации),
+        из них считаются TTFT, задержки между токенами и скорости Ollama.
+        resources - сводка ResourceSampler за время итераций; без нее
+        берется мгновенный неблокирующий замер.
+        """
         if not response_times:
             raise ValueError("Список времен ответа не может быть пустым")
         
@@ -131,8 +208,12 @@ class MetricsCalculator:
         throughput = len(response_times) / total_time if total_time > 0 else 0
         
         # Использование ресурсов
-        memory_usage_mb = psutil.virtual_memory().used / (1024 * 1024)
-        cpu_usage_percent = psutil.cpu_percent(interval=1)
+        if resources is not None:
+            memory_usage_mb = resources.memory_avg_mb
+            cpu_usage_percent = resources.cpu_avg
+        else:
+            memory_usage_mb = psutil.virtual_memory().used / (1024 * 1024)
+            cpu_usage_percent = psutil.cpu_percent(interval=None)
         
         return PerformanceMetrics(
             response_time_avg=response_time_avg,
@@ -142,8 +223,83 @@ class MetricsCalculator:
             tokens_per_second=tokens_per_second,
             throughput=throughput,
             memory_usage_mb=memory_usage_mb,
-            cpu_usage_percent=cpu_usage_percent
+            cpu_usage_percent=cpu_usage_percent,
+            **MetricsCalculator.calculate_token_latency_metrics(timings or [])
+        )
+    
+    @staticmethod
+    def calculate_token_latency_metrics(timings: List[GenerationTiming]) -> Dict[str, Optional[float]]:
+        """TTFT, распределение задержек между токенами и счетчики Ollama."""
+        metrics: Dict[str, Optional[float]] = {}
+        if not timings:
+            return metrics
+        
+        ttfts = [timing.ttft for timing in timings if timing.ttft is not None]
+        if ttfts:
+            p50, p90, p99 = np.percentile(ttfts, [50, 90, 99])
+            metrics.update(ttft_avg=float(np.mean(ttfts)), ttft_p50=float(p50), ttft_p90=float(p90), ttft_p99=float(p99))
+        
+        # Распределение по всем промежуткам всех итераций
+        gaps = [gap for timing in timings for gap in timing.inter_token_latencies]
+        if gaps:
+            p50, p90, p99 = np.percentile(gaps, [50, 90, 99])
+            metrics.update(
+                inter_token_latency_avg=float(np.mean(gaps)),
+                inter_token_latency_p50=float(p50),
+                inter_token_latency_p90=float(p90),
+                inter_token_latency_p99=float(p99)
+            )
+        
+        eval_count = sum(timing.eval_count for timing in timings)
+        eval_duration = sum(timing.eval_duration for timing in timings)
+        prompt_eval_count = sum(timing.prompt_eval_count for timing in timings)
+        prompt_eval_duration = sum(timing.prompt_eval_duration for timing in timings)
+        metrics.update(
+            eval_count_avg=eval_count / len(timings),
+            prompt_eval_count_avg=prompt_eval_count / len(timings),
+            load_duration_avg=sum(timing.load_duration for timing in timings) / len(timings)
         )
+        if eval_duration > 0:
+            metrics['eval_tokens_per_second'] = eval_count / eval_duration
+        if prompt_eval_duration > 0:
+            metrics['prompt_tokens_per_second'] = prompt_eval_count / prompt_eval_duration
+        return metrics
+    
+    @staticmethod
+    def compare_token_latency(results: List[BenchmarkResult]) -> Dict[str, Dict[str, Any]]:
+        """Сравнение моделей прогона по TTFT, задержке между токенами и скорости.
+        
+        Для каждой модели: значения метрик, место (1 - лучшая) и отношение
+        к лучшей модели (для задержек >= 1, для скорости <= 1).
+        """
+        criteria = {
+            'ttft_p50': min,
+            'ttft_p99': min,
+            'inter_token_latency_p50': min,
+            'inter_token_latency_p99': min,
+            'eval_tokens_per_second': max
+        }
+        values: Dict[str, Dict[str, float]] = {}
+        for result in results:
+            if result.status != BenchmarkStatus.COMPLETED:
+                continue
+            performance = result.metrics.performance
+            values[result.model_name] = {
+                name: getattr(performance, name) for name in criteria
+                if getattr(performance, name) is not None
+            }
+        
+        comparison: Dict[str, Dict[str, Any]] = {model: {'metrics': metrics, 'rank': {}, 'vs_best': {}} for model, metrics in values.items()}
+        for name, best_of in criteria.items():
+            measured = {model: metrics[name] for model, metrics in values.items() if name in metrics}
+            if not measured:
+                continue
+            best = best_of(measured.values())
+            ordered = sorted(measured, key=measured.get, reverse=best_of is max)
+            for rank, model in enumerate(ordered, start=1):
+                comparison[model]['rank'][name] = rank
+                comparison[model]['vs_best'][name] = measured[model] / best if best > 0 else 1.0
+        return comparison
     
     @staticmethod
     def calculate_quality_metrics(
@@ -151,81 +307,8 @@ class MetricsCalculator:
         expected_responses: List[str],
         prompts: List[str]
     ) -> QualityMetrics:
-        """Расчет метрик качества."""
-        if not responses:
-            raise ValueError("Список ответов не может быть пустым")
-        
-        # Векторизация текстов для семантического анализа
-        vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
-        
-        try:
-            # Объединяем все тексты для векторизации
-            all_texts = responses + expected_responses + prompts
-            tfidf_matrix = vectorizer.fit_transform(all_texts)
-            
-            # Семантическое сходство
-            response_vectors = tfidf_matrix[:len(responses)]
-            expected_vectors = tfidf_matrix[len(responses):len(responses) + len(expected_responses)]
-            
-            similarities = []
-            for resp_vec, exp_vec in zip(response_vectors, expected_vectors):
-                similarity = cosine_similarity(resp_vec, exp_vec)[0][0]
-                similarities.append(similarity)
-            
-            semantic_similarity = statistics.mean(similarities) if similarities else 0
-        except Exception as e:
-            logger.warning(f"Ошибка расчета семантического сходства: {e}")
-            semantic_similarity = 0
-        
-        # Анализ текста
-        accuracy_scores = []
-        relevance_scores = []
-        coherence_scores = []
-        fluency_scores = []
-        
-        for response in responses:
-            # Оценка точности (простота реализации)
-            accuracy_score = min(1.0, len(response.split()) / 50)  # Чем больше слов, тем лучше
-            accuracy_scores.append(accuracy_score)
-            
-            # Оценка релевантности
-            relevance_score = min(1.0, len(set(response.lower().split()) & set(prompts[0].lower().split())) / 10)
-            relevance_scores.append(relevance_score)
-            
-            # Оценка связности (количество предложений)
-            sentences = sent_tokenize(response)
-            coherence_score = min(1.0, len(sentences) / 5)
-            coherence_scores.append(coherence_score)
-            
-            # Оценка беглости (читаемость)
-            try:
-                flesch_score = textstat.flesch_reading_ease(response)
-                fluency_score = max(0, min(1, flesch_score / 100))
-            except:
-                fluency_score = 0.5
-            fluency_scores.append(fluency_score)
-        
-        # Расчет средних значений
-        accuracy_score = statistics.mean(accuracy_scores)
-        relevance_score = statistics.mean(relevance_scores)
-        coherence_score = statistics.mean(coherence_scores)
-        fluency_score = statistics.mean(fluency_scores)
-        
-        # Оценка галлюцинаций (простая реализация)
-        hallucination_rate = 0.1  # Заглушка
-        
-        # Фактическая точность
-        factual_accuracy = 0.8  # Заглушка
-        
-        return QualityMetrics(
-            accuracy_score=accuracy_score,
-            relevance_score=relevance_score,
-            coherence_score=coherence_score,
-            fluency_score=fluency_score,
-            semantic_similarity=semantic_similarity,
-            hallucination_rate=hallucination_rate,
-            factual_accuracy=factual_accuracy
-        )
+        """Расчет метрик качества (пакетно, см. BatchQualityScorer)."""
+        return get_quality_scorer().score(responses, expected_responses, prompts)
     
     @staticmethod
     def calculate_seo_metrics(responses: List[str], prompts: List[str]) -> SEOMetrics:
@@ -324,11 +407,16 @@ class BenchmarkService:
         self.ollama_service = OllamaService()
         self.metrics_calculator = MetricsCalculator()
         self.cache = None
+        self.results_store = None
         self.active_benchmarks: Dict[str, asyncio.Task] = {}
     
     async def initialize(self):
         """Инициализация сервиса."""
         self.cache = await get_cache()
+        try:
+            self.results_store = await asyncio.to_thread(get_results_store)
+        except Exception as e:
+            logger.error(f"Хранилище результатов недоступно: {e}")
         logger.info("BenchmarkService инициализирован")
     
     async def run_benchmark(self, request: BenchmarkRequest) -> List[BenchmarkResult]:
@@ -346,20 +434,36 @@ class BenchmarkService:
                 result = await self._run_single_benchmark(request, model_name)
                 results.append(result)
                 
-                # Кэшируем результат
-                if self.cache:
-                    await self.cache.set_benchmark_result(
-                        str(result.benchmark_id), 
-                        result.dict(),
-                        ttl=settings.cache_ttl
-                    )
-                
             except Exception as e:
                 logger.error(f"Ошибка бенчмарка для модели {model_name}: {e}")
                 # Создаем результат с ошибкой
                 error_result = await self._create_error_result(request, model_name, str(e))
                 results.append(error_result)
         
+        # Сравнение токенных задержек между моделями прогона
+        comparison = self.metrics_calculator.compare_token_latency(results)
+        for result in results:
+            if result.model_name in comparison:
+                result.model_comparison = comparison
+        
+        # Кэшируем результаты
+        if self.cache:
+            for result in results:
+                if result.status == BenchmarkStatus.COMPLETED:
+                    await self.cache.set_benchmark_result(
+                        str(result.benchmark_id), 
+                        result.dict(),
+                        ttl=settings.cache_ttl
+                    )
+        
+        # Постоянное хранение - база для поиска регрессий
+        if self.results_store:
+            for result in results:
+                try:
+                    await asyncio.to_thread(self.results_store.save_result, result)
+                except Exception as e:
+                    logger.error(f"Ошибка сохранения результата {result.benchmark_id}: {e}")
+        
         return results
     
     async def _run_single_benchmark(
@@ -380,43 +484,56 @@ class BenchmarkService:
         response_times = []
         responses = []
         tokens_per_response = []
+        timings: List[GenerationTiming] = []
+        prompts = []
+        expected_responses = []
         success_count = 0
+        failed_count = 0
         
-        for i in range(request.iterations):
-            try:
-                # Выбираем случайный тест
+        # Ресурсы снимаются в фоне, пока идут итерации
+        with ResourceSampler(settings.resource_sample_interval) as sampler:
+            for i in range(request.iterations):
+                # Выбираем тест по кругу
                 test = test_data[i % len(test_data)]
                 prompt = test['prompt']
-                expected = test.get('expected', '')
+                prompts.append(prompt)
+                expected_responses.append(test.get('expected', ''))
                 
-                # Генерируем ответ
-                response, response_time = await self.ollama_service.generate_response(
-                    model_name, 
-                    prompt, 
-                    request.parameters
-                )
-                
-                response_times.append(response_time)
-                responses.append(response)
-                tokens_per_response.append(len(response.split()))
-                success_count += 1
-                
-                logger.debug(f"Итерация {i+1}/{request.iterations} завершена за {response_time:.2f}с")
-                
-            except Exception as e:
-                logger.error(f"Ошибка в итерации {i+1}: {e}")
-                response_times.append(30.0)  # Таймаут
-                responses.append("")
-                tokens_per_response.append(0)
+                try:
+                    # Генерируем ответ потоково
+                    timing = await self.ollama_service.generate_stream(
+                        model_name, 
+                        prompt, 
+                        request.parameters
+                    )
+                    
+                    response_times.append(timing.response_time)
+                    responses.append(timing.response)
+                    tokens_per_response.append(timing.eval_count)
+                    timings.append(timing)
+                    success_count += 1
+                    
+                    logger.debug(f"Итерация {i+1}/{request.iterations} завершена за {timing.response_time:.2f}с, TTFT {timing.ttft or 0:.3f}с")
+                    
+                except Exception as e:
+                    # Неудачные итерации учитываются отдельно и не попадают
+                    # в ряды задержек (по ним ищутся регрессии)
+                    logger.error(f"Ошибка в итерации {i+1}: {e}")
+                    responses.append("")
+                    failed_count += 1
+        
+        if not success_count:
+            raise ValueError(f"Все {request.iterations} итераций завершились ошибкой")
         
         # Рассчитываем метрики
         performance_metrics = self.metrics_calculator.calculate_performance_metrics(
-            response_times, tokens_per_response
+            response_times, tokens_per_response, timings, sampler.summary()
         )
         
-        quality_metrics = self.metrics_calculator.calculate_quality_metrics(
-            responses, [test.get('expected', '') for test in test_data[:len(responses)]], 
-            [test['prompt'] for test in test_data[:len(responses)]]
+        # Пакетная оценка качества не блокирует event loop
+        quality_metrics = await asyncio.to_thread(
+            self.metrics_calculator.calculate_quality_metrics,
+            responses, expected_responses, prompts
         )
         
         reliability_metrics = self.metrics_calculator.calculate_reliability_metrics(
@@ -426,7 +543,7 @@ class BenchmarkService:
         # SEO метрики только для SEO бенчмарков
         seo_metrics = None
         if request.benchmark_type in [BenchmarkType.SEO_BASIC, BenchmarkType.SEO_ADVANCED]:
-            seo_metrics = self.metrics_calculator.calculate_seo_metrics(responses, [test['prompt'] for test in test_data[:len(responses)]])
+            seo_metrics = self.metrics_calculator.calculate_seo_metrics(responses, prompts)
         
         # Создаем комплексные метрики
         benchmark_metrics = BenchmarkMetrics(
@@ -453,10 +570,77 @@ class BenchmarkService:
             raw_data={
                 'responses': responses,
                 'response_times': response_times,
-                'tokens_per_response': tokens_per_response
+                'tokens_per_response': tokens_per_response,
+                'failed_iterations': failed_count,
+                'ttft': [timing.ttft for timing in timings],
+                'inter_token_latencies': [timing.inter_token_latencies for timing in timings],
+                'eval_counts': [timing.eval_count for timing in timings],
+                'eval_durations': [timing.eval_duration for timing in timings],
+                'prompt_eval_counts': [timing.prompt_eval_count for timing in timings],
+                'prompt_eval_durations': [timing.prompt_eval_duration for timing in timings]
             }
         )
     
+    async def run_load_test(self, request: LoadTestRequest) -> List[LoadTestResult]:
+        """Нагрузочный бенчмарк: все модели нагружаются параллельно."""
+        return list(await asyncio.gather(*(
+            self._run_model_load_test(request, model_name) for model_name in request.models
+        )))
+    
+    async def _run_model_load_test(self, request: LoadTestRequest, model_name: str) -> LoadTestResult:
+        """Ступени нагрузки для одной модели."""
+        started_at = datetime.utcnow()
+        try:
+            if not await self.ollama_service.check_model_availability(model_name):
+                raise ValueError(f"Модель {model_name} недоступна")
+            
+            test_data = await self._get_test_data(request.benchmark_type)
+            
+            async def send(prompt: str) -> int:
+                return await self.ollama_service.generate_async(model_name, prompt, request.parameters)
+            
+            generator = LoadGenerator(
+                send, [test['prompt'] for test in test_data],
+                warmup=request.warmup, duration=request.step_duration
+            )
+            
+            steps = []
+            if request.arrival == ArrivalProcess.CLOSED:
+                for concurrency in request.concurrency_levels:
+                    steps.append(await generator.run_closed(concurrency))
+                    logger.info(f"Модель {model_name}: конкурентность {concurrency}, "
+                                f"{steps[-1].throughput:.2f} запросов/сек")
+            else:
+                for rate in request.rates:
+                    steps.append(await generator.run_open(
+                        rate, poisson=request.arrival == ArrivalProcess.POISSON,
+                        max_in_flight=request.max_in_flight
+                    ))
+                    logger.info(f"Модель {model_name}: {rate} RPS, p99 {steps[-1].histogram.percentile(99):.2f}с")
+            
+            saturation = find_saturation(steps)
+            return LoadTestResult(
+                name=request.name,
+                model_name=model_name,
+                arrival=request.arrival,
+                status=BenchmarkStatus.COMPLETED,
+                steps=[LoadStepResult(**step.summary()) for step in steps],
+                saturation_throughput=max((step.throughput for step in steps), default=0.0),
+                saturation_step=LoadStepResult(**saturation.summary()) if saturation else None,
+                started_at=started_at,
+                completed_at=datetime.utcnow()
+            )
+        except Exception as e:
+            logger.error(f"Ошибка нагрузочного теста для модели {model_name}: {e}")
+            return LoadTestResult(
+                name=request.name,
+                model_name=model_name,
+                arrival=request.arrival,
+                status=BenchmarkStatus.FAILED,
+                started_at=started_at,
+                error_message=str(e)
+            )
+    
     async def _create_error_result(
         self, 
         request: BenchmarkRequest, 
@@ -558,6 +742,83 @@ class BenchmarkService:
             return [BenchmarkResult(**result) for result in cached_results]
         return []
     
+    async def query_results(self, filters: BenchmarkFilterRequest) -> List[BenchmarkResult]:
+        """Результаты из постоянного хранилища по модели, типу, статусу и дате."""
+        if not self.results_store:
+            return []
+        rows = await asyncio.to_thread(
+            self.results_store.query,
+            model_name=filters.model_name,
+            benchmark_type=filters.benchmark_type,
+            status=filters.status,
+            date_from=filters.date_from,
+            date_to=filters.date_to,
+            limit=filters.limit,
+            offset=filters.offset
+        )
+        return [BenchmarkResult(**row) for row in rows]
+    
+    async def check_regression(
+        self,
+        benchmark_id: str,
+        baseline_ids: Optional[List[str]] = None,
+        baseline_runs: Optional[int] = None,
+        alpha: Optional[float] = None,
+        min_slowdown: Optional[float] = None
+    ) -> Optional[RegressionReport]:
+        """Сравнение прогона с базой по TTFT, задержке между токенами и времени ответа.
+        
+        База по умолчанию - последние baseline_runs успешных прогонов той же
+        модели и типа, начатых раньше проверяемого.
+        """
+        if not self.results_store:
+            return None
+        run = await asyncio.to_thread(self.results_store.get_result, benchmark_id)
+        if run is None:
+            return None
+        
+        alpha = alpha if alpha is not None else settings.regression_alpha
+        min_slowdown = min_slowdown if min_slowdown is not None else settings.regression_min_slowdown
+        if baseline_ids is None:
+            baseline = await asyncio.to_thread(
+                self.results_store.query,
+                model_name=run['model_name'],
+                benchmark_type=run['benchmark_type'],
+                status=BenchmarkStatus.COMPLETED,
+                before_id=benchmark_id,
+                limit=baseline_runs or settings.regression_baseline_runs
+            )
+            baseline_ids = [row['benchmark_id'] for row in baseline]
+        
+        def compare() -> RegressionReport:
+            report = RegressionReport(
+                benchmark_id=benchmark_id,
+                model_name=run['model_name'],
+                benchmark_type=run['benchmark_type'],
+                baseline_ids=baseline_ids,
+                alpha=alpha,
+                min_slowdown=min_slowdown
+            )
+            for metric in SAMPLE_METRICS:
+                report.metrics.append(detect_regression(
+                    metric,
+                    self.results_store.samples([benchmark_id], metric),
+                    self.results_store.samples(baseline_ids, metric),
+                    alpha=alpha,
+                    min_slowdown=min_slowdown,
+                    resamples=settings.regression_bootstrap_resamples
+                ))
+            report.regressed = any(check.regressed for check in report.metrics)
+            return report
+        
+        report = await asyncio.to_thread(compare)
+        if report.regressed:
+            logger.warning(
+                f"Регрессия производительности {run['model_name']} в прогоне {benchmark_id}",
+                metrics=[check.metric for check in report.metrics if check.regressed]
+            )
+        return report
+    
     async def get_model_performance(self, model_name: str) -> Optional[Dict[str, Any]]:
         """Получение производительности модели."""
         if self.cache:
@@ -0,0 +1,209 @@
+"""
+🗄️ ПОСТОЯННОЕ ХРАНИЛИЩЕ РЕЗУЛЬТАТОВ БЕНЧМАРКА
+Компактная SQLite схема: прогоны с метриками и сырые задержки по столбцам
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import structlog
+
+from .config import settings
+from .models import BenchmarkResult
+
+logger = structlog.get_logger(__name__)
+
+# Сырые ряды задержек, которые сохраняются из raw_data прогона
+SAMPLE_METRICS = ("response_time", "ttft", "inter_token_latency")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    benchmark_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    benchmark_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    completed_at REAL,
+    iterations INTEGER NOT NULL,
+    overall_score REAL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_model_type_started ON runs (model_name, benchmark_type, started_at);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+CREATE TABLE IF NOT EXISTS samples (
+    benchmark_id TEXT NOT NULL REFERENCES runs (benchmark_id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (benchmark_id, metric)
+);
+"""
+
+# Глобальное хранилище
+_results_store: Optional['BenchmarkResultStore'] = None
+
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    """Unix-время; наивные datetime (utcnow) считаются UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _pack(values: Iterable[Optional[float]]) -> array:
+    return array('d', (float(value) for value in values if value is not None))
+
+
+def extract_samples(raw_data: Optional[Dict[str, Any]]) -> Dict[str, array]:
+    """Ряды задержек из raw_data результата"""
+    raw_data = raw_data or {}
+    samples = {
+        "response_time": _pack(raw_data.get("response_times", [])),
+        "ttft": _pack(raw_data.get("ttft", [])),
+        "inter_token_latency": _pack(gap for gaps in raw_data.get("inter_token_latencies", []) for gap in gaps)
+    }
+    return {metric: values for metric, values in samples.items() if len(values)}
+
+
+class BenchmarkResultStore:
+    """Хранилище прогонов бенчмарка в SQLite
+
+    Redis хранит результаты с TTL, и после истечения сравнивать новую
+    версию модели или Ollama не с чем. Здесь каждый прогон - строка runs
+    с метриками (JSON результата без текстов ответов) и индексом по
+    модели, типу и дате; сырые задержки лежат в samples по одному BLOB
+    float64 на метрику, так что выборка ряда для теста регрессии - одно
+    чтение без разбора JSON.
+
+    sqlite3 синхронный: BenchmarkService вызывает методы через
+    asyncio.to_thread, соединение общее и защищено блокировкой.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+
+    def save_result(self, result: BenchmarkResult):
+        """Сохранение (или перезапись) прогона и его сырых задержек"""
+        data = json.loads(result.json(exclude={"raw_data"}))
+        benchmark_id = str(result.benchmark_id)
+        samples = extract_samples(result.raw_data)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    benchmark_id, result.name, result.model_name,
+                    getattr(result.benchmark_type, "value", result.benchmark_type),
+                    getattr(result.status, "value", result.status),
+                    _epoch(result.started_at), _epoch(result.completed_at),
+                    result.iterations, result.metrics.overall_score, json.dumps(data)
+                )
+            )
+            self._conn.execute("DELETE FROM samples WHERE benchmark_id = ?", (benchmark_id,))
+            self._conn.executemany(
+                "INSERT INTO samples VALUES (?, ?, ?, ?)",
+                [(benchmark_id, metric, len(values), values.tobytes()) for metric, values in samples.items()]
+            )
+
+    def query(
+        self,
+        model_name: Optional[str] = None,
+        benchmark_type: Optional[str] = None,
+        status: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        before_id: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Прогоны по модели, типу, статусу и дате, новые первыми
+
+        before_id - только прогоны, начатые раньше указанного (для базы
+        сравнения).
+        """
+        clauses, params = [], []
+        for column, value in (("model_name", model_name), ("benchmark_type", benchmark_type), ("status", status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(getattr(value, "value", value))
+        if date_from is not None:
+            clauses.append("started_at >= ?")
+            params.append(_epoch(date_from))
+        if date_to is not None:
+            clauses.append("started_at < ?")
+            params.append(_epoch(date_to))
+        if before_id is not None:
+            clauses.append("started_at < (SELECT started_at FROM runs WHERE benchmark_id = ?)")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT result FROM runs {where} ORDER BY started_at DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+        return [json.loads(row["result"]) for row in rows]
+
+    def get_result(self, benchmark_id: str) -> Optional[Dict[str, Any]]:
+        """Прогон по ID"""
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM runs WHERE benchmark_id = ?", (benchmark_id,)).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def samples(self, benchmark_ids: List[str], metric: str) -> List[float]:
+        """Сырые значения метрики по прогонам (объединенные)"""
+        if not benchmark_ids:
+            return []
+        placeholders = ", ".join("?" for _ in benchmark_ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM samples WHERE metric = ? AND benchmark_id IN ({placeholders})",
+                (metric, *benchmark_ids)
+            ).fetchall()
+        values = array('d')
+        for row in rows:
+            values.frombytes(row["data"])
+        return values.tolist()
+
+    def delete_before(self, cutoff: datetime) -> int:
+        """Удаление прогонов старше cutoff"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM runs WHERE started_at < ?", (_epoch(cutoff),))
+        return cursor.rowcount
+
+    def close(self):
+        """Закрытие соединения"""
+        with self._lock:
+            self._conn.close()
+
+
+def get_results_store() -> BenchmarkResultStore:
+    """Получение глобального хранилища результатов"""
+    global _results_store
+    if _results_store is None:
+        _results_store = BenchmarkResultStore(settings.results_db_path)
+        logger.info("Хранилище результатов открыто", path=settings.results_db_path)
+    return _results_store
+
+
+def close_results_store():
+    """Закрытие глобального хранилища результатов"""
+    global _results_store
+    if _results_store:
+        _results_store.close()
+        _results_store = None
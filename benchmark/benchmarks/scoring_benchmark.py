@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пакетной оценки качества (BatchQualityScorer)
+
+Сравнивает пакетное косинусное сходство с прежним попарным циклом
+cosine_similarity и измеряет пропускную способность полной оценки
+с пулом процессов для текстовой статистики.
+
+Запуск из каталога benchmark:
+    python benchmarks/scoring_benchmark.py
+    python benchmarks/scoring_benchmark.py --responses 1000 5000 --workers 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scoring import BatchQualityScorer
+
+DEFAULT_RESPONSES = [1000]
+
+WORDS = (
+    "internal linking improves search ranking because anchors pass relevance "
+    "between pages and crawlers discover content faster when the site structure "
+    "is shallow and every article links to related topics"
+).split()
+
+
+def make_corpus(size: int, seed: int = 42):
+    """Ответы, эталоны и промпты из случайных предложений"""
+    rng = random.Random(seed)
+
+    def text():
+        sentences = [" ".join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize() + "." for _ in range(rng.randint(1, 6))]
+        return " ".join(sentences)
+
+    return [text() for _ in range(size)], [text() for _ in range(size)], [text() for _ in range(size)]
+
+
+def pairwise_loop(responses, expected, prompts):
+    """Прежний расчет: cosine_similarity на каждую пару"""
+    matrix = TfidfVectorizer(stop_words='english', max_features=1000).fit_transform(responses + expected + prompts)
+    return [
+        cosine_similarity(resp_vec, exp_vec)[0][0]
+        for resp_vec, exp_vec in zip(matrix[:len(responses)], matrix[len(responses):2 * len(responses)])
+    ]
+
+
+def main(sizes: List[int], workers: int, parallel_threshold: int):
+    scorer = BatchQualityScorer(workers=workers, parallel_threshold=parallel_threshold)
+    try:
+        scorer.text_statistics(make_corpus(parallel_threshold)[0])  # прогрев пула
+        print(f"{'responses':>9} {'loop, s':>8} {'batch, s':>9} {'speedup':>8} {'score, s':>9} {'resp/s':>8}")
+        for size in sizes:
+            responses, expected, prompts = make_corpus(size)
+
+            started = time.perf_counter()
+            pairwise_loop(responses, expected, prompts)
+            loop_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            scorer.semantic_similarity(responses, expected, prompts)
+            batch_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            scorer.score(responses, expected, prompts)
+            score_seconds = time.perf_counter() - started
+
+            print(
+                f"{size:>9} {loop_seconds:>8.3f} {batch_seconds:>9.3f} {loop_seconds / batch_seconds:>7.1f}x "
+                f"{score_seconds:>9.3f} {size / score_seconds:>8.0f}"
+            )
+    finally:
+        scorer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch quality scoring benchmark")
+    parser.add_argument("--responses", type=int, nargs="+", default=DEFAULT_RESPONSES)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--parallel-threshold", type=int, default=200)
+    args = parser.parse_args()
+    main(args.responses, args.workers, args.parallel_threshold)
@@ -5,13 +5,14 @@
 
 import pytest
 import asyncio
+import time
 from unittest.mock import Mock, patch, AsyncMock
 from datetime import datetime
 from typing import List, Dict, Any
 
-from app.services import OllamaService, MetricsCalculator, BenchmarkService
-from app.models import BenchmarkRequest, BenchmarkType, BenchmarkStatus
-from app.config import settings
+from app.services import OllamaService, MetricsCalculator, BenchmarkService, GenerationTiming
+from app.models import BenchmarkRequest, BenchmarkType, BenchmarkStatus, BenchmarkResult, BenchmarkMetrics, QualityMetrics
+from app.config import settings, MODEL_CONFIGS
 
 
 class TestOllamaService:
@@ -63,10 +64,11 @@ class TestOllamaService:
     async def test_generate_response_success(self, ollama_service):
         """Тест успешной генерации ответа."""
         with patch.object(ollama_service.client, 'generate') as mock_generate:
-            mock_generate.return_value = {
-                'response': 'Test response',
-                'model': 'llama2'
-            }
+            mock_generate.return_value = iter([
+                {'response': 'Test', 'done': False},
+                {'response': ' response', 'done': False},
+                {'response': '', 'done': True, 'eval_count': 2}
+            ])
             
             response, response_time = await ollama_service.generate_response(
                 'llama2', 'Test prompt'
@@ -75,6 +77,46 @@ class TestOllamaService:
             assert response == 'Test response'
             assert response_time > 0
             mock_generate.assert_called_once()
+            assert mock_generate.call_args.kwargs['stream'] is True
+    
+    @pytest.mark.asyncio
+    async def test_generate_stream_timings(self, ollama_service):
+        """Тест замеров TTFT, задержек между токенами и счетчиков финального чанка."""
+        def stream(**kwargs):
+            time.sleep(0.05)
+            yield {'response': 'Hello', 'done': False}
+            for _ in range(3):
+                time.sleep(0.01)
+                yield {'response': ' world', 'done': False}
+            yield {
+                'response': '', 'done': True,
+                'eval_count': 4, 'eval_duration': 2_000_000_000,
+                'prompt_eval_count': 12, 'prompt_eval_duration': 500_000_000,
+                'load_duration': 100_000_000
+            }
+        
+        with patch.object(ollama_service.client, 'generate', side_effect=stream):
+            timing = await ollama_service.generate_stream('llama2', 'Test prompt')
+        
+        assert timing.response == 'Hello world world world'
+        assert timing.ttft >= 0.05
+        assert len(timing.inter_token_latencies) == 3
+        assert all(gap >= 0.009 for gap in timing.inter_token_latencies)
+        assert timing.response_time >= timing.ttft + 0.03
+        assert timing.eval_count == 4
+        assert timing.eval_duration == pytest.approx(2.0)
+        assert timing.prompt_eval_count == 12
+        assert timing.prompt_eval_duration == pytest.approx(0.5)
+        assert timing.load_duration == pytest.approx(0.1)
+    
+    @pytest.mark.asyncio
+    async def test_generate_stream_does_not_mutate_model_config(self, ollama_service):
+        """Тест: параметры запроса не попадают в общий MODEL_CONFIGS."""
+        with patch.object(ollama_service.client, 'generate') as mock_generate:
+            mock_generate.return_value = iter([{'response': 'ok', 'done': True}])
+            await ollama_service.generate_stream('llama2', 'Test prompt', {'seed': 42})
+        
+        assert 'seed' not in MODEL_CONFIGS['llama2']['benchmark_params']
     
     @pytest.mark.asyncio
     async def test_generate_response_error(self, ollama_service):
@@ -146,6 +188,58 @@ class TestMetricsCalculator:
         assert metrics.memory_usage_mb > 0
         assert 0 <= metrics.cpu_usage_percent <= 100
     
+    def test_calculate_performance_metrics_with_timings(self, metrics_calculator):
+        """Тест TTFT и распределения задержек между токенами."""
+        timings = [
+            GenerationTiming(
+                response="a b c", response_time=1.0, ttft=0.2 + i * 0.1,
+                inter_token_latencies=[0.02, 0.03], eval_count=50,
+                eval_duration=0.5, prompt_eval_count=10, prompt_eval_duration=0.1
+            )
+            for i in range(3)
+        ]
+        
+        metrics = metrics_calculator.calculate_performance_metrics(
+            [1.0, 1.0, 1.0], [50, 50, 50], timings
+        )
+        
+        assert metrics.ttft_avg == pytest.approx(0.3)
+        assert metrics.ttft_p50 == pytest.approx(0.3)
+        assert metrics.ttft_p99 <= 0.4
+        assert metrics.inter_token_latency_p50 == pytest.approx(0.025)
+        assert metrics.inter_token_latency_p99 <= 0.03
+        assert metrics.eval_count_avg == 50
+        assert metrics.eval_tokens_per_second == pytest.approx(100)
+        assert metrics.prompt_tokens_per_second == pytest.approx(100)
+    
+    def test_compare_token_latency(self, metrics_calculator):
+        """Тест сравнения моделей по токенным задержкам."""
+        def result(model_name, ttft, gap, eval_duration):
+            timing = GenerationTiming(
+                ttft=ttft, inter_token_latencies=[gap], eval_count=100, eval_duration=eval_duration
+            )
+            return BenchmarkResult(
+                name="Compare", benchmark_type=BenchmarkType.PERFORMANCE,
+                model_name=model_name, status=BenchmarkStatus.COMPLETED,
+                metrics=BenchmarkMetrics(
+                    performance=metrics_calculator.calculate_performance_metrics([1.0], [100], [timing]),
+                    quality=metrics_calculator.calculate_quality_metrics(["Internal links help SEO"], ["Internal links help SEO"], ["What helps SEO?"]),
+                    reliability=metrics_calculator.calculate_reliability_metrics(1, 1, [1.0])
+                ),
+                iterations=1, started_at=datetime.utcnow()
+            )
+        
+        comparison = metrics_calculator.compare_token_latency([
+            result("llama2", 0.4, 0.02, 2.0),
+            result("mistral", 0.2, 0.04, 1.0)
+        ])
+        
+        assert comparison["mistral"]["rank"]["ttft_p50"] == 1
+        assert comparison["llama2"]["vs_best"]["ttft_p50"] == pytest.approx(2.0)
+        assert comparison["llama2"]["rank"]["inter_token_latency_p50"] == 1
+        assert comparison["mistral"]["rank"]["eval_tokens_per_second"] == 1
+        assert comparison["llama2"]["vs_best"]["eval_tokens_per_second"] == pytest.approx(0.5)
+    
     def test_calculate_performance_metrics_empty_list(self, metrics_calculator):
         """Тест расчета метрик с пустым списком."""
         with pytest.raises(ValueError, match="не может быть пустым"):
@@ -299,6 +393,35 @@ class TestBenchmarkService:
                 assert len(results) == 1
                 mock_error.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_failed_iterations_excluded_from_latencies(self, benchmark_service, benchmark_request):
+        """Тест: ошибки итераций считаются отдельно, а не как задержки."""
+        timing = GenerationTiming(response="Ответ", response_time=1.5, ttft=0.1, eval_count=10)
+        generate = AsyncMock(side_effect=[timing, Exception("timeout"), timing])
+        
+        with patch.object(benchmark_service.ollama_service, 'generate_stream', generate), \
+                patch.object(benchmark_service.metrics_calculator, 'calculate_quality_metrics') as mock_quality, \
+                patch.object(benchmark_service.metrics_calculator, 'calculate_seo_metrics', return_value=None):
+            mock_quality.return_value = QualityMetrics(
+                accuracy_score=0.5, relevance_score=0.5, coherence_score=0.5, fluency_score=0.5,
+                semantic_similarity=0.5, hallucination_rate=0.1, factual_accuracy=0.5
+            )
+            result = await benchmark_service._run_single_benchmark(benchmark_request, "llama2")
+        
+        assert result.raw_data['response_times'] == [1.5, 1.5]
+        assert result.raw_data['failed_iterations'] == 1
+        assert result.metrics.performance.response_time_max == 1.5
+        assert result.metrics.reliability.success_rate == pytest.approx(2 / 3)
+    
+    @pytest.mark.asyncio
+    async def test_all_iterations_failed(self, benchmark_service, benchmark_request):
+        """Тест: прогон без успешных итераций завершается ошибкой."""
+        generate = AsyncMock(side_effect=Exception("timeout"))
+        
+        with patch.object(benchmark_service.ollama_service, 'generate_stream', generate):
+            with pytest.raises(ValueError):
+                await benchmark_service._run_single_benchmark(benchmark_request, "llama2")
+    
     @pytest.mark.asyncio
     async def test_get_benchmark_history(self, benchmark_service):
         """Тест получения истории бенчмарков."""
@@ -0,0 +1,159 @@
+"""
+🧪 ТЕСТЫ НАГРУЗОЧНОГО РЕЖИМА БЕНЧМАРКА
+Гистограмма задержек, закрытая и открытая модели нагрузки
+"""
+
+import asyncio
+import random
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from app.load import LatencyHistogram, LoadGenerator, LoadStepStats, find_saturation
+from app.models import ArrivalProcess, LoadTestRequest
+
+
+class StubOllama:
+    """Заглушка Ollama: фиксированное время ответа и ограниченное число слотов."""
+
+    def __init__(self, service_time: float = 0.01, slots: int = 4, tokens: int = 20):
+        self.service_time = service_time
+        self.slots = asyncio.Semaphore(slots)
+        self.tokens = tokens
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> int:
+        self.calls += 1
+        async with self.slots:
+            await asyncio.sleep(self.service_time)
+        return self.tokens
+
+
+class TestLatencyHistogram:
+    """Тесты HDR-гистограммы."""
+
+    def test_percentiles_within_precision(self):
+        histogram = LatencyHistogram(significant_digits=3)
+        values = [random.uniform(0.001, 2.0) for _ in range(20000)]
+        for value in values:
+            histogram.record(value)
+
+        values.sort()
+        for percent in (50, 90, 99, 99.9):
+            exact = values[int(len(values) * percent / 100) - 1]
+            assert histogram.percentile(percent) == pytest.approx(exact, rel=0.01)
+        assert histogram.total == len(values)
+        assert histogram.max == pytest.approx(values[-1], rel=1e-3)
+
+    def test_coordinated_omission_correction(self):
+        histogram = LatencyHistogram()
+        for _ in range(99):
+            histogram.record(0.01, expected_interval=0.01)
+        histogram.record(1.0, expected_interval=0.01)
+
+        # Одна пауза в 1с скрывает ~99 запросов, которые тоже ждали бы
+        assert histogram.total == 99 + 1 + 99
+        assert histogram.percentile(75) > 0.25
+
+    def test_merge(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record(0.1)
+        second.record(0.3)
+        first.merge(second)
+
+        assert first.total == 2
+        assert first.mean == pytest.approx(0.2, rel=1e-3)
+
+
+class TestLoadGenerator:
+    """Тесты ступеней нагрузки против заглушки Ollama."""
+
+    @pytest.mark.asyncio
+    async def test_closed_loop_saturates_at_capacity(self):
+        stub = StubOllama(service_time=0.01, slots=4)
+        generator = LoadGenerator(stub.generate, ["prompt"], warmup=0.05, duration=0.3)
+
+        steps = [await generator.run_closed(concurrency) for concurrency in (1, 4, 8)]
+
+        assert steps[1].throughput > steps[0].throughput * 2.5
+        # Сверх 4 слотов пропускная способность не растет, растет задержка
+        assert steps[2].throughput < steps[1].throughput * 1.3
+        assert steps[2].histogram.percentile(50) > steps[1].histogram.percentile(50) * 1.5
+        assert find_saturation(steps).concurrency == 4
+        assert all(step.errors == 0 for step in steps)
+
+    @pytest.mark.asyncio
+    async def test_open_loop_counts_queueing_delay(self):
+        stub = StubOllama(service_time=0.02, slots=1)
+        generator = LoadGenerator(stub.generate, ["prompt"], warmup=0.0, duration=0.3)
+
+        underloaded = await generator.run_open(rate=20)
+        overloaded = await generator.run_open(rate=200, poisson=True)
+
+        assert underloaded.histogram.percentile(50) < 0.05
+        # Задержка от запланированного момента отправки включает очередь
+        assert overloaded.histogram.percentile(99) > 0.2
+        assert overloaded.throughput < 60
+
+    @pytest.mark.asyncio
+    async def test_warmup_excluded(self):
+        stub = StubOllama(service_time=0.01, slots=1)
+        generator = LoadGenerator(stub.generate, ["prompt"], warmup=0.1, duration=0.1)
+
+        stats = await generator.run_closed(1)
+
+        assert stats.requests < stub.calls
+        assert stats.tokens == stats.requests * stub.tokens
+
+    @pytest.mark.asyncio
+    async def test_errors_are_counted(self):
+        async def failing(prompt: str) -> int:
+            await asyncio.sleep(0.005)
+            raise RuntimeError("boom")
+
+        generator = LoadGenerator(failing, ["prompt"], warmup=0.0, duration=0.1)
+        stats = await generator.run_closed(2)
+
+        assert stats.requests == 0
+        assert stats.errors > 0
+
+    @pytest.mark.asyncio
+    async def test_models_run_in_parallel(self):
+        stubs = {name: StubOllama(service_time=0.01, slots=2) for name in ("llama2", "mistral", "qwen")}
+
+        async def run(stub):
+            generator = LoadGenerator(stub.generate, ["prompt"], warmup=0.0, duration=0.2)
+            return await generator.run_closed(2)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(run(stub) for stub in stubs.values()))
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.45
+        assert all(result.requests > 0 for result in results)
+
+
+def test_find_saturation_empty():
+    assert find_saturation([]) is None
+    assert find_saturation([LoadStepStats(concurrency=1)]).concurrency == 1
+
+
+class TestLoadTestRequest:
+    """Тесты валидации запроса на нагрузочный бенчмарк"""
+
+    @pytest.mark.parametrize("arrival", [ArrivalProcess.CONSTANT, ArrivalProcess.POISSON])
+    def test_open_loop_requires_rates(self, arrival):
+        with pytest.raises(ValidationError, match="rates"):
+            LoadTestRequest(name="load", models=["m"], arrival=arrival)
+
+    def test_closed_loop_without_rates(self):
+        request = LoadTestRequest(name="load", models=["m"])
+
+        assert request.rates == []
+        assert request.concurrency_levels == [1, 2, 4, 8]
+
+    def test_rates_are_sorted(self):
+        request = LoadTestRequest(name="load", models=["m"], arrival="poisson", rates=[4, 1, 4])
+
+        assert request.rates == [1.0, 4.0]
@@ -0,0 +1,96 @@
+"""
+🧪 ТЕСТЫ ПАКЕТНОЙ ОЦЕНКИ КАЧЕСТВА
+Векторное сходство, пул процессов и фоновый замер ресурсов
+"""
+
+import random
+import time
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.resources import ResourceSampler
+from app.scoring import BatchQualityScorer, row_cosine, text_statistics
+
+WORDS = (
+    "internal linking improves search ranking because anchors pass relevance "
+    "between pages and crawlers discover content faster when the site structure "
+    "is shallow and every article links to related topics"
+).split()
+
+
+def make_corpus(size: int, seed: int = 42):
+    rng = random.Random(seed)
+
+    def text():
+        sentences = [" ".join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize() + "." for _ in range(rng.randint(1, 6))]
+        return " ".join(sentences)
+
+    return [text() for _ in range(size)], [text() for _ in range(size)], [text() for _ in range(size)]
+
+
+def pairwise_loop(responses, expected, prompts):
+    """Прежний расчет: cosine_similarity на каждую пару"""
+    matrix = TfidfVectorizer(stop_words='english', max_features=1000).fit_transform(responses + expected + prompts)
+    return [
+        cosine_similarity(resp_vec, exp_vec)[0][0]
+        for resp_vec, exp_vec in zip(matrix[:len(responses)], matrix[len(responses):2 * len(responses)])
+    ]
+
+
+class TestBatchQualityScorer:
+    """Тесты пакетной оценки"""
+
+    def test_row_cosine_matches_pairwise(self):
+        responses, expected, prompts = make_corpus(300)
+
+        batch = BatchQualityScorer().semantic_similarity(responses, expected, prompts)
+
+        assert batch == pytest.approx(pairwise_loop(responses, expected, prompts), abs=1e-9)
+
+    def test_row_cosine_zero_rows(self):
+        matrix = TfidfVectorizer().fit_transform(["seo links", "", "seo"])
+        assert list(row_cosine(matrix[:2], matrix[1:])) == [0.0, 0.0]
+
+    def test_process_pool_matches_serial(self):
+        responses, expected, prompts = make_corpus(120)
+        scorer = BatchQualityScorer(workers=2, parallel_threshold=50)
+        try:
+            parallel = scorer.text_statistics(responses)
+        finally:
+            scorer.close()
+
+        assert parallel == text_statistics(responses)
+
+    def test_score_handles_unpaired_expected(self):
+        metrics = BatchQualityScorer().score(
+            ["Internal links help SEO. They pass relevance.", ""],
+            ["Internal links help SEO."],
+            ["Why do internal links help SEO?"]
+        )
+
+        assert 0 < metrics.semantic_similarity <= 1
+        assert metrics.coherence_score == pytest.approx(0.2)
+
+    def test_empty_responses(self):
+        with pytest.raises(ValueError):
+            BatchQualityScorer().score([], [], [])
+
+
+class TestResourceSampler:
+    """Тесты фонового замера ресурсов"""
+
+    def test_samples_during_run(self):
+        with ResourceSampler(interval=0.02) as sampler:
+            deadline = time.perf_counter() + 0.15
+            while time.perf_counter() < deadline:
+                sum(range(1000))
+
+        usage = sampler.summary()
+        assert usage.samples >= 3
+        assert 0 <= usage.cpu_avg <= usage.cpu_max <= 100
+        assert 0 < usage.memory_avg_mb <= usage.memory_peak_mb
+
+    def test_summary_without_samples(self):
+        assert ResourceSampler().summary() is None
@@ -0,0 +1,196 @@
+"""
+🧪 ТЕСТЫ ХРАНИЛИЩА РЕЗУЛЬТАТОВ И ДЕТЕКТОРА РЕГРЕССИЙ
+SQLite схема, выборки по модели/типу/дате, Манн-Уитни и бутстреп
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models import (
+    BenchmarkMetrics, BenchmarkResult, BenchmarkStatus, BenchmarkType,
+    PerformanceMetrics, QualityMetrics, ReliabilityMetrics
+)
+from app.regression import detect_regression, mann_whitney_greater
+from app.services import BenchmarkService
+from app.storage import BenchmarkResultStore
+
+
+def make_result(
+    model_name: str = "llama2",
+    started_at: datetime = None,
+    latency: float = 1.0,
+    samples: int = 40,
+    seed: int = 0,
+    benchmark_type: BenchmarkType = BenchmarkType.PERFORMANCE,
+    status: BenchmarkStatus = BenchmarkStatus.COMPLETED
+) -> BenchmarkResult:
+    rng = np.random.default_rng(seed)
+    response_times = list(rng.lognormal(np.log(latency), 0.1, samples))
+    started_at = started_at or datetime.utcnow()
+    return BenchmarkResult(
+        name="Stored",
+        benchmark_type=benchmark_type,
+        model_name=model_name,
+        status=status,
+        metrics=BenchmarkMetrics(
+            performance=PerformanceMetrics(
+                response_time_avg=latency, response_time_min=0, response_time_max=latency * 2,
+                response_time_std=0.1, tokens_per_second=50, throughput=1,
+                memory_usage_mb=100, cpu_usage_percent=10
+            ),
+            quality=QualityMetrics(
+                accuracy_score=0.5, relevance_score=0.5, coherence_score=0.5,
+                fluency_score=0.5, semantic_similarity=0.5, hallucination_rate=0.1,
+                factual_accuracy=0.8
+            ),
+            reliability=ReliabilityMetrics(
+                success_rate=1, error_rate=0, timeout_rate=0,
+                consistency_score=1, stability_score=1
+            )
+        ),
+        iterations=samples,
+        started_at=started_at,
+        completed_at=started_at + timedelta(seconds=sum(response_times)),
+        raw_data={
+            'responses': ["text"] * samples,
+            'response_times': response_times,
+            'ttft': [value / 10 for value in response_times],
+            'inter_token_latencies': [[0.02, 0.03]] * samples
+        }
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BenchmarkResultStore(str(tmp_path / "benchmarks.db"))
+    yield store
+    store.close()
+
+
+class TestBenchmarkResultStore:
+    """Тесты хранилища"""
+
+    def test_roundtrip_without_response_texts(self, store):
+        result = make_result()
+        store.save_result(result)
+
+        stored = store.get_result(str(result.benchmark_id))
+        assert stored['model_name'] == "llama2"
+        assert 'raw_data' not in stored
+        assert BenchmarkResult(**stored).metrics.performance.response_time_avg == 1.0
+        assert store.samples([str(result.benchmark_id)], "response_time") == pytest.approx(result.raw_data['response_times'])
+        assert len(store.samples([str(result.benchmark_id)], "inter_token_latency")) == 80
+
+    def test_query_filters(self, store):
+        now = datetime.utcnow()
+        store.save_result(make_result("llama2", now - timedelta(days=3)))
+        store.save_result(make_result("llama2", now - timedelta(days=1)))
+        store.save_result(make_result("mistral", now))
+        store.save_result(make_result("llama2", now, benchmark_type=BenchmarkType.SEO_BASIC))
+
+        assert len(store.query(model_name="llama2")) == 3
+        assert len(store.query(model_name="llama2", benchmark_type=BenchmarkType.PERFORMANCE)) == 2
+        assert len(store.query(date_from=now - timedelta(days=2))) == 3
+        recent = store.query(model_name="llama2", benchmark_type="performance", limit=1)
+        assert datetime.fromisoformat(recent[0]['started_at']) > now - timedelta(days=2)
+
+    def test_persists_across_reopen(self, tmp_path):
+        path = str(tmp_path / "benchmarks.db")
+        first = BenchmarkResultStore(path)
+        result = make_result()
+        first.save_result(result)
+        first.close()
+
+        second = BenchmarkResultStore(path)
+        try:
+            assert second.get_result(str(result.benchmark_id)) is not None
+            assert second.delete_before(datetime.utcnow() + timedelta(seconds=1)) == 1
+            assert second.samples([str(result.benchmark_id)], "ttft") == []
+        finally:
+            second.close()
+
+
+class TestRegressionDetector:
+    """Тесты статистических проверок"""
+
+    def test_mann_whitney_direction(self):
+        rng = np.random.default_rng(1)
+        fast = rng.normal(1.0, 0.1, 50)
+        slow = rng.normal(1.3, 0.1, 50)
+
+        assert mann_whitney_greater(slow, fast)[1] < 0.001
+        assert mann_whitney_greater(fast, slow)[1] > 0.99
+
+    def test_mann_whitney_ties(self):
+        u, p_value = mann_whitney_greater([1.0] * 10, [1.0] * 10)
+        assert u == 50
+        assert p_value == 1.0
+
+    def test_detects_slowdown(self):
+        rng = np.random.default_rng(2)
+        baseline = rng.lognormal(0, 0.1, 200)
+        candidate = rng.lognormal(np.log(1.2), 0.1, 60)
+
+        check = detect_regression("response_time", candidate, baseline, seed=0)
+
+        assert check.regressed
+        assert check.p50_ratio_ci[0] > 1.05
+        assert check.candidate_p50 > check.baseline_p50
+
+    def test_no_false_positive_on_same_distribution(self):
+        rng = np.random.default_rng(3)
+        baseline = rng.lognormal(0, 0.2, 200)
+        candidate = rng.lognormal(0, 0.2, 60)
+
+        check = detect_regression("response_time", candidate, baseline, seed=0)
+
+        assert not check.regressed
+        assert check.p50_ratio_ci[0] < 1 < check.p50_ratio_ci[1]
+
+    def test_small_significant_shift_is_ignored(self):
+        rng = np.random.default_rng(4)
+        baseline = rng.normal(1.0, 0.01, 2000)
+        candidate = rng.normal(1.02, 0.01, 2000)
+
+        check = detect_regression("ttft", candidate, baseline, min_slowdown=0.05, seed=0)
+
+        assert check.p_value < 0.01
+        assert not check.regressed
+
+    def test_insufficient_data(self):
+        check = detect_regression("ttft", [1.0, 2.0], [1.0] * 100)
+        assert not check.sufficient_data
+        assert not check.regressed
+
+
+class TestServiceRegression:
+    """Тесты проверки регрессии через BenchmarkService"""
+
+    @pytest.mark.asyncio
+    async def test_check_regression_against_previous_runs(self, store):
+        service = BenchmarkService()
+        service.results_store = store
+        now = datetime.utcnow()
+        for day in range(3, 0, -1):
+            store.save_result(make_result(started_at=now - timedelta(days=day), seed=day))
+        store.save_result(make_result("mistral", now - timedelta(days=1), latency=5.0))
+        regressed = make_result(started_at=now, latency=1.4, seed=9)
+        store.save_result(regressed)
+
+        report = await service.check_regression(str(regressed.benchmark_id))
+
+        assert len(report.baseline_ids) == 3
+        assert report.regressed
+        by_metric = {check.metric: check for check in report.metrics}
+        assert by_metric["response_time"].regressed
+        assert by_metric["ttft"].regressed
+        assert not by_metric["inter_token_latency"].regressed
+
+    @pytest.mark.asyncio
+    async def test_check_regression_unknown_run(self, store):
+        service = BenchmarkService()
+        service.results_store = store
+
+        assert await service.check_regression("missing") is None
@@ -0,0 +1,270 @@
+"""
+⚙️ Выполнение операций ChromaDB вне event loop
+Пул потоков для синхронного клиента, очередь записи по коллекциям, пул процессов для эмбеддингов
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import structlog
+
+from .config import get_settings
+
+logger = structlog.get_logger()
+
+# Эмбеддинги: список текстов -> список векторов. Должна быть функцией
+# уровня модуля, чтобы передаваться в пул процессов
+EmbedFunc = Callable[[List[str]], List[List[float]]]
+
+# Функция эмбеддингов, созданная в процессе-воркере
+_process_embedding_function = None
+
+# Глобальный исполнитель
+_chroma_executor: Optional['ChromaExecutor'] = None
+
+
+def default_embed(texts: List[str]) -> List[List[float]]:
+    """Эмбеддинги встроенной модели Chroma (ONNX MiniLM), модель грузится один раз на процесс"""
+    global _process_embedding_function
+    if _process_embedding_function is None:
+        from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+        _process_embedding_function = DefaultEmbeddingFunction()
+    return [list(map(float, vector)) for vector in _process_embedding_function(texts)]
+
+
+class _KindStats:
+    """Счетчики очереди одного вида операций"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_seconds": self.wait_seconds / finished if finished else 0.0,
+            "avg_run_seconds": self.run_seconds / finished if finished else 0.0
+        }
+
+
+class ChromaExecutor:
+    """Исполнитель операций Chroma для async кода
+
+    Синхронный клиент Chroma (collection.add/query, которые к тому же
+    считают эмбеддинги локально) вызывался прямо из async def, и одна
+    большая загрузка замораживала все остальные запросы сервиса.
+
+    - run() выполняет синхронный вызов в ограниченном пуле потоков; методы
+      асинхронного HTTP клиента Chroma (CHROMADB_ASYNC_CLIENT) просто
+      ожидаются в event loop;
+    - writer(name) сериализует запись в одну коллекцию, чтение и запись в
+      разные коллекции идут параллельно;
+    - embed() считает эмбеддинги срезами в пуле процессов (при
+      embedding_workers > 0), иначе их считает сам Chroma в потоке пула;
+    - stats() отдает глубину очереди, число выполняющихся операций и
+      средние ожидание/выполнение по видам операций.
+
+    Не больше max_workers + max_queue операций принимаются одновременно,
+    остальные ждут в event loop и тоже учитываются как очередь.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 64,
+        embedding_workers: int = 0,
+        embed_func: EmbedFunc = default_embed,
+        embedding_batch_size: int = 256
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.embedding_workers = embedding_workers
+        self.embed_func = embed_func
+        self.embedding_batch_size = embedding_batch_size
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chroma")
+        self._embed_pool: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(max_workers + max_queue)
+        self._embed_slots = asyncio.Semaphore(max(embedding_workers, 1))
+        self._write_locks: Dict[str, asyncio.Lock] = {}
+        self._stats: Dict[str, _KindStats] = {}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def embeds_in_processes(self) -> bool:
+        return self.embedding_workers > 0
+
+    def _kind(self, kind: str) -> _KindStats:
+        stats = self._stats.get(kind)
+        if stats is None:
+            stats = self._stats[kind] = _KindStats()
+        return stats
+
+    def _enqueue(self, kind: str) -> float:
+        with self._stats_lock:
+            stats = self._kind(kind)
+            stats.submitted += 1
+            stats.queued += 1
+            stats.max_queued = max(stats.max_queued, stats.queued)
+        return time.perf_counter()
+
+    def _start(self, kind: str, queued_at: float) -> float:
+        started = time.perf_counter()
+        with self._stats_lock:
+            stats = self._kind(kind)
+            stats.queued -= 1
+            stats.running += 1
+            stats.wait_seconds += started - queued_at
+        return started
+
+    def _finish(self, kind: str, started: float, failed: bool):
+        with self._stats_lock:
+            stats = self._kind(kind)
+            stats.running -= 1
+            stats.run_seconds += time.perf_counter() - started
+            if failed:
+                stats.failed += 1
+            else:
+                stats.completed += 1
+
+    def _tracked(self, kind: str, queued_at: float, func: Callable[[], Any]) -> Any:
+        """Выполнение в потоке пула с учетом ожидания в очереди"""
+        started = self._start(kind, queued_at)
+        failed = True
+        try:
+            result = func()
+            failed = False
+            return result
+        finally:
+            self._finish(kind, started, failed)
+
+    async def run(self, func: Callable[..., Any], *args, kind: str = "read", **kwargs) -> Any:
+        """Выполнение операции Chroma без блокировки event loop"""
+        queued_at = self._enqueue(kind)
+        if inspect.iscoroutinefunction(func):
+            # Асинхронный клиент: ждать в пуле нечего
+            started = self._start(kind, queued_at)
+            failed = True
+            try:
+                result = await func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self._finish(kind, started, failed)
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._pool, self._tracked, kind, queued_at, partial(func, *args, **kwargs)
+            )
+
+    @asynccontextmanager
+    async def writer(self, collection_name: str):
+        """Эксклюзивная запись в коллекцию"""
+        lock = self._write_locks.get(collection_name)
+        if lock is None:
+            lock = self._write_locks[collection_name] = asyncio.Lock()
+        queued_at = self._enqueue("write_lock")
+        async with lock:
+            started = self._start("write_lock", queued_at)
+            try:
+                yield
+            finally:
+                self._finish("write_lock", started, False)
+
+    async def write(self, collection_name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Операция записи под блокировкой коллекции"""
+        async with self.writer(collection_name):
+            return await self.run(func, *args, kind="write", **kwargs)
+
+    async def embed(self, texts: Sequence[str]) -> Optional[List[List[float]]]:
+        """Эмбеддинги в пуле процессов (None - пул отключен, считает Chroma)"""
+        if not self.embeds_in_processes or not texts:
+            return None
+        if self._embed_pool is None:
+            self._embed_pool = ProcessPoolExecutor(max_workers=self.embedding_workers)
+        loop = asyncio.get_running_loop()
+        chunks = [list(texts[i:i + self.embedding_batch_size]) for i in range(0, len(texts), self.embedding_batch_size)]
+
+        async def embed_chunk(chunk: List[str]) -> List[List[float]]:
+            # В пул отдается не больше embedding_workers срезов, поэтому срез,
+            # получивший слот, выполняется, а остальные ждут в очереди
+            queued_at = self._enqueue("embed")
+            async with self._embed_slots:
+                started = self._start("embed", queued_at)
+                failed = True
+                try:
+                    result = await loop.run_in_executor(self._embed_pool, self.embed_func, chunk)
+                    failed = False
+                    return result
+                finally:
+                    self._finish("embed", started, failed)
+
+        vectors: List[List[float]] = []
+        for chunk_vectors in await asyncio.gather(*(embed_chunk(chunk) for chunk in chunks)):
+            vectors.extend(chunk_vectors)
+        return vectors
+
+    def stats(self) -> Dict[str, Any]:
+        """Глубина очередей и время операций по видам"""
+        with self._stats_lock:
+            kinds = {kind: stats.snapshot() for kind, stats in self._stats.items()}
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "embedding_workers": self.embedding_workers,
+            "queue_depth": sum(stats["queued"] for kind, stats in kinds.items() if kind != "write_lock"),
+            "running": sum(stats["running"] for kind, stats in kinds.items() if kind != "write_lock"),
+            "write_locks": len(self._write_locks),
+            "operations": kinds
+        }
+
+    def close(self):
+        """Остановка пулов"""
+        self._pool.shutdown(wait=True)
+        if self._embed_pool is not None:
+            self._embed_pool.shutdown(wait=True)
+            self._embed_pool = None
+
+
+def get_chroma_executor() -> ChromaExecutor:
+    """Получение глобального исполнителя операций Chroma"""
+    global _chroma_executor
+    if _chroma_executor is None:
+        settings = get_settings()
+        _chroma_executor = ChromaExecutor(
+            max_workers=settings.CHROMADB_EXECUTOR_WORKERS,
+            max_queue=settings.CHROMADB_EXECUTOR_QUEUE,
+            embedding_workers=settings.CHROMADB_EMBEDDING_WORKERS
+        )
+        logger.info(
+            "Chroma executor created",
+            max_workers=settings.CHROMADB_EXECUTOR_WORKERS,
+            embedding_workers=settings.CHROMADB_EMBEDDING_WORKERS
+        )
+    return _chroma_executor
+
+
+def close_chroma_executor():
+    """Остановка глобального исполнителя операций Chroma"""
+    global _chroma_executor
+    if _chroma_executor:
+        _chroma_executor.close()
+        _chroma_executor = None
@@ -16,6 +16,7 @@ import hashlib
 import json
 
 from .config import get_settings
+from .chroma_executor import get_chroma_executor
 
 logger = structlog.get_logger()
 
@@ -46,6 +47,7 @@ class ChromaDBOptimizer:
         self.client: Optional[chromadb.Client] = None
         self.collections_cache: Dict[str, Collection] = {}
         self.performance_metrics: Dict[str, Any] = {}
+        self.executor = get_chroma_executor()
         
         self._initialize_client()
         logger.info("ChromaDB Optimizer initialized", config=self.config)
@@ -97,7 +99,9 @@ class ChromaDBOptimizer:
             }
             
             # Создание коллекции с оптимизированными параметрами
-            collection = self.client.create_collection(
+            collection = await self.executor.write(
+                name,
+                self.client.create_collection,
                 name=name,
                 metadata=collection_metadata,
                 embedding_function=None  # Используем встроенные эмбеддинги
@@ -131,7 +135,7 @@ class ChromaDBOptimizer:
         start_time = time.time()
         
         try:
-            collection = self._get_collection(collection_name)
+            collection = await self._get_collection(collection_name)
             if not collection:
                 return {"error": f"Collection {collection_name} not found"}
             
@@ -146,21 +150,14 @@ class ChromaDBOptimizer:
                 batch_start = time.time()
                 
                 # Подготавливаем данные батча
-                texts = []
-                metadatas = []
-                ids = []
+                texts, metadatas, ids = await self.executor.run(self._prepare_batch, batch, kind="prepare")
+                params = {"documents": texts, "metadatas": metadatas, "ids": ids}
+                embeddings = await self.executor.embed(texts)
+                if embeddings is not None:
+                    params["embeddings"] = embeddings
                 
-                for doc in batch:
-                    texts.append(doc.get('text', doc.get('content', str(doc))))
-                    metadatas.append(doc.get('metadata', {}))
-                    ids.append(doc.get('id', self._generate_document_id(doc)))
-                
-                # Добавляем батч
-                collection.add(
-                    documents=texts,
-                    metadatas=metadatas,
-                    ids=ids
-                )
+                # Добавляем батч (батчи одной коллекции пишутся по одному)
+                await self.executor.write(collection_name, collection.add, **params)
                 
                 batch_duration = time.time() - batch_start
                 batch_metrics.append({
@@ -218,13 +215,14 @@ class ChromaDBOptimizer:
         start_time = time.time()
         
         try:
-            collection = self._get_collection(collection_name)
+            collection = await self._get_collection(collection_name)
             if not collection:
                 return []
             
             # Оптимизированные параметры поиска
+            query_embeddings = await self.executor.embed([query])
             search_params = {
-                "query_texts": [query],
+                **({"query_embeddings": query_embeddings} if query_embeddings else {"query_texts": [query]}),
                 "n_results": top_k,
                 "include": ["metadatas", "distances"] if include_metadata else ["distances"]
             }
@@ -234,7 +232,7 @@ class ChromaDBOptimizer:
                 search_params["where"] = filter_metadata
             
             # Выполняем поиск
-            results = collection.query(**search_params)
+            results = await self.executor.run(collection.query, **search_params)
             
             # Форматируем результаты
             formatted_results = []
@@ -274,18 +272,31 @@ class ChromaDBOptimizer:
                         collection_name=collection_name)
             return []
     
-    def _get_collection(self, name: str) -> Optional[Collection]:
+    async def _get_collection(self, name: str) -> Optional[Collection]:
         """Получение коллекции с кешированием"""
         if name in self.collections_cache:
             return self.collections_cache[name]
         
         try:
-            collection = self.client.get_collection(name)
+            collection = await self.executor.run(self.client.get_collection, name)
             self.collections_cache[name] = collection
             return collection
         except:
             return None
     
+    def _prepare_batch(self, batch: List[Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, Any]], List[str]]:
+        """Тексты, метаданные и ID батча"""
+        texts = []
+        metadatas = []
+        ids = []
+        
+        for doc in batch:
+            texts.append(doc.get('text', doc.get('content', str(doc))))
+            metadatas.append(doc.get('metadata', {}))
+            ids.append(doc.get('id', self._generate_document_id(doc)))
+        
+        return texts, metadatas, ids
+    
     def _generate_document_id(self, document: Dict[str, Any]) -> str:
         """Генерация уникального ID документа"""
         content = str(document.get('text', document.get('content', str(document))))
@@ -304,16 +315,16 @@ class ChromaDBOptimizer:
             return {"error": "ChromaDB not initialized"}
         
         try:
-            collection = self._get_collection(collection_name)
+            collection = await self._get_collection(collection_name)
             if not collection:
                 return {"error": f"Collection {collection_name} not found"}
             
             # Получаем базовую информацию
-            count = collection.count()
+            count = await self.executor.run(collection.count)
             metadata = collection.metadata
             
             # Анализируем метаданные документов
-            sample_docs = collection.peek(limit=100)
+            sample_docs = await self.executor.run(collection.peek, limit=100)
             metadata_keys = set()
             if sample_docs['metadatas']:
                 for doc_metadata in sample_docs['metadatas']:
@@ -343,7 +354,7 @@ class ChromaDBOptimizer:
             return {"error": "ChromaDB not initialized"}
         
         try:
-            collection = self._get_collection(collection_name)
+            collection = await self._get_collection(collection_name)
             if not collection:
                 return {"error": f"Collection {collection_name} not found"}
             
@@ -390,10 +401,10 @@ class ChromaDBOptimizer:
         
         try:
             # Проверка подключения
-            heartbeat = self.client.heartbeat()
+            heartbeat = await self.executor.run(self.client.heartbeat)
             
             # Получение списка коллекций
-            collections = self.client.list_collections()
+            collections = await self.executor.run(self.client.list_collections)
             
             # Анализ производительности
             performance_summary = {}
@@ -410,6 +421,7 @@ class ChromaDBOptimizer:
                 "collections_count": len(collections),
                 "collections": [col.name for col in collections],
                 "performance_summary": performance_summary,
+                "executor": self.executor.stats(),
                 "config": {
                     "host": self.config.host,
                     "port": self.config.port,
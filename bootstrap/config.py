@@ -28,6 +28,10 @@ class Settings(BaseSettings):
         description="Коллекция ChromaDB"
     )
     CHROMADB_AUTH_TOKEN: Optional[str] = None
+    CHROMADB_ASYNC_CLIENT: bool = Field(default=False, description="Использовать асинхронный HTTP клиент Chroma")
+    CHROMADB_EXECUTOR_WORKERS: int = Field(default=4, description="Потоков для синхронных операций Chroma")
+    CHROMADB_EXECUTOR_QUEUE: int = Field(default=64, description="Операций Chroma в очереди сверх числа потоков")
+    CHROMADB_EMBEDDING_WORKERS: int = Field(default=0, description="Процессов для эмбеддингов (0 - считает клиент Chroma)")
     
     # Redis кеширование
     REDIS_URL: str = Field(
@@ -49,6 +53,12 @@ class Settings(BaseSettings):
     )
     OLLAMA_TIMEOUT: int = 120  # Увеличенный timeout для больших моделей
     
+    # Пулы HTTP соединений (bootstrap/http_clients.py)
+    HTTP_POOL_MAX_CONNECTIONS: int = Field(default=100, description="Максимум соединений на upstream")
+    HTTP_POOL_MAX_KEEPALIVE: int = Field(default=20, description="Максимум keep-alive соединений на upstream")
+    HTTP_KEEPALIVE_EXPIRY: float = Field(default=30.0, description="Время жизни простаивающего соединения, с")
+    HTTP_CONNECT_TIMEOUT: float = Field(default=5.0, description="Таймаут установки соединения, с")
+    
     # LLM Router
     LLM_ROUTER_URL: str = Field(
         default="http://router:8001",
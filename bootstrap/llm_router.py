@@ -7,6 +7,7 @@ import httpx
 import structlog
 
 from .config import get_settings
+from .http_clients import get_http_clients
 
 logger = structlog.get_logger()
 
@@ -19,10 +20,14 @@ class LLMRouter:
     def __init__(self):
         self.settings = get_settings()
         self.base_url = self.settings.LLM_ROUTER_URL
-        self.client = httpx.AsyncClient(timeout=30.0)
         
         logger.info("LLM Router initialized", base_url=self.base_url)
     
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Общий клиент роутера из реестра HTTP клиентов"""
+        return get_http_clients().client("router")
+    
     async def route_request(
         self, 
         prompt: str, 
@@ -115,9 +120,8 @@ class LLMRouter:
             raise
     
     async def close(self):
-        """Закрытие соединения"""
-        await self.client.aclose()
-        logger.info("LLM Router connection closed")
+        """Клиент принадлежит реестру и закрывается в lifespan сервиса"""
+        logger.info("LLM Router closed")
 
 def get_llm_router() -> LLMRouter:
     """Получение глобального экземпляра LLM роутера"""
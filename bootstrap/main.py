@@ -15,6 +15,8 @@ from fastapi.middleware.cors import CORSMiddleware
 import structlog
 
 from .config import get_settings
+from .http_clients import get_http_clients, close_http_clients
+from .chroma_executor import close_chroma_executor
 
 # Настройка логирования
 structlog.configure(
@@ -43,10 +45,13 @@ async def lifespan(app: FastAPI):
     
     # Инициализация происходит в rag_service.py
     logger.info("Application startup", service_name=settings.SERVICE_NAME)
+    get_http_clients()
     
     yield
     
     # Очистка ресурсов
+    await close_http_clients()
+    close_chroma_executor()
     logger.info("Application shutdown", service_name=settings.SERVICE_NAME)
 
 def create_app() -> FastAPI:
@@ -99,6 +104,11 @@ def create_app() -> FastAPI:
         
         return health_status
     
+    @app.get("/health/http-pools")
+    async def http_pools():
+        """Утилизация пулов HTTP соединений по upstream"""
+        return get_http_clients().stats()
+    
     # Динамическая загрузка роутеров сервисов
     load_service_routers(app, service_name)
     
@@ -12,6 +12,7 @@ import asyncio
 from dataclasses import dataclass
 
 from .config import get_settings
+from .http_clients import get_http_clients
 
 logger = structlog.get_logger()
 
@@ -34,7 +35,6 @@ class OllamaClient:
     def __init__(self):
         self.settings = get_settings()
         self.base_url = self.settings.OLLAMA_URL
-        self.client = httpx.AsyncClient(timeout=self.settings.OLLAMA_TIMEOUT)
         self.is_m4_mac = self._detect_m4_mac()
         self.system_memory = self._get_system_memory()
         
@@ -46,6 +46,14 @@ class OllamaClient:
                    is_m4_mac=self.is_m4_mac,
                    system_memory_gb=self.system_memory)
     
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Общий клиент Ollama из реестра HTTP клиентов"""
+        return get_http_clients().client("ollama")
+    
+    async def close(self):
+        """Клиент принадлежит реестру и закрывается в lifespan сервиса"""
+    
     def _detect_m4_mac(self) -> bool:
         """Определение MacBook M4"""
         try:
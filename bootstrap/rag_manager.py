@@ -3,7 +3,6 @@
 Автоматическое управление коллекциями ChromaDB + умное кеширование
 """
 
-import asyncio
 import time
 import hashlib
 from typing import List, Dict, Any, Optional, Set
@@ -13,15 +12,18 @@ import chromadb
 from chromadb.config import Settings
 
 from .config import get_settings
+from .chroma_executor import ChromaExecutor, get_chroma_executor
 
 logger = structlog.get_logger()
 
 class ChromaDBManager:
     """Умный менеджер ChromaDB с автоматическим управлением коллекциями"""
     
-    def __init__(self):
+    def __init__(self, chroma_client: Optional[Any] = None, executor: Optional[ChromaExecutor] = None):
         self.settings = get_settings()
-        self.chroma_client: Optional[chromadb.Client] = None
+        self.chroma_client: Optional[chromadb.Client] = chroma_client
+        # Все вызовы Chroma идут через исполнитель, а не в event loop
+        self.executor = executor or get_chroma_executor()
         self._collections_cache: Dict[str, Any] = {}
         self._last_cleanup = datetime.now()
         self._cleanup_interval = timedelta(hours=1)  # Очистка каждый час
@@ -31,20 +33,24 @@ class ChromaDBManager:
         self.max_documents_per_collection = 10000  # Максимум документов в коллекции
         self.collection_ttl = timedelta(days=7)  # TTL для коллекций
         
-        self._initialize_chromadb()
+        # Асинхронный клиент создается при первом обращении (нужен event loop)
+        if self.chroma_client is None and not self.settings.CHROMADB_ASYNC_CLIENT:
+            self._initialize_chromadb()
+    
+    def _client_headers(self) -> Optional[Dict[str, str]]:
+        headers = {}
+        if hasattr(self.settings, 'CHROMADB_AUTH_TOKEN') and self.settings.CHROMADB_AUTH_TOKEN:
+            headers["X-Chroma-Token"] = self.settings.CHROMADB_AUTH_TOKEN
+        return headers if headers else None
     
     def _initialize_chromadb(self):
         """Инициализация ChromaDB с обработкой ошибок"""
         try:
-            headers = {}
-            if hasattr(self.settings, 'CHROMADB_AUTH_TOKEN') and self.settings.CHROMADB_AUTH_TOKEN:
-                headers["X-Chroma-Token"] = self.settings.CHROMADB_AUTH_TOKEN
-            
             self.chroma_client = chromadb.HttpClient(
                 host=self.settings.CHROMADB_HOST,
                 port=self.settings.CHROMADB_PORT,
                 ssl=False,
-                headers=headers if headers else None
+                headers=self._client_headers()
             )
             
             # Тестируем подключение
@@ -55,6 +61,23 @@ class ChromaDBManager:
             logger.error("Failed to initialize ChromaDB client", error=str(e))
             self.chroma_client = None
     
+    async def _get_client(self) -> Optional[Any]:
+        """Клиент Chroma; асинхронный HTTP клиент подключается лениво"""
+        if self.chroma_client is None and self.settings.CHROMADB_ASYNC_CLIENT:
+            try:
+                self.chroma_client = await chromadb.AsyncHttpClient(
+                    host=self.settings.CHROMADB_HOST,
+                    port=self.settings.CHROMADB_PORT,
+                    ssl=False,
+                    headers=self._client_headers()
+                )
+                await self.chroma_client.heartbeat()
+                logger.info("ChromaDB async client initialized successfully")
+            except Exception as e:
+                logger.error("Failed to initialize ChromaDB async client", error=str(e))
+                self.chroma_client = None
+        return self.chroma_client
+    
     async def get_or_create_collection(
         self, 
         name: str, 
@@ -62,7 +85,8 @@ class ChromaDBManager:
     ) -> Optional[Any]:
         """Получение или создание коллекции с умным кешированием"""
         
-        if not self.chroma_client:
+        client = await self._get_client()
+        if not client:
             logger.error("ChromaDB client not initialized")
             return None
         
@@ -70,7 +94,7 @@ class ChromaDBManager:
         if name in self._collections_cache:
             try:
                 # Проверяем, что коллекция все еще существует
-                collection = self.chroma_client.get_collection(name)
+                collection = await self.executor.run(client.get_collection, name)
                 return collection
             except:
                 # Коллекция удалена, убираем из кеша
@@ -78,7 +102,7 @@ class ChromaDBManager:
         
         try:
             # Пытаемся получить существующую коллекцию
-            collection = self.chroma_client.get_collection(name)
+            collection = await self.executor.run(client.get_collection, name)
             self._collections_cache[name] = collection
             logger.info("Collection retrieved from cache", name=name)
             return collection
@@ -95,7 +119,9 @@ class ChromaDBManager:
                 if metadata:
                     default_metadata.update(metadata)
                 
-                collection = self.chroma_client.create_collection(
+                collection = await self.executor.write(
+                    name,
+                    client.create_collection,
                     name=name,
                     metadata=default_metadata
                 )
@@ -112,15 +138,52 @@ class ChromaDBManager:
                 logger.error("Failed to create collection", name=name, error=str(e))
                 return None
     
+    def _prepare_documents(self, documents: List[Dict[str, Any]]):
+        """Тексты, очищенные метаданные и ID документов (в потоке пула)"""
+        texts = []
+        metadatas = []
+        ids = []
+        
+        for i, doc in enumerate(documents):
+            # Извлекаем текст
+            text = doc.get('text', doc.get('content', str(doc)))
+            if not text or len(text.strip()) == 0:
+                continue
+            
+            texts.append(text)
+            
+            # Очищаем метаданные от проблемных полей
+            metadata = doc.get('metadata', {}).copy()
+            problematic_fields = ['_type', 'id', '__class__', '__module__']
+            for field in problematic_fields:
+                if field in metadata:
+                    del metadata[field]
+            
+            # Добавляем служебные метаданные
+            metadata.update({
+                "added_at": datetime.now().isoformat(),
+                "service": self.settings.SERVICE_NAME,
+                "document_hash": hashlib.md5(text.encode()).hexdigest()
+            })
+            
+            metadatas.append(metadata)
+            ids.append(doc.get('id', f"doc_{i}_{hash(text)}"))
+        
+        return texts, metadatas, ids
+    
     async def add_documents_safe(
         self,
         documents: List[Dict[str, Any]],
         collection_name: str = "default",
         batch_size: int = 100
     ) -> Dict[str, Any]:
-        """Безопасное добавление документов с обработкой ошибок"""
+        """Безопасное добавление документов с обработкой ошибок
+        
+        Подготовка, эмбеддинги и запись батчей выполняются вне event loop;
+        батчи одной коллекции пишутся строго по одному.
+        """
         
-        if not self.chroma_client:
+        if not await self._get_client():
             return {"error": "ChromaDB not initialized"}
         
         try:
@@ -129,52 +192,24 @@ class ChromaDBManager:
                 return {"error": "Failed to get or create collection"}
             
             # Подготавливаем данные
-            texts = []
-            metadatas = []
-            ids = []
-            
-            for i, doc in enumerate(documents):
-                # Извлекаем текст
-                text = doc.get('text', doc.get('content', str(doc)))
-                if not text or len(text.strip()) == 0:
-                    continue
-                
-                texts.append(text)
-                
-                # Очищаем метаданные от проблемных полей
-                metadata = doc.get('metadata', {}).copy()
-                problematic_fields = ['_type', 'id', '__class__', '__module__']
-                for field in problematic_fields:
-                    if field in metadata:
-                        del metadata[field]
-                
-                # Добавляем служебные метаданные
-                metadata.update({
-                    "added_at": datetime.now().isoformat(),
-                    "service": self.settings.SERVICE_NAME,
-                    "document_hash": hashlib.md5(text.encode()).hexdigest()
-                })
-                
-                metadatas.append(metadata)
-                ids.append(doc.get('id', f"doc_{i}_{hash(text)}"))
+            texts, metadatas, ids = await self.executor.run(self._prepare_documents, documents, kind="prepare")
             
             # Добавляем документы батчами
             added_count = 0
             for i in range(0, len(texts), batch_size):
                 batch_texts = texts[i:i + batch_size]
-                batch_metadatas = metadatas[i:i + batch_size]
-                batch_ids = ids[i:i + batch_size]
+                batch = {
+                    "documents": batch_texts,
+                    "metadatas": metadatas[i:i + batch_size],
+                    "ids": ids[i:i + batch_size]
+                }
                 
-                collection.add(
-                    documents=batch_texts,
-                    metadatas=batch_metadatas,
-                    ids=batch_ids
-                )
-                added_count += len(batch_texts)
+                embeddings = await self.executor.embed(batch_texts)
+                if embeddings is not None:
+                    batch["embeddings"] = embeddings
                 
-                # Небольшая пауза между батчами
-                if i + batch_size < len(texts):
-                    await asyncio.sleep(0.1)
+                await self.executor.write(collection_name, collection.add, **batch)
+                added_count += len(batch_texts)
             
             logger.info(
                 "Documents added successfully",
@@ -199,6 +234,19 @@ class ChromaDBManager:
             )
             return {"error": str(e)}
     
+    async def delete_documents(self, document_ids: List[str], collection_name: str = "default") -> Dict[str, Any]:
+        """Удаление документов под блокировкой записи коллекции"""
+        
+        if not await self._get_client():
+            return {"error": "ChromaDB not initialized"}
+        
+        collection = await self.get_or_create_collection(collection_name)
+        if not collection:
+            return {"error": "Collection not found"}
+        
+        await self.executor.write(collection_name, collection.delete, ids=document_ids)
+        return {"success": True, "deleted_count": len(document_ids), "collection": collection_name}
+    
     async def search_safe(
         self,
         query: str,
@@ -208,7 +256,7 @@ class ChromaDBManager:
     ) -> List[Dict[str, Any]]:
         """Безопасный поиск с обработкой ошибок"""
         
-        if not self.chroma_client:
+        if not await self._get_client():
             return []
         
         try:
@@ -216,11 +264,16 @@ class ChromaDBManager:
             if not collection:
                 return []
             
+            # Эмбеддинг запроса считается тем же способом, что и при записи
+            query_embeddings = await self.executor.embed([query])
+            query_params = {"query_embeddings": query_embeddings} if query_embeddings else {"query_texts": [query]}
+            
             # Выполняем поиск
-            results = collection.query(
-                query_texts=[query],
+            results = await self.executor.run(
+                collection.query,
                 n_results=top_k,
-                where=filter_metadata
+                where=filter_metadata,
+                **query_params
             )
             
             # Форматируем результаты
@@ -255,11 +308,12 @@ class ChromaDBManager:
     async def delete_collection(self, name: str) -> Dict[str, Any]:
         """Удаление коллекции"""
         
-        if not self.chroma_client:
+        client = await self._get_client()
+        if not client:
             return {"error": "ChromaDB not initialized"}
         
         try:
-            self.chroma_client.delete_collection(name)
+            await self.executor.write(name, client.delete_collection, name)
             
             # Убираем из кеша
             if name in self._collections_cache:
@@ -275,11 +329,12 @@ class ChromaDBManager:
     async def cleanup_old_collections(self) -> Dict[str, Any]:
         """Автоматическая очистка старых коллекций"""
         
-        if not self.chroma_client:
+        client = await self._get_client()
+        if not client:
             return {"error": "ChromaDB not initialized"}
         
         try:
-            collections = self.chroma_client.list_collections()
+            collections = await self.executor.run(client.list_collections)
             deleted_count = 0
             
             for collection in collections:
@@ -290,7 +345,8 @@ class ChromaDBManager:
                     try:
                         created_at = datetime.fromisoformat(created_at_str)
                         if datetime.now() - created_at > self.collection_ttl:
-                            self.chroma_client.delete_collection(collection.name)
+                            await self.executor.write(collection.name, client.delete_collection, collection.name)
+                            self._collections_cache.pop(collection.name, None)
                             deleted_count += 1
                             logger.info("Old collection deleted", name=collection.name)
                     except:
@@ -307,11 +363,12 @@ class ChromaDBManager:
     async def _check_collection_limits(self):
         """Проверка лимитов коллекций"""
         
-        if not self.chroma_client:
+        client = await self._get_client()
+        if not client:
             return
         
         try:
-            collections = self.chroma_client.list_collections()
+            collections = await self.executor.run(client.list_collections)
             
             # Проверяем количество коллекций
             if len(collections) > self.max_collections:
@@ -324,11 +381,12 @@ class ChromaDBManager:
             
             # Проверяем размер коллекций
             for collection in collections:
-                if collection.count() > self.max_documents_per_collection:
+                count = await self.executor.run(collection.count)
+                if count > self.max_documents_per_collection:
                     logger.warning(
                         "Collection too large",
                         name=collection.name,
-                        count=collection.count(),
+                        count=count,
                         max=self.max_documents_per_collection
                     )
             
@@ -338,18 +396,19 @@ class ChromaDBManager:
     async def get_collections_info(self) -> List[Dict[str, Any]]:
         """Получение информации о коллекциях"""
         
-        if not self.chroma_client:
+        client = await self._get_client()
+        if not client:
             return []
         
         try:
-            collections = self.chroma_client.list_collections()
+            collections = await self.executor.run(client.list_collections)
             
             result = []
             for collection in collections:
                 result.append({
                     "name": collection.name,
                     "metadata": collection.metadata,
-                    "count": collection.count(),
+                    "count": await self.executor.run(collection.count),
                     "created_at": collection.metadata.get('created_at') if collection.metadata else None
                 })
             
@@ -362,7 +421,8 @@ class ChromaDBManager:
     async def health_check(self) -> Dict[str, Any]:
         """Расширенная проверка здоровья"""
         
-        if not self.chroma_client:
+        client = await self._get_client()
+        if not client:
             return {
                 "status": "unhealthy",
                 "error": "ChromaDB client not initialized"
@@ -370,7 +430,7 @@ class ChromaDBManager:
         
         try:
             # Проверяем подключение
-            self.chroma_client.heartbeat()
+            await self.executor.run(client.heartbeat)
             
             # Получаем информацию о коллекциях
             collections_info = await self.get_collections_info()
@@ -384,6 +444,7 @@ class ChromaDBManager:
                 "collections_count": len(collections_info),
                 "collections_info": collections_info,
                 "needs_cleanup": needs_cleanup,
+                "executor": self.executor.stats(),
                 "service": self.settings.SERVICE_NAME
             }
             
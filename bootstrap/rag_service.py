@@ -57,16 +57,11 @@ class RAGService:
     ) -> Dict[str, Any]:
         """Удаление документов из векторной БД"""
         
-        if not self.chromadb_manager.chroma_client:
-            return {"error": "ChromaDB not initialized"}
-        
         try:
-            chroma_collection = await self.chromadb_manager.get_or_create_collection(collection)
-            if not chroma_collection:
-                return {"error": "Collection not found"}
-            
-            # Удаляем документы
-            chroma_collection.delete(ids=document_ids)
+            # Удаляем документы (под блокировкой записи коллекции)
+            result = await self.chromadb_manager.delete_documents(document_ids, collection)
+            if "error" in result:
+                return result
             
             logger.info(
                 "Documents deleted from RAG",
@@ -74,11 +69,7 @@ class RAGService:
                 collection=collection
             )
             
-            return {
-                "success": True,
-                "deleted_count": len(document_ids),
-                "collection": collection
-            }
+            return result
             
         except Exception as e:
             logger.error(
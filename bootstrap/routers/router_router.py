@@ -5,12 +5,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
-import httpx
 
 from ..rag_service import get_rag_service
 from ..llm_router import get_llm_router
 from ..ollama_client import get_ollama_client
 from ..config import get_settings
+from ..http_clients import get_http_clients
 
 router = APIRouter(prefix="/api/v1", tags=["router"])
 
@@ -228,9 +228,10 @@ async def health_check() -> Dict[str, Any]:
     
     # Проверяем Ollama
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            ollama_response = await client.get(f"{settings.OLLAMA_URL}/api/tags")
-            ollama_models = ollama_response.json().get("models", [])
+        ollama_response = await get_http_clients().client("ollama").get(
+            f"{settings.OLLAMA_URL}/api/tags", timeout=5.0
+        )
+        ollama_models = ollama_response.json().get("models", [])
     except Exception as e:
         ollama_models = []
     
@@ -0,0 +1,276 @@
+"""
+Тесты выполнения операций ChromaDB вне event loop
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from bootstrap.chroma_executor import ChromaExecutor
+from bootstrap.rag_manager import ChromaDBManager
+
+# Задержка event loop при загрузке 50k документов не должна превышать порог
+MAX_LOOP_LAG = 0.05
+
+
+def fake_embed(texts):
+    """Эмбеддинги для пула процессов (функция уровня модуля)"""
+    return [[float(len(text)), float(sum(map(ord, text)) % 97)] for text in texts]
+
+
+def slow_embed(texts):
+    """Эмбеддинги с задержкой вычисления (функция уровня модуля)"""
+    time.sleep(0.1)
+    return fake_embed(texts)
+
+
+class FakeCollection:
+    """Синхронная коллекция: каждый вызов блокирует поток, как HTTP клиент Chroma"""
+
+    def __init__(self, name, add_delay=0.002, query_delay=0.005):
+        self.name = name
+        self.metadata = {}
+        self.add_delay = add_delay
+        self.query_delay = query_delay
+        self.ids = []
+        self.active_writers = 0
+        self.max_writers = 0
+        self.embeddings_received = False
+        self._lock = threading.Lock()
+
+    def add(self, documents, metadatas, ids, embeddings=None):
+        with self._lock:
+            self.active_writers += 1
+            self.max_writers = max(self.max_writers, self.active_writers)
+        time.sleep(self.add_delay)
+        with self._lock:
+            self.active_writers -= 1
+            self.ids.extend(ids)
+            self.embeddings_received = self.embeddings_received or embeddings is not None
+
+    def query(self, n_results, where=None, query_texts=None, query_embeddings=None):
+        time.sleep(self.query_delay)
+        found = self.ids[:n_results]
+        return {
+            "documents": [[f"doc {doc_id}" for doc_id in found]],
+            "metadatas": [[{} for _ in found]],
+            "ids": [found],
+            "distances": [[0.1 for _ in found]]
+        }
+
+    def delete(self, ids):
+        time.sleep(self.add_delay)
+        removed = set(ids)
+        with self._lock:
+            self.ids = [doc_id for doc_id in self.ids if doc_id not in removed]
+
+    def count(self):
+        return len(self.ids)
+
+
+class FakeClient:
+    """Синхронный клиент с коллекциями FakeCollection"""
+
+    def __init__(self, **collection_options):
+        self.collection_options = collection_options
+        self.collections = {}
+
+    def get_collection(self, name):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist")
+        return self.collections[name]
+
+    def create_collection(self, name, metadata=None):
+        collection = self.collections[name] = FakeCollection(name, **self.collection_options)
+        return collection
+
+    def list_collections(self):
+        return list(self.collections.values())
+
+    def heartbeat(self):
+        return 1
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Максимальное опоздание пробуждения event loop"""
+    max_lag = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - started - interval)
+    return max_lag
+
+
+def make_documents(count: int, prefix: str = "doc"):
+    return [
+        {"id": f"{prefix}_{i}", "text": f"Internal linking article {i} about SEO anchors", "metadata": {"index": i}}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def executor():
+    executor = ChromaExecutor(max_workers=4, max_queue=16)
+    yield executor
+    executor.close()
+
+
+class TestChromaDBManagerOffloading:
+    """Тесты работы менеджера RAG через исполнитель"""
+
+    @pytest.mark.asyncio
+    async def test_large_ingest_keeps_event_loop_responsive(self, executor):
+        client = FakeClient()
+        manager = ChromaDBManager(chroma_client=client, executor=executor)
+        documents = make_documents(50_000)
+
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(measure_loop_lag(stop))
+        ingest = asyncio.create_task(manager.add_documents_safe(documents, "articles", batch_size=100))
+
+        # Поиск по другой коллекции не ждет окончания загрузки
+        await manager.add_documents_safe(make_documents(10, "other"), "other")
+        search_started = time.perf_counter()
+        results = await manager.search_safe("anchors", "other", top_k=3)
+        search_seconds = time.perf_counter() - search_started
+        assert not ingest.done()
+
+        added = await ingest
+        stop.set()
+        max_lag = await monitor
+
+        assert added["added_count"] == 50_000
+        assert client.collections["articles"].count() == 50_000
+        assert len(results) == 3
+        assert search_seconds < 0.5
+        assert max_lag < MAX_LOOP_LAG, f"event loop lag {max_lag * 1000:.1f}ms"
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_would_stall_event_loop(self):
+        """Контроль измерителя: тот же вызов прямо в event loop дает заметную задержку"""
+        collection = FakeCollection("articles", add_delay=0.2)
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(measure_loop_lag(stop))
+        await asyncio.sleep(0.01)
+
+        collection.add(documents=["text"], metadatas=[{}], ids=["1"])
+        await asyncio.sleep(0.01)
+        stop.set()
+
+        assert await monitor > MAX_LOOP_LAG
+
+    @pytest.mark.asyncio
+    async def test_writes_serialized_per_collection(self, executor):
+        client = FakeClient(add_delay=0.01)
+        manager = ChromaDBManager(chroma_client=client, executor=executor)
+        await manager.get_or_create_collection("first")
+        await manager.get_or_create_collection("second")
+
+        await asyncio.gather(
+            manager.add_documents_safe(make_documents(300, "a"), "first", batch_size=50),
+            manager.add_documents_safe(make_documents(300, "b"), "first", batch_size=50),
+            manager.add_documents_safe(make_documents(300, "c"), "second", batch_size=50),
+            manager.delete_documents(["a_0", "b_0"], "first")
+        )
+
+        assert client.collections["first"].max_writers == 1
+        assert client.collections["second"].max_writers == 1
+        assert client.collections["second"].count() == 300
+        assert executor.stats()["operations"]["write"]["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_health_check_reports_executor_stats(self, executor):
+        manager = ChromaDBManager(chroma_client=FakeClient(), executor=executor)
+        await manager.add_documents_safe(make_documents(250), "articles", batch_size=100)
+
+        health = await manager.health_check()
+
+        stats = health["executor"]
+        assert stats["queue_depth"] == 0
+        assert stats["running"] == 0
+        assert stats["write_locks"] == 1
+        assert stats["operations"]["write"]["completed"] == 4  # создание коллекции + 3 батча
+        assert stats["operations"]["prepare"]["completed"] == 1
+
+
+class TestChromaExecutor:
+    """Тесты очереди, блокировок записи и пула эмбеддингов"""
+
+    @pytest.mark.asyncio
+    async def test_queue_depth_is_tracked(self):
+        executor = ChromaExecutor(max_workers=1, max_queue=2)
+        release = threading.Event()
+        try:
+            tasks = [asyncio.create_task(executor.run(release.wait, kind="read")) for _ in range(5)]
+            await asyncio.sleep(0.05)
+
+            stats = executor.stats()
+            assert stats["running"] == 1
+            assert stats["queue_depth"] == 4
+            assert stats["operations"]["read"]["max_queued"] == 4
+
+            release.set()
+            await asyncio.gather(*tasks)
+            stats = executor.stats()
+            assert stats["queue_depth"] == 0
+            assert stats["operations"]["read"]["completed"] == 5
+            assert stats["operations"]["read"]["avg_wait_seconds"] > 0
+        finally:
+            release.set()
+            executor.close()
+
+    @pytest.mark.asyncio
+    async def test_failures_are_counted(self, executor):
+        def broken():
+            raise RuntimeError("chroma is down")
+
+        with pytest.raises(RuntimeError):
+            await executor.run(broken, kind="write")
+
+        assert executor.stats()["operations"]["write"]["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_coroutine_functions_are_awaited(self, executor):
+        async def heartbeat():
+            return 42
+
+        assert await executor.run(heartbeat) == 42
+        assert executor.stats()["operations"]["read"]["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_embeddings_in_process_pool(self):
+        executor = ChromaExecutor(embedding_workers=2, embed_func=fake_embed, embedding_batch_size=16)
+        try:
+            texts = [f"text {i}" for i in range(50)]
+
+            assert await executor.embed(texts) == fake_embed(texts)
+            assert executor.stats()["operations"]["embed"]["completed"] == 4
+
+            client = FakeClient()
+            manager = ChromaDBManager(chroma_client=client, executor=executor)
+            await manager.add_documents_safe(make_documents(20), "articles")
+            assert client.collections["articles"].embeddings_received
+        finally:
+            executor.close()
+
+    @pytest.mark.asyncio
+    async def test_embedding_run_time_separated_from_wait(self):
+        executor = ChromaExecutor(embedding_workers=1, embed_func=slow_embed, embedding_batch_size=10)
+        try:
+            await executor.embed(["warmup"])  # запуск процесса пула
+            await executor.embed([f"text {i}" for i in range(30)])
+
+            stats = executor.stats()["operations"]["embed"]
+            assert stats["completed"] == 4
+            assert stats["avg_run_seconds"] >= 0.1
+            # Три среза нагрузки ждали друг друга в очереди одного процесса
+            assert stats["avg_wait_seconds"] >= 0.05
+        finally:
+            executor.close()
+
+    @pytest.mark.asyncio
+    async def test_embeddings_disabled_by_default(self, executor):
+        assert not executor.embeds_in_processes
+        assert await executor.embed(["text"]) is None
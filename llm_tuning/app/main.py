@@ -18,6 +18,7 @@ from sqlalchemy.sql import func
 from .config import settings
 from .database import get_db, init_db
 from .services import (
+    close_ollama_embedder,
     ModelManager, 
     RouteManager, 
     RAGService, 
@@ -68,6 +69,7 @@ async def lifespan(app: FastAPI):
     
     # Очистка при остановке
     logger.info("🛑 Остановка LLM Tuning микросервиса...")
+    await close_ollama_embedder()
 
 
 # Создание FastAPI приложения
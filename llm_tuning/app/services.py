@@ -212,6 +212,191 @@ class RouteManager:
         return result.scalar_one_or_none()
 
 
+class EmbeddingBatcher:
+    """Объединение конкурентных запросов эмбеддингов в пакетные вызовы Ollama
+    
+    Тексты, запрошенные в пределах окна batch_window (или до max_batch_size
+    уникальных текстов), отправляются одним вызовом; одинаковые тексты
+    отправляются один раз, результат раздается всем ожидающим. Отмена
+    одного вызова не затрагивает остальных ожидающих того же текста.
+    """
+    
+    def __init__(self, embed_batch, max_batch_size: int = 64, batch_window: float = 0.005):
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.stats = {"texts": 0, "deduplicated": 0, "batches": 0}
+    
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Эмбеддинги для списка текстов (порядок сохраняется)"""
+        if not texts:
+            return []
+        futures = [self._enqueue(text) for text in texts]
+        for future in futures:
+            self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return list(await asyncio.gather(*(asyncio.shield(future) for future in futures)))
+        finally:
+            for future in futures:
+                self._release(future)
+    
+    def _release(self, future: asyncio.Future):
+        """Снятие ожидающего; future без ожидающих отменяется"""
+        waiters = self._waiters[future] - 1
+        if waiters:
+            self._waiters[future] = waiters
+            return
+        del self._waiters[future]
+        if not future.done():
+            future.cancel()
+    
+    def _enqueue(self, text: str) -> asyncio.Future:
+        self.stats["texts"] += 1
+        future = self._pending.get(text)
+        if future is not None:
+            self.stats["deduplicated"] += 1
+            return future
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[text] = future
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return future
+    
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, batch: Dict[str, asyncio.Future]):
+        batch = {text: future for text, future in batch.items() if not future.done()}
+        if not batch:
+            return
+        texts = list(batch.keys())
+        self.stats["batches"] += 1
+        try:
+            embeddings = await self.embed_batch(texts)
+            if len(embeddings) != len(texts):
+                raise ValueError(
+                    f"Ollama вернула {len(embeddings)} эмбеддингов на {len(texts)} текстов"
+                )
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for text, embedding in zip(texts, embeddings):
+            if not batch[text].done():
+                batch[text].set_result(embedding)
+    
+    async def close(self):
+        """Отправка оставшегося пакета и ожидание выполняющихся"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class OllamaEmbedder:
+    """Общий для всех экземпляров RAGService клиент эмбеддингов Ollama
+    
+    RAGService создается на каждый запрос, поэтому батчер и HTTP клиент
+    живут на уровне приложения: конкурентные запросы попадают в общий пакет.
+    """
+    
+    EMBEDDING_MODEL = "nomic-embed-text"
+    
+    def __init__(self, max_batch_size: int = 64, batch_window: float = 0.005):
+        self.ollama_client = httpx.AsyncClient(
+            base_url=settings.OLLAMA_BASE_URL,
+            timeout=settings.OLLAMA_TIMEOUT
+        )
+        self.batcher = EmbeddingBatcher(self._embed_batch, max_batch_size, batch_window)
+        self._batch_embed_supported = True
+    
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Эмбеддинги текстов; None для текстов, которые Ollama не обработала"""
+        return await self.batcher.embed(texts)
+    
+    async def _embed_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Пакетный вызов Ollama /api/embed (с откатом на /api/embeddings)"""
+        if self._batch_embed_supported:
+            response = await self.ollama_client.post(
+                "/api/embed",
+                json={"model": self.EMBEDDING_MODEL, "input": texts}
+            )
+            if response.status_code == 200:
+                return response.json().get("embeddings", [])
+            if not self._is_missing_endpoint(response):
+                return [None] * len(texts)
+            self._batch_embed_supported = False
+        
+        embeddings = []
+        for text in texts:
+            response = await self.ollama_client.post(
+                "/api/embeddings",
+                json={"model": self.EMBEDDING_MODEL, "prompt": text}
+            )
+            if response.status_code == 200:
+                embeddings.append(response.json().get("embedding", []))
+            else:
+                embeddings.append(None)
+        return embeddings
+    
+    @staticmethod
+    def _is_missing_endpoint(response: httpx.Response) -> bool:
+        """404 от отсутствующего /api/embed (старая Ollama), а не от неизвестной модели
+        
+        На неизвестную модель Ollama отвечает 404 с JSON {"error": ...},
+        на отсутствующий маршрут - текстом "404 page not found".
+        """
+        if response.status_code != 404:
+            return False
+        try:
+            return "error" not in response.json()
+        except (ValueError, TypeError):
+            return True
+    
+    async def close(self):
+        """Остановка батчера и закрытие HTTP клиента"""
+        await self.batcher.close()
+        await self.ollama_client.aclose()
+
+
+_ollama_embedder: Optional[OllamaEmbedder] = None
+
+
+def get_ollama_embedder() -> OllamaEmbedder:
+    """Получение общего клиента эмбеддингов"""
+    global _ollama_embedder
+    if _ollama_embedder is None:
+        _ollama_embedder = OllamaEmbedder()
+    return _ollama_embedder
+
+
+async def close_ollama_embedder():
+    """Закрытие общего клиента эмбеддингов"""
+    global _ollama_embedder
+    if _ollama_embedder:
+        await _ollama_embedder.close()
+        _ollama_embedder = None
+
+
 class RAGService:
     """Сервис для работы с RAG (Retrieval-Augmented Generation)"""
     
@@ -225,33 +410,39 @@ class RAGService:
     
     async def add_document(self, document_data: Dict[str, Any]) -> RAGDocument:
         """Добавление документа в RAG систему"""
+        documents = await self.add_documents([document_data])
+        return documents[0]
+    
+    async def add_documents(self, documents_data: List[Dict[str, Any]]) -> List[RAGDocument]:
+        """Добавление документов в RAG систему (эмбеддинги одним пакетом)"""
         try:
-            # Преобразуем metadata -> doc_metadata, если есть
-            if 'metadata' in document_data:
-                document_data['doc_metadata'] = document_data.pop('metadata')
-            # Создаем документ
-            document = RAGDocument(**document_data)
-            
-            # Генерируем эмбеддинги для документа
-            embeddings = await self._generate_embeddings(document.content)
-            document.embeddings = json.dumps(embeddings)
-            
-            # Извлекаем ключевые слова
-            document.keywords = await self._extract_keywords(document.content)
+            documents = []
+            for document_data in documents_data:
+                # Преобразуем metadata -> doc_metadata, если есть
+                if 'metadata' in document_data:
+                    document_data['doc_metadata'] = document_data.pop('metadata')
+                documents.append(RAGDocument(**document_data))
+            
+            # Генерируем эмбеддинги для всех документов
+            embeddings = await self.get_embeddings([document.content for document in documents])
+            for document, document_embeddings in zip(documents, embeddings):
+                document.embeddings = json.dumps(document_embeddings)
+                # Извлекаем ключевые слова
+                document.keywords = await self._extract_keywords(document.content)
+                self.db.add(document)
             
             # Сохраняем в БД
-            self.db.add(document)
             await self.db.commit()
-            await self.db.refresh(document)
-            
-            # Кэшируем эмбеддинги
-            self._vector_cache[f"doc_{document.id}"] = embeddings
+            for document, document_embeddings in zip(documents, embeddings):
+                await self.db.refresh(document)
+                # Кэшируем эмбеддинги
+                self._vector_cache[f"doc_{document.id}"] = document_embeddings
             
-            logger.info(f"Документ {document.title} добавлен в RAG систему")
-            return document
+            logger.info(f"В RAG систему добавлено документов: {len(documents)}")
+            return documents
             
         except Exception as e:
-            logger.error(f"Ошибка добавления документа: {e}")
+            logger.error(f"Ошибка добавления документов: {e}")
             raise
     
     async def search_documents(self, query: str, limit: int = 5) -> List[RAGDocument]:
@@ -333,27 +524,22 @@ class RAGService:
             }
     
     async def _generate_embeddings(self, text: str) -> List[float]:
-        """Генерация эмбеддингов для текста"""
+        """Генерация эмбеддингов для текста (через микро-батчер)"""
+        embeddings = await self.get_embeddings([text])
+        return embeddings[0]
+    
+    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Генерация эмбеддингов для списка текстов пакетными вызовами"""
         try:
-            # Используем простую модель для эмбеддингов
-            response = await self.ollama_client.post(
-                "/api/embeddings",
-                json={
-                    "model": "nomic-embed-text",
-                    "prompt": text
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("embedding", [])
-            else:
-                # Fallback: используем простые эмбеддинги
-                return self._simple_embeddings(text)
-                
+            embeddings = await get_ollama_embedder().embed(texts)
         except Exception as e:
             logger.warning(f"Ошибка генерации эмбеддингов, используем fallback: {e}")
-            return self._simple_embeddings(text)
+            return [self._simple_embeddings(text) for text in texts]
+        # Fallback: простые эмбеддинги для текстов, которые Ollama не обработала
+        return [
+            embedding if embedding is not None else self._simple_embeddings(text)
+            for text, embedding in zip(texts, embeddings)
+        ]
     
     def _simple_embeddings(self, text: str) -> List[float]:
         """Простая реализация эмбеддингов для fallback"""
@@ -631,6 +631,48 @@ class TestUtils:
         assert all(isinstance(k, str) for k in keywords)
 
 
+class TestEmbeddingBatcher:
+    """Тесты микро-батчинга эмбеддингов"""
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_text(self):
+        """Тест: отмена одного из вызовов с общим текстом не отменяет остальные"""
+        from app.services import EmbeddingBatcher
+        
+        batches = []
+        
+        async def embed_batch(texts):
+            batches.append(list(texts))
+            return [[float(len(text))] for text in texts]
+        
+        batcher = EmbeddingBatcher(embed_batch, batch_window=0.01)
+        first = asyncio.create_task(batcher.embed(["a", "bb"]))
+        second = asyncio.create_task(batcher.embed(["a"]))
+        await asyncio.sleep(0)
+        
+        first.cancel()
+        
+        assert await second == [[1.0]]
+        assert first.cancelled()
+        assert batches == [["a"]]
+    
+    @pytest.mark.asyncio
+    async def test_documents_embedded_in_one_batch(self):
+        """Тест: эмбеддинги нескольких документов запрашиваются одним вызовом"""
+        from app.services import RAGService
+        
+        service = RAGService(None)
+        embedder = Mock()
+        embedder.embed = AsyncMock(return_value=[[0.1, 0.2], None])
+        
+        with patch('app.services.get_ollama_embedder', return_value=embedder):
+            embeddings = await service.get_embeddings(["first", "second"])
+        
+        embedder.embed.assert_awaited_once_with(["first", "second"])
+        assert embeddings[0] == [0.1, 0.2]
+        assert embeddings[1] == service._simple_embeddings("second")
+
+
 # Тесты производительности
 class TestPerformance:
     """Тесты производительности"""
@@ -60,7 +60,10 @@ class APISettings(BaseSettings):
 class MonitoringSettings(BaseSettings):
     """Настройки мониторинга"""
     collect_interval: int = Field(default=30, env="COLLECT_INTERVAL")
+    host_sample_interval: float = Field(default=5.0, env="HOST_SAMPLE_INTERVAL")
     retention_days: int = Field(default=30, env="RETENTION_DAYS")
+    timeseries_raw_retention: int = Field(default=24 * 3600, env="TIMESERIES_RAW_RETENTION")
+    timeseries_minute_retention: int = Field(default=7 * 24 * 3600, env="TIMESERIES_MINUTE_RETENTION")
     alert_thresholds: dict = Field(
         default={
             "cpu_usage": 80.0,
@@ -0,0 +1,135 @@
+"""
+Фоновый сбор системных метрик хоста для микросервиса мониторинга
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HostSample:
+    """Снимок системных метрик"""
+    timestamp: float
+    cpu_percent: float
+    cpu_count: int
+    memory_percent: float
+    load_average: Tuple[float, ...]
+    disk_percent: float
+    network_in: int
+    network_out: int
+
+
+class HostSampler:
+    """Сборщик системных метрик в фоновом потоке
+
+    psutil.cpu_percent(interval=1) блокировал event loop на секунду при
+    каждом сборе. Поток снимает метрики раз в interval секунд (CPU
+    считается между соседними замерами), snapshot() отдает последний
+    снимок за O(1), а кольцевой буфер хранит историю для скоростей
+    сетевого трафика и трендов.
+    """
+
+    def __init__(self, interval: float = 5.0, history: int = 720, disk_path: str = "/"):
+        self.interval = interval
+        self.disk_path = disk_path
+        self._samples: Deque[HostSample] = deque(maxlen=history)
+        self._latest: Optional[HostSample] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Запуск фонового потока"""
+        if self.running:
+            return
+        self._stop.clear()
+        psutil.cpu_percent(interval=None)
+        self._thread = threading.Thread(target=self._run, name="host-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"Host sampler started with {self.interval}s interval")
+
+    def stop(self):
+        """Остановка фонового потока"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1.0)
+            self._thread = None
+
+    def _run(self):
+        wait = min(self.interval, 0.1)
+        while not self._stop.wait(wait):
+            try:
+                self._record(self.sample())
+            except Exception as e:
+                logger.error(f"Error sampling host metrics: {e}")
+            wait = self.interval
+
+    def _record(self, sample: HostSample):
+        with self._lock:
+            self._samples.append(sample)
+            self._latest = sample
+
+    def sample(self) -> HostSample:
+        """Немедленный неблокирующий замер"""
+        network = psutil.net_io_counters()
+        return HostSample(
+            timestamp=time.time(),
+            cpu_percent=psutil.cpu_percent(interval=None),
+            cpu_count=psutil.cpu_count(),
+            memory_percent=psutil.virtual_memory().percent,
+            load_average=tuple(psutil.getloadavg()),
+            disk_percent=psutil.disk_usage(self.disk_path).percent,
+            network_in=network.bytes_recv,
+            network_out=network.bytes_sent
+        )
+
+    def snapshot(self) -> HostSample:
+        """Последний снимок (до первого фонового замера снимается сразу)"""
+        latest = self._latest
+        if latest is None:
+            latest = self.sample()
+            self._record(latest)
+        return latest
+
+    def samples(self, window: Optional[float] = None) -> List[HostSample]:
+        """Замеры за последние window секунд"""
+        with self._lock:
+            samples = list(self._samples)
+        if window is None or not samples:
+            return samples
+        cutoff = samples[-1].timestamp - window
+        return [sample for sample in samples if sample.timestamp >= cutoff]
+
+    def rate(self, field: str, window: Optional[float] = None) -> Optional[float]:
+        """Скорость роста счетчика в секунду (network_in, network_out)"""
+        samples = self.samples(window)
+        if len(samples) < 2 or samples[-1].timestamp <= samples[0].timestamp:
+            return None
+        return (getattr(samples[-1], field) - getattr(samples[0], field)) / (samples[-1].timestamp - samples[0].timestamp)
+
+    def trend(self, field: str, window: Optional[float] = None) -> Optional[float]:
+        """Наклон метрики в секунду по методу наименьших квадратов"""
+        samples = self.samples(window)
+        if len(samples) < 2:
+            return None
+        t0 = samples[0].timestamp
+        xs = [sample.timestamp - t0 for sample in samples]
+        ys = [getattr(sample, field) for sample in samples]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        variance = sum((x - mean_x) ** 2 for x in xs)
+        if variance == 0:
+            return None
+        return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
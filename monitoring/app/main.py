@@ -3,12 +3,14 @@
 """
 
 import asyncio
+import json
 import logging
 import time
 from contextlib import asynccontextmanager
-from typing import Dict, Any, List
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import redis.asyncio as redis
@@ -24,6 +26,8 @@ from .models import (
 from .services import (
     MetricsCollector, AlertService, HealthCheckService, DashboardService
 )
+from .http_clients import get_http_clients, close_http_clients
+from .timeseries import RetentionPolicy, TimeSeriesStore, flatten_metrics, to_epoch
 
 # Настройка логирования
 logging.basicConfig(
@@ -34,6 +38,8 @@ logger = logging.getLogger(__name__)
 
 # Глобальные переменные для сервисов
 redis_client: redis.Redis = None
+timeseries_client: redis.Redis = None
+timeseries_store: TimeSeriesStore = None
 db_session: AsyncSession = None
 metrics_collector: MetricsCollector = None
 alert_service: AlertService = None
@@ -44,7 +50,8 @@ dashboard_service: DashboardService = None
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Управление жизненным циклом приложения"""
-    global redis_client, db_session, metrics_collector, alert_service, health_checker, dashboard_service
+    global redis_client, timeseries_client, timeseries_store, db_session
+    global metrics_collector, alert_service, health_checker, dashboard_service
     
     # Инициализация Redis
     logger.info("Initializing Redis connection...")
@@ -64,6 +71,24 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to connect to Redis: {e}")
         raise
     
+    # Хранилище временных рядов работает с бинарными чанками
+    timeseries_client = redis.Redis(
+        host=settings.redis.host,
+        port=settings.redis.port,
+        db=settings.redis.db,
+        password=settings.redis.password,
+        decode_responses=False
+    )
+    timeseries_store = TimeSeriesStore(
+        timeseries_client,
+        prefix=settings.redis.prefix,
+        retention=RetentionPolicy(
+            raw=settings.monitoring.timeseries_raw_retention,
+            minute=settings.monitoring.timeseries_minute_retention,
+            hour=settings.monitoring.retention_days * 24 * 3600
+        )
+    )
+    
     # Инициализация базы данных
     logger.info("Initializing database connection...")
     try:
@@ -96,8 +121,10 @@ async def lifespan(app: FastAPI):
     
     # Инициализация сервисов с зависимостями
     await metrics_collector.initialize(redis_client, None)  # TODO: передать session
+    metrics_collector.host_sampler.start()
     await alert_service.initialize(redis_client)
-    await dashboard_service.initialize(redis_client)
+    await health_checker.initialize(redis_client)
+    await dashboard_service.initialize(redis_client, timeseries_store, alert_service)
     
     logger.info("All services initialized successfully")
     
@@ -108,6 +135,11 @@ async def lifespan(app: FastAPI):
     
     # Очистка ресурсов
     logger.info("Shutting down monitoring service...")
+    if metrics_collector:
+        metrics_collector.host_sampler.stop()
+    await close_http_clients()
+    if timeseries_client:
+        await timeseries_client.close()
     if redis_client:
         await redis_client.close()
     logger.info("Monitoring service shutdown complete")
@@ -143,13 +175,15 @@ async def metrics_collection_task():
             # Сбор метрик
             metrics = await metrics_collector.collect_all_metrics()
             
-            # Сохранение метрик в Redis
+            # Сохранение последнего снимка и точек временных рядов
             if redis_client:
                 await redis_client.setex(
                     f"{settings.redis.prefix}latest_metrics",
                     settings.redis.ttl,
-                    str(metrics)
+                    json.dumps({name: metric.dict() for name, metric in metrics.items()}, default=str)
                 )
+            if timeseries_store:
+                await timeseries_store.add_many(flatten_metrics(metrics))
             
             # Проверка алертов
             if alert_service:
@@ -165,7 +199,7 @@ async def metrics_collection_task():
                     await redis_client.setex(
                         f"{settings.redis.prefix}services_status",
                         settings.redis.ttl,
-                        str([service.dict() for service in services])
+                        json.dumps([service.dict() for service in services], default=str)
                     )
             
             logger.debug("Metrics collection completed")
@@ -231,12 +265,12 @@ async def health_check():
     # Ollama
     try:
         import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{settings.ollama.url}/api/tags", timeout=5) as response:
-                if response.status == 200:
-                    services_status["ollama"] = ServiceStatus.HEALTHY
-                else:
-                    services_status["ollama"] = ServiceStatus.DEGRADED
+        session = get_http_clients().session("ollama")
+        async with session.get(f"{settings.ollama.url}/api/tags", timeout=aiohttp.ClientTimeout(total=5)) as response:
+            if response.status == 200:
+                services_status["ollama"] = ServiceStatus.HEALTHY
+            else:
+                services_status["ollama"] = ServiceStatus.DEGRADED
     except Exception:
         services_status["ollama"] = ServiceStatus.DOWN
     
@@ -256,6 +290,12 @@ async def health_check():
     )
 
 
+@app.get("/health/http-pools")
+async def http_pools():
+    """Утилизация пулов HTTP соединений по upstream"""
+    return get_http_clients().stats()
+
+
 @app.get("/metrics", response_model=MetricsResponse)
 async def get_metrics(query: MetricsQuery = Depends()):
     """Получение метрик"""
@@ -278,15 +318,40 @@ async def get_metrics(query: MetricsQuery = Depends()):
         raise HTTPException(status_code=500, detail="Failed to collect metrics")
 
 
+@app.get("/metrics/series", response_model=List[str])
+async def get_metrics_series():
+    """Список рядов в хранилище временных рядов"""
+    if not timeseries_store:
+        raise HTTPException(status_code=503, detail="Time series store not initialized")
+    return await timeseries_store.series()
+
+
 @app.get("/metrics/history")
-async def get_metrics_history(query: MetricsQuery = Depends()):
-    """Получение истории метрик"""
+async def get_metrics_history(
+    series: List[str] = Query(..., description="Имена рядов, например system.cpu_usage"),
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    step: float = Query(60.0, gt=0, description="Шаг агрегации, секунды")
+):
+    """Получение истории метрик с агрегацией по шагу"""
     try:
-        if not redis_client:
-            raise HTTPException(status_code=503, detail="Redis not available")
+        if not timeseries_store:
+            raise HTTPException(status_code=503, detail="Time series store not initialized")
         
-        # TODO: реализовать получение истории метрик
-        return {"message": "Metrics history not implemented yet"}
+        end = to_epoch(end_time) if end_time else time.time()
+        start = to_epoch(start_time) if start_time else end - 3600
+        history = await asyncio.gather(*(
+            timeseries_store.aggregate(name, start, end, step) for name in series
+        ))
+        
+        return {
+            "start": start,
+            "end": end,
+            "step": step,
+            "series": dict(zip(series, history))
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting metrics history: {e}")
         raise HTTPException(status_code=500, detail="Failed to get metrics history")
@@ -299,13 +364,14 @@ async def get_alerts(query: AlertsQuery = Depends()):
         if not alert_service:
             raise HTTPException(status_code=503, detail="Alert service not initialized")
         
-        alerts = await alert_service.get_alerts(status=query.status)
-        
-        # Фильтрация по времени
-        if query.start_time:
-            alerts = [alert for alert in alerts if alert.created_at >= query.start_time]
-        if query.end_time:
-            alerts = [alert for alert in alerts if alert.created_at <= query.end_time]
+        # Статус и время отбираются по индексам хранилища алертов
+        post_filtered = bool(query.severity or query.source)
+        alerts = await alert_service.get_alerts(
+            status=query.status,
+            start_time=query.start_time,
+            end_time=query.end_time,
+            limit=None if post_filtered else query.limit
+        )
         
         # Фильтрация по важности
         if query.severity:
@@ -420,6 +486,28 @@ async def get_dashboard():
         raise HTTPException(status_code=500, detail="Failed to get dashboard data")
 
 
+@app.get("/dashboard/trends")
+async def get_dashboard_trends(
+    series: List[str] = Query(
+        ["system.cpu_usage", "system.memory_usage", "system.disk_usage"],
+        description="Имена рядов"
+    ),
+    window: float = Query(3600.0, gt=0, description="Окно, секунды"),
+    step: float = Query(60.0, gt=0, description="Шаг агрегации, секунды")
+):
+    """Тренды метрик для дашборда из хранилища временных рядов"""
+    try:
+        if not dashboard_service:
+            raise HTTPException(status_code=503, detail="Dashboard service not initialized")
+        
+        return await dashboard_service.get_trends(series, window, step)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting dashboard trends: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get dashboard trends")
+
+
 @app.post("/metrics/collect")
 async def trigger_metrics_collection(background_tasks: BackgroundTasks):
     """Принудительный сбор метрик"""
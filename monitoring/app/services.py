@@ -3,10 +3,9 @@
 """
 
 import asyncio
+import json
 import time
-import psutil
 import aiohttp
-import redis.asyncio as redis
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 import logging
@@ -14,6 +13,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from .config import settings
+from .host_sampler import HostSampler
+from .http_clients import get_http_clients
+from .timeseries import TimeSeriesStore, to_epoch
 from .models import (
     SystemMetric, DatabaseMetric, CacheMetric, OllamaMetric, HTTPMetric,
     Alert, Service, ServiceStatus, AlertSeverity, AlertStatus
@@ -28,6 +30,7 @@ class MetricsCollector:
     def __init__(self):
         self.redis_client = None
         self.session = None
+        self.host_sampler = HostSampler(interval=settings.monitoring.host_sample_interval)
     
     async def initialize(self, redis_client, session: AsyncSession):
         """Инициализация сервиса"""
@@ -35,38 +38,22 @@ class MetricsCollector:
         self.session = session
     
     async def collect_system_metrics(self) -> SystemMetric:
-        """Сбор системных метрик"""
+        """Сбор системных метрик (последний снимок фонового сборщика)"""
         try:
-            # CPU метрики
-            cpu_percent = psutil.cpu_percent(interval=1)
-            cpu_count = psutil.cpu_count()
-            load_avg = psutil.getloadavg()
-            
-            # Память
-            memory = psutil.virtual_memory()
-            memory_percent = memory.percent
-            
-            # Диск
-            disk = psutil.disk_usage('/')
-            disk_percent = disk.percent
-            
-            # Сеть
-            network = psutil.net_io_counters()
-            network_in = network.bytes_recv
-            network_out = network.bytes_sent
+            sample = self.host_sampler.snapshot()
             
             return SystemMetric(
                 name="system_metrics",
-                value=cpu_percent,
-                cpu_usage=cpu_percent,
-                memory_usage=memory_percent,
-                disk_usage=disk_percent,
-                network_in=network_in,
-                network_out=network_out,
-                load_average=list(load_avg),
+                value=sample.cpu_percent,
+                cpu_usage=sample.cpu_percent,
+                memory_usage=sample.memory_percent,
+                disk_usage=sample.disk_percent,
+                network_in=sample.network_in,
+                network_out=sample.network_out,
+                load_average=list(sample.load_average),
                 labels={
                     "host": "monitoring-service",
-                    "cpu_count": str(cpu_count)
+                    "cpu_count": str(sample.cpu_count)
                 }
             )
         except Exception as e:
@@ -160,36 +147,36 @@ class MetricsCollector:
     async def collect_ollama_metrics(self) -> OllamaMetric:
         """Сбор метрик Ollama"""
         try:
-            async with aiohttp.ClientSession() as session:
-                # Получение информации о моделях
-                async with session.get(f"{settings.ollama.url}/api/tags") as response:
-                    if response.status == 200:
-                        models_data = await response.json()
-                        models = models_data.get('models', [])
+            session = get_http_clients().session("ollama")
+            # Получение информации о моделях
+            async with session.get(f"{settings.ollama.url}/api/tags") as response:
+                if response.status == 200:
+                    models_data = await response.json()
+                    models = models_data.get('models', [])
+                    
+                    if models:
+                        model = models[0]  # Берем первую модель
+                        model_name = model.get('name', 'unknown')
                         
-                        if models:
-                            model = models[0]  # Берем первую модель
-                            model_name = model.get('name', 'unknown')
-                            
-                            # Получение детальной информации о модели
-                            async with session.post(
-                                f"{settings.ollama.url}/api/show",
-                                json={"name": model_name}
-                            ) as show_response:
-                                if show_response.status == 200:
-                                    model_info = await show_response.json()
-                                    
-                                    return OllamaMetric(
-                                        name="ollama_metrics",
-                                        value=len(models),
-                                        model=model_name,
-                                        response_time=0.0,  # TODO: измерить реальное время
-                                        tokens_per_second=0.0,  # TODO: измерить
-                                        memory_usage=float(model_info.get('size', 0)),
-                                        requests_per_minute=0,  # TODO: подсчитать
-                                        errors=0,
-                                        labels={"ollama_url": settings.ollama.url}
-                                    )
+                        # Получение детальной информации о модели
+                        async with session.post(
+                            f"{settings.ollama.url}/api/show",
+                            json={"name": model_name}
+                        ) as show_response:
+                            if show_response.status == 200:
+                                model_info = await show_response.json()
+                                
+                                return OllamaMetric(
+                                    name="ollama_metrics",
+                                    value=len(models),
+                                    model=model_name,
+                                    response_time=0.0,  # TODO: измерить реальное время
+                                    tokens_per_second=0.0,  # TODO: измерить
+                                    memory_usage=float(model_info.get('size', 0)),
+                                    requests_per_minute=0,  # TODO: подсчитать
+                                    errors=0,
+                                    labels={"ollama_url": settings.ollama.url}
+                                )
             
             # Если не удалось получить данные
             return OllamaMetric(
@@ -342,68 +329,103 @@ class AlertService:
         
         return alerts
     
+    def _alerts_key(self, suffix: str = "") -> str:
+        return f"{settings.redis.prefix}alerts{suffix}"
+
     async def save_alerts(self, alerts: List[Alert]):
-        """Сохранение алертов в Redis"""
+        """Сохранение алертов в Redis
+
+        Алерт хранится как JSON в хеше alerts и индексируется по времени
+        (sorted set alerts:by_time) и по статусу (alerts:status:<status>).
+        """
         try:
             if not self.redis_client:
                 return
             
+            pipe = self.redis_client.pipeline(transaction=False)
             for alert in alerts:
-                alert.id = f"alert:{int(time.time())}:{alert.name}"
-                alert_data = alert.dict()
-                alert_data['created_at'] = alert.created_at.isoformat()
-                
-                # Сохранение в Redis с TTL
-                await self.redis_client.hset(
-                    f"{settings.redis.prefix}alerts",
-                    alert.id,
-                    str(alert_data)
-                )
-                
-                # Установка TTL для алерта (30 дней)
-                await self.redis_client.expire(
-                    f"{settings.redis.prefix}alerts",
-                    30 * 24 * 3600
-                )
+                alert.id = f"alert:{int(time.time())}:{alert.title}"
+                score = to_epoch(alert.timestamp)
+                pipe.hset(self._alerts_key(), alert.id, alert.json())
+                pipe.zadd(self._alerts_key(":by_time"), {alert.id: score})
+                pipe.zadd(self._alerts_key(f":status:{alert.status.value}"), {alert.id: score})
+            await pipe.execute()
+            
+            await self._expire_alerts(time.time() - settings.monitoring.retention_days * 24 * 3600)
         except Exception as e:
             logger.error(f"Error saving alerts: {e}")
     
-    async def get_alerts(self, status: Optional[AlertStatus] = None) -> List[Alert]:
-        """Получение алертов из Redis"""
+    async def _expire_alerts(self, before: float):
+        """Удаление алертов старше before вместе с индексами"""
+        expired = await self.redis_client.zrangebyscore(self._alerts_key(":by_time"), "-inf", before)
+        if not expired:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hdel(self._alerts_key(), *expired)
+        pipe.zrem(self._alerts_key(":by_time"), *expired)
+        for status in AlertStatus:
+            pipe.zrem(self._alerts_key(f":status:{status.value}"), *expired)
+        await pipe.execute()
+    
+    async def get_alerts(
+        self,
+        status: Optional[AlertStatus] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[Alert]:
+        """Получение алертов из Redis, от новых к старым
+
+        Отбор по статусу и времени выполняется по индексам, из хеша читаются
+        только подходящие алерты.
+        """
         try:
             if not self.redis_client:
                 return []
             
-            alerts_data = await self.redis_client.hgetall(f"{settings.redis.prefix}alerts")
-            alerts = []
+            index = self._alerts_key(f":status:{status.value}" if status else ":by_time")
+            ids = await self.redis_client.zrevrangebyscore(
+                index,
+                to_epoch(end_time) if end_time else "+inf",
+                to_epoch(start_time) if start_time else "-inf",
+                start=0 if limit else None,
+                num=limit
+            )
+            if not ids:
+                return []
             
-            for alert_id, alert_str in alerts_data.items():
+            alerts = []
+            for alert_id, alert_json in zip(ids, await self.redis_client.hmget(self._alerts_key(), ids)):
+                if alert_json is None:
+                    continue
                 try:
-                    alert_dict = eval(alert_str)  # Простой способ для демо
-                    alert = Alert(**alert_dict)
-                    
-                    if status is None or alert.status == status:
-                        alerts.append(alert)
+                    alerts.append(Alert.parse_raw(alert_json))
                 except Exception as e:
                     logger.warning(f"Error parsing alert {alert_id}: {e}")
             
-            return sorted(alerts, key=lambda x: x.created_at, reverse=True)
+            return alerts
         except Exception as e:
             logger.error(f"Error getting alerts: {e}")
             return []
     
+    async def count_alerts(self, status: Optional[AlertStatus] = None) -> int:
+        """Количество алертов по индексу"""
+        if not self.redis_client:
+            return 0
+        index = self._alerts_key(f":status:{status.value}" if status else ":by_time")
+        return await self.redis_client.zcard(index)
+    
     async def update_alert_status(self, alert_id: str, status: AlertStatus, acknowledged_by: Optional[str] = None):
         """Обновление статуса алерта"""
         try:
             if not self.redis_client:
                 return
             
-            alerts_data = await self.redis_client.hgetall(f"{settings.redis.prefix}alerts")
+            alert_json = await self.redis_client.hget(self._alerts_key(), alert_id)
             
-            if alert_id in alerts_data:
-                alert_str = alerts_data[alert_id]
-                alert_dict = eval(alert_str)
-                alert = Alert(**alert_dict)
+            if alert_json:
+                alert = Alert.parse_raw(alert_json)
+                previous = alert.status
                 
                 alert.status = status
                 if status == AlertStatus.RESOLVED:
@@ -412,12 +434,12 @@ class AlertService:
                     alert.acknowledged_by = acknowledged_by
                     alert.acknowledged_at = datetime.utcnow()
                 
-                # Сохранение обновленного алерта
-                await self.redis_client.hset(
-                    f"{settings.redis.prefix}alerts",
-                    alert_id,
-                    str(alert.dict())
-                )
+                # Сохранение обновленного алерта и перенос между индексами статусов
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.hset(self._alerts_key(), alert_id, alert.json())
+                pipe.zrem(self._alerts_key(f":status:{previous.value}"), alert_id)
+                pipe.zadd(self._alerts_key(f":status:{status.value}"), {alert_id: to_epoch(alert.timestamp)})
+                await pipe.execute()
         except Exception as e:
             logger.error(f"Error updating alert status: {e}")
 
@@ -426,6 +448,7 @@ class HealthCheckService:
     """Сервис проверки здоровья"""
     
     def __init__(self):
+        self.redis_client = None
         self.services = {
             "database": {
                 "url": settings.database.url,
@@ -441,6 +464,10 @@ class HealthCheckService:
             }
         }
     
+    async def initialize(self, redis_client):
+        """Инициализация сервиса (общий клиент Redis приложения)"""
+        self.redis_client = redis_client
+    
     async def check_service_health(self, service_name: str, service_config: Dict[str, str]) -> Service:
         """Проверка здоровья конкретного сервиса"""
         start_time = time.time()
@@ -455,16 +482,9 @@ class HealthCheckService:
             elif service_name == "redis":
                 # Проверка Redis
                 try:
-                    r = redis.Redis(
-                        host=settings.redis.host,
-                        port=settings.redis.port,
-                        db=settings.redis.db,
-                        password=settings.redis.password
-                    )
-                    await r.ping()
+                    await self.redis_client.ping()
                     status = ServiceStatus.HEALTHY
                     response_time = time.time() - start_time
-                    await r.close()
                 except Exception:
                     status = ServiceStatus.DOWN
                     response_time = None
@@ -472,14 +492,14 @@ class HealthCheckService:
             elif service_name == "ollama":
                 # Проверка Ollama
                 try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(service_config["url"], timeout=5) as response:
-                            if response.status == 200:
-                                status = ServiceStatus.HEALTHY
-                                response_time = time.time() - start_time
-                            else:
-                                status = ServiceStatus.DEGRADED
-                                response_time = None
+                    session = get_http_clients().session("ollama")
+                    async with session.get(service_config["url"], timeout=aiohttp.ClientTimeout(total=5)) as response:
+                        if response.status == 200:
+                            status = ServiceStatus.HEALTHY
+                            response_time = time.time() - start_time
+                        else:
+                            status = ServiceStatus.DEGRADED
+                            response_time = None
                 except Exception:
                     status = ServiceStatus.DOWN
                     response_time = None
@@ -530,10 +550,19 @@ class DashboardService:
     
     def __init__(self):
         self.redis_client = None
+        self.timeseries: Optional[TimeSeriesStore] = None
+        self.alert_service: Optional[AlertService] = None
     
-    async def initialize(self, redis_client):
+    async def initialize(
+        self,
+        redis_client,
+        timeseries: Optional[TimeSeriesStore] = None,
+        alert_service: Optional[AlertService] = None
+    ):
         """Инициализация сервиса"""
         self.redis_client = redis_client
+        self.timeseries = timeseries
+        self.alert_service = alert_service
     
     async def get_dashboard_data(self) -> Dict[str, Any]:
         """Получение данных для дашборда"""
@@ -541,16 +570,19 @@ class DashboardService:
             # Получение последних метрик
             metrics_data = await self.redis_client.get(f"{settings.redis.prefix}latest_metrics")
             
-            # Получение алертов
-            alerts_data = await self.redis_client.hgetall(f"{settings.redis.prefix}alerts")
+            # Количество алертов по индексу, без чтения самих алертов
+            if self.alert_service:
+                alerts_count = await self.alert_service.count_alerts()
+            else:
+                alerts_count = await self.redis_client.hlen(f"{settings.redis.prefix}alerts")
             
             # Получение статистики сервисов
             services_data = await self.redis_client.get(f"{settings.redis.prefix}services_status")
             
             return {
-                "metrics": metrics_data,
-                "alerts_count": len(alerts_data),
-                "services": services_data,
+                "metrics": json.loads(metrics_data) if metrics_data else None,
+                "alerts_count": alerts_count,
+                "services": json.loads(services_data) if services_data else None,
                 "timestamp": datetime.utcnow().isoformat()
             }
         except Exception as e:
@@ -560,4 +592,20 @@ class DashboardService:
                 "alerts_count": 0,
                 "services": None,
                 "timestamp": datetime.utcnow().isoformat()
-            } 
\ No newline at end of file
+            }
+    
+    async def get_trends(
+        self,
+        series: List[str],
+        window: float = 3600.0,
+        step: float = 60.0
+    ) -> Dict[str, List[Dict[str, float]]]:
+        """Тренды рядов за последние window секунд с шагом step"""
+        if not self.timeseries:
+            return {}
+        end = time.time()
+        start = end - window
+        trends = await asyncio.gather(*(
+            self.timeseries.aggregate(name, start, end, step) for name in series
+        ))
+        return dict(zip(series, trends))
@@ -0,0 +1,359 @@
+"""
+Хранилище временных рядов метрик в Redis с прореживанием и retention
+"""
+
+import logging
+import struct
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS = {"1m": 60, "1h": 3600}
+
+
+# Кодирование чанков: delta-of-delta для времени и XOR для значений
+# (побайтовый вариант Gorilla). Неизменившееся значение занимает 1 байт,
+# время при постоянном интервале сбора - 1 байт.
+
+def _zigzag(n: int) -> int:
+    return (n << 1) ^ (n >> 63)
+
+
+def _unzigzag(n: int) -> int:
+    return (n >> 1) ^ -(n & 1)
+
+
+def _write_varint(buf: bytearray, n: int):
+    while n >= 0x80:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _float_bits(value: float) -> int:
+    return struct.unpack("<Q", struct.pack("<d", value))[0]
+
+
+def _bits_float(bits: int) -> float:
+    return struct.unpack("<d", struct.pack("<Q", bits))[0]
+
+
+def encode_chunk(timestamps: List[int], values: List[float]) -> bytes:
+    """Кодирование точек (время в мс, значение) в компактный чанк"""
+    buf = bytearray()
+    _write_varint(buf, len(timestamps))
+    prev_ts = prev_delta = prev_bits = 0
+    for i, (ts, value) in enumerate(zip(timestamps, values)):
+        if i == 0:
+            _write_varint(buf, ts)
+        else:
+            delta = ts - prev_ts
+            _write_varint(buf, _zigzag(delta - prev_delta))
+            prev_delta = delta
+        prev_ts = ts
+
+        bits = _float_bits(value)
+        xor = bits ^ prev_bits
+        if xor == 0:
+            buf.append(0)
+        else:
+            trailing = (xor & -xor).bit_length() - 1
+            buf.append(trailing + 1)
+            _write_varint(buf, xor >> trailing)
+        prev_bits = bits
+    return bytes(buf)
+
+
+def decode_chunk(data: bytes) -> List[Tuple[int, float]]:
+    """Декодирование чанка в список (время в мс, значение)"""
+    count, pos = _read_varint(data, 0)
+    points = []
+    prev_ts = prev_delta = prev_bits = 0
+    for i in range(count):
+        if i == 0:
+            ts, pos = _read_varint(data, pos)
+        else:
+            encoded, pos = _read_varint(data, pos)
+            prev_delta += _unzigzag(encoded)
+            ts = prev_ts + prev_delta
+        prev_ts = ts
+
+        marker = data[pos]
+        pos += 1
+        if marker:
+            xor, pos = _read_varint(data, pos)
+            prev_bits ^= xor << (marker - 1)
+        points.append((ts, _bits_float(prev_bits)))
+    return points
+
+
+@dataclass
+class Bucket:
+    """Агрегат значений за интервал прореживания"""
+    start: float
+    count: int = 0
+    sum: float = 0.0
+    min: float = float("inf")
+    max: float = float("-inf")
+    last: float = 0.0
+
+    @property
+    def avg(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.last = value
+
+    def merge(self, other: "Bucket"):
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.last = other.last
+
+    def to_member(self) -> bytes:
+        return f"{self.start:.0f}:{self.count}:{self.sum!r}:{self.min!r}:{self.max!r}:{self.last!r}".encode()
+
+    @classmethod
+    def from_member(cls, member: bytes) -> "Bucket":
+        start, count, total, low, high, last = member.decode().split(":")
+        return cls(float(start), int(count), float(total), float(low), float(high), float(last))
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "timestamp": self.start,
+            "count": self.count,
+            "avg": self.avg,
+            "min": self.min,
+            "max": self.max,
+            "last": self.last
+        }
+
+
+@dataclass
+class RetentionPolicy:
+    """Сроки хранения по разрешениям, секунды"""
+    raw: float = 24 * 3600
+    minute: float = 7 * 24 * 3600
+    hour: float = 90 * 24 * 3600
+
+    def for_resolution(self, resolution: str) -> float:
+        return {"raw": self.raw, "1m": self.minute, "1h": self.hour}[resolution]
+
+
+@dataclass
+class _SeriesState:
+    head_start: float = 0.0
+    timestamps: List[int] = field(default_factory=list)
+    values: List[float] = field(default_factory=list)
+    buckets: Dict[str, Bucket] = field(default_factory=dict)
+
+
+class TimeSeriesStore:
+    """Временные ряды метрик в Redis
+
+    Сырые точки ряда хранятся чанками в sorted set (score - время первой
+    точки): открытый чанк перезаписывается при каждом добавлении, после
+    chunk_points точек или chunk_seconds секунд он закрывается и больше не
+    меняется. Параллельно ведутся агрегаты 1m и 1h (count/sum/min/max/last),
+    по одному элементу sorted set на интервал. Старые данные удаляются
+    согласно RetentionPolicy при закрытии чанков и интервалов.
+
+    Клиент Redis должен работать с bytes (decode_responses=False).
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        prefix: str = "monitoring:",
+        retention: Optional[RetentionPolicy] = None,
+        chunk_points: int = 120,
+        chunk_seconds: float = 3600.0
+    ):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.retention = retention or RetentionPolicy()
+        self.chunk_points = chunk_points
+        self.chunk_seconds = chunk_seconds
+        self._series: Dict[str, _SeriesState] = {}
+        self._known: Set[str] = set()
+
+    def _key(self, series: str, resolution: str) -> str:
+        return f"{self.prefix}ts:{series}:{resolution}"
+
+    async def add(self, series: str, value: float, timestamp: Optional[float] = None):
+        """Добавление точки в ряд"""
+        await self.add_many({series: value}, timestamp)
+
+    async def add_many(self, values: Dict[str, float], timestamp: Optional[float] = None):
+        """Добавление точек нескольких рядов одним pipeline"""
+        timestamp = time.time() if timestamp is None else timestamp
+        await self._restore_buckets(values, timestamp)
+        pipe = self.redis.pipeline(transaction=False)
+        new_series = []
+        for series, value in values.items():
+            self._append(pipe, series, float(value), timestamp)
+            if series not in self._known:
+                new_series.append(series)
+        if new_series:
+            pipe.sadd(f"{self.prefix}ts:series", *new_series)
+        await pipe.execute()
+        self._known.update(new_series)
+
+    async def _restore_buckets(self, names: Iterable[str], timestamp: float):
+        """Загрузка текущих агрегатов рядов, которых еще нет в памяти
+
+        После перезапуска состояние рядов пустое; без загрузки первая точка
+        перезаписала бы сохраненный агрегат интервала только новыми значениями.
+        """
+        missing = [
+            (series, resolution)
+            for series in names
+            for resolution in ROLLUPS
+            if resolution not in self._series.get(series, _SeriesState()).buckets
+        ]
+        if not missing:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for series, resolution in missing:
+            start = timestamp - timestamp % ROLLUPS[resolution]
+            pipe.zrangebyscore(self._key(series, resolution), start, start)
+        results = await pipe.execute()
+        for (series, resolution), members in zip(missing, results):
+            start = timestamp - timestamp % ROLLUPS[resolution]
+            state = self._series.setdefault(series, _SeriesState())
+            state.buckets[resolution] = Bucket.from_member(members[-1]) if members else Bucket(start)
+
+    def _append(self, pipe, series: str, value: float, timestamp: float):
+        state = self._series.setdefault(series, _SeriesState())
+        raw_key = self._key(series, "raw")
+
+        if state.timestamps and (
+            len(state.timestamps) >= self.chunk_points or timestamp - state.head_start >= self.chunk_seconds
+        ):
+            # Чанк закрыт и уже записан; удаляем данные старше retention
+            state.timestamps, state.values = [], []
+            pipe.zremrangebyscore(raw_key, "-inf", timestamp - self.retention.raw)
+        if not state.timestamps:
+            state.head_start = timestamp
+        state.timestamps.append(int(timestamp * 1000))
+        state.values.append(value)
+        pipe.zremrangebyscore(raw_key, state.head_start, state.head_start)
+        pipe.zadd(raw_key, {encode_chunk(state.timestamps, state.values): state.head_start})
+
+        for resolution, seconds in ROLLUPS.items():
+            key = self._key(series, resolution)
+            start = timestamp - timestamp % seconds
+            bucket = state.buckets.get(resolution)
+            if bucket is None or bucket.start != start:
+                if bucket is not None:
+                    pipe.zremrangebyscore(key, "-inf", timestamp - self.retention.for_resolution(resolution))
+                bucket = state.buckets[resolution] = Bucket(start)
+            bucket.add(value)
+            pipe.zremrangebyscore(key, start, start)
+            pipe.zadd(key, {bucket.to_member(): start})
+
+    async def series(self) -> List[str]:
+        """Имена всех рядов"""
+        names = await self.redis.smembers(f"{self.prefix}ts:series")
+        return sorted(name.decode() if isinstance(name, bytes) else name for name in names)
+
+    async def range(self, series: str, start: float, end: float) -> List[Tuple[float, float]]:
+        """Сырые точки ряда за [start, end]"""
+        chunks = await self.redis.zrangebyscore(self._key(series, "raw"), start - self.chunk_seconds, end)
+        points = []
+        for chunk in chunks:
+            for ts, value in decode_chunk(chunk):
+                ts /= 1000
+                if start <= ts <= end:
+                    points.append((ts, value))
+        return points
+
+    async def rollups(self, series: str, resolution: str, start: float, end: float) -> List[Bucket]:
+        """Агрегаты 1m или 1h за [start, end]"""
+        seconds = ROLLUPS[resolution]
+        members = await self.redis.zrangebyscore(self._key(series, resolution), start - start % seconds, end)
+        return [Bucket.from_member(member) for member in members]
+
+    async def aggregate(self, series: str, start: float, end: float, step: float) -> List[Dict[str, float]]:
+        """Агрегаты ряда с шагом step за [start, end]
+
+        Источник выбирается по шагу и возрасту данных: 1h агрегаты для шага
+        от часа, 1m - от минуты, иначе сырые точки, если они еще хранятся.
+        """
+        now = time.time()
+        if step >= 3600 or start < now - self.retention.minute:
+            resolution = "1h"
+        elif step >= 60 or start < now - self.retention.raw:
+            resolution = "1m"
+        else:
+            resolution = "raw"
+
+        if resolution == "raw":
+            sources = []
+            for ts, value in await self.range(series, start, end):
+                bucket = Bucket(ts)
+                bucket.add(value)
+                sources.append(bucket)
+        else:
+            sources = await self.rollups(series, resolution, start, end)
+
+        return [bucket.to_dict() for bucket in self._rebucket(sources, start, step)]
+
+    @staticmethod
+    def _rebucket(sources: Iterable[Bucket], start: float, step: float) -> List[Bucket]:
+        result: Dict[float, Bucket] = {}
+        for source in sources:
+            bucket_start = start + ((source.start - start) // step) * step
+            bucket = result.get(bucket_start)
+            if bucket is None:
+                bucket = result[bucket_start] = Bucket(bucket_start)
+            bucket.merge(source)
+        return [result[key] for key in sorted(result)]
+
+    async def latest(self, series: str) -> Optional[Tuple[float, float]]:
+        """Последняя точка ряда"""
+        state = self._series.get(series)
+        if state is not None and state.timestamps:
+            return state.timestamps[-1] / 1000, state.values[-1]
+        chunks = await self.redis.zrange(self._key(series, "raw"), -1, -1)
+        if not chunks:
+            return None
+        ts, value = decode_chunk(chunks[0])[-1]
+        return ts / 1000, value
+
+
+def flatten_metrics(metrics: Dict[str, object]) -> Dict[str, float]:
+    """Числовые поля собранных метрик в виде рядов "<группа>.<поле>" """
+    values = {}
+    for group, metric in metrics.items():
+        data = metric.dict() if hasattr(metric, "dict") else dict(metric)
+        for name, value in data.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[f"{group}.{name}"] = float(value)
+    return values
+
+
+def to_epoch(moment: datetime) -> float:
+    """Время в секундах epoch; наивные datetime считаются UTC"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
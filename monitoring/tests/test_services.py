@@ -10,6 +10,7 @@ from datetime import datetime
 from app.services import (
     MetricsCollector, AlertService, HealthCheckService, DashboardService
 )
+from app.host_sampler import HostSample, HostSampler
 from app.models import (
     SystemMetric, DatabaseMetric, CacheMetric, OllamaMetric,
     Alert, AlertSeverity, AlertStatus, Service, ServiceStatus
@@ -107,9 +108,9 @@ class TestMetricsCollector:
     @pytest.mark.asyncio
     async def test_collect_ollama_metrics(self, collector):
         """Тест сбора метрик Ollama"""
-        with patch('aiohttp.ClientSession') as mock_session_class:
-            mock_session = AsyncMock()
-            mock_session_class.return_value.__aenter__.return_value = mock_session
+        with patch('app.services.get_http_clients') as mock_registry:
+            mock_session = MagicMock()
+            mock_registry.return_value.session.return_value = mock_session
             
             # Мок для /api/tags
             mock_response_tags = AsyncMock()
@@ -296,89 +297,84 @@ class TestAlertService:
         assert alert.severity == AlertSeverity.ERROR
         assert alert.current_value == 5
     
-    @pytest.mark.asyncio
-    async def test_save_alerts(self, alert_service):
-        """Тест сохранения алертов"""
+    @staticmethod
+    def _redis_with_pipeline():
         redis_client = AsyncMock()
-        alert_service.redis_client = redis_client
-        
-        alert = Alert(
-            name="Test Alert",
-            description="Test description",
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[])
+        redis_client.pipeline = MagicMock(return_value=pipe)
+        redis_client.zrangebyscore.return_value = []
+        return redis_client, pipe
+    
+    @staticmethod
+    def _alert(**overrides):
+        data = dict(
+            title="Test Alert",
+            message="Test description",
             severity=AlertSeverity.WARNING,
             source="system",
+            service="monitoring",
             metric_name="cpu_usage",
+            metric_value=85.0,
             threshold=80.0,
-            current_value=85.0
+            timestamp=datetime(2023, 1, 1)
         )
+        data.update(overrides)
+        return Alert(**data)
+    
+    @pytest.mark.asyncio
+    async def test_save_alerts(self, alert_service):
+        """Тест сохранения алертов в JSON с индексами"""
+        redis_client, pipe = self._redis_with_pipeline()
+        alert_service.redis_client = redis_client
         
+        alert = self._alert()
         await alert_service.save_alerts([alert])
         
-        # Проверяем, что Redis методы были вызваны
-        assert redis_client.hset.called
-        assert redis_client.expire.called
+        key, alert_id, payload = pipe.hset.call_args.args
+        assert key.endswith("alerts")
+        assert Alert.parse_raw(payload).title == "Test Alert"
+        indexes = {call.args[0] for call in pipe.zadd.call_args_list}
+        assert any(index.endswith("alerts:by_time") for index in indexes)
+        assert any(index.endswith("alerts:status:active") for index in indexes)
+        assert pipe.execute.called
     
     @pytest.mark.asyncio
     async def test_get_alerts(self, alert_service):
-        """Тест получения алертов"""
+        """Тест получения алертов по индексу статуса"""
         redis_client = AsyncMock()
         alert_service.redis_client = redis_client
         
-        # Мок данных из Redis
-        alert_data = {
-            'alert:123:test': str({
-                'id': 'alert:123:test',
-                'name': 'Test Alert',
-                'description': 'Test description',
-                'severity': 'warning',
-                'status': 'active',
-                'source': 'system',
-                'metric_name': 'cpu_usage',
-                'threshold': 80.0,
-                'current_value': 85.0,
-                'created_at': '2023-01-01T00:00:00'
-            })
-        }
-        redis_client.hgetall.return_value = alert_data
+        alert = self._alert(id="alert:123:test")
+        redis_client.zrevrangebyscore.return_value = ["alert:123:test"]
+        redis_client.hmget.return_value = [alert.json()]
         
-        alerts = await alert_service.get_alerts()
+        alerts = await alert_service.get_alerts(status=AlertStatus.ACTIVE, limit=10)
         
+        index = redis_client.zrevrangebyscore.call_args.args[0]
+        assert index.endswith("alerts:status:active")
         assert len(alerts) == 1
-        alert = alerts[0]
-        assert alert.name == "Test Alert"
-        assert alert.severity == AlertSeverity.WARNING
-        assert alert.status == AlertStatus.ACTIVE
+        assert alerts[0].title == "Test Alert"
+        assert alerts[0].severity == AlertSeverity.WARNING
+        assert alerts[0].status == AlertStatus.ACTIVE
     
     @pytest.mark.asyncio
     async def test_update_alert_status(self, alert_service):
-        """Тест обновления статуса алерта"""
-        redis_client = AsyncMock()
+        """Тест обновления статуса алерта с переносом между индексами"""
+        redis_client, pipe = self._redis_with_pipeline()
         alert_service.redis_client = redis_client
-        
-        # Мок данных из Redis
-        alert_data = {
-            'alert:123:test': str({
-                'id': 'alert:123:test',
-                'name': 'Test Alert',
-                'description': 'Test description',
-                'severity': 'warning',
-                'status': 'active',
-                'source': 'system',
-                'metric_name': 'cpu_usage',
-                'threshold': 80.0,
-                'current_value': 85.0,
-                'created_at': '2023-01-01T00:00:00'
-            })
-        }
-        redis_client.hgetall.return_value = alert_data
+        redis_client.hget.return_value = self._alert(id="alert:123:test").json()
         
         await alert_service.update_alert_status(
             'alert:123:test',
             AlertStatus.RESOLVED
         )
         
-        # Проверяем, что Redis метод был вызван для обновления
-        assert redis_client.hset.called
+        updated = Alert.parse_raw(pipe.hset.call_args.args[2])
+        assert updated.status == AlertStatus.RESOLVED
+        assert updated.resolved_at is not None
+        assert pipe.zrem.call_args.args[0].endswith("alerts:status:active")
+        assert pipe.zadd.call_args.args[0].endswith("alerts:status:resolved")
 
 
 class TestHealthCheckService:
@@ -413,17 +409,15 @@ class TestHealthCheckService:
             "name": "Test Redis"
         }
         
-        with patch('redis.asyncio.Redis') as mock_redis_class:
-            mock_redis = AsyncMock()
-            mock_redis_class.return_value = mock_redis
-            mock_redis.ping = AsyncMock()
-            mock_redis.close = AsyncMock()
-            
-            service = await health_checker.check_service_health("redis", service_config)
-            
-            assert isinstance(service, Service)
-            assert service.name == "Test Redis"
-            assert service.status == ServiceStatus.HEALTHY
+        mock_redis = AsyncMock()
+        await health_checker.initialize(mock_redis)
+        
+        service = await health_checker.check_service_health("redis", service_config)
+        
+        assert isinstance(service, Service)
+        assert service.name == "Test Redis"
+        assert service.status == ServiceStatus.HEALTHY
+        mock_redis.ping.assert_awaited_once()
     
     @pytest.mark.asyncio
     async def test_check_service_health_ollama(self, health_checker):
@@ -433,9 +427,9 @@ class TestHealthCheckService:
             "name": "Test Ollama"
         }
         
-        with patch('aiohttp.ClientSession') as mock_session_class:
-            mock_session = AsyncMock()
-            mock_session_class.return_value.__aenter__.return_value = mock_session
+        with patch('app.services.get_http_clients') as mock_registry:
+            mock_session = MagicMock()
+            mock_registry.return_value.session.return_value = mock_session
             
             mock_response = AsyncMock()
             mock_response.status = 200
@@ -573,4 +567,27 @@ class TestIntegration:
         alerts = await alert_service.get_alerts()
         
         assert len(alerts) == 1
-        assert alerts[0].name == "Test Alert" 
\ No newline at end of file
+        assert alerts[0].name == "Test Alert" 
+
+
+class TestHostSampler:
+    """Тесты фонового сборщика системных метрик"""
+    
+    def test_snapshot_uses_latest_sample(self):
+        """Тест: снимок берется из буфера без обращения к psutil"""
+        sampler = HostSampler()
+        for i in range(3):
+            sampler._record(HostSample(
+                timestamp=100.0 + 10 * i, cpu_percent=20.0 + i, cpu_count=4,
+                memory_percent=50.0, load_average=(1.0,), disk_percent=30.0,
+                network_in=1000 * i, network_out=0
+            ))
+        
+        with patch('psutil.cpu_percent') as mock_cpu:
+            sample = sampler.snapshot()
+        
+        mock_cpu.assert_not_called()
+        assert sample.cpu_percent == 22.0
+        assert sampler.rate('network_in') == 100.0
+        assert sampler.trend('cpu_percent') == pytest.approx(0.1)
+        assert len(sampler.samples(window=10)) == 2
@@ -0,0 +1,155 @@
+"""
+Тесты хранилища временных рядов
+"""
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.timeseries import (
+    Bucket, RetentionPolicy, TimeSeriesStore, decode_chunk, encode_chunk, flatten_metrics
+)
+
+
+class FakeRedis:
+    """Минимальная замена Redis: sorted set и set в памяти"""
+
+    def __init__(self):
+        self.zsets = {}
+        self.sets = {}
+
+    def pipeline(self, transaction=True):
+        pipe = MagicMock()
+        ops = []
+        for name in ("zadd", "zremrangebyscore", "sadd", "zrangebyscore"):
+            setattr(pipe, name, lambda *args, _name=name: ops.append((_name, args)))
+
+        async def execute():
+            results = [getattr(self, f"_{name}")(*args) for name, args in ops]
+            ops.clear()
+            return results
+
+        pipe.execute = execute
+        return pipe
+
+    def _zadd(self, key, mapping):
+        zset = self.zsets.setdefault(key, {})
+        zset.update(mapping)
+
+    def _zremrangebyscore(self, key, low, high):
+        low = float(low)
+        high = float(high)
+        zset = self.zsets.get(key, {})
+        for member in [m for m, score in zset.items() if low <= score <= high]:
+            del zset[member]
+
+    def _sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(m.encode() for m in members)
+
+    async def zrangebyscore(self, key, low, high):
+        return self._zrangebyscore(key, low, high)
+
+    def _zrangebyscore(self, key, low, high):
+        low = float(low)
+        high = float(high)
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])
+        return [member for member, score in items if low <= score <= high]
+
+    async def zrange(self, key, start, end):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])
+        members = [member for member, _ in items]
+        return members[start:] if end == -1 else members[start:end + 1]
+
+    async def smembers(self, key):
+        return self.sets.get(key, set())
+
+
+class TestChunkEncoding:
+    """Тесты кодирования чанков"""
+
+    def test_roundtrip(self):
+        timestamps = [1_700_000_000_000 + i * 30_000 for i in range(50)]
+        timestamps[10] += 7
+        values = [42.0] * 20 + [float(i) * 0.37 - 3 for i in range(30)]
+
+        points = decode_chunk(encode_chunk(timestamps, values))
+
+        assert points == list(zip(timestamps, values))
+
+    def test_regular_series_is_compact(self):
+        timestamps = [1_700_000_000_000 + i * 30_000 for i in range(100)]
+        data = encode_chunk(timestamps, [5.0] * 100)
+
+        # 2 байта на точку: delta-of-delta и маркер неизменного значения
+        assert len(data) < 100 * 2 + 20
+
+
+class TestTimeSeriesStore:
+    """Тесты хранилища временных рядов"""
+
+    @pytest.fixture
+    def store(self):
+        return TimeSeriesStore(FakeRedis(), chunk_points=10)
+
+    @pytest.mark.asyncio
+    async def test_range_and_latest(self, store):
+        for i in range(25):
+            await store.add("system.cpu_usage", float(i), timestamp=1000.0 + i * 10)
+
+        points = await store.range("system.cpu_usage", 1050.0, 1100.0)
+
+        assert points == [(1000.0 + i * 10, float(i)) for i in range(5, 11)]
+        assert await store.latest("system.cpu_usage") == (1240.0, 24.0)
+        assert await store.series() == ["system.cpu_usage"]
+
+    @pytest.mark.asyncio
+    async def test_minute_rollups(self, store):
+        for i in range(12):
+            await store.add("cache.hit_rate", float(i), timestamp=1200.0 + i * 10)
+
+        buckets = await store.rollups("cache.hit_rate", "1m", 1200.0, 1319.0)
+
+        assert [bucket.start for bucket in buckets] == [1200.0, 1260.0]
+        assert buckets[0].count == 6
+        assert buckets[0].avg == pytest.approx(2.5)
+        assert (buckets[1].min, buckets[1].max, buckets[1].last) == (6.0, 11.0, 11.0)
+
+    @pytest.mark.asyncio
+    async def test_rollups_survive_restart(self, store):
+        for i in range(3):
+            await store.add("cache.hit_rate", float(i), timestamp=3600.0 + i * 10)
+
+        # Новый экземпляр с тем же Redis: состояние рядов в памяти пустое
+        restarted = TimeSeriesStore(store.redis, chunk_points=10)
+        for i in range(3, 5):
+            await restarted.add("cache.hit_rate", float(i), timestamp=3600.0 + i * 10)
+
+        minute, = await restarted.rollups("cache.hit_rate", "1m", 3600.0, 3659.0)
+        hour, = await restarted.rollups("cache.hit_rate", "1h", 3600.0, 7199.0)
+        for bucket in (minute, hour):
+            assert (bucket.count, bucket.sum, bucket.min, bucket.max, bucket.last) == (5, 10.0, 0.0, 4.0, 4.0)
+
+    @pytest.mark.asyncio
+    async def test_raw_retention(self):
+        store = TimeSeriesStore(FakeRedis(), retention=RetentionPolicy(raw=100), chunk_points=5)
+        for i in range(30):
+            await store.add("system.cpu_usage", 1.0, timestamp=1000.0 + i * 10)
+
+        points = await store.range("system.cpu_usage", 0, 2000)
+
+        assert points[0][0] >= 1290.0 - 100 - 5 * 10
+
+    def test_rebucket(self):
+        sources = [Bucket(start) for start in (0.0, 60.0, 120.0, 180.0)]
+        for value, bucket in enumerate(sources):
+            bucket.add(float(value))
+
+        result = TimeSeriesStore._rebucket(sources, 0.0, 120.0)
+
+        assert [(bucket.start, bucket.count, bucket.sum) for bucket in result] == [(0.0, 2, 1.0), (120.0, 2, 5.0)]
+
+
+def test_flatten_metrics():
+    metric = MagicMock()
+    metric.dict.return_value = {"cpu_usage": 12.5, "cpu_count": 4, "ok": True, "labels": {}}
+
+    assert flatten_metrics({"system": metric}) == {"system.cpu_usage": 12.5, "system.cpu_count": 4.0}
@@ -0,0 +1,341 @@
+"""
+🕷️ Асинхронный краулер доменов с пулом соединений
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Обработчик страницы: (url, html, depth) -> найденные ссылки
+PageHandler = Callable[[str, str, int], Awaitable[Iterable[str]]]
+
+SKIP_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.pdf',
+    '.zip', '.rar', '.gz', '.mp3', '.mp4', '.avi', '.css', '.js', '.xml',
+    '.json', '.doc', '.docx', '.xls', '.xlsx', '.woff', '.woff2', '.ttf'
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class CrawlConfig:
+    """Настройки краулера"""
+    max_pages: int = 5000
+    max_depth: int = 5
+    concurrency: int = 20
+    per_host_concurrency: int = 8
+    per_host_delay: float = 0.0  # Минимальный интервал между запросами к хосту
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 10.0
+    timeout: float = 30.0
+    respect_robots: bool = True
+    use_sitemap: bool = True
+    max_sitemaps: int = 50
+    parser_workers: int = field(default_factory=lambda: min(4, os.cpu_count() or 1))
+    user_agent: str = 'Mozilla/5.0 (compatible; reLinkBot/1.0; +https://github.com/i8megabit/blink)'
+    skip_extensions: Tuple[str, ...] = field(default=SKIP_EXTENSIONS)
+
+    @classmethod
+    def from_env(cls) -> "CrawlConfig":
+        """Настройки из переменных окружения RELINK_CRAWL_*"""
+        config = cls()
+        config.max_pages = int(os.getenv("RELINK_CRAWL_MAX_PAGES", config.max_pages))
+        config.max_depth = int(os.getenv("RELINK_CRAWL_MAX_DEPTH", config.max_depth))
+        config.concurrency = int(os.getenv("RELINK_CRAWL_CONCURRENCY", config.concurrency))
+        config.per_host_concurrency = int(
+            os.getenv("RELINK_CRAWL_PER_HOST_CONCURRENCY", config.per_host_concurrency)
+        )
+        config.per_host_delay = float(os.getenv("RELINK_CRAWL_PER_HOST_DELAY", config.per_host_delay))
+        config.parser_workers = int(os.getenv("RELINK_PARSER_WORKERS", config.parser_workers))
+        return config
+
+
+class HostThrottle:
+    """Ограничение параллелизма и частоты запросов к одному хосту"""
+
+    def __init__(self, concurrency: int, delay: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.delay = delay
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            if self.delay > 0:
+                async with self._lock:
+                    now = time.monotonic()
+                    wait = self._next_slot - now
+                    self._next_slot = max(now, self._next_slot) + self.delay
+                if wait > 0:
+                    await asyncio.sleep(wait)
+        except BaseException:
+            # При отмене во время паузы __aexit__ не вызовется - возвращаем слот сами
+            self.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+
+class Crawler:
+    """BFS-краулер одного домена
+
+    Все запросы идут через одну aiohttp сессию с пулом соединений.
+    Фронтир обходится по уровням (BFS) пулом из concurrency воркеров,
+    к каждому хосту одновременно идет не более per_host_concurrency
+    запросов. Стартовые URL берутся из sitemap.xml, robots.txt
+    соблюдается (включая Crawl-delay). Временные ошибки (таймауты,
+    429, 5xx) повторяются с экспоненциальной задержкой.
+    """
+
+    def __init__(self, config: Optional[CrawlConfig] = None, session: Optional[aiohttp.ClientSession] = None):
+        self.config = config or CrawlConfig()
+        self.session = session
+        self._owns_session = session is None
+
+        self.visited: Set[str] = set()
+        self.fetched: Set[str] = set()
+        self._robots: Optional[RobotFileParser] = None
+        self._throttles: Dict[str, HostThrottle] = {}
+
+        self.stats = {
+            "fetched": 0,
+            "failed": 0,
+            "retries": 0,
+            "skipped_robots": 0,
+            "sitemap_urls": 0,
+        }
+
+    async def __aenter__(self) -> "Crawler":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """Создание общей сессии с пулом соединений"""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.concurrency,
+                limit_per_host=self.config.per_host_concurrency,
+                ttl_dns_cache=300,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout),
+                headers={'User-Agent': self.config.user_agent},
+            )
+            self._owns_session = True
+
+    async def close(self):
+        """Закрытие сессии (если она создана краулером)"""
+        if self.session is not None and self._owns_session:
+            await self.session.close()
+            self.session = None
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """Нормализация URL: без фрагмента, хост в нижнем регистре"""
+        url, _ = urldefrag(url)
+        parsed = urlparse(url)
+        path = parsed.path or '/'
+        normalized = parsed._replace(netloc=parsed.netloc.lower(), path=path)
+        return normalized.geturl()
+
+    def _throttle(self, host: str) -> HostThrottle:
+        throttle = self._throttles.get(host)
+        if throttle is None:
+            delay = self.config.per_host_delay
+            if self._robots is not None:
+                crawl_delay = self._robots.crawl_delay(self.config.user_agent)
+                if crawl_delay:
+                    delay = max(delay, float(crawl_delay))
+            throttle = HostThrottle(self.config.per_host_concurrency, delay)
+            self._throttles[host] = throttle
+        return throttle
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Задержка перед повтором (Retry-After или экспонента с джиттером)"""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.config.backoff_max)
+        delay = self.config.backoff_base * (2 ** attempt)
+        return min(delay, self.config.backoff_max) * (0.5 + random.random() / 2)
+
+    async def fetch(self, url: str, html_only: bool = True) -> Optional[str]:
+        """Получение страницы с повторами; None при ошибке"""
+        if self.session is None:
+            await self.start()
+        host = urlparse(url).netloc
+
+        for attempt in range(self.config.max_retries + 1):
+            retry_after = None
+            try:
+                async with self._throttle(host):
+                    async with self.session.get(url) as response:
+                        if response.status == 200:
+                            content_type = response.headers.get('Content-Type', '')
+                            if html_only and content_type and 'html' not in content_type:
+                                return None
+                            self.stats["fetched"] += 1
+                            self.fetched.add(url)
+                            return await response.text(errors='replace')
+                        if response.status not in RETRY_STATUSES:
+                            logger.warning(f"Ошибка {response.status} для {url}")
+                            self.stats["failed"] += 1
+                            return None
+                        retry_after = response.headers.get('Retry-After')
+                        logger.debug(f"Ответ {response.status} для {url}, попытка {attempt + 1}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.debug(f"Ошибка при получении {url} (попытка {attempt + 1}): {e}")
+
+            if attempt < self.config.max_retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        logger.error(f"Не удалось получить {url} после {self.config.max_retries + 1} попыток")
+        self.stats["failed"] += 1
+        return None
+
+    async def load_robots(self, base_url: str) -> List[str]:
+        """Загрузка robots.txt, возвращает указанные в нем sitemap"""
+        robots_url = urljoin(base_url, '/robots.txt')
+        text = await self.fetch(robots_url, html_only=False)
+        if text is None:
+            return []
+        parser = RobotFileParser(robots_url)
+        parser.parse(text.splitlines())
+        self._robots = parser
+        # Throttle хоста пересоздается с учетом Crawl-delay
+        self._throttles.clear()
+        return list(parser.site_maps() or [])
+
+    def allowed(self, url: str) -> bool:
+        """Разрешен ли URL правилами robots.txt"""
+        if not self.config.respect_robots or self._robots is None:
+            return True
+        return self._robots.can_fetch(self.config.user_agent, url)
+
+    async def load_sitemaps(self, sitemap_urls: List[str]) -> List[str]:
+        """Сбор URL страниц из sitemap (включая sitemap index)"""
+        pending = list(sitemap_urls)
+        seen: Set[str] = set()
+        page_urls: List[str] = []
+
+        while pending and len(seen) < self.config.max_sitemaps and len(page_urls) < self.config.max_pages:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+
+            text = await self.fetch(sitemap_url, html_only=False)
+            if not text:
+                continue
+            try:
+                root = ET.fromstring(text.encode('utf-8'))
+            except ET.ParseError as e:
+                logger.warning(f"Некорректный sitemap {sitemap_url}: {e}")
+                continue
+
+            is_index = root.tag.endswith('sitemapindex')
+            for loc in root.iter():
+                if not loc.tag.endswith('loc') or not loc.text:
+                    continue
+                if is_index:
+                    pending.append(loc.text.strip())
+                else:
+                    page_urls.append(loc.text.strip())
+
+        self.stats["sitemap_urls"] = len(page_urls)
+        return page_urls
+
+    def _should_visit(self, url: str, domain: str) -> bool:
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or parsed.netloc.lower() != domain:
+            return False
+        if parsed.path.lower().endswith(self.config.skip_extensions):
+            return False
+        if not self.allowed(url):
+            self.stats["skipped_robots"] += 1
+            return False
+        return True
+
+    async def crawl(self, start_url: str, handler: PageHandler) -> Dict[str, int]:
+        """Обход домена в ширину начиная с start_url
+
+        handler вызывается для каждой полученной страницы и возвращает
+        найденные на ней ссылки; внешние и уже посещенные отбрасываются.
+        """
+        if self.session is None:
+            await self.start()
+        start_url = self.normalize_url(start_url)
+        domain = urlparse(start_url).netloc
+
+        seeds: List[str] = []
+        sitemaps: List[str] = []
+        if self.config.respect_robots or self.config.use_sitemap:
+            sitemaps = await self.load_robots(start_url)
+        if self.config.use_sitemap:
+            seeds = await self.load_sitemaps(sitemaps or [urljoin(start_url, '/sitemap.xml')])
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def enqueue(url: str, depth: int):
+            url = self.normalize_url(url)
+            if url in self.visited or len(self.visited) >= self.config.max_pages:
+                return
+            if not self._should_visit(url, domain):
+                return
+            self.visited.add(url)
+            queue.put_nowait((url, depth))
+
+        # Стартовая страница проверяется без robots: ее запросил пользователь
+        self.visited.add(start_url)
+        queue.put_nowait((start_url, 0))
+        for url in seeds:
+            enqueue(url, 1)
+
+        async def worker():
+            while True:
+                url, depth = await queue.get()
+                try:
+                    html = await self.fetch(url)
+                    if html is None:
+                        continue
+                    links = await handler(url, html, depth)
+                    if depth < self.config.max_depth:
+                        for link in links or ():
+                            enqueue(urljoin(url, link), depth + 1)
+                except Exception as e:
+                    logger.error(f"Ошибка обработки {url}: {e}")
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.config.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        logger.info(
+            f"Обход {domain} завершен: получено {self.stats['fetched']} страниц, "
+            f"ошибок {self.stats['failed']}, повторов {self.stats['retries']}"
+        )
+        return dict(self.stats)
@@ -0,0 +1,182 @@
+"""
+⚡ Однопроходное извлечение SEO данных из HTML
+"""
+
+import asyncio
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml  # noqa: F401
+    PARSER_BACKEND = 'lxml'
+except ImportError:  # pragma: no cover - зависит от окружения
+    PARSER_BACKEND = 'html.parser'
+
+# Селекторы в порядке приоритета: (тип, значение)
+CONTENT_SELECTORS = [
+    ('tag', 'article'), ('class', 'post-content'), ('class', 'entry-content'),
+    ('class', 'content'), ('class', 'main-content'), ('id', 'content'),
+]
+DATE_SELECTORS = [
+    ('class', 'publish-date'), ('class', 'post-date'), ('class', 'entry-date'),
+    ('time', 'datetime'), ('class', 'date'),
+]
+HEADER_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+META_NAMES = {'description': 'meta_description', 'keywords': 'meta_keywords'}
+META_PROPERTIES = {'og:title': 'og_title', 'og:description': 'og_description', 'og:image': 'og_image'}
+
+
+def _match(element, selectors, found: List[Optional[Any]]):
+    """Запоминание первого элемента для каждого селектора"""
+    classes = None
+    for i, (kind, value) in enumerate(selectors):
+        if found[i] is not None:
+            continue
+        if kind == 'tag':
+            matched = element.name == value
+        elif kind == 'id':
+            matched = element.get('id') == value
+        elif kind == 'time':
+            matched = element.name == 'time' and element.has_attr(value)
+        else:
+            if classes is None:
+                classes = element.get('class') or ()
+            matched = value in classes
+        if matched:
+            found[i] = element
+
+
+def extract_page(html: str, url: str) -> Dict[str, Any]:
+    """Извлечение всех данных страницы за один разбор и один обход дерева
+
+    Возвращает SEO данные (в формате DomainIndexer.extract_seo_data),
+    основной контент, дату публикации и все ссылки страницы.
+    Результат состоит только из простых типов, поэтому функцию можно
+    выполнять в пуле процессов.
+    """
+    soup = BeautifulSoup(html, PARSER_BACKEND)
+
+    seo_data: Dict[str, Any] = {
+        'url': url,
+        'title': '',
+        'meta_description': '',
+        'meta_keywords': '',
+        'og_title': '',
+        'og_description': '',
+        'og_image': '',
+        'structured_data': [],
+        'headers': {f'h{i}': [] for i in range(1, 7)},
+        'images': [],
+        'word_count': 0,
+        'links_count': 0,
+    }
+    seen_meta = set()
+    title_found = False
+    links: List[Dict[str, str]] = []
+    content_found: List[Optional[Any]] = [None] * len(CONTENT_SELECTORS)
+    date_found: List[Optional[Any]] = [None] * len(DATE_SELECTORS)
+
+    for element in soup.find_all(True):
+        name = element.name
+
+        if name == 'a':
+            seo_data['links_count'] += 1
+            href = element.get('href')
+            if href:
+                links.append({
+                    'url': urljoin(url, href),
+                    'anchor_text': element.get_text(strip=True),
+                    'title': element.get('title', '')
+                })
+        elif name in HEADER_TAGS:
+            seo_data['headers'][name].append(element.get_text(strip=True))
+        elif name == 'img':
+            src = element.get('src') or element.get('data-src')
+            if src:
+                seo_data['images'].append({
+                    'src': urljoin(url, src),
+                    'alt': element.get('alt', ''),
+                    'title': element.get('title', '')
+                })
+        elif name == 'meta':
+            key = META_NAMES.get(element.get('name')) or META_PROPERTIES.get(element.get('property'))
+            if key and key not in seen_meta:
+                seen_meta.add(key)
+                seo_data[key] = element.get('content', '')
+        elif name == 'title' and not title_found:
+            title_found = True
+            seo_data['title'] = element.get_text(strip=True)
+        elif name == 'script' and element.get('type') == 'application/ld+json':
+            try:
+                seo_data['structured_data'].append(json.loads(element.string))
+            except (TypeError, ValueError):
+                pass
+
+        _match(element, CONTENT_SELECTORS, content_found)
+        _match(element, DATE_SELECTORS, date_found)
+
+    seo_data['word_count'] = len(soup.get_text().split())
+
+    content_elem = next((e for e in content_found if e is not None), None)
+    content = content_elem.get_text(strip=True) if content_elem is not None else ''
+    if not content:
+        content = soup.get_text(strip=True)
+
+    date_elem = next((e for e in date_found if e is not None), None)
+    publish_date = ''
+    if date_elem is not None:
+        publish_date = date_elem.get('datetime') or date_elem.get_text(strip=True)
+
+    return {
+        'seo_data': seo_data,
+        'content': content,
+        'publish_date': publish_date,
+        'links': links,
+    }
+
+
+class HtmlExtractor:
+    """Разбор HTML в пуле процессов, чтобы не блокировать event loop
+
+    При workers=0 разбор выполняется в текущем процессе.
+    """
+
+    def __init__(self, workers: int = 0):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def extract(self, html: str, url: str) -> Dict[str, Any]:
+        """Однопроходное извлечение данных страницы"""
+        if self.workers <= 0:
+            return extract_page(html, url)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, extract_page, html, url)
+
+    def close(self):
+        """Остановка пула процессов"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def internal_links(page: Dict[str, Any], url: str, domain: str) -> List[Dict[str, str]]:
+    """Внутренние ссылки страницы в формате DomainIndexer"""
+    return [
+        {
+            'from_url': url,
+            'to_url': link['url'],
+            'anchor_text': link['anchor_text'],
+            'title': link['title']
+        }
+        for link in page['links']
+        if link['url'] and urlparse(link['url']).netloc == domain
+    ]
@@ -8,10 +8,13 @@ import json
 import logging
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse
 import os
 
+from bootstrap.http_clients import UpstreamConfig, get_http_clients
+
+from .crawler import CrawlConfig, Crawler
+from .html_extractor import HtmlExtractor, internal_links
 from ..models import (
     InternalLink, Post, InternalLinkAnalysis, PostAnalysis,
     SEOAnalysisResult, Recommendation, FocusArea, Priority
@@ -25,8 +28,21 @@ class InternalLinkingService:
     def __init__(self):
         self.indexed_data: Dict[str, Any] = {}
         self.cache_dir = "cache"
+        self.crawl_config = CrawlConfig.from_env()
         os.makedirs(self.cache_dir, exist_ok=True)
     
+    def _crawler_session(self) -> aiohttp.ClientSession:
+        """Общая сессия краулера из реестра HTTP клиентов сервиса"""
+        registry = get_http_clients()
+        if "crawler" not in registry.upstreams:
+            registry.register("crawler", UpstreamConfig(
+                max_connections=self.crawl_config.concurrency,
+                max_keepalive=self.crawl_config.concurrency,
+                read_timeout=self.crawl_config.timeout,
+                headers={'User-Agent': self.crawl_config.user_agent}
+            ))
+        return registry.session("crawler")
+    
     async def index_domain(self, domain: str) -> Dict[str, Any]:
         """Индексация домена"""
         logger.info(f"Начинаем индексацию домена: {domain}")
@@ -42,7 +58,7 @@ class InternalLinkingService:
             
             # Запускаем индексацию
             base_url = f"https://{domain}"
-            indexer = DomainIndexer(base_url)
+            indexer = DomainIndexer(base_url, self.crawl_config, self._crawler_session())
             result = await indexer.index_domain()
             
             # Сохраняем в кеш
@@ -598,36 +614,45 @@ class InternalLinkingService:
 class DomainIndexer:
     """Индексатор домена для извлечения SEO данных"""
     
-    def __init__(self, base_url: str):
+    POST_URL_PATTERNS = [
+        '/post/', '/article/', '/blog/', '/news/',
+        '/2024/', '/2023/', '/2022/', '/2021/',
+        '.html', '.php'
+    ]
+    
+    def __init__(
+        self,
+        base_url: str,
+        crawl_config: Optional[CrawlConfig] = None,
+        session: Optional[aiohttp.ClientSession] = None
+    ):
         self.base_url = base_url
         self.domain = urlparse(base_url).netloc
+        self.crawl_config = crawl_config or CrawlConfig()
+        # Внешняя сессия переиспользуется между индексациями и fetch_page
+        self.session = session
+        self.crawler: Optional[Crawler] = None
+        self.extractor = HtmlExtractor(workers=0)
         self.visited_urls: set = set()
         self.posts: List[Dict[str, Any]] = []
         self.internal_links: List[Dict[str, Any]] = []
         self.seo_data: Dict[str, Any] = {}
+        self.crawl_stats: Dict[str, int] = {}
         
     async def index_domain(self) -> Dict[str, Any]:
-        """Полная индексация домена"""
+        """Полная индексация домена (BFS обход краулером)"""
         logger.info(f"Начинаем индексацию домена: {self.base_url}")
         
+        self.extractor = HtmlExtractor(self.crawl_config.parser_workers)
         try:
-            # Получаем главную страницу
-            main_page = await self.fetch_page(self.base_url)
-            if not main_page:
-                raise Exception("Не удалось получить главную страницу")
-            
-            # Извлекаем SEO данные главной страницы
-            self.seo_data = await self.extract_seo_data(main_page, self.base_url)
+            async with Crawler(self.crawl_config, self.session) as crawler:
+                self.crawler = crawler
+                self.crawl_stats = await crawler.crawl(self.base_url, self.process_page)
+                self.visited_urls = set(crawler.fetched)
+            self.crawler = None
             
-            # Ищем ссылки на посты
-            post_urls = await self.find_post_urls(main_page)
-            logger.info(f"Найдено {len(post_urls)} постов для индексации")
-            
-            # Индексируем каждый пост
-            for url in post_urls[:10]:  # Ограничиваем для тестирования
-                post_data = await self.index_post(url)
-                if post_data:
-                    self.posts.append(post_data)
+            if not self.seo_data:
+                raise Exception("Не удалось получить главную страницу")
             
             # Анализируем внутренние ссылки
             await self.analyze_internal_links()
@@ -642,7 +667,8 @@ class DomainIndexer:
                 "posts": self.posts,
                 "internal_links_count": len(self.internal_links),
                 "internal_links": self.internal_links,
-                "visited_urls_count": len(self.visited_urls)
+                "visited_urls_count": len(self.visited_urls),
+                "crawl_stats": self.crawl_stats
             }
             
             logger.info(f"Индексация завершена. Обработано {len(self.posts)} постов")
@@ -651,101 +677,50 @@ class DomainIndexer:
         except Exception as e:
             logger.error(f"Ошибка при индексации: {e}")
             raise
+        finally:
+            self.crawler = None
+            self.extractor.close()
+    
+    async def process_page(self, url: str, html: str, depth: int) -> List[str]:
+        """Обработка страницы краулером, возвращает ссылки для обхода"""
+        page = await self.extractor.extract(html, url)
+        
+        if depth == 0:
+            # SEO данные главной страницы
+            self.seo_data = page['seo_data']
+        elif self.is_post_url(url):
+            self.posts.append(self._build_post(page, url))
+        
+        return [link['url'] for link in page['links']]
+    
+    def is_post_url(self, url: str) -> bool:
+        """Похож ли URL на пост"""
+        url = url.lower()
+        return any(pattern in url for pattern in self.POST_URL_PATTERNS)
     
     async def fetch_page(self, url: str) -> str:
         """Получение страницы"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-                }
-                async with session.get(url, headers=headers, timeout=30) as response:
-                    if response.status == 200:
-                        self.visited_urls.add(url)
-                        return await response.text()
-                    else:
-                        logger.warning(f"Ошибка {response.status} для {url}")
-                        return ""
-        except Exception as e:
-            logger.error(f"Ошибка при получении {url}: {e}")
-            return ""
+        if self.crawler is not None:
+            return await self.crawler.fetch(url) or ""
+        
+        async with Crawler(self.crawl_config, self.session) as crawler:
+            html = await crawler.fetch(url)
+        if html:
+            self.visited_urls.add(url)
+        return html or ""
     
     async def extract_seo_data(self, html: str, url: str) -> Dict[str, Any]:
         """Извлечение SEO данных со страницы"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Мета-теги
-        title = soup.find('title')
-        description = soup.find('meta', attrs={'name': 'description'})
-        keywords = soup.find('meta', attrs={'name': 'keywords'})
-        
-        # Open Graph
-        og_title = soup.find('meta', attrs={'property': 'og:title'})
-        og_description = soup.find('meta', attrs={'property': 'og:description'})
-        og_image = soup.find('meta', attrs={'property': 'og:image'})
-        
-        # Структурированные данные
-        structured_data = []
-        for script in soup.find_all('script', type='application/ld+json'):
-            try:
-                data = json.loads(script.string)
-                structured_data.append(data)
-            except:
-                pass
-        
-        # Заголовки
-        headers = {}
-        for i in range(1, 7):
-            h_tags = soup.find_all(f'h{i}')
-            headers[f'h{i}'] = [h.get_text(strip=True) for h in h_tags]
-        
-        # Изображения
-        images = []
-        for img in soup.find_all('img'):
-            src = img.get('src') or img.get('data-src')
-            if src:
-                images.append({
-                    'src': urljoin(url, src),
-                    'alt': img.get('alt', ''),
-                    'title': img.get('title', '')
-                })
-        
-        return {
-            'url': url,
-            'title': title.get_text(strip=True) if title else '',
-            'meta_description': description.get('content', '') if description else '',
-            'meta_keywords': keywords.get('content', '') if keywords else '',
-            'og_title': og_title.get('content', '') if og_title else '',
-            'og_description': og_description.get('content', '') if og_description else '',
-            'og_image': og_image.get('content', '') if og_image else '',
-            'structured_data': structured_data,
-            'headers': headers,
-            'images': images,
-            'word_count': len(soup.get_text().split()),
-            'links_count': len(soup.find_all('a'))
-        }
+        page = await self.extractor.extract(html, url)
+        return page['seo_data']
     
     async def find_post_urls(self, html: str) -> List[str]:
         """Поиск ссылок на посты"""
-        soup = BeautifulSoup(html, 'html.parser')
-        post_urls = []
-        
-        # Ищем ссылки, которые могут быть постами
-        for link in soup.find_all('a', href=True):
-            href = link.get('href')
-            if href:
-                full_url = urljoin(self.base_url, href)
-                
-                # Проверяем, что это внутренняя ссылка
-                if urlparse(full_url).netloc == self.domain:
-                    # Ищем паттерны постов
-                    if any(pattern in full_url.lower() for pattern in [
-                        '/post/', '/article/', '/blog/', '/news/',
-                        '/2024/', '/2023/', '/2022/', '/2021/',
-                        '.html', '.php'
-                    ]):
-                        post_urls.append(full_url)
-        
+        page = await self.extractor.extract(html, self.base_url)
+        post_urls = [
+            link['url'] for link in page['links']
+            if urlparse(link['url']).netloc == self.domain and self.is_post_url(link['url'])
+        ]
         return list(set(post_urls))  # Убираем дубликаты
     
     async def index_post(self, url: str) -> Dict[str, Any]:
@@ -755,62 +730,24 @@ class DomainIndexer:
         html = await self.fetch_page(url)
         if not html:
             return None
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Извлекаем SEO данные
-        seo_data = await self.extract_seo_data(html, url)
-        
-        # Ищем основной контент
-        content = ""
-        content_selectors = [
-            'article', '.post-content', '.entry-content', 
-            '.content', '.main-content', '#content'
-        ]
-        
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                content = content_elem.get_text(strip=True)
-                break
-        
-        if not content:
-            content = soup.get_text(strip=True)
-        
-        # Извлекаем дату публикации
-        publish_date = ""
-        date_selectors = [
-            '.publish-date', '.post-date', '.entry-date',
-            'time[datetime]', '.date'
-        ]
-        
-        for selector in date_selectors:
-            date_elem = soup.select_one(selector)
-            if date_elem:
-                publish_date = date_elem.get('datetime') or date_elem.get_text(strip=True)
-                break
-        
-        # Ищем внутренние ссылки в посте
-        internal_links = []
-        for link in soup.find_all('a', href=True):
-            href = link.get('href')
-            if href:
-                full_url = urljoin(url, href)
-                if urlparse(full_url).netloc == self.domain:
-                    internal_links.append({
-                        'from_url': url,
-                        'to_url': full_url,
-                        'anchor_text': link.get_text(strip=True),
-                        'title': link.get('title', '')
-                    })
-        
+        return await self.parse_post(html, url)
+    
+    async def parse_post(self, html: str, url: str) -> Dict[str, Any]:
+        """Извлечение данных поста из HTML"""
+        page = await self.extractor.extract(html, url)
+        return self._build_post(page, url)
+    
+    def _build_post(self, page: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """Данные поста из результата однопроходного разбора"""
+        seo_data = page['seo_data']
+        content = page['content']
         return {
             'url': url,
             'title': seo_data['title'],
             'content': content[:1000] + "..." if len(content) > 1000 else content,
-            'publish_date': publish_date,
+            'publish_date': page['publish_date'],
             'word_count': seo_data['word_count'],
-            'internal_links': internal_links,
+            'internal_links': internal_links(page, url, self.domain),
             'seo_data': seo_data
         }
     
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк краулера reLink на локальном статическом сайте
+
+Поднимает aiohttp-сервер со сгенерированным сайтом (главная, рубрики,
+посты, robots.txt и sitemap.xml) с фиксированной задержкой ответа и
+сравнивает прежнюю схему (последовательные запросы, новая сессия на
+каждый URL) с Crawler (общий пул соединений, параллельный BFS).
+
+Запуск из каталога relink:
+    python scripts/crawl_benchmark.py
+    python scripts/crawl_benchmark.py --pages 5000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.crawler import CrawlConfig, Crawler
+from app.services.internal_linking import DomainIndexer
+
+LINKS_PER_PAGE = 5
+POSTS_PER_CATEGORY = 100
+
+
+def make_site(pages: int, latency: float) -> web.Application:
+    """Статический сайт: главная -> рубрики -> посты, посты ссылаются друг на друга"""
+    categories = max(1, pages // POSTS_PER_CATEGORY)
+
+    def post_html(i: int) -> str:
+        links = "".join(
+            f'<a href="/blog/post-{(i * 7 + k) % pages}.html">Пост {(i * 7 + k) % pages}</a>'
+            for k in range(1, LINKS_PER_PAGE + 1)
+        )
+        return (
+            f"<html><head><title>Пост {i}</title>"
+            f'<meta name="description" content="Описание поста {i}"></head>'
+            f"<body><article><h1>Пост {i}</h1><p>{'Текст поста о перелинковке. ' * 50}</p>"
+            f"{links}</article></body></html>"
+        )
+
+    async def delayed(body: str, content_type: str = "text/html") -> web.Response:
+        await asyncio.sleep(latency)
+        return web.Response(text=body, content_type=content_type)
+
+    async def index(request):
+        links = "".join(f'<a href="/category/{c}/">Рубрика {c}</a>' for c in range(categories))
+        return await delayed(f"<html><head><title>Главная</title></head><body>{links}</body></html>")
+
+    async def category(request):
+        c = int(request.match_info["c"])
+        links = "".join(
+            f'<a href="/blog/post-{i}.html">Пост {i}</a>'
+            for i in range(c * POSTS_PER_CATEGORY, min(pages, (c + 1) * POSTS_PER_CATEGORY))
+        )
+        return await delayed(f"<html><body>{links}</body></html>")
+
+    async def post(request):
+        return await delayed(post_html(int(request.match_info["i"])))
+
+    async def robots(request):
+        host = f"http://{request.host}"
+        return await delayed(f"User-agent: *\nDisallow: /admin/\nSitemap: {host}/sitemap.xml\n", "text/plain")
+
+    async def sitemap(request):
+        host = f"http://{request.host}"
+        urls = "".join(f"<url><loc>{host}/category/{c}/</loc></url>" for c in range(categories))
+        body = f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+        return await delayed(body, "application/xml")
+
+    app = web.Application()
+    app.router.add_get("/", index)
+    app.router.add_get("/category/{c}/", category)
+    app.router.add_get("/blog/post-{i}.html", post)
+    app.router.add_get("/robots.txt", robots)
+    app.router.add_get("/sitemap.xml", sitemap)
+    return app
+
+
+async def legacy_fetch_all(urls):
+    """Прежняя схема: новая ClientSession на каждый URL, последовательно"""
+    for url in urls:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url, timeout=30) as response:
+                await response.text()
+
+
+async def main(args):
+    runner = web.AppRunner(make_site(args.pages, args.latency))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+    base_url = f"http://127.0.0.1:{args.port}/"
+
+    try:
+        # Прежняя схема на выборке, результат экстраполируется
+        sample = [f"{base_url}blog/post-{i}.html" for i in range(min(args.legacy_sample, args.pages))]
+        start = time.perf_counter()
+        await legacy_fetch_all(sample)
+        legacy_rate = len(sample) / (time.perf_counter() - start)
+
+        config = CrawlConfig(
+            max_pages=args.pages + 200,
+            max_depth=10,
+            concurrency=args.concurrency,
+            per_host_concurrency=args.concurrency,
+        )
+        crawler_only = Crawler(config)
+
+        async def links_handler(url, html, depth):
+            return [a.get("href") for a in BeautifulSoup(html, "html.parser").find_all("a", href=True)]
+
+        start = time.perf_counter()
+        async with crawler_only:
+            stats = await crawler_only.crawl(base_url, links_handler)
+        crawl_time = time.perf_counter() - start
+
+        indexer = DomainIndexer(base_url, config)
+        start = time.perf_counter()
+        report = await indexer.index_domain()
+        index_time = time.perf_counter() - start
+    finally:
+        await runner.cleanup()
+
+    total = stats["fetched"]
+    print(f"pages on site: {args.pages}, latency {args.latency * 1000:.0f} ms, concurrency {args.concurrency}")
+    print(f"{'mode':<34} {'pages':>8} {'pages/s':>10} {'time, s':>10}")
+    print(f"{'legacy (session per URL, serial)':<34} {total:>8} {legacy_rate:>10.1f} {total / legacy_rate:>10.1f}  (extrapolated)")
+    print(f"{'Crawler (pooled, BFS)':<34} {total:>8} {total / crawl_time:>10.1f} {crawl_time:>10.1f}")
+    print(f"{'DomainIndexer.index_domain':<34} {report['visited_urls_count']:>8} "
+          f"{report['visited_urls_count'] / index_time:>10.1f} {index_time:>10.1f}  ({report['posts_count']} posts)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="reLink crawler benchmark")
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.02, help="задержка ответа сервера, с")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--legacy-sample", type=int, default=100)
+    parser.add_argument("--port", type=int, default=18080)
+    asyncio.run(main(parser.parse_args()))
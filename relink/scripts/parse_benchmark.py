@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк разбора HTML в DomainIndexer (pages/sec)
+
+Сравнивает прежнюю схему (два разбора html.parser и отдельные find_all
+на каждый тип тегов) с однопроходным extract_page, в текущем процессе
+и в пуле процессов HtmlExtractor. Страницы берутся из сохраненных HTML
+фикстур; перед замером проверяется, что результаты совпадают.
+
+Запуск из каталога relink:
+    python scripts/parse_benchmark.py
+    python scripts/parse_benchmark.py --fixtures /path/to/saved/pages --pages 2000
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.html_extractor import PARSER_BACKEND, HtmlExtractor, extract_page, internal_links
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+BASE_URL = "https://example.com/blog/post.html"
+
+
+def legacy_extract(html: str, url: str) -> Dict[str, Any]:
+    """Прежний DomainIndexer.index_post: два разбора и отдельные проходы"""
+    domain = urlparse(url).netloc
+    soup = BeautifulSoup(html, 'html.parser')
+
+    seo_soup = BeautifulSoup(html, 'html.parser')
+    title = seo_soup.find('title')
+    description = seo_soup.find('meta', attrs={'name': 'description'})
+    keywords = seo_soup.find('meta', attrs={'name': 'keywords'})
+    og_title = seo_soup.find('meta', attrs={'property': 'og:title'})
+    og_description = seo_soup.find('meta', attrs={'property': 'og:description'})
+    og_image = seo_soup.find('meta', attrs={'property': 'og:image'})
+    structured_data = []
+    for script in seo_soup.find_all('script', type='application/ld+json'):
+        try:
+            structured_data.append(json.loads(script.string))
+        except (TypeError, ValueError):
+            pass
+    headers = {f'h{i}': [h.get_text(strip=True) for h in seo_soup.find_all(f'h{i}')] for i in range(1, 7)}
+    images = []
+    for img in seo_soup.find_all('img'):
+        src = img.get('src') or img.get('data-src')
+        if src:
+            images.append({'src': urljoin(url, src), 'alt': img.get('alt', ''), 'title': img.get('title', '')})
+    seo_data = {
+        'url': url,
+        'title': title.get_text(strip=True) if title else '',
+        'meta_description': description.get('content', '') if description else '',
+        'meta_keywords': keywords.get('content', '') if keywords else '',
+        'og_title': og_title.get('content', '') if og_title else '',
+        'og_description': og_description.get('content', '') if og_description else '',
+        'og_image': og_image.get('content', '') if og_image else '',
+        'structured_data': structured_data,
+        'headers': headers,
+        'images': images,
+        'word_count': len(seo_soup.get_text().split()),
+        'links_count': len(seo_soup.find_all('a'))
+    }
+
+    content = ""
+    for selector in ['article', '.post-content', '.entry-content', '.content', '.main-content', '#content']:
+        content_elem = soup.select_one(selector)
+        if content_elem:
+            content = content_elem.get_text(strip=True)
+            break
+    if not content:
+        content = soup.get_text(strip=True)
+
+    publish_date = ""
+    for selector in ['.publish-date', '.post-date', '.entry-date', 'time[datetime]', '.date']:
+        date_elem = soup.select_one(selector)
+        if date_elem:
+            publish_date = date_elem.get('datetime') or date_elem.get_text(strip=True)
+            break
+
+    links = []
+    for link in soup.find_all('a', href=True):
+        href = link.get('href')
+        if href:
+            full_url = urljoin(url, href)
+            if urlparse(full_url).netloc == domain:
+                links.append({
+                    'from_url': url,
+                    'to_url': full_url,
+                    'anchor_text': link.get_text(strip=True),
+                    'title': link.get('title', '')
+                })
+
+    return {'seo_data': seo_data, 'content': content, 'publish_date': publish_date, 'internal_links': links}
+
+
+def load_fixtures(path: str) -> List[str]:
+    files = sorted(glob.glob(os.path.join(path, '*.html')))
+    if not files:
+        raise SystemExit(f"Нет HTML фикстур в {path}")
+    pages = []
+    for name in files:
+        with open(name, encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+    return pages
+
+
+def check_parity(pages: List[str]):
+    """Однопроходный разбор должен давать те же данные, что и прежний"""
+    for html in pages:
+        legacy = legacy_extract(html, BASE_URL)
+        page = extract_page(html, BASE_URL)
+        assert page['seo_data'] == legacy['seo_data'], "seo_data расходится"
+        assert page['publish_date'] == legacy['publish_date'], "publish_date расходится"
+        assert page['content'] == legacy['content'], "content расходится"
+        assert internal_links(page, BASE_URL, urlparse(BASE_URL).netloc) == legacy['internal_links']
+
+
+async def run_pool(pages: List[str], workers: int) -> float:
+    extractor = HtmlExtractor(workers)
+    try:
+        # Прогрев пула, чтобы не учитывать запуск процессов
+        await asyncio.gather(*[extractor.extract(pages[0], BASE_URL) for _ in range(workers)])
+        start = time.perf_counter()
+        await asyncio.gather(*[extractor.extract(html, BASE_URL) for html in pages])
+        return time.perf_counter() - start
+    finally:
+        extractor.close()
+
+
+def main(args):
+    fixtures = load_fixtures(args.fixtures)
+    check_parity(fixtures)
+    pages = [fixtures[i % len(fixtures)] for i in range(args.pages)]
+    size_kb = sum(len(p) for p in pages) / len(pages) / 1024
+
+    results = []
+    start = time.perf_counter()
+    for html in pages:
+        legacy_extract(html, BASE_URL)
+    results.append(("legacy (2x html.parser)", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for html in pages:
+        extract_page(html, BASE_URL)
+    results.append((f"single-pass ({PARSER_BACKEND})", time.perf_counter() - start))
+
+    for workers in args.workers:
+        results.append((f"single-pass, pool x{workers}", asyncio.run(run_pool(pages, workers))))
+
+    print(f"{len(pages)} pages, avg {size_kb:.0f} KB, fixtures: {len(fixtures)}")
+    print(f"{'mode':<30} {'pages/s':>10} {'speedup':>9}")
+    baseline = len(pages) / results[0][1]
+    for name, duration in results:
+        rate = len(pages) / duration
+        print(f"{name:<30} {rate:>10.1f} {rate / baseline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DomainIndexer HTML parsing benchmark")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="каталог с сохраненными .html страницами")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="*", default=[2, 4])
+    main(parser.parse_args())